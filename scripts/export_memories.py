@@ -0,0 +1,129 @@
+"""Exports the memory store one file per fact, or packs it into per-compartment segments.
+
+With `MEMORY_STORAGE=packed` a compartment's facts live in one append-only `facts.seg`
+(`services/memory/segments.py`). That is the right shape for the bot and the wrong one for
+a reviewer: the store's own git history then shows a consolidation as bytes appended to a
+segment, not as the facts it changed. An export writes every compartment back out in the
+file-per-fact layout, whichever layout it is stored in, so two exports — or an export
+under git — diff fact by fact::
+
+    <out>/<scope>/<compartment>/<fact id>.md
+
+The export directory is rebuilt on every run, so a fact deleted since the last one
+disappears from it too. It is marked as an export the first time, and a directory that
+is not empty and carries no mark is refused, so a mistyped path can never be emptied.
+A `.git` inside it is left alone, so committing each export builds a readable history.
+
+`--pack` rewrites every compartment of the live store into a single segment instead,
+folding its loose fact files in. That is the move to the packed layout (new writes follow
+`MEMORY_STORAGE`, and both layouts are always read, so nothing breaks without it — it
+only stops old facts costing a file each). Stop the bot first: this runs in another
+process, outside `scope_lock`, like `scripts/regen_memories.py`.
+
+Run from the repo root::
+
+    uv run python -m scripts.export_memories ./data/memories_export
+    uv run python -m scripts.export_memories --pack
+"""
+
+import shutil
+from pathlib import Path
+import argparse
+from collections.abc import Sequence
+
+from rich.console import Console
+
+from discordbot.services.memory.store import (
+    iter_scopes,
+    memory_root,
+    compartment_texts,
+    list_compartments,
+    compact_compartment,
+)
+
+console = Console()
+
+# Marks a directory this script owns, so a rerun may empty it and nothing else ever is.
+_EXPORT_MARK = ".memory-export"
+
+
+def _prepare(out: Path) -> None:
+    """Empties a previous export (keeping its `.git`), or claims a new directory.
+
+    Raises:
+        SystemExit: `out` is inside the store, or holds something that is not an export.
+    """
+    resolved = out.resolve()
+    if resolved.is_relative_to(memory_root().resolve()):
+        raise SystemExit(f"refusing to export into the memory store itself: {out}")
+    if out.exists() and any(out.iterdir()) and not (out / _EXPORT_MARK).is_file():
+        raise SystemExit(f"{out} is not empty and is not a previous export; pick another path")
+    out.mkdir(parents=True, exist_ok=True)
+    for child in out.iterdir():
+        if child.name in {".git", _EXPORT_MARK}:
+            continue
+        if child.is_dir():
+            shutil.rmtree(child)
+        else:
+            child.unlink()
+    (out / _EXPORT_MARK).write_text("written by scripts/export_memories.py\n", encoding="utf-8")
+
+
+def export_store(out: Path) -> tuple[int, int]:
+    """Writes every stored fact under `out`, returning (facts written, undecodable skipped)."""
+    _prepare(out=out)
+    written = skipped = 0
+    for scope in iter_scopes():
+        for compartment in list_compartments(scope=scope):
+            texts = compartment_texts(scope=scope, compartment=compartment)
+            directory = out / scope / compartment
+            for fact_id, text in sorted(texts.items()):
+                if not text:
+                    skipped += 1
+                    continue
+                directory.mkdir(parents=True, exist_ok=True)
+                (directory / f"{fact_id}.md").write_text(text, encoding="utf-8")
+                written += 1
+    return written, skipped
+
+
+def pack_store() -> tuple[int, int]:
+    """Packs every compartment into its segment, returning (compartments, facts)."""
+    compartments = facts = 0
+    for scope in iter_scopes():
+        for compartment in list_compartments(scope=scope):
+            facts += compact_compartment(scope=scope, compartment=compartment)
+            compartments += 1
+    return compartments, facts
+
+
+def _parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    """Parses the export CLI arguments."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("out", nargs="?", default=None, help="Directory to export into.")
+    parser.add_argument(
+        "--pack", action="store_true", help="Pack the live store in place instead of exporting."
+    )
+    args = parser.parse_args(argv)
+    if args.pack == (args.out is not None):
+        parser.error("give either an export directory or --pack")
+    return args
+
+
+def main() -> None:
+    """Runs the export, or the in-place pack."""
+    args = _parse_args()
+    if args.pack:
+        compartments, facts = pack_store()
+        console.print(f"packed {facts} fact(s) across {compartments} compartment(s)")
+        return
+    written, skipped = export_store(out=Path(args.out))
+    console.print(f"exported {written} fact(s) to {args.out}")
+    if skipped:
+        console.print(f"[yellow]{skipped} undecodable fact(s) skipped[/yellow]")
+
+
+if __name__ == "__main__":
+    main()
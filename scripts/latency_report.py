@@ -0,0 +1,195 @@
+"""Offline percentiles of the per-reply latency waterfalls under `data/timing`.
+
+`utils/reply_timing.py` writes one JSON line per AI reply: every stage of the reply pipeline
+as a start and an end on one timeline, plus the first-reasoning and first-content marks of
+the answer stream. This reads a day (or every day) of them and prints, per stage, how long it
+took at p50 / p95 / p99 and when it tended to finish — which, next to each other, say which
+stage the answer actually waits on. Like `scripts/usage_report.py` it only ever reads, and a
+torn last line of a live day file is counted rather than raised on.
+
+Two readings need care. A stage recorded several times in one reply (`media_queue`, one
+interval per wait on the shared media semaphore) is summed per reply, so its row is the total
+time that reply spent queued, not the typical single wait. And `gating` is the share of replies
+in which that stage was the last to finish before the answer (or the IMAGE / VIDEO handler)
+started: the stage the dispatch was actually waiting on. A wrapper stage (`prep`) finishes
+after the stages inside it, so it is the one credited; its children's `ends p50` say which of
+them held it open.
+
+Run from the repo root::
+
+    uv run python -m scripts.latency_report                  # every day on disk
+    uv run python -m scripts.latency_report 2026-10-16       # one day
+    uv run python -m scripts.latency_report 2026-10 --route QA
+"""
+
+import math
+from pathlib import Path
+import argparse
+from collections import Counter, defaultdict
+from collections.abc import Sequence
+
+from rich import box
+from rich.table import Table
+from rich.console import Console
+
+from discordbot.utils.reply_timing import ReplyTiming, ReplyTimingConfig
+
+console = Console()
+
+# The stages that start the route's deliverable; whatever finished last before one of these is
+# what the reply was waiting on.
+_DISPATCH_STAGES = ("answer", "image", "video")
+
+
+def _day_files(directory: Path, day: str | None) -> list[Path]:
+    """Returns the day files to read, oldest first; `day` matches a `YYYY-MM-DD` prefix.
+
+    Raises:
+        SystemExit: The directory is absent or holds nothing matching.
+    """
+    if not directory.is_dir():
+        raise SystemExit(f"no reply timings at {directory}")
+    files = sorted(directory.glob(pattern="*.jsonl"))
+    if day is not None:
+        files = [path for path in files if path.stem.startswith(day)]
+    if not files:
+        raise SystemExit(f"no reply timings for {day or 'any day'} in {directory}")
+    return files
+
+
+def _read_timings(paths: Sequence[Path], route: str | None) -> tuple[list[ReplyTiming], int]:
+    """Parses every timing in `paths` (of `route`, when given), plus the unreadable count."""
+    timings: list[ReplyTiming] = []
+    unreadable = 0
+    for path in paths:
+        for line in path.read_text(encoding="utf-8").splitlines():
+            if not line.strip():
+                continue
+            try:
+                timing = ReplyTiming.model_validate_json(json_data=line)
+            except ValueError:
+                unreadable += 1
+                continue
+            if route is None or timing.route == route:
+                timings.append(timing)
+    return timings, unreadable
+
+
+def _percentile(values: Sequence[float], q: float) -> float:
+    """The nearest-rank `q` percentile of `values`, which must not be empty."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def _gating_stage(timing: ReplyTiming) -> str | None:
+    """The stage that finished last before the route's deliverable started, if any."""
+    dispatch = min((s.start for s in timing.stages if s.stage in _DISPATCH_STAGES), default=None)
+    if dispatch is None:
+        return None
+    finished = [s for s in timing.stages if s.end <= dispatch + 1e-6]
+    return max(finished, key=lambda s: s.end).stage if finished else None
+
+
+def _stage_table(timings: list[ReplyTiming]) -> Table:
+    """Returns one row per stage, ordered by when it tends to finish."""
+    durations: defaultdict[str, list[float]] = defaultdict(list)
+    ends: defaultdict[str, list[float]] = defaultdict(list)
+    for timing in timings:
+        per_reply: defaultdict[str, float] = defaultdict(float)
+        last_end: dict[str, float] = {}
+        for stage in timing.stages:
+            per_reply[stage.stage] += stage.end - stage.start
+            last_end[stage.stage] = max(last_end.get(stage.stage, 0.0), stage.end)
+        for name, seconds in per_reply.items():
+            durations[name].append(seconds)
+            ends[name].append(last_end[name])
+    gating = Counter(_gating_stage(timing=timing) for timing in timings)
+
+    table = Table(
+        title=f"stages - {len(timings)} replies",
+        title_justify="left",
+        title_style="bold",
+        box=box.SIMPLE_HEAD,
+    )
+    table.add_column("stage", no_wrap=True)
+    table.add_column("replies", justify="right")
+    for label in ("p50", "p95", "p99", "ends p50", "gating"):
+        table.add_column(label, justify="right")
+    for name in sorted(durations, key=lambda n: _percentile(values=ends[n], q=50)):
+        values = durations[name]
+        table.add_row(
+            name,
+            str(len(values)),
+            *(f"{_percentile(values=values, q=q):.2f}s" for q in (50, 95, 99)),
+            f"{_percentile(values=ends[name], q=50):.2f}s",
+            f"{gating[name] / len(timings) * 100:.0f}%" if gating[name] else "",
+        )
+    return table
+
+
+def _marks_table(timings: list[ReplyTiming]) -> Table:
+    """Returns the answer-stream marks and the total, as offsets from the reply's start."""
+    points: defaultdict[str, list[float]] = defaultdict(list)
+    for timing in timings:
+        for name, offset in timing.marks.items():
+            points[name].append(offset)
+        points["total"].append(timing.total)
+
+    table = Table(
+        title="since start", title_justify="left", title_style="bold", box=box.SIMPLE_HEAD
+    )
+    table.add_column("point", no_wrap=True)
+    table.add_column("replies", justify="right")
+    for label in ("p50", "p95", "p99"):
+        table.add_column(label, justify="right")
+    for name in sorted(points, key=lambda n: _percentile(values=points[n], q=50)):
+        values = points[name]
+        table.add_row(
+            name,
+            str(len(values)),
+            *(f"{_percentile(values=values, q=q):.2f}s" for q in (50, 95, 99)),
+        )
+    return table
+
+
+def _parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    """Parses the latency-report CLI arguments."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "day",
+        nargs="?",
+        default=None,
+        help="YYYY-MM-DD, or any prefix of it; omit to read every day on disk.",
+    )
+    parser.add_argument("--route", default=None, help="Only replies that took this route.")
+    parser.add_argument(
+        "--dir",
+        default=ReplyTimingConfig().directory,
+        help="Directory holding the daily timing files (defaults to REPLY_TIMING_DIR).",
+    )
+    return parser.parse_args(argv)
+
+
+def main() -> None:
+    """Reads the requested days and prints the per-stage percentiles."""
+    args = _parse_args()
+    paths = _day_files(directory=Path(args.dir), day=args.day)
+    timings, unreadable = _read_timings(paths=paths, route=args.route)
+    if not timings:
+        raise SystemExit(f"no readable timings in {', '.join(str(path) for path in paths)}")
+    console.print(f"[bold cyan]files[/bold cyan]  {', '.join(path.stem for path in paths)}")
+    routes = Counter(timing.route for timing in timings)
+    console.print(
+        "[bold cyan]routes[/bold cyan] "
+        + ", ".join(f"{route} {count}" for route, count in routes.most_common())
+    )
+    if unreadable:
+        console.print(f"[yellow]{unreadable} unreadable line(s) skipped[/yellow]")
+    console.print(_stage_table(timings=timings))
+    console.print(_marks_table(timings=timings))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,578 @@
+"""Offline load test of the memory store: how reads, writes and the restart sweep scale.
+
+`tests/test_memory*.py` pin what the store does, but nothing measured what it costs as the
+store grows, so a change that re-parses a compartment per delta or walks the tree on the
+event loop ships unnoticed until a busy guild's replies get slow. This builds a synthetic
+store in a throwaway directory and times the store's own entry points against it, in the
+order a process meets them:
+
+- the restart sweep: `iter_scopes`, then `needs_consolidation` and `read_owner` for every
+  scope over the threshold, run on the event loop exactly as `_resume_memory` runs them;
+- cold reads: `read_memory_document` through `memory_io` with the fact and render caches
+  dropped, so every compartment read is parsed from disk;
+- warm reads: the same reads again, answered from the render cache;
+- write bursts: one `apply_deltas` batch per scope followed by an `append_raw_entry`, as
+  a consolidation and the next turn's extraction write them;
+- prunes: `prune_compartment` dropping a few facts from each of the largest compartments,
+  as a rebuild's replace pass does.
+
+The store is skewed the way a real one is: most users hold `--min-facts` facts, and a
+`--heavy-fraction` of them hold between that and `--max-facts` (log-uniform), each with a
+guild compartment a quarter that size and a `--detail-mb` detail file. Every phase runs
+beside a probe task measuring how late the event loop wakes, which is what a reply pays for
+a store call that blocks the loop instead of going through `memory_io`'s threads.
+
+Results print as a table. `--output` writes them as JSON, labelled with the commit they ran
+on, and `--baseline` names an earlier file to print beside this run, so a regression shows
+up as a column, not a recollection. The layout under test is whatever `MEMORY_STORAGE` says.
+
+Run from the repo root::
+
+    uv run python -m scripts.memory_bench                              # 10k users
+    uv run python -m scripts.memory_bench --users 1000 --output before.json
+    MEMORY_STORAGE=packed uv run python -m scripts.memory_bench --baseline before.json
+"""
+
+import os
+import math
+import time
+import random
+import asyncio
+from pathlib import Path
+import argparse
+import resource
+import tempfile
+from functools import partial
+import subprocess
+from collections.abc import Callable, Sequence, Awaitable
+
+from rich import box
+import logfire
+from pydantic import Field, BaseModel
+from rich.table import Table
+from rich.console import Console
+
+from scripts.latency_report import _percentile
+from discordbot.typings.memory import MemoryFact, MemoryOwner, MemoryConfig
+from discordbot.services.memory.facts import utc_now, mint_fact_id
+from discordbot.services.memory.store import (
+    GLOBAL_COMPARTMENT,
+    read_facts,
+    read_owner,
+    user_scope,
+    iter_scopes,
+    memory_root,
+    write_facts,
+    append_detail,
+    append_raw_entry,
+    drop_read_caches,
+    guild_compartment,
+    prune_compartment,
+)
+from discordbot.services.memory.deltas import apply_deltas
+from discordbot.services.memory.pipeline import needs_consolidation
+from discordbot.services.memory.store_io import memory_io
+from discordbot.services.memory.extraction import MemoryFactDelta
+
+console = Console()
+
+# Synthetic ids: users from here up, every guild compartment in one guild.
+_FIRST_USER_ID = 100_000_000_000_000_000
+_BENCH_GUILD_ID = 1
+# Fact bodies are Traditional Chinese, as stored ones are, so sizes and parse costs match.
+_PHRASES = (
+    "喜歡簡短回覆",
+    "常在深夜上線聊天",
+    "正在自學日文",
+    "養了一隻橘貓",
+    "非常討厭劇透",
+    "週末會去爬山",
+    "偏好繁體中文回答",
+    "最近在玩音樂遊戲",
+)
+_LOOP_PROBE_SECONDS = 0.01
+# A write burst's batch: this many new facts plus this many rewrites of existing ones.
+_BURST_CREATES = 8
+_BURST_UPDATES = 8
+# Facts a prune drops from each compartment it visits.
+_PRUNE_DROP = 5
+
+
+class StoreShape(BaseModel):
+    """The synthetic store a run is measured against.
+
+    Attributes:
+        users: User scopes to generate.
+        min_facts: Global-compartment facts of an ordinary user.
+        max_facts: Upper bound of a heavy user's global compartment.
+        heavy_fraction: Share of users drawn log-uniform between the two bounds.
+        detail_bytes: Detail-file size of each heavy user.
+        raw_entries: Raw entries appended to every scope.
+        seed: Seed of the generator, so two runs measure the same store.
+    """
+
+    users: int = Field(default=10_000, description="User scopes to generate.")
+    min_facts: int = Field(default=10, description="Facts of an ordinary user.")
+    max_facts: int = Field(default=2_000, description="Upper bound of a heavy user's facts.")
+    heavy_fraction: float = Field(default=0.01, description="Share of heavy users.")
+    detail_bytes: int = Field(default=2 * 2**20, description="Detail size of a heavy user.")
+    raw_entries: int = Field(default=3, description="Raw entries per scope.")
+    seed: int = Field(default=0, description="Generator seed.")
+
+
+class GeneratedScope(BaseModel):
+    """One generated user scope.
+
+    Attributes:
+        scope: The scope key.
+        facts: Facts written across its compartments.
+        heavy: Whether it was drawn as a heavy user.
+    """
+
+    scope: str
+    facts: int
+    heavy: bool
+
+
+class PhaseResult(BaseModel):
+    """What one phase measured.
+
+    Attributes:
+        name: The phase.
+        operations: Store calls made.
+        wall_seconds: From the first call to the last one finished.
+        p50_ms: Median latency of one call, queueing for `memory_io` included.
+        p95_ms: 95th percentile latency.
+        p99_ms: 99th percentile latency.
+        max_ms: Slowest call.
+        loop_lag_p99_ms: 99th percentile of the probe's overshoot.
+        loop_lag_max_ms: Longest the event loop was blocked.
+    """
+
+    name: str
+    operations: int
+    wall_seconds: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    loop_lag_p99_ms: float
+    loop_lag_max_ms: float
+
+    @property
+    def operations_per_second(self) -> float:
+        """Store calls completed per second of wall time."""
+        return self.operations / self.wall_seconds if self.wall_seconds else 0.0
+
+
+class BenchReport(BaseModel):
+    """One run, as written by `--output` and read back by `--baseline`.
+
+    Attributes:
+        label: What the run measured; the short commit unless `--label` says otherwise.
+        storage: The fact layout under test (`MEMORY_STORAGE`).
+        shape: The generated store.
+        scopes: Scopes generated.
+        facts: Facts generated across them.
+        store_bytes: Size of the generated store on disk.
+        generate_seconds: Time spent generating it.
+        phases: Every phase, in run order.
+        peak_rss_bytes: The process's peak resident set.
+    """
+
+    label: str
+    storage: str
+    shape: StoreShape
+    scopes: int
+    facts: int
+    store_bytes: int
+    generate_seconds: float
+    phases: list[PhaseResult]
+    peak_rss_bytes: int
+
+
+def _fact_count(shape: StoreShape, rng: random.Random) -> tuple[int, bool]:
+    """Draws one user's global-compartment size and whether it is a heavy user."""
+    if shape.max_facts <= shape.min_facts or rng.random() >= shape.heavy_fraction:
+        return shape.min_facts, False
+    drawn = math.exp(rng.uniform(math.log(max(shape.min_facts, 1)), math.log(shape.max_facts)))
+    return round(drawn), True
+
+
+def _synthetic_facts(
+    scope: str, owner: MemoryOwner, compartment: str, count: int, rng: random.Random
+) -> list[MemoryFact]:
+    """`count` distinct facts for one compartment, stamped as consolidation stamps them."""
+    now = utc_now()
+    facts: list[MemoryFact] = []
+    for index in range(count):
+        summary = f"{rng.choice(_PHRASES)} #{index}"
+        facts.append(
+            MemoryFact(
+                fact_id=mint_fact_id(compartment=compartment, summary=f"{scope} {summary}"),
+                summary=summary,
+                section="preference",
+                durability="stable",
+                text="，".join(rng.choices(_PHRASES, k=rng.randint(1, 6))),
+                compartment=compartment,
+                owner_id=owner.owner_id,
+                owner_name=owner.owner_name,
+                created=now,
+                last_confirmed=now,
+                keys=(f"preference.bench.{index}",),
+            )
+        )
+    return facts
+
+
+def _detail_text(size: int, rng: random.Random) -> str:
+    """About `size` bytes of dated detail entries, as consumed raw batches leave behind."""
+    entries: list[str] = []
+    written = 0
+    while written < size:
+        body = "\n".join(f"- {rng.choice(_PHRASES)}" for _ in range(12))
+        entry = f"## 2026-01-01T00:00:{len(entries) % 60:02d}+00:00\n{body}"
+        entries.append(entry)
+        written += len(entry.encode("utf-8")) + 2
+    return "\n\n".join(entries)
+
+
+def build_store(shape: StoreShape) -> list[GeneratedScope]:
+    """Generates the synthetic store under `memory_root()` through the store's writers."""
+    rng = random.Random(shape.seed)  # noqa: S311 -- synthetic data, not a secret
+    generated: list[GeneratedScope] = []
+    for offset in range(shape.users):
+        owner_id = _FIRST_USER_ID + offset
+        scope = user_scope(user_id=owner_id)
+        owner = MemoryOwner(owner_id=owner_id, owner_name=f"bench{offset}")
+        count, heavy = _fact_count(shape=shape, rng=rng)
+        written = 0
+        for compartment, size in (
+            (GLOBAL_COMPARTMENT, count),
+            (guild_compartment(guild_id=_BENCH_GUILD_ID), count // 4),
+        ):
+            if size:
+                facts = _synthetic_facts(
+                    scope=scope, owner=owner, compartment=compartment, count=size, rng=rng
+                )
+                write_facts(scope=scope, compartment=compartment, writes=facts, deletes=set())
+                written += size
+        for _ in range(shape.raw_entries):
+            append_raw_entry(scope=scope, entry_text=f"- {rng.choice(_PHRASES)}")
+        if heavy and shape.detail_bytes:
+            append_detail(scope=scope, text=_detail_text(size=shape.detail_bytes, rng=rng))
+        generated.append(GeneratedScope(scope=scope, facts=written, heavy=heavy))
+    return generated
+
+
+def _store_bytes() -> int:
+    """Size of every file under the store root."""
+    return sum(path.stat().st_size for path in memory_root().rglob("*") if path.is_file())
+
+
+async def _probe_loop_lag(samples: list[float]) -> None:
+    """Records how late each short sleep wakes up, until cancelled."""
+    while True:
+        started = time.monotonic()
+        await asyncio.sleep(_LOOP_PROBE_SECONDS)
+        samples.append(max(0.0, time.monotonic() - started - _LOOP_PROBE_SECONDS))
+
+
+def _ms(values: Sequence[float], q: float) -> float:
+    """The `q` percentile of `values` in milliseconds, 0 for none."""
+    return _percentile(values=values, q=q) * 1000 if values else 0.0
+
+
+async def run_phase(
+    name: str, calls: Sequence[Callable[[], Awaitable[object]]], concurrency: int
+) -> PhaseResult:
+    """Runs `calls` at most `concurrency` at a time beside a loop-lag probe and times them."""
+    lag: list[float] = []
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+    async def _one(call: Callable[[], Awaitable[object]]) -> None:
+        async with semaphore:
+            started = time.monotonic()
+            await call()
+            latencies.append(time.monotonic() - started)
+
+    probe = asyncio.create_task(_probe_loop_lag(samples=lag))
+    # Let the probe start its first sleep, so a call that blocks at once is still measured.
+    await asyncio.sleep(0)
+    started = time.monotonic()
+    try:
+        await asyncio.gather(*(_one(call=call) for call in calls))
+        wall_seconds = time.monotonic() - started
+        # One more probe period, so a wake a blocking call held back is recorded, not cancelled.
+        await asyncio.sleep(_LOOP_PROBE_SECONDS * 2)
+    finally:
+        probe.cancel()
+        await asyncio.gather(probe, return_exceptions=True)
+    return PhaseResult(
+        name=name,
+        operations=len(latencies),
+        wall_seconds=wall_seconds,
+        p50_ms=_ms(values=latencies, q=50),
+        p95_ms=_ms(values=latencies, q=95),
+        p99_ms=_ms(values=latencies, q=99),
+        max_ms=max(latencies, default=0.0) * 1000,
+        loop_lag_p99_ms=_ms(values=lag, q=99),
+        loop_lag_max_ms=max(lag, default=0.0) * 1000,
+    )
+
+
+async def _restart_sweep() -> None:
+    """`_resume_memory`'s sweep minus the consolidations it would spawn, on the loop as there."""
+    for scope in iter_scopes():
+        if needs_consolidation(scope=scope):
+            read_owner(scope=scope)
+
+
+async def _read(scope: str) -> None:
+    """One reply's read of a user's memory in the bench guild."""
+    await memory_io.read_memory_document(
+        scope=scope,
+        compartments=[GLOBAL_COMPARTMENT, guild_compartment(guild_id=_BENCH_GUILD_ID)],
+        flavor="user",
+    )
+
+
+def _write_burst(scope: str, burst: int) -> None:
+    """One consolidation's delta batch for a scope, then the next turn's raw entry."""
+    existing = read_facts(scope=scope, compartment=GLOBAL_COMPARTMENT)
+    deltas = [
+        MemoryFactDelta(
+            action="create",
+            section="preference",
+            durability="stable",
+            summary=f"{_PHRASES[index % len(_PHRASES)]} burst {burst}.{index}",
+            text=_PHRASES[index % len(_PHRASES)],
+            from_keys=(f"preference.burst.{burst}.{index}",),
+        )
+        for index in range(_BURST_CREATES)
+    ]
+    deltas.extend(
+        MemoryFactDelta(
+            action="update",
+            fact_id=fact.fact_id,
+            section=fact.section,
+            durability=fact.durability,
+            summary=fact.summary,
+            text=f"{fact.text}，已確認",
+            from_keys=fact.keys,
+        )
+        for fact in existing[:_BURST_UPDATES]
+    )
+    apply_deltas(
+        scope=scope,
+        compartment=GLOBAL_COMPARTMENT,
+        flavor="user",
+        deltas=tuple(deltas),
+        owner=read_owner(scope=scope),
+        allow_mass_delete=False,
+    )
+    append_raw_entry(scope=scope, entry_text=f"- burst {burst}")
+
+
+def _prune(scope: str) -> None:
+    """A rebuild's replace pass over a scope's global compartment, dropping a few facts."""
+    facts = read_facts(scope=scope, compartment=GLOBAL_COMPARTMENT)
+    keep = {fact.fact_id for fact in facts[_PRUNE_DROP:]}
+    prune_compartment(scope=scope, compartment=GLOBAL_COMPARTMENT, keep=keep)
+
+
+def _io_call(scope: str, call: Callable[[], object]) -> Callable[[], Awaitable[object]]:
+    """A store call as the bot makes it: on `memory_io`'s threads, serialized per scope."""
+    return partial(memory_io.run, scope=scope, call=call)
+
+
+async def run_bench(
+    shape: StoreShape, sample: int, concurrency: int, label: str = "local"
+) -> BenchReport:
+    """Generates a store under `memory_root()` and runs every phase against it.
+
+    Args:
+        shape: The store to generate.
+        sample: Scopes each read and write phase visits; the heavy ones always included.
+        concurrency: Store calls in flight at once within a phase.
+        label: What the report is labelled with.
+
+    Returns:
+        The run's measurements.
+    """
+    started = time.monotonic()
+    generated = await asyncio.to_thread(build_store, shape=shape)
+    generate_seconds = time.monotonic() - started
+    rng = random.Random(shape.seed + 1)  # noqa: S311 -- picks scopes, not a secret
+    heavy = [scope.scope for scope in generated if scope.heavy]
+    light = [scope.scope for scope in generated if not scope.heavy]
+    visited = heavy + rng.sample(light, k=min(max(sample - len(heavy), 0), len(light)))
+    largest = [scope.scope for scope in sorted(generated, key=lambda scope: scope.facts)[-sample:]]
+
+    phases = [await run_phase(name="restart sweep", calls=[_restart_sweep], concurrency=1)]
+    drop_read_caches()
+    phases.append(
+        await run_phase(
+            name="cold read",
+            calls=[partial(_read, scope=scope) for scope in visited],
+            concurrency=concurrency,
+        )
+    )
+    phases.append(
+        await run_phase(
+            name="warm read",
+            calls=[partial(_read, scope=scope) for scope in visited],
+            concurrency=concurrency,
+        )
+    )
+    phases.append(
+        await run_phase(
+            name="write burst",
+            calls=[
+                _io_call(scope=scope, call=partial(_write_burst, scope=scope, burst=burst))
+                for burst, scope in enumerate(visited)
+            ],
+            concurrency=concurrency,
+        )
+    )
+    phases.append(
+        await run_phase(
+            name="prune",
+            calls=[_io_call(scope=scope, call=partial(_prune, scope=scope)) for scope in largest],
+            concurrency=concurrency,
+        )
+    )
+    return BenchReport(
+        label=label,
+        storage=MemoryConfig().storage,
+        shape=shape,
+        scopes=len(generated),
+        facts=sum(scope.facts for scope in generated),
+        store_bytes=await asyncio.to_thread(_store_bytes),
+        generate_seconds=generate_seconds,
+        phases=phases,
+        # Linux reports kilobytes.
+        peak_rss_bytes=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+    )
+
+
+def _phase_cells(phase: PhaseResult) -> list[str]:
+    """One phase's figures, in the table's column order."""
+    return [
+        str(phase.operations),
+        f"{phase.operations_per_second:.0f}",
+        f"{phase.p50_ms:.1f}",
+        f"{phase.p99_ms:.1f}",
+        f"{phase.max_ms:.0f}",
+        f"{phase.loop_lag_max_ms:.0f}",
+    ]
+
+
+def _results_table(report: BenchReport, baseline: BenchReport | None) -> Table:
+    """One row per phase; with a baseline, its row follows each of this run's."""
+    table = Table(
+        title=(
+            f"memory store: {report.scopes} scopes, {report.facts} facts, "
+            f"{report.store_bytes / 2**20:.0f}MB {report.storage}, "
+            f"generated in {report.generate_seconds:.0f}s (ms)"
+        ),
+        title_justify="left",
+        box=box.SIMPLE_HEAD,
+    )
+    table.add_column("phase", no_wrap=True)
+    table.add_column("run", no_wrap=True)
+    # Latencies in milliseconds; `blocked` is the longest the event loop went unserved.
+    for heading in ("calls", "calls/s", "p50", "p99", "max", "blocked"):
+        table.add_column(heading, justify="right")
+    previous = {phase.name: phase for phase in baseline.phases} if baseline else {}
+    for phase in report.phases:
+        table.add_row(phase.name, report.label, *_phase_cells(phase=phase))
+        if baseline is not None and phase.name in previous:
+            table.add_row(
+                "", baseline.label, *_phase_cells(phase=previous[phase.name]), style="dim"
+            )
+    return table
+
+
+def _commit_label() -> str:
+    """The short commit of the working tree, or "local" outside a git checkout."""
+    result = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"],  # noqa: S607 -- git from PATH, as contributors run it
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    return result.stdout.strip() or "local"
+
+
+def _parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    """Parses the memory-bench CLI arguments."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    defaults = StoreShape()
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--min-facts", type=int, default=defaults.min_facts)
+    parser.add_argument("--max-facts", type=int, default=defaults.max_facts)
+    parser.add_argument("--heavy-fraction", type=float, default=defaults.heavy_fraction)
+    parser.add_argument(
+        "--detail-mb",
+        type=float,
+        default=defaults.detail_bytes / 2**20,
+        help="Detail-file size of each heavy user.",
+    )
+    parser.add_argument("--raw-entries", type=int, default=defaults.raw_entries)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument(
+        "--sample", type=int, default=1_000, help="Scopes each read, write and prune visits."
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=32, help="Store calls in flight at once."
+    )
+    parser.add_argument("--label", default=None, help="Run label; defaults to the commit.")
+    parser.add_argument("--output", type=Path, default=None, help="Write the results here.")
+    parser.add_argument(
+        "--baseline", type=Path, default=None, help="An earlier --output to print beside."
+    )
+    return parser.parse_args(argv)
+
+
+def main() -> None:
+    """Runs the bench in a throwaway working directory and prints one row per phase."""
+    args = _parse_args()
+    shape = StoreShape(
+        users=args.users,
+        min_facts=args.min_facts,
+        max_facts=args.max_facts,
+        heavy_fraction=args.heavy_fraction,
+        detail_bytes=round(args.detail_mb * 2**20),
+        raw_entries=args.raw_entries,
+        seed=args.seed,
+    )
+    label = args.label or _commit_label()
+    output = args.output.resolve() if args.output is not None else None
+    baseline = (
+        BenchReport.model_validate_json(args.baseline.read_text(encoding="utf-8"))
+        if args.baseline is not None
+        else None
+    )
+    os.environ["MEMORY_GIT_ENABLED"] = "false"
+    # Configured so every log record is built as it is in production, printed nowhere.
+    logfire.configure(
+        send_to_logfire=False, console=False, scrubbing=False, inspect_arguments=False
+    )
+    with tempfile.TemporaryDirectory(prefix="memory-bench-") as workdir:
+        # The store root is relative to the working directory.
+        os.chdir(workdir)
+        report = asyncio.run(
+            run_bench(shape=shape, sample=args.sample, concurrency=args.concurrency, label=label)
+        )
+    console.print(_results_table(report=report, baseline=baseline))
+    if output is not None:
+        output.write_text(report.model_dump_json(indent=2) + "\n", encoding="utf-8")
+        console.print(f"[green]wrote[/green] {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -39,6 +39,18 @@ It counts the unreadable ones it removed as well: renaming a section or a durabi
 value makes every fact carrying the old one unparsable, and the next rebuild then drops
 all of them in one pass, which nothing else here would say out loud.
 
+A collective run over thousands of scopes is hours of LLM work, so it runs as a worker
+pool and keeps a journal. ``--concurrency`` scopes rebuild at once, largest evidence
+first, so the longest rebuilds are not the ones left running alone at the end. ``--tpm``
+caps the estimated input tokens started per minute, through the same gate the bot paces
+its background consolidations with (`services/memory/scheduler.py`); 0, the default, is
+no cap. Every scope that finishes, rebuilt or failed, is appended to the journal
+(``memory_regen.jsonl`` beside the store, or ``--journal``) and synced, and ``--resume``
+skips the scopes it records as rebuilt, so a crash costs the scopes that were in flight
+rather than the whole run. A run without ``--resume`` starts the journal over. The
+closing summary gives throughput and the estimated input tokens and cost — estimated,
+because the rebuild path does not hand back the provider's usage.
+
 Run from the repo root::
 
     uv run python -m scripts.regen_memories                            # rebuild all
@@ -46,33 +58,47 @@ Run from the repo root::
     uv run python -m scripts.regen_memories 1234567890
     uv run python -m scripts.regen_memories bot_memories/9876543210
     uv run python -m scripts.regen_memories users
+    uv run python -m scripts.regen_memories --concurrency 40 --tpm 2000000
+    uv run python -m scripts.regen_memories --resume
 """
 
+import os
+import time
 from typing import TYPE_CHECKING, cast
 import asyncio
+from pathlib import Path
 import argparse
 from collections.abc import Sequence
 
 from openai import AsyncOpenAI
+from pydantic import Field, BaseModel, ConfigDict, SkipValidation, ValidationError
 from rich.console import Console
 from rich.progress import Progress, BarColumn, TextColumn, TimeElapsedColumn, MofNCompleteColumn
 
 from discordbot.typings.llm import LLMConfig
 from discordbot.typings.models import ModelSettings, RuntimeModelCatalog
+from discordbot.utils.model_pricing import get_token_rates
 from discordbot.services.memory.facts import render_owner_identity
 from discordbot.services.memory.store import (
     GLOBAL_COMPARTMENT,
     read_facts,
     read_owner,
     iter_scopes,
+    memory_root,
+    raw_file_bytes,
     read_detail_tail,
     read_raw_entries,
+    detail_file_bytes,
     list_compartments,
     unaccounted_files,
 )
 from discordbot.services.memory.deltas import partition_raw_entries
 from discordbot.services.memory.pipeline import flavor_of, regenerate_main_memory
 from discordbot.services.memory.constants import MEMORY_DETAIL_CONTEXT_MAX_CHARS
+from discordbot.services.memory.scheduler import (
+    ConsolidationScheduler,
+    estimate_consolidation_tokens,
+)
 from discordbot.services.memory.extraction import MemoryExtractorAI
 
 if TYPE_CHECKING:
@@ -80,15 +106,111 @@ if TYPE_CHECKING:
 
 console = Console()
 
-# The offline fan-out's own bound, deliberately not `MEMORY_GLOBAL_CONCURRENCY`: that one
-# is sized for background work sharing the proxy with the latency-critical reply path, on
-# the assumption that path exists. A batch run here has no reply latency to protect and no
-# reason to push the proxy as hard. No flag on purpose — edit this if a store needs more.
+# The offline fan-out's default bound, deliberately not `MEMORY_GLOBAL_CONCURRENCY`: that
+# one is sized for background work sharing the proxy with the latency-critical reply path,
+# on the assumption that path exists. A batch run here has no reply latency to protect, and
+# `--concurrency` raises it for a maintenance window that has the proxy to itself.
 _CONCURRENCY = 20
 
 # Targets naming more than one scope, which is what makes a run store-scale.
 _BATCH_TARGETS = ("all", "users", "servers")
 
+# Journal results `--resume` skips. `failed`, `cooldown` and an `error:` row are retried.
+_DONE_RESULTS = frozenset({"regenerated", "no_evidence"})
+
+
+class BatchOptions(BaseModel):
+    """How a real run fans out, and where it keeps its progress.
+
+    Attributes:
+        concurrency: Scopes rebuilding at once.
+        tokens_per_minute: Estimated input tokens started per minute; 0 is no cap.
+        resume: Skip the scopes the journal records as rebuilt.
+        journal: The progress journal; None is `memory_regen.jsonl` beside the store.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    concurrency: int = Field(default=_CONCURRENCY, ge=1, description="Scopes in flight.")
+    tokens_per_minute: int = Field(default=0, ge=0, description="Token cap; 0 is none.")
+    resume: bool = Field(default=False, description="Skip scopes the journal has done.")
+    journal: Path | None = Field(default=None, description="Journal path; None is default.")
+
+
+class JournalEntry(BaseModel):
+    """One finished scope, as one line of the progress journal.
+
+    Attributes:
+        scope: The scope key.
+        result: How its rebuild ended, an `error: ...` row included.
+        estimated_tokens: Input tokens its rebuild was estimated to send.
+        seconds: Wall time of the rebuild itself, from admission to landing.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    scope: str = Field(..., description="The scope key.")
+    result: str = Field(..., description="How its rebuild ended.")
+    estimated_tokens: int = Field(..., description="Estimated input tokens sent.")
+    seconds: float = Field(..., description="Wall time of the rebuild.")
+
+
+class _Run(BaseModel):
+    """What every worker of one batch shares."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    semaphore: SkipValidation[asyncio.Semaphore] = Field(..., description="The pool bound.")
+    gate: ConsolidationScheduler = Field(..., description="The token-rate cap.")
+    journal: Path = Field(..., description="Where finished scopes are appended.")
+    prompt_bytes: int = Field(..., description="Consolidation prompt size, for estimates.")
+
+
+def _journal_path(options: BatchOptions) -> Path:
+    """Returns the journal a run writes: `--journal`, or one beside the store."""
+    return options.journal or memory_root().parent / "memory_regen.jsonl"
+
+
+def _read_journal(path: Path) -> dict[str, JournalEntry]:
+    """Returns the latest journal entry per scope; a line torn by the crash is skipped."""
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    except FileNotFoundError:
+        return {}
+    entries: dict[str, JournalEntry] = {}
+    for line in lines:
+        try:
+            entry = JournalEntry.model_validate_json(json_data=line)
+        except ValidationError:
+            continue
+        entries[entry.scope] = entry
+    return entries
+
+
+def _append_journal(path: Path, entry: JournalEntry) -> None:
+    """Appends one entry and syncs it, so a crash right after still counts the scope.
+
+    A line the crash tore is closed off first, or this entry would be glued onto it and
+    lost with it.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    line = entry.model_dump_json().encode("utf-8") + b"\n"
+    with path.open(mode="a+b") as handle:
+        if handle.seek(0, os.SEEK_END):
+            handle.seek(-1, os.SEEK_END)
+            if handle.read(1) != b"\n":
+                line = b"\n" + line
+        handle.write(line)
+        handle.flush()
+        os.fsync(handle.fileno())
+
+
+def _evidence_bytes(scope: str) -> int:
+    """Returns the evidence a rebuild of this scope reads: raw backlog plus detail window."""
+    return raw_file_bytes(scope=scope) + min(
+        detail_file_bytes(scope=scope), MEMORY_DETAIL_CONTEXT_MAX_CHARS
+    )
+
 
 def _scopes_for_target(target: str) -> list[str]:
     """Returns the scopes a target names, in store order.
@@ -202,14 +324,26 @@ def _report(rows: list[tuple[str, str, dict[str, int], int]]) -> None:
 
 
 async def _regen_one(
-    extractor: MemoryExtractorAI, scope: str, semaphore: asyncio.Semaphore
+    extractor: MemoryExtractorAI, scope: str, run: _Run
 ) -> tuple[str, str, dict[str, int], int]:
-    """Rebuilds one scope, prints its outcome, and returns its report row."""
+    """Rebuilds one scope, journals and prints its outcome, and returns its report row."""
     removed = 0
-    async with semaphore:
+    async with run.semaphore:
         # The script calls the rebuild directly rather than through the reply pipeline,
         # so it needs its own bound: `_memory_semaphore` is entered inside
         # `regenerate_main_memory`, but nothing else here throttles the fan-out.
+        evidence_bytes = _evidence_bytes(scope=scope)
+        estimated_tokens = estimate_consolidation_tokens(
+            prompt_bytes=run.prompt_bytes,
+            evidence_bytes=evidence_bytes,
+            calls=len(list_compartments(scope=scope)) + 1,
+        )
+        # Admitted holding a pool slot, so a rebuild is charged to the minute it starts in
+        # rather than to whenever it happened to queue.
+        await run.gate.admit(
+            scope=scope, backlog_bytes=evidence_bytes, estimated_tokens=estimated_tokens
+        )
+        started_at = time.monotonic()
         try:
             # Inside the handler because it is not safe either: `read_owner` parses the
             # id out of the scope key, so one non-numeric directory under the store (a
@@ -224,6 +358,15 @@ async def _regen_one(
         except Exception as error:
             # Broad on purpose: one scope failing must not abandon the rest of the batch.
             result, counts = f"error: {type(error).__name__}: {error}", _preview(scope=scope)
+    _append_journal(
+        path=run.journal,
+        entry=JournalEntry(
+            scope=scope,
+            result=result,
+            estimated_tokens=estimated_tokens,
+            seconds=round(time.monotonic() - started_at, 3),
+        ),
+    )
     # A 145-scope run is several minutes of LLM work, so each scope reports as it lands
     # rather than leaving the closing report as the only output.
     console.print(f"{scope}: {result}")
@@ -231,17 +374,29 @@ async def _regen_one(
 
 
 async def _rebuild_batch(
-    extractor: MemoryExtractorAI, scopes: list[str]
+    extractor: MemoryExtractorAI,
+    scopes: list[str],
+    options: BatchOptions,
+    journal: Path,
+    prompt_bytes: int,
 ) -> list[tuple[str, str, dict[str, int], int]]:
-    """Rebuilds every scope concurrently, advancing one bar over the whole batch.
+    """Rebuilds every scope on the worker pool, advancing one bar over the whole batch.
 
     The bar counts finished scopes out of total rather than tracking any one of them,
-    since `_CONCURRENCY` of them are in flight at once and they land out of order. It
+    since `--concurrency` of them are in flight at once and they land out of order. It
     shows elapsed time and no estimate, which out-of-order LLM completions would make up.
     It draws on the module's own console, so `_regen_one`'s per-scope lines scroll above
     it instead of fighting its redraw.
     """
-    semaphore = asyncio.Semaphore(_CONCURRENCY)
+    run = _Run(
+        semaphore=asyncio.Semaphore(options.concurrency),
+        gate=ConsolidationScheduler(tokens_per_minute=options.tokens_per_minute),
+        journal=journal,
+        prompt_bytes=prompt_bytes,
+    )
+    # Largest evidence first: tasks take the semaphore in the order they are created, so
+    # this is the order rebuilds start in, and the longest ones do not start last.
+    by_size = sorted(scopes, key=lambda scope: _evidence_bytes(scope=scope), reverse=True)
     rows: dict[str, tuple[str, str, dict[str, int], int]] = {}
     with Progress(
         TextColumn("[progress.description]{task.description}"),
@@ -251,8 +406,11 @@ async def _rebuild_batch(
         console=console,
     ) as progress:
         task = progress.add_task("[green]rebuilding", total=len(scopes))
+        # Tasks rather than bare coroutines: `as_completed` would wrap those in a set's
+        # order and throw the largest-first start order away.
         pending = [
-            _regen_one(extractor=extractor, scope=scope, semaphore=semaphore) for scope in scopes
+            asyncio.create_task(_regen_one(extractor=extractor, scope=scope, run=run))
+            for scope in by_size
         ]
         for landing in asyncio.as_completed(pending):
             row = await landing
@@ -283,10 +441,46 @@ def _confirmed() -> bool:
     return False
 
 
-async def _regen_all(model: ModelSettings, target: str, dry_run: bool) -> None:
+def _summarize(scopes: list[str], journal: Path, elapsed: float, model: ModelSettings) -> None:
+    """Prints the run's throughput and its estimated input tokens and cost.
+
+    Read back from the journal rather than from the report rows, since it is the journal
+    that carries each scope's estimate. Input cost only: the output side of a rebuild is
+    the facts it wrote, which nothing here sizes.
+    """
+    entries = _read_journal(path=journal)
+    ran = [entries[scope] for scope in scopes if scope in entries]
+    rebuilt = sum(entry.result in _DONE_RESULTS for entry in ran)
+    tokens = sum(entry.estimated_tokens for entry in ran)
+    per_minute = len(ran) / elapsed * 60 if elapsed > 0 else 0.0
+    input_rate, _output_rate = get_token_rates(model_name=model.name)
+    console.print(
+        f"[bold]{rebuilt} rebuilt, {len(ran) - rebuilt} not[/bold] in {elapsed:.0f}s "
+        f"({per_minute:.1f} scope(s)/min); journal: {journal}"
+    )
+    console.print(
+        f"~{tokens:,} input tokens estimated, ~${tokens * input_rate:.2f} at "
+        f"{model.name} input rates"
+    )
+
+
+async def _regen_all(
+    model: ModelSettings, target: str, dry_run: bool, options: BatchOptions | None = None
+) -> None:
     """Previews or rebuilds every scope the target names, warning about the race first."""
+    options = options or BatchOptions()
+    journal = _journal_path(options=options)
     scopes = _scopes_for_target(target=target)
     console.print(f"{len(scopes)} scope(s) found; dry_run={dry_run}")
+    if options.resume:
+        finished = {
+            scope
+            for scope, entry in _read_journal(path=journal).items()
+            if entry.result in _DONE_RESULTS
+        }
+        remaining = [scope for scope in scopes if scope not in finished]
+        console.print(f"resuming: {len(scopes) - len(remaining)} already rebuilt per {journal}")
+        scopes = remaining
     # Printed on the dry run too, which is when there is still time to act on it, and on
     # every target: an out-of-process write races the bot's own `scope_lock` whether it
     # touches one scope or all of them (`/memory regenerate` is the live-safe single-scope
@@ -304,6 +498,10 @@ async def _regen_all(model: ModelSettings, target: str, dry_run: bool) -> None:
         return
     if not _confirmed():
         return
+    if not options.resume:
+        # A fresh run starts the journal over: entries from an earlier run would let a
+        # later `--resume` skip scopes this one has not rebuilt.
+        journal.unlink(missing_ok=True)
     config = LLMConfig()
     extractor = MemoryExtractorAI(
         client=AsyncOpenAI(base_url=config.base_url, api_key=config.api_key),
@@ -312,7 +510,16 @@ async def _regen_all(model: ModelSettings, target: str, dry_run: bool) -> None:
         consolidate_model=model,
     )
     console.print(f"Rebuilding with [bold]{model.name}[/bold] (effort: {model.effort})")
-    _report(rows=await _rebuild_batch(extractor=extractor, scopes=scopes))
+    started_at = time.monotonic()
+    rows = await _rebuild_batch(
+        extractor=extractor,
+        scopes=scopes,
+        options=options,
+        journal=journal,
+        prompt_bytes=len(extractor.consolidate_prompt.encode("utf-8")),
+    )
+    _report(rows=rows)
+    _summarize(scopes=scopes, journal=journal, elapsed=time.monotonic() - started_at, model=model)
 
 
 def _parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
@@ -334,14 +541,37 @@ def _parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
     parser.add_argument(
         "--dry-run", action="store_true", help="Preview only; omit to rewrite the store."
     )
-    return parser.parse_args(argv)
+    parser.add_argument(
+        "--concurrency", type=int, default=_CONCURRENCY, help="Scopes rebuilding at once."
+    )
+    parser.add_argument(
+        "--tpm", type=int, default=0, help="Estimated input tokens per minute; 0 is no cap."
+    )
+    parser.add_argument(
+        "--resume", action="store_true", help="Skip scopes the journal records as rebuilt."
+    )
+    parser.add_argument(
+        "--journal", type=Path, default=None, help="Progress journal; defaults beside the store."
+    )
+    args = parser.parse_args(argv)
+    if args.concurrency < 1 or args.tpm < 0:
+        parser.error("--concurrency must be at least 1 and --tpm at least 0")
+    return args
 
 
 def main() -> None:
     """Parses arguments and runs the rebuild."""
     args = _parse_args()
     model = ModelSettings(name=args.model, effort=cast("ReasoningEffort", args.effort))
-    asyncio.run(main=_regen_all(model=model, target=args.target, dry_run=args.dry_run))
+    options = BatchOptions(
+        concurrency=args.concurrency,
+        tokens_per_minute=args.tpm,
+        resume=args.resume,
+        journal=args.journal,
+    )
+    asyncio.run(
+        main=_regen_all(model=model, target=args.target, dry_run=args.dry_run, options=options)
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,774 @@
+"""Offline replay benchmark of the reply pipeline: throughput, latency and loop lag under load.
+
+Nothing else measures the orchestration in `gen_reply/cog.py` without a live Discord and a
+live proxy, so a change that serialises two stages or blocks the loop for a few milliseconds
+per delta ships unnoticed until replies get slow in production. This drives the real
+`ReplyGeneratorCogs.on_message` -> `_run_reply_pipeline` path end to end, against two local
+stand-ins:
+
+- a stub Responses API server (aiohttp, on 127.0.0.1) that answers the route, effort and
+  memory calls after a fixed delay and streams the answer as text deltas at a fixed token
+  rate, so the model side costs the same on every run; and
+- a fake Discord layer (channels, messages, reactions) that records every reply and edit and
+  can charge a fixed round trip per REST call.
+
+Each conversation is one channel that sends its messages one at a time and waits for the
+reply before the next, and N conversations run at once. Per level of N it prints replies/sec,
+the pre-answer latency (reply start to the answer stage), first content and total from each
+reply's `ReplyTiming`, the event loop's lag measured by a probe task, and the process's peak
+memory. `--trace-memory` adds the traced Python heap peak, at a visible cost to the latencies.
+
+The messages are synthetic unless `--replay` names a JSONL file, one message per line::
+
+    {"channel": "general", "author": "alice", "content": "what did I miss?"}
+
+A line is addressed to the bot unless it carries `"mention": false`, in which case it only
+lands in the channel's history. Everything the pipeline writes (memory, usage, the key
+balancer) goes to a throwaway working directory, and no Gemini key is configured, so nothing
+leaves the machine. Memory extraction the replies schedule keeps running in the background
+and is part of the load a later level sees, as it would be in production.
+
+Run from the repo root::
+
+    uv run python -m scripts.reply_bench                               # 1, 4 and 16 at once
+    uv run python -m scripts.reply_bench --conversations 32 --messages 10
+    uv run python -m scripts.reply_bench --replay chat.jsonl --tokens-per-second 40
+"""
+
+import os
+import json
+import time
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any, cast
+import asyncio
+from pathlib import Path
+import argparse
+from datetime import UTC, datetime
+import resource
+import tempfile
+import itertools
+from collections import Counter, defaultdict
+import tracemalloc
+from collections.abc import Callable, Sequence, Awaitable, AsyncIterator
+
+from rich import box
+from aiohttp import web
+import logfire
+from pydantic import Field, BaseModel
+from rich.table import Table
+from rich.console import Console
+from nextcord.utils import time_snowflake
+
+from discordbot.typings.llm import LLMConfig
+from scripts.latency_report import _percentile
+from discordbot.typings.models import EffortGrade, RouteClassification
+from discordbot.cogs.gen_reply.cog import ReplyGeneratorCogs
+from discordbot.utils.reply_timing import ReplyTiming, ReplyTimingRecorder
+from discordbot.utils.model_pricing import load_model_info
+from discordbot.services.memory.extraction import RawMemoryDraft, ConsolidatedMemory
+
+if TYPE_CHECKING:
+    from nextcord import Message
+    from nextcord.ext import commands
+
+console = Console()
+
+BOT_USER_ID = 10_000
+# The structured calls the reply path and its memory follow-ups make, each answered with the
+# cheapest valid verdict: route to QA, grade low effort, and find nothing worth remembering.
+_STRUCTURED_VERDICTS = {
+    RouteClassification.__name__: RouteClassification(decision="QA").model_dump_json(),
+    EffortGrade.__name__: EffortGrade(effort="low").model_dump_json(),
+    RawMemoryDraft.__name__: RawMemoryDraft(has_signal=False).model_dump_json(),
+    ConsolidatedMemory.__name__: ConsolidatedMemory().model_dump_json(),
+}
+_ANSWER_WORDS = ("the", "quick", "brown", "fox", "jumps", "over", "the", "lazy", "dog")
+_SYNTHETIC_PROMPTS = (
+    "what do you think about this?",
+    "can you summarise the last few messages",
+    "explain how a hash map handles collisions",
+    "give me three ideas for dinner tonight",
+    "is it going to rain tomorrow, and should I care",
+)
+_LOOP_PROBE_SECONDS = 0.01
+
+
+class StubModelSettings(BaseModel):
+    """How the stub Responses server paces its answers.
+
+    Attributes:
+        tokens_per_second: Streaming rate of the answer deltas.
+        reply_tokens: Deltas per streamed answer, one word each.
+        first_token_seconds: Delay before the first delta, after `response.created`.
+        triage_seconds: Delay before a non-streamed (route / effort / memory) response.
+    """
+
+    tokens_per_second: float = Field(default=60.0, description="Answer streaming rate.")
+    reply_tokens: int = Field(default=200, description="Deltas per streamed answer.")
+    first_token_seconds: float = Field(default=0.4, description="Delay before the first delta.")
+    triage_seconds: float = Field(default=0.3, description="Delay of a non-streamed response.")
+
+
+def _response_payload(model: str, text: str | None, output_tokens: int) -> dict[str, Any]:
+    """A Responses API `response` object; `text=None` leaves the output empty (in progress)."""
+    output = (
+        []
+        if text is None
+        else [
+            {
+                "type": "message",
+                "id": "msg_bench",
+                "role": "assistant",
+                "status": "completed",
+                "content": [{"type": "output_text", "text": text, "annotations": []}],
+            }
+        ]
+    )
+    return {
+        "id": "resp_bench",
+        "object": "response",
+        "created_at": time.time(),
+        "model": model,
+        "status": "in_progress" if text is None else "completed",
+        "output": output,
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": [],
+        "usage": {
+            "input_tokens": 1_000,
+            "output_tokens": output_tokens,
+            "total_tokens": 1_000 + output_tokens,
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens_details": {"reasoning_tokens": 0},
+        },
+    }
+
+
+class StubResponsesServer:
+    """A local Responses API that answers every request the same way, at a fixed pace."""
+
+    def __init__(self, settings: StubModelSettings) -> None:
+        """Initializes the server; nothing listens until `start`."""
+        self.settings = settings
+        # Requests served, by the structured format asked for, `stream` or `tools`.
+        self.requests: Counter[str] = Counter()
+        self._runner: web.AppRunner | None = None
+
+    async def start(self) -> str:
+        """Starts listening on a free local port and returns the base url to hand a client."""
+        app = web.Application()
+        app.router.add_post(path="/v1/responses", handler=self._responses)
+        self._runner = web.AppRunner(app=app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(runner=self._runner, host="127.0.0.1", port=0)
+        await site.start()
+        _host, port = self._runner.addresses[0][:2]
+        return f"http://127.0.0.1:{port}/v1"
+
+    async def stop(self) -> None:
+        """Stops listening and closes any open stream."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _responses(self, request: web.Request) -> web.StreamResponse:
+        """Serves one `POST /responses`, streamed or not as the request asks."""
+        body = await request.json()
+        if body.get("stream"):
+            self.requests["stream"] += 1
+            return await self._stream(request=request, model=body["model"])
+        text_format = (body.get("text") or {}).get("format") or {}
+        kind = text_format.get("name") or ("tools" if body.get("tools") else "text")
+        self.requests[kind] += 1
+        await asyncio.sleep(self.settings.triage_seconds)
+        payload = _response_payload(
+            model=body["model"], text=_STRUCTURED_VERDICTS.get(kind, ""), output_tokens=20
+        )
+        return web.json_response(data=payload)
+
+    async def _stream(self, request: web.Request, model: str) -> web.StreamResponse:
+        """Streams `created`, one text delta per token at the configured rate, `completed`."""
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        sequence = itertools.count()
+
+        async def send(event: dict[str, Any]) -> None:
+            event["sequence_number"] = next(sequence)
+            await response.write(f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode())
+
+        await send({
+            "type": "response.created",
+            "response": _response_payload(model=model, text=None, output_tokens=0),
+        })
+        await asyncio.sleep(self.settings.first_token_seconds)
+        words = list(itertools.islice(itertools.cycle(_ANSWER_WORDS), self.settings.reply_tokens))
+        for word in words:
+            await send({
+                "type": "response.output_text.delta",
+                "item_id": "msg_bench",
+                "output_index": 0,
+                "content_index": 0,
+                "delta": f"{word} ",
+                "logprobs": [],
+            })
+            await asyncio.sleep(1 / self.settings.tokens_per_second)
+        await send({
+            "type": "response.completed",
+            "response": _response_payload(
+                model=model, text=" ".join(words), output_tokens=len(words)
+            ),
+        })
+        await response.write_eof()
+        return response
+
+
+_last_snowflake = 0
+
+
+def _next_snowflake() -> int:
+    """A unique, increasing message id that still decodes to roughly now."""
+    global _last_snowflake  # noqa: PLW0603 -- one id sequence for every fake message
+    _last_snowflake = max(_last_snowflake + 1, time_snowflake(datetime.now(tz=UTC)))
+    return _last_snowflake
+
+
+class BenchUser:
+    """A Discord user or member: identity fields only."""
+
+    def __init__(self, user_id: int, name: str, bot: bool = False) -> None:
+        """Initializes the identity fields the pipeline reads."""
+        self.id = user_id
+        self.name = name
+        self.display_name = name
+        self.global_name = name
+        self.bot = bot
+        self.mention = f"<@{user_id}>"
+        self.display_avatar = SimpleNamespace(url="https://example.invalid/avatar.png")
+
+
+class BenchGuild:
+    """A guild with no roles, no cached members and Discord's default upload limit."""
+
+    def __init__(self, guild_id: int, name: str) -> None:
+        """Initializes the guild fields the pipeline reads."""
+        self.id = guild_id
+        self.name = name
+        self.default_role = SimpleNamespace(id=guild_id)
+        self.filesize_limit = 10 * 1024 * 1024
+
+    def get_member(self, user_id: int) -> None:
+        """No members are cached, so mentions render by id."""
+        del user_id
+
+    def get_role(self, role_id: int) -> None:
+        """No roles exist."""
+        del role_id
+
+    def get_channel(self, channel_id: int) -> None:
+        """No other channels exist."""
+        del channel_id
+
+
+class BenchDiscord:
+    """What every fake REST call shares: its round trip, and what it has recorded."""
+
+    def __init__(self, latency: float, bot_user: BenchUser) -> None:
+        """Initializes the shared REST latency and the empty records."""
+        self.latency = latency
+        self.bot_user = bot_user
+        self.calls: Counter[str] = Counter()
+        # Set by the driver: delivers a posted message to the cog, as the gateway would.
+        self.gateway: Callable[[BenchMessage], Awaitable[None]] | None = None
+
+    async def rest(self, route: str) -> None:
+        """Charges one REST round trip to `route`."""
+        self.calls[route] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+
+class BenchChannel:
+    """A public text channel whose history is every message posted to it, in order."""
+
+    def __init__(self, discord: BenchDiscord, guild: BenchGuild, channel_id: int) -> None:
+        """Initializes an empty channel in `guild`."""
+        self.discord = discord
+        self.guild = guild
+        self.id = channel_id
+        self.name = f"bench-{channel_id}"
+        self.parent = None
+        self.log: list[BenchMessage] = []
+
+    def permissions_for(self, role: object) -> SimpleNamespace:
+        """Everyone can see every bench channel, so server memory stays in play."""
+        del role
+        return SimpleNamespace(view_channel=True)
+
+    async def history(
+        self, limit: int, before: "BenchMessage | None" = None, oldest_first: bool = False
+    ) -> AsyncIterator["BenchMessage"]:
+        """Yields up to `limit` messages older than `before`, as one REST page."""
+        await self.discord.rest(route="history")
+        older = [m for m in self.log if before is None or m.id < before.id][-limit:]
+        for message in older if oldest_first else reversed(older):
+            yield message
+
+    async def post(self, message: "BenchMessage") -> None:
+        """Adds a message to the channel and delivers it to the cog."""
+        self.log.append(message)
+        if self.discord.gateway is not None:
+            await self.discord.gateway(message)
+
+    async def send(self, content: str | None = None, **kwargs: object) -> "BenchMessage":
+        """Posts a bot message that replies to nothing."""
+        await self.discord.rest(route="send")
+        sent = BenchMessage(
+            channel=self, author=self.discord.bot_user, content=content or "", payload=kwargs
+        )
+        await self.post(message=sent)
+        return sent
+
+
+class BenchMessage:
+    """A message that records its edits, reactions and the replies made to it."""
+
+    def __init__(
+        self,
+        channel: BenchChannel,
+        author: BenchUser,
+        content: str,
+        reference: "BenchMessage | None" = None,
+        payload: dict[str, object] | None = None,
+    ) -> None:
+        """Initializes a freshly posted message."""
+        self.id = _next_snowflake()
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author
+        self.content = content
+        self.created_at = datetime.now(tz=UTC)
+        self.edited_at: datetime | None = None
+        self.embeds: list[object] = []
+        self.attachments: list[object] = []
+        self.stickers: list[object] = []
+        self.snapshots: list[object] = []
+        self.mentions: list[BenchUser] = []
+        self.system_content = ""
+        self.reference = (
+            SimpleNamespace(resolved=reference, message_id=reference.id)
+            if reference is not None
+            else None
+        )
+        # The failure notice is the one reply the pipeline sends with an embed.
+        self.failed = payload is not None and payload.get("embed") is not None
+        self.edits: list[float] = []
+        self.replies: list[BenchMessage] = []
+
+    def is_system(self) -> bool:
+        """A bench message is never a system message."""
+        return False
+
+    async def reply(self, content: str | None = None, **kwargs: object) -> "BenchMessage":
+        """Posts a bot reply to this message."""
+        await self.channel.discord.rest(route="reply")
+        sent = BenchMessage(
+            channel=self.channel,
+            author=self.channel.discord.bot_user,
+            content=content or "",
+            reference=self,
+            payload=kwargs,
+        )
+        self.replies.append(sent)
+        await self.channel.post(message=sent)
+        return sent
+
+    async def edit(self, content: str | None = None, **kwargs: object) -> None:
+        """Rewrites the content and records when."""
+        del kwargs
+        await self.channel.discord.rest(route="edit")
+        if content is not None:
+            self.content = content
+        self.edited_at = datetime.now(tz=UTC)
+        self.edits.append(time.monotonic())
+
+    async def delete(self) -> None:
+        """Removes the message from its channel."""
+        await self.channel.discord.rest(route="delete")
+        if self in self.channel.log:
+            self.channel.log.remove(self)
+
+    async def add_reaction(self, emoji: str) -> None:
+        """Adds a reaction; only the round trip matters here."""
+        del emoji
+        await self.channel.discord.rest(route="reaction")
+
+    async def remove_reaction(self, emoji: str, member: object) -> None:
+        """Removes a reaction; only the round trip matters here."""
+        del emoji, member
+        await self.channel.discord.rest(route="reaction")
+
+
+class BenchBot:
+    """The slice of `commands.Bot` the reply cog reads: its own user and no other cogs."""
+
+    def __init__(self, user: BenchUser) -> None:
+        """Initializes the bot's own user."""
+        self.user = user
+
+    def get_cog(self, name: str) -> None:
+        """No research cog is loaded, so no channel is ever a research thread."""
+        del name
+
+    def get_user(self, user_id: int) -> None:
+        """No users are cached."""
+        del user_id
+
+
+class ScriptedMessage(BaseModel):
+    """One message of a conversation: who sends it and whether it asks the bot for a reply.
+
+    Attributes:
+        author: The sender's username; the same name is the same user across conversations.
+        content: The message text, without the bot mention.
+        mention: Whether the message mentions the bot, and so gets a reply.
+    """
+
+    author: str = Field(..., description="The sender's username.")
+    content: str = Field(..., description="The message text, without the bot mention.")
+    mention: bool = Field(default=True, description="Whether the message mentions the bot.")
+
+
+def synthetic_conversations(count: int, messages: int) -> list[list[ScriptedMessage]]:
+    """`count` conversations of `messages` distinct prompts each, one author per conversation.
+
+    Every prompt carries its conversation and turn, so no two render alike and the triage
+    cache answers none of them: the bench measures the full route and effort calls.
+    """
+    return [
+        [
+            ScriptedMessage(
+                author=f"user{conversation}",
+                content=f"({conversation}.{turn}) "
+                f"{_SYNTHETIC_PROMPTS[turn % len(_SYNTHETIC_PROMPTS)]}",
+            )
+            for turn in range(messages)
+        ]
+        for conversation in range(count)
+    ]
+
+
+def recorded_conversations(path: Path) -> list[list[ScriptedMessage]]:
+    """The conversations in a replay file, one per `channel` value, in first-seen order."""
+    channels: defaultdict[str, list[ScriptedMessage]] = defaultdict(list)
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        channels[str(record.pop("channel"))].append(ScriptedMessage.model_validate(record))
+    return list(channels.values())
+
+
+class BenchResult(BaseModel):
+    """What one level of the bench measured.
+
+    Attributes:
+        conversations: Conversations run at once.
+        replies: Replies the bot completed, the failed ones included.
+        failures: Replies that ended in the failure notice.
+        wall_seconds: From the first message sent to the last reply finished.
+        timings: Every reply's latency waterfall.
+        loop_lag: Each probe's overshoot of its sleep, in seconds.
+        edits: Edits made to each reply message.
+        llm_requests: Stub requests served, by kind.
+        rest_calls: Fake Discord REST calls made, by route.
+        peak_rss_bytes: The process's peak resident set so far; never goes down across levels.
+        peak_traced_bytes: The traced Python heap peak, or None when not tracing.
+    """
+
+    conversations: int
+    replies: int
+    failures: int
+    wall_seconds: float
+    timings: list[ReplyTiming]
+    loop_lag: list[float]
+    edits: list[int]
+    llm_requests: dict[str, int]
+    rest_calls: dict[str, int]
+    peak_rss_bytes: int
+    peak_traced_bytes: int | None = None
+
+    @property
+    def replies_per_second(self) -> float:
+        """Completed replies per second of wall time."""
+        return self.replies / self.wall_seconds if self.wall_seconds else 0.0
+
+
+class _CollectingTimingRecorder(ReplyTimingRecorder):
+    """Keeps every reply's timing in memory instead of appending it to a day file."""
+
+    collected: list[ReplyTiming] = Field(default_factory=list)
+
+    async def record(self, timing: ReplyTiming) -> None:
+        """Keeps the closed timing."""
+        self.collected.append(timing)
+
+
+def build_bench_cog(bot: BenchBot, base_url: str) -> ReplyGeneratorCogs:
+    """The real reply cog, pointed at the stub server and with no Gemini key."""
+    cog = ReplyGeneratorCogs(bot=cast("commands.Bot", bot))
+    cog.config = LLMConfig.model_validate({
+        "OPENAI_BASE_URL": base_url,
+        "OPENAI_API_KEY": "bench",
+        "GEMINI_API_KEY": "",
+    })
+    cog.timing_recorder = _CollectingTimingRecorder()
+    return cog
+
+
+async def _probe_loop_lag(samples: list[float]) -> None:
+    """Records how late each short sleep wakes up, until cancelled."""
+    while True:
+        started = time.monotonic()
+        await asyncio.sleep(_LOOP_PROBE_SECONDS)
+        samples.append(max(0.0, time.monotonic() - started - _LOOP_PROBE_SECONDS))
+
+
+async def _play(
+    channel: BenchChannel, script: list[ScriptedMessage], users: dict[str, BenchUser]
+) -> list[BenchMessage]:
+    """Sends a conversation's messages one at a time, each after the last one's reply."""
+    sent: list[BenchMessage] = []
+    for scripted in script:
+        author = users.setdefault(
+            scripted.author, BenchUser(user_id=len(users) + 1, name=scripted.author)
+        )
+        content = f"<@{BOT_USER_ID}> {scripted.content}" if scripted.mention else scripted.content
+        message = BenchMessage(channel=channel, author=author, content=content)
+        # `post` delivers to `on_message`, which returns once the reply is finalized.
+        await channel.post(message=message)
+        if scripted.mention:
+            sent.append(message)
+    return sent
+
+
+async def run_bench(
+    conversations: Sequence[list[ScriptedMessage]],
+    settings: StubModelSettings,
+    discord_latency: float = 0.0,
+    trace_memory: bool = False,
+) -> BenchResult:
+    """Plays every conversation at once through a fresh cog and measures the run.
+
+    Args:
+        conversations: One script per channel; all of them run concurrently.
+        settings: How the stub model paces its answers.
+        discord_latency: Seconds charged to every fake Discord REST call.
+        trace_memory: Whether to trace the Python heap for its peak.
+
+    Returns:
+        The level's measurements.
+    """
+    server = StubResponsesServer(settings=settings)
+    base_url = await server.start()
+    bot_user = BenchUser(user_id=BOT_USER_ID, name="bench-bot", bot=True)
+    discord = BenchDiscord(latency=discord_latency, bot_user=bot_user)
+    cog = build_bench_cog(bot=BenchBot(user=bot_user), base_url=base_url)
+
+    async def gateway(message: BenchMessage) -> None:
+        await cog.on_message(message=cast("Message", message))
+
+    discord.gateway = gateway
+    guild = BenchGuild(guild_id=1, name="bench")
+    users: dict[str, BenchUser] = {}
+    lag: list[float] = []
+    probe = asyncio.create_task(_probe_loop_lag(samples=lag))
+    if trace_memory:
+        tracemalloc.start()
+    started = time.monotonic()
+    try:
+        played = await asyncio.gather(
+            *(
+                _play(
+                    channel=BenchChannel(discord=discord, guild=guild, channel_id=index + 1),
+                    script=script,
+                    users=users,
+                )
+                for index, script in enumerate(conversations)
+            )
+        )
+        wall_seconds = time.monotonic() - started
+    finally:
+        probe.cancel()
+        await asyncio.gather(probe, return_exceptions=True)
+        peak_traced = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        if trace_memory:
+            tracemalloc.stop()
+        await cog.openai_client.close()
+        await server.stop()
+
+    replies = [reply for messages in played for message in messages for reply in message.replies]
+    timing_recorder = cast("_CollectingTimingRecorder", cog.timing_recorder)
+    return BenchResult(
+        conversations=len(conversations),
+        replies=sum(len(messages) for messages in played),
+        failures=sum(reply.failed for reply in replies),
+        wall_seconds=wall_seconds,
+        timings=timing_recorder.collected,
+        loop_lag=lag,
+        edits=[len(reply.edits) for reply in replies if not reply.failed],
+        llm_requests=dict(server.requests),
+        rest_calls=dict(discord.calls),
+        # Linux reports kilobytes.
+        peak_rss_bytes=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        peak_traced_bytes=peak_traced,
+    )
+
+
+def _answer_start(timing: ReplyTiming) -> float | None:
+    """When the route's deliverable (the answer, an image or a video) started, if it did."""
+    return min(
+        (s.start for s in timing.stages if s.stage in ("answer", "image", "video")), default=None
+    )
+
+
+def _metric_rows(result: BenchResult) -> dict[str, str]:
+    """One level's figures, keyed by the row label they print under."""
+    pre_answer = [s for t in result.timings if (s := _answer_start(timing=t)) is not None]
+    first_content = [
+        t.marks["first_content"] for t in result.timings if "first_content" in t.marks
+    ]
+    rows = {
+        "replies": str(result.replies),
+        "failed": str(result.failures),
+        "replies/s": f"{result.replies_per_second:.2f}",
+    }
+    for name, values in (
+        ("pre-answer", pre_answer),
+        ("first content", first_content),
+        ("total", [t.total for t in result.timings]),
+    ):
+        for q in (50, 95, 99):
+            rows[f"{name} p{q}"] = f"{_percentile(values=values, q=q):.2f}s" if values else "-"
+    lag = result.loop_lag
+    rows["loop lag p99"] = f"{_percentile(values=lag, q=99) * 1000:.1f}ms" if lag else "-"
+    rows["loop lag max"] = f"{max(lag, default=0.0) * 1000:.1f}ms"
+    rows["edits per reply p50"] = (
+        f"{_percentile(values=result.edits, q=50):.0f}" if result.edits else "-"
+    )
+    rows["peak rss"] = f"{result.peak_rss_bytes / 2**20:.0f}MB"
+    if result.peak_traced_bytes is not None:
+        rows["peak heap"] = f"{result.peak_traced_bytes / 2**20:.0f}MB"
+    return rows
+
+
+def _results_table(results: list[BenchResult]) -> Table:
+    """One column per concurrency level, one row per figure."""
+    table = Table(title="reply pipeline under load", title_justify="left", box=box.SIMPLE_HEAD)
+    table.add_column("conversations at once", no_wrap=True)
+    for result in results:
+        table.add_column(str(result.conversations), justify="right")
+    columns = [_metric_rows(result=result) for result in results]
+    for label in columns[0] if columns else ():
+        table.add_row(label, *(column.get(label, "") for column in columns))
+    return table
+
+
+def _parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    """Parses the reply-bench CLI arguments."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--conversations",
+        type=int,
+        nargs="+",
+        default=[1, 4, 16],
+        help="Conversations run at once; one level per value.",
+    )
+    parser.add_argument(
+        "--messages", type=int, default=5, help="Messages per synthetic conversation."
+    )
+    parser.add_argument(
+        "--replay",
+        type=Path,
+        default=None,
+        help="JSONL of recorded messages to replay instead of synthetic ones; each level "
+        "plays its first N channels.",
+    )
+    parser.add_argument("--tokens-per-second", type=float, default=60.0)
+    parser.add_argument("--reply-tokens", type=int, default=200)
+    parser.add_argument("--first-token-seconds", type=float, default=0.4)
+    parser.add_argument("--triage-seconds", type=float, default=0.3)
+    parser.add_argument(
+        "--discord-latency",
+        type=float,
+        default=0.05,
+        help="Seconds charged to every fake Discord REST call.",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Also report the traced Python heap peak; slows every level noticeably.",
+    )
+    return parser.parse_args(argv)
+
+
+async def _run_levels(args: argparse.Namespace) -> list[BenchResult]:
+    """Runs every requested level in turn, on one event loop."""
+    settings = StubModelSettings(
+        tokens_per_second=args.tokens_per_second,
+        reply_tokens=args.reply_tokens,
+        first_token_seconds=args.first_token_seconds,
+        triage_seconds=args.triage_seconds,
+    )
+    recorded = recorded_conversations(path=args.replay) if args.replay is not None else None
+    # The price table is loaded once per process, off the loop; loading it inside the first
+    # level would charge that level a network timeout on an offline machine.
+    await asyncio.to_thread(load_model_info)
+    # One unreported reply first, so the first level does not also pay every lazy import and
+    # schema bootstrap the pipeline's first pass triggers.
+    await run_bench(conversations=synthetic_conversations(count=1, messages=1), settings=settings)
+    results: list[BenchResult] = []
+    for level in args.conversations:
+        conversations = (
+            recorded[:level]
+            if recorded is not None
+            else synthetic_conversations(count=level, messages=args.messages)
+        )
+        console.print(f"[bold cyan]running[/bold cyan] {len(conversations)} at once")
+        results.append(
+            await run_bench(
+                conversations=conversations,
+                settings=settings,
+                discord_latency=args.discord_latency,
+                trace_memory=args.trace_memory,
+            )
+        )
+    return results
+
+
+def main() -> None:
+    """Runs the bench in a throwaway working directory and prints one row per level."""
+    args = _parse_args()
+    if args.replay is not None:
+        args.replay = args.replay.resolve()
+    # No Gemini key, so no reply ever takes a direct-to-Google path; `gemini_keys` reads the
+    # numbered variables straight from the environment.
+    for name in [name for name in os.environ if name.startswith("GEMINI_API_KEY")]:
+        del os.environ[name]
+    os.environ["MEMORY_GIT_ENABLED"] = "false"
+    # Configured so every log record and span is built as it is in production, which is part
+    # of what a reply costs, but printed nowhere: a run would otherwise flood the terminal.
+    logfire.configure(
+        send_to_logfire=False, console=False, scrubbing=False, inspect_arguments=False
+    )
+    with tempfile.TemporaryDirectory(prefix="reply-bench-") as workdir:
+        # Every store the pipeline writes is addressed relative to the working directory.
+        os.chdir(workdir)
+        Path("data/database").mkdir(parents=True)
+        results = asyncio.run(_run_levels(args=args))
+    console.print(_results_table(results=results))
+
+
+if __name__ == "__main__":
+    main()
@@ -20,7 +20,7 @@ from discordbot.typings.config import DiscordConfig
 from discordbot.typings.economy import BASE_MESSAGE_REWARD_AMOUNT, MESSAGE_REWARD_COOLDOWN_SECONDS
 from discordbot.utils.model_pricing import MODEL_INFO_REFRESH_MINUTES, refresh_model_info
 from discordbot.utils.discord_embeds import embed_spacer_payload
-from discordbot.services.economy.database import credit_with_repayment
+from discordbot.services.economy.message_rewards import message_rewards
 
 
 class DiscordBot(commands.Bot):
@@ -128,6 +128,7 @@ class DiscordBot(commands.Bot):
         )
 
         await self.sync_all_application_commands()
+        message_rewards.start()
         self.status_task.start()
         self.price_table_task.start()
 
@@ -176,7 +177,9 @@ class DiscordBot(commands.Bot):
         """Awards the cooldown-gated message reward, then dispatches commands.
 
         This is the only faucet that pays an action reward; it is best-effort, so
-        command dispatch runs whether or not the credit lands.
+        command dispatch runs whether or not the credit lands. The credit itself is
+        write-behind: `message_rewards` batches it with everyone else's and writes
+        them together a few seconds later.
 
         Args:
             message: The message that was sent.
@@ -195,7 +198,7 @@ class DiscordBot(commands.Bot):
             guild = getattr(message, "guild", None)
             try:
                 avatar_url = await guild_avatar_url(user=message.author, guild=guild)
-                await credit_with_repayment(
+                message_rewards.add(
                     user_id=message.author.id,
                     name=message.author.name,
                     avatar_url=avatar_url,
@@ -207,7 +210,7 @@ class DiscordBot(commands.Bot):
                 else:
                     self._message_reward_at[message.author.id] = last_rewarded_at
                 # Broad on purpose: the reward is best-effort and must never stop
-                # process_commands, so every failure mode (DB, avatar fetch) is swallowed.
+                # process_commands, so every failure mode (avatar fetch) is swallowed.
                 logfire.warn(
                     "Failed to award base message points",
                     user_id=message.author.id,
@@ -217,6 +220,11 @@ class DiscordBot(commands.Bot):
                 )
         await self.process_commands(message)
 
+    async def close(self) -> None:
+        """Writes the pending message rewards, then closes the bot."""
+        await message_rewards.stop()
+        await super().close()
+
     async def on_command_completion(self, context: commands.Context[commands.Bot]) -> None:
         """Handles successful command execution.
 
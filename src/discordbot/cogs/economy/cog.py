@@ -42,6 +42,7 @@ from discordbot.services.economy.database import (
     call_central_bank_loans,
     get_central_bank_status,
     repay_central_bank_loans,
+    verify_economy_aggregates,
     monthly_rate_percent_to_bps,
     create_personal_loan_request,
     create_central_bank_loan_request,
@@ -207,6 +208,54 @@ class EconomyCogs(commands.Cog):
             delta=-parsed_amount,
         )
 
+    @admin.subcommand(
+        name="aggregates",
+        description="Economy admins only: verify the running economy totals against a scan.",
+        name_localizations={Locale.zh_TW: "累計值", Locale.ja: "累計値"},
+        description_localizations={
+            Locale.zh_TW: "economy admin 限定：以全表掃描檢查經濟累計值",
+            Locale.ja: "economy admin 専用：経済の累計値を全件スキャンと照合します。",
+        },
+    )
+    async def admin_aggregates(
+        self,
+        interaction: Interaction[commands.Bot],
+        rebuild: bool = SlashOption(
+            name="rebuild",
+            description="Overwrite the running totals with the scan when they differ.",
+            name_localizations={Locale.zh_TW: "重建", Locale.ja: "再構築"},
+            description_localizations={
+                Locale.zh_TW: "累計值有偏差時, 以掃描結果覆寫",
+                Locale.ja: "差異がある場合、スキャン結果で累計値を上書きします。",
+            },
+            required=False,
+            default=False,
+        ),
+    ) -> None:
+        """Checks `economy_aggregates` against a full scan and optionally rebuilds it."""
+        if interaction.user is None:
+            return
+        actor = interaction.user
+        await interaction.response.defer(ephemeral=True)
+        if not await get_admin(user_id=actor.id):
+            actor_avatar_url = await guild_avatar_url(
+                user=actor, guild=getattr(interaction, "guild", None)
+            )
+            await send_private_followup(
+                interaction=interaction,
+                embed=embeds.build_error_embed(
+                    title="權限不足",
+                    description="### 只有 economy admin 可以執行這個操作",
+                    author_name=actor.display_name,
+                    author_icon_url=actor_avatar_url,
+                ),
+            )
+            return
+        check = await verify_economy_aggregates(rebuild=rebuild)
+        await send_private_followup(
+            interaction=interaction, embed=embeds.build_economy_aggregates_embed(check=check)
+        )
+
     async def _run_admin_adjustment(
         self,
         interaction: Interaction[commands.Bot],
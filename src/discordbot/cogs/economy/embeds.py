@@ -16,6 +16,7 @@ from discordbot.typings.economy import (
     VipPurchaseResult,
     CasinoLedgerSnapshot,
     LossLeaderboardEntry,
+    EconomyAggregatesCheck,
     BalanceAdjustmentResult,
     LoanProposalAcceptResult,
 )
@@ -249,6 +250,38 @@ def build_admin_adjustment_embed(  # noqa: PLR0913 -- mirrors every visible adju
     return embed
 
 
+def build_economy_aggregates_embed(*, check: EconomyAggregatesCheck) -> Embed:
+    """Builds the private result embed for an admin aggregates verification."""
+    if check.consistent:
+        description = "### 累計值與全表掃描一致"
+    elif check.rebuilt:
+        description = "### 累計值有偏差, 已依全表掃描重建"
+    else:
+        description = "### 累計值有偏差, 加上 rebuild 即可重建"
+    embed = Embed(
+        title="經濟累計值檢查",
+        description=description,
+        color=ADMIN_COLOR if check.consistent or check.rebuilt else ERROR_COLOR,
+    )
+    embed.add_field(
+        name="全體正餘額",
+        value=(
+            f"累計 {amount_code(amount=check.stored_total_positive_balance, compact=True)}\n"
+            f"掃描 {amount_code(amount=check.scanned_total_positive_balance, compact=True)}"
+        ),
+        inline=False,
+    )
+    embed.add_field(
+        name="央行未還本金",
+        value=(
+            f"累計 {amount_code(amount=check.stored_central_bank_principal, compact=True)}\n"
+            f"掃描 {amount_code(amount=check.scanned_central_bank_principal, compact=True)}"
+        ),
+        inline=False,
+    )
+    return embed
+
+
 def build_balance_embed(
     *, display_name: str, avatar_url: str, portfolio: PortfolioView, is_vip: bool, age_days: int
 ) -> Embed:
@@ -5,6 +5,11 @@ referenced as an `input_file` part: the direct-SDK upload, the activation poll,
 per-source pending re-poll cache. The dead-source cache and the media semaphore it works
 against are inherited from `base.AttachmentRenderer`. Kept separate from `input.py` so the
 upload state machine does not tangle with source-to-part rendering.
+
+Every ACTIVE upload is also recorded in the persistent per-key registry
+(`services/gemini_keys/uploads.py`), which is consulted before any download: a source seen in
+an earlier process resolves to its live uri with no download, and bytes already uploaded
+under the same key under another source id are reused rather than sent again.
 """
 
 import io
@@ -23,6 +28,13 @@ from google.genai.types import FileState
 from openai.types.responses.response_input_file_param import ResponseInputFileParam
 
 from discordbot.typings.timeouts import ATTACHMENT_ACTIVATION_TIMEOUT_SECONDS
+from discordbot.utils.reply_timing import queued_slot
+from discordbot.services.gemini_keys.uploads import (
+    content_digest,
+    remember_upload,
+    find_upload_for_source,
+    find_upload_for_content,
+)
 from discordbot.cogs.gen_reply.attachment.base import (
     RenderedPart,
     AttachmentRenderer,
@@ -56,6 +68,7 @@ class PendingUpload(BaseModel):
         name: The Gemini file resource name (`files/<id>`) used to re-poll its state.
         uri: The full file uri the answer references once the file becomes ACTIVE.
         expires_at: Provider-reported expiry; a pending entry past it is discarded.
+        content_hash: Digest of the uploaded bytes, so an adopted upload joins the registry.
     """
 
     name: str = Field(..., description="The Gemini file resource name used to re-poll its state.")
@@ -65,6 +78,9 @@ class PendingUpload(BaseModel):
     expires_at: datetime = Field(
         ..., description="Provider-reported expiry; a pending entry past it is discarded."
     )
+    content_hash: str = Field(
+        default="", description="Digest of the uploaded bytes; empty when never hashed."
+    )
 
 
 class GeminiFileUploader(AttachmentRenderer):
@@ -80,9 +96,14 @@ class GeminiFileUploader(AttachmentRenderer):
         api_key: The Gemini key this uploader uploads with. Required rather than defaulted,
             so a caller that forgot to say which key fails at construction instead of
             silently uploading to the first one while the answer dispatches on another.
+        key_index: The number of that key, which the upload registry is keyed on. None
+            leaves the registry out entirely, so nothing is reused or recorded.
     """
 
     api_key: str = Field(..., description="The Gemini key this uploader uploads with.")
+    key_index: int | None = Field(
+        default=None, description="The key's number for the upload registry; None skips it."
+    )
     # Uploads that timed out while still PROCESSING, keyed by attachment source cache_key
     # (attachment/sticker id or embed url). The next reference to that source re-polls the
     # same file (usually ACTIVE by then) instead of re-uploading. Kept until the file's
@@ -191,6 +212,14 @@ class GeminiFileUploader(AttachmentRenderer):
         )
         if uploaded.state == FileState.ACTIVE:
             self._pending_uploads.pop(cache_key, None)
+            if self.key_index is not None and pending.content_hash:
+                await remember_upload(
+                    cache_key=cache_key,
+                    content_hash=pending.content_hash,
+                    key_index=self.key_index,
+                    uri=pending.uri,
+                    expires_at=pending.expires_at,
+                )
             return True, (pending.uri, pending.expires_at)
         if uploaded.state == FileState.PROCESSING:
             # Still cooking; keep it and retry on the next reference.
@@ -225,6 +254,9 @@ class GeminiFileUploader(AttachmentRenderer):
         handled, adopted = await self._repoll_pending_upload(cache_key=cache_key)
         if handled:
             return adopted
+        reused = await self._find_registered_upload(cache_key=cache_key)
+        if reused is not None:
+            return reused
         # The dead-source skip is for history scrollback only (an expired CDN url that
         # re-fails every turn); current/reference renders never opt in, so one transient
         # failure on a just-posted attachment is not poisoned for the next reply.
@@ -234,7 +266,7 @@ class GeminiFileUploader(AttachmentRenderer):
         # attachment type, so concurrent pipelines cannot launch dozens of CDN downloads or
         # uploads at once and buffer all their bytes while waiting for an upload slot.
         wait_started = time.monotonic()
-        async with media_semaphore.get():
+        async with queued_slot(semaphore=media_semaphore.get(), stage="media_queue"):
             logfire.debug(
                 "gemini media slot acquired",
                 cache_key=loggable_cache_key(cache_key=cache_key),
@@ -256,15 +288,63 @@ class GeminiFileUploader(AttachmentRenderer):
                 if allow_dead_cache:
                     self._mark_dead(cache_key=cache_key)
                 return None
+            # Off the loop: a linked video can be hundreds of megabytes.
+            content_hash = await asyncio.to_thread(content_digest, data)
+            reused = await self._find_registered_upload(
+                cache_key=cache_key, content_hash=content_hash
+            )
+            if reused is not None:
+                return reused
             result = await self._upload_file(
                 filename=filename, data=data, content_type=content_type
             )
+        return await self._record_upload_result(
+            cache_key=cache_key, content_hash=content_hash, result=result
+        )
+
+    async def _find_registered_upload(
+        self, cache_key: int | str, content_hash: str = ""
+    ) -> tuple[str, datetime] | None:
+        """Returns a live registry upload for this source, or for these bytes once hashed."""
+        if self.key_index is None:
+            return None
+        if content_hash:
+            reused = await find_upload_for_content(
+                cache_key=cache_key, content_hash=content_hash, key_index=self.key_index
+            )
+        else:
+            reused = await find_upload_for_source(cache_key=cache_key, key_index=self.key_index)
+        if reused is not None:
+            logfire.debug(
+                "gemini upload reused",
+                cache_key=loggable_cache_key(cache_key=cache_key),
+                matched="content" if content_hash else "source",
+            )
+        return reused
+
+    async def _record_upload_result(
+        self,
+        cache_key: int | str,
+        content_hash: str,
+        result: tuple[str, datetime] | PendingUpload | None,
+    ) -> tuple[str, datetime] | None:
+        """Parks a still-PROCESSING upload for a re-poll, or registers an ACTIVE one."""
         if isinstance(result, PendingUpload):
-            self._pending_uploads[cache_key] = result
+            self._pending_uploads[cache_key] = result.model_copy(
+                update={"content_hash": content_hash}
+            )
             self._pending_uploads.move_to_end(cache_key)
             if len(self._pending_uploads) > 128:
                 self._pending_uploads.popitem(last=False)
             return None
+        if result is not None and self.key_index is not None:
+            await remember_upload(
+                cache_key=cache_key,
+                content_hash=content_hash,
+                key_index=self.key_index,
+                uri=result[0],
+                expires_at=result[1],
+            )
         return result
 
     async def _upload_file(  # noqa: PLR0911 -- one best-effort upload with several distinct degrade-to-None paths
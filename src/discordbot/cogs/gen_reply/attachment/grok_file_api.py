@@ -54,6 +54,7 @@ from openai.types.responses.response_input_file_param import ResponseInputFilePa
 
 from discordbot.typings.llm import LLMConfig
 from discordbot.typings.timeouts import GROK_FILE_UPLOAD_TIMEOUT_SECONDS
+from discordbot.utils.reply_timing import queued_slot
 from discordbot.cogs.gen_reply.attachment.base import (
     RenderedPart,
     AttachmentRenderer,
@@ -153,7 +154,7 @@ class GrokFileUploader(AttachmentRenderer):
         """Returns an uploaded xAI file id and its expiry."""
         if allow_dead_cache and self._is_known_dead(cache_key=cache_key):
             return None
-        async with media_semaphore.get():
+        async with queued_slot(semaphore=media_semaphore.get(), stage="media_queue"):
             try:
                 data, content_type = await load_data()
             except Exception as exc:
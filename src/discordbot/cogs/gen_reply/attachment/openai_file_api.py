@@ -19,6 +19,7 @@ from openai.types.responses.response_input_file_param import ResponseInputFilePa
 from openai.types.responses.response_input_image_param import ResponseInputImageParam
 
 from discordbot.typings.llm import LLMConfig
+from discordbot.utils.reply_timing import queued_slot
 from discordbot.cogs.gen_reply.attachment.base import (
     RenderedPart,
     AttachmentRenderer,
@@ -117,7 +118,7 @@ class OpenAIFileUploader(AttachmentRenderer):
         """Returns an uploaded OpenAI file id and its cache expiry."""
         if allow_dead_cache and self._is_known_dead(cache_key=cache_key):
             return None
-        async with media_semaphore.get():
+        async with queued_slot(semaphore=media_semaphore.get(), stage="media_queue"):
             try:
                 data, content_type = await load_data()
             except Exception as exc:
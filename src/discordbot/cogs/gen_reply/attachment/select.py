@@ -10,7 +10,9 @@ from discordbot.cogs.gen_reply.attachment.gemini_file_api import GeminiFileUploa
 # from discordbot.cogs.gen_reply.attachment.anthropic_file_api import AnthropicFileUploader
 
 
-def build_attachment_handler(model_name: str, gemini_api_key: str) -> AttachmentRenderer:
+def build_attachment_handler(
+    model_name: str, gemini_api_key: str, gemini_key_index: int | None = None
+) -> AttachmentRenderer:
     """Returns the attachment renderer matching the answer (slow) model's provider.
 
     Only Gemini resolves an uploaded Files-API URI; OpenAI / Anthropic answer models reject
@@ -23,7 +25,8 @@ def build_attachment_handler(model_name: str, gemini_api_key: str) -> Attachment
     the environment here: the uploaded file is readable only by the project that uploaded it,
     so an uploader on a different key from the answer's `-key<n>` deployment fails the whole
     request. An empty string is the unbalanced case (no key configured), which behaves as it
-    always did — the client raises lazily and the attachment is dropped.
+    always did — the client raises lazily and the attachment is dropped. `gemini_key_index` is
+    that key's number, which keys the persistent upload registry; None leaves it out.
 
     `file_api_enabled` overrides the provider branch entirely: a provider whose Files API is
     refusing to resolve references costs the WHOLE reply, since the answer carries the failing
@@ -34,7 +37,7 @@ def build_attachment_handler(model_name: str, gemini_api_key: str) -> Attachment
     if not LLMConfig().file_api_enabled:
         return InlineRenderer()
     if "gemini" in model_name:
-        return GeminiFileUploader(api_key=gemini_api_key)
+        return GeminiFileUploader(api_key=gemini_api_key, key_index=gemini_key_index)
     # if "gpt" in model_name:
     #     return OpenAIFileUploader(model_name=model_name)
     # if "claude" in model_name:
@@ -5,7 +5,7 @@ import time
 import base64
 from typing import TYPE_CHECKING, Any, Literal, TypedDict, cast
 import asyncio
-from functools import cached_property
+from functools import partial, cached_property
 import contextlib
 from contextvars import ContextVar
 from collections.abc import AsyncIterator
@@ -13,7 +13,17 @@ from collections.abc import AsyncIterator
 from google import genai
 from openai import AsyncOpenAI
 import logfire
-from nextcord import Embed, Message, NotFound, TextChannel, HTTPException, AllowedMentions
+from nextcord import (
+    Embed,
+    Message,
+    NotFound,
+    TextChannel,
+    HTTPException,
+    AllowedMentions,
+    RawMessageDeleteEvent,
+    RawMessageUpdateEvent,
+    RawBulkMessageDeleteEvent,
+)
 from pydantic import ValidationError
 from nextcord.ext import commands
 from openai.types.responses import ResponseStreamEvent
@@ -22,7 +32,7 @@ from openai.types.responses.response_input_file_param import ResponseInputFilePa
 from openai.types.responses.response_input_text_param import ResponseInputTextParam
 from openai.types.responses.response_input_image_param import ResponseInputImageParam
 
-from discordbot.typings.llm import LLMConfig
+from discordbot.typings.llm import LLMConfig, GeminiKeySlot
 from discordbot.utils.douyin import DOUYIN_URL_RE, is_douyin_post_url
 from discordbot.utils.images import convert_base64_to_data_uri
 from discordbot.utils.threads import THREADS_URL_RE
@@ -41,6 +51,13 @@ from discordbot.typings.timeouts import (
     GENERATED_VIDEO_ACTIVATION_TIMEOUT_SECONDS,
 )
 from discordbot.utils.llm_errors import extract_friendly_error
+from discordbot.utils.reply_timing import (
+    ReplyTimingRecorder,
+    timed_task,
+    timed_stage,
+    start_reply_timing,
+    current_reply_timing,
+)
 from discordbot.cogs.gen_reply.input import MessageInputBuilder
 from discordbot.utils.discord_embeds import embed_spacer_payload
 from discordbot.utils.llm_transcript import (
@@ -63,7 +80,6 @@ from discordbot.services.memory.store import (
     user_scope,
     iter_scopes,
     server_scope,
-    read_memory_document,
 )
 from discordbot.cogs.gen_reply.context import ReplyContext
 from discordbot.cogs.gen_reply.prompts import (
@@ -83,6 +99,7 @@ from discordbot.cogs.gen_reply.prompts import (
     REQUEST_LOCATION_CONTEXT_PROMPT,
 )
 from discordbot.cogs.gen_reply.toolkit import GeminiKeyToolkit
+from discordbot.cogs.gen_reply.prefetch import AttachmentPrefetcher
 from discordbot.cogs.gen_reply.files_api import upload_to_files_api
 from discordbot.cogs.gen_reply.streaming import (
     ResponseStreamer,
@@ -97,6 +114,7 @@ from discordbot.services.memory.pipeline import (
     consolidate_if_needed,
     schedule_memory_update,
 )
+from discordbot.services.memory.store_io import memory_io
 from discordbot.cogs.gen_reply.generation import MAX_VIDEO_REFERENCE_IMAGES
 from discordbot.cogs.gen_reply.memory_tool import (
     NO_STORED_MEMORY,
@@ -127,8 +145,12 @@ from discordbot.cogs.gen_reply.interactions import (
     create_interactions_answer_stream,
 )
 from discordbot.cogs.gen_reply.link_sources import LinkContextSource
+from discordbot.cogs.gen_reply.triage_cache import TriageCache, triage_fingerprint
 from discordbot.services.memory.git_history import memory_git
-from discordbot.services.gemini_keys.balancer import pick_gemini_key
+from discordbot.cogs.gen_reply.history_cache import ChannelHistoryCache
+from discordbot.cogs.gen_reply.history_budget import HistoryPack, HistoryCostIndex, pack_history
+from discordbot.services.gemini_keys.balancer import peek_gemini_key, pick_gemini_key
+from discordbot.cogs.gen_reply.selection_cache import MemorySelectionCache
 from discordbot.cogs.gen_reply.link_sources.douyin import (
     build_douyin_context_messages,
     douyin_timeout_context_messages,
@@ -154,45 +176,14 @@ MEMORY_CONTEXT_TARGET_USERS = 8
 # Recorded as a reply's route when the pipeline failed before the router returned one.
 UNROUTED_REPLY = "unrouted"
 
-# How much channel history one answer reads, bounded on three axes (the third is
-# `MAX_HISTORY_MEDIA_PARTS` below) because no one of them is the right shape alone. Discord
-# conversation here is overwhelmingly one-line messages — measured across 10M logged messages,
-# the median is 6 characters and the busiest channel's last 200 come to 1.5k — so a message
-# count alone lets a chatty channel hand the model almost nothing while a channel of long posts
-# blows the input up. Whichever bound binds first wins, and in practice that has only ever been
-# the char budget: it alone held history to 107-119 messages at 8000, so the message limit is a
-# backstop rather than the working bound.
+# How much channel history one answer reads, bounded twice: by message count here, and by the
+# answer tier's `history_token_budget` in `history_budget.pack_history`. Discord conversation
+# here is overwhelmingly one-line messages — measured across 10M logged messages, the median is
+# 6 characters and the busiest channel's last 200 come to 1.5k — so a message count alone lets a
+# chatty channel hand the model almost nothing while a channel of long posts blows the input up.
+# In practice the token budget is what binds, so the message limit is a backstop rather than the
+# working bound.
 HISTORY_MESSAGE_LIMIT = 500
-# Doubled from 8000 once the media cap landed. Text was never the expensive half — the whole
-# budget is worth ~4k input tokens against 1.3k to 1.9k for a single attachment — so what made
-# widening it unsafe was that more messages meant proportionally more files, which the cap now
-# decouples.
-HISTORY_CHAR_BUDGET = 16000
-
-# What a history message costs beyond its own text: the rendered form carries an author header,
-# and an attachment-only message has empty `content` but still renders a marker standing in for
-# it. Without a floor per message a run of image posts would count as free and overshoot.
-HISTORY_PER_MESSAGE_OVERHEAD = 40
-
-# How many history attachments ride as real uploaded files. The char budget cannot see this cost
-# at all: an attachment-only message spends `HISTORY_PER_MESSAGE_OVERHEAD` there while re-sending
-# every one of its files to the model on every single reply, and the Files-API cache in `input.py`
-# only saves the re-upload, never the tokens. A media part costs ~1.1k input tokens, measured as
-# the median over consecutive replies in one channel, where the history text barely moves between
-# the two; the naive slope across all replies reads 2.3k and is measuring the channels that post
-# many files rather than the part. Past this many the older attachments degrade to the
-# `[attachment: ...]` markers the route already reads, which keeps the model aware a file was
-# posted without paying to re-read it.
-#
-# Ten was a judgement call when it landed and 249 post-deploy replies say to keep it, because what
-# a reply WOULD send uncapped is bimodal rather than graded: just over half want five parts or
-# fewer and never reach the cap, while the p90 is 92 and the worst 128. There is no bulge just
-# above ten to buy, so raising the cap to 20 un-caps 21 more of them and leaves 82 still capped,
-# and every further step buys less for more. Latency says the same: the answer awaits this render,
-# which runs a median 6s when the cap binds against 0s when it does not, and the uploads under it
-# share `MEDIA_CONCURRENCY` slots with every other reply in flight, so the cost of a raise is not
-# confined to the reply that asked for it.
-MAX_HISTORY_MEDIA_PARTS = 10
 
 # The model this turn most recently dispatched on, so `gen_reply failed` can name it: the failure
 # surfaces in `on_message`, several frames above every place that picks a model, and a provider
@@ -249,79 +240,6 @@ def _authored_link_texts(message: Message) -> list[str]:
     return [USAGE_FOOTER_RE.sub("", span).strip() for span in spans]
 
 
-def _trim_history_to_budget(messages: list[Message]) -> list[Message]:
-    """Keeps the newest history messages that fit `HISTORY_CHAR_BUDGET`, cut on a boundary.
-
-    `_fetch_history` returns oldest-first, so this walks from the end and reverses back: what
-    survives is the conversation closest to the question being answered, and the oldest context
-    is what gets dropped. Cutting between messages rather than mid-text is the point — half a
-    sentence with no author and no end reads as corrupted context rather than as less of it.
-
-    The newest message is always kept even when it alone exceeds the budget, so a single long
-    post can never reduce history to nothing.
-    """
-    kept: list[Message] = []
-    spent = 0
-    for candidate in reversed(messages):
-        spent += len(candidate.content or "") + HISTORY_PER_MESSAGE_OVERHEAD
-        if spent > HISTORY_CHAR_BUDGET and kept:
-            break
-        kept.append(candidate)
-    kept.reverse()
-    return kept
-
-
-def _history_media_over_budget(
-    builder: MessageInputBuilder, hist_messages: list[Message]
-) -> dict[int, int]:
-    """History message ids to how many attachments each renders as markers, newest kept first.
-
-    The count rides along because it is what tells an operator the cap did anything: `media_parts`
-    on the dispatch record stops at the cap by construction, so only the number held back says
-    whether this turn was trimmed by one file or by thirty.
-
-    Walks from the newest message back, the same direction and for the same reason as
-    `_trim_history_to_budget`: what keeps its real files is the conversation closest to the
-    question being asked. Once one message is refused every older one is too, so the files the
-    model gets are always an unbroken run ending at the present. Letting a later small message
-    slip into the leftover budget would put an older attachment on screen while a newer one
-    showed only a marker, which reads as the pipeline losing files at random.
-
-    Counting is off `collect_attachment_sources` rather than the modality-gated list, so it
-    stays free of the per-message log the gate emits; the gate dropped nothing at all across
-    the day this was measured, and over-counting can only refuse an attachment the answer was
-    never going to be sent.
-
-    The newest message carrying attachments is exempt, so a single post of many images is
-    never reduced to nothing but markers while the budget sits unspent. That makes the cap a
-    soft one on exactly that message: a source is not only an upload, it is also every sticker
-    and every embed image and thumbnail, snapshots included, so one post of ten files carrying
-    a few unfurled link cards can exempt well past `MAX_HISTORY_MEDIA_PARTS`. Everything older
-    than it is still bounded.
-    """
-    over: dict[int, int] = {}
-    spent = 0
-    for candidate in reversed(hist_messages):
-        try:
-            count = len(builder.collect_attachment_sources(message=candidate))
-        except Exception:  # noqa: S112
-            # Broad for the same reason `process_single_message` is, and load-bearing here for a
-            # different one: this runs inside `_prepare_reply_context`'s gather, which has no
-            # except of its own, so an unexpected nextcord shape would take the whole reply out
-            # through the generic error path rather than costing one message its attachments.
-            # Silent against S112 on purpose: the message is left out of the refusal set, so its
-            # own render re-collects a moment later, fails the same way, and that handler logs it
-            # with the message id and the traceback. Logging here would double every such failure.
-            continue
-        if not count:
-            continue
-        if over or (spent and spent + count > MAX_HISTORY_MEDIA_PARTS):
-            over[candidate.id] = count
-            continue
-        spent += count
-    return over
-
-
 def _first_url_match(pattern: re.Pattern[str], texts: list[str]) -> re.Match[str] | None:
     """First match of a URL pattern across one message's already-rendered text spans."""
     for text in texts:
@@ -820,6 +738,8 @@ class ReplyGeneratorCogs(commands.Cog):
         config: The LLM client configuration loaded for reply generation.
         runtime_models: The model strings and per-tier settings every call here dispatches on.
         usage_recorder: The per-reply usage-record writer read by `scripts/usage_report.py`.
+        timing_recorder: The per-reply latency-waterfall writer read by
+            `scripts/latency_report.py`.
     """
 
     def __init__(self, bot: commands.Bot) -> None:
@@ -831,11 +751,25 @@ class ReplyGeneratorCogs(commands.Cog):
         self.bot = bot
         self.config = LLMConfig()
         self.usage_recorder = UsageRecorder()
+        self.timing_recorder = ReplyTimingRecorder()
         # One toolkit per Gemini key, built on first use and kept for the life of the process.
         # Keyed by the key number, with None for the unconfigured deployment. Long-lived on
         # purpose: the caches inside hold Files API uris only that key can read, so rebuilding
         # per reply would re-upload the whole history window every time.
         self._toolkits: dict[int | None, GeminiKeyToolkit] = {}
+        # The gateway's copy of recent channel history, which `_fetch_history` reads before it
+        # falls back to REST. Sized to the fetch limit so a full window never needs a top-up.
+        self.history_cache = ChannelHistoryCache(max_messages=HISTORY_MESSAGE_LIMIT)
+        # Route and effort verdicts reused for inputs whose text-only render reads the same.
+        self.triage_cache = TriageCache()
+        # Per-channel memory of an optional memory selection that chose nobody.
+        self.selection_cache = MemorySelectionCache()
+        # Estimated token cost of each history message, so packing never re-reads a message.
+        self.history_costs = HistoryCostIndex()
+        # Opt-in early uploads of posted attachments; inert unless the config enables it.
+        self.prefetcher = AttachmentPrefetcher(
+            guild_byte_budget=self.config.attachment_prefetch_guild_bytes
+        )
         # Tracked background tasks for the one-shot restart memory resume.
         self._tasks: set[asyncio.Task[None]] = set()
         self._resume_started = False
@@ -866,7 +800,10 @@ class ReplyGeneratorCogs(commands.Cog):
         Returns:
             The toolkit for the leased key, or the unpinned one when no key is configured.
         """
-        slot = await pick_gemini_key(config=self.config)
+        return self._toolkit_for(slot=await pick_gemini_key(config=self.config))
+
+    def _toolkit_for(self, slot: GeminiKeySlot | None) -> GeminiKeyToolkit:
+        """Returns the process-long toolkit for `slot`, building it on first use."""
         index = slot.index if slot is not None else None
         cached = self._toolkits.get(index)
         if cached is not None:
@@ -886,16 +823,70 @@ class ReplyGeneratorCogs(commands.Cog):
         """
         return build_media_delivery_planner()
 
-    async def _fetch_history(self, message: Message, limit: int) -> list[Message]:
-        """Fetches up to `limit` channel-history messages once, trimmed to the char budget.
+    def _pack_history(self, toolkit: GeminiKeyToolkit, messages: list[Message]) -> HistoryPack:
+        """Packs history under the answer tier's token budget, from cached per-message costs."""
+        return pack_history(
+            costs=[
+                self.history_costs.cost(builder=toolkit.input_builder, message=m) for m in messages
+            ],
+            messages=messages,
+            budget=toolkit.runtime_models.slow_model.history_token_budget,
+        )
+
+    async def _fetch_history(
+        self, toolkit: GeminiKeyToolkit, message: Message, limit: int
+    ) -> list[Message]:
+        """Fetches up to `limit` channel-history messages once, packed to the token budget.
 
         Returned raw so both the optional selector's text-only render and the answer's
         uploaded render derive from one fetch, without a second walk of history.
+
+        Served from `history_cache` whenever its window covers what the budget will keep: the
+        window need not hold all `limit` messages, only enough that the budget binds inside
+        it, which is the common case since the budget holds history to around a hundred
+        messages. Otherwise REST is asked only for the run older than the window, and that run
+        seeds the window so the channel's next reply does not ask again. A channel the cache
+        cannot vouch for walks REST exactly as before.
+
+        The REST walk is sorted by id because `oldest_first` reverses each 100-message page
+        rather than the whole walk, so past one page the pages themselves arrive newest first.
         """
+        window = self.history_cache.window_before(message=message, limit=limit)
+        if window is not None:
+            kept = self._pack_history(toolkit=toolkit, messages=window.messages).messages
+            if window.complete or len(kept) < len(window.messages) or window.anchor is None:
+                logfire.debug(
+                    "gen_reply history served from cache",
+                    cached=len(window.messages),
+                    kept=len(kept),
+                    message_id=message.id,
+                )
+                return kept
+            requested = limit - len(window.messages)
+            older: list[Message] = [
+                m
+                async for m in message.channel.history(
+                    limit=requested, before=window.anchor, oldest_first=True
+                )
+            ]
+            older.sort(key=lambda m: m.id)
+            self.history_cache.backfill(
+                anchor=window.anchor, older=older, reaches_start=len(older) < requested
+            )
+            logfire.debug(
+                "gen_reply history topped up over REST",
+                cached=len(window.messages),
+                fetched=len(older),
+                message_id=message.id,
+            )
+            return self._pack_history(
+                toolkit=toolkit, messages=[*older, *window.messages]
+            ).messages
         hist_messages: list[Message] = []
         async for m in message.channel.history(limit=limit, before=message, oldest_first=True):
             hist_messages.append(m)
-        return _trim_history_to_budget(messages=hist_messages)
+        hist_messages.sort(key=lambda m: m.id)
+        return self._pack_history(toolkit=toolkit, messages=hist_messages).messages
 
     async def _render_history(
         self,
@@ -914,19 +905,20 @@ class ReplyGeneratorCogs(commands.Cog):
         an expired CDN attachment here re-fails every turn (current / reference do not; see
         GeminiFileUploader._resolve_file_upload).
 
-        The full render is additionally capped at `MAX_HISTORY_MEDIA_PARTS` uploaded files: a
-        message past the cap takes the text-only render, which is exactly the marker form the
-        route already reads, so the degradation needs no second render path of its own.
+        The full render re-packs the fetched history, which reads only cached costs, to learn
+        which messages' media did not fit the budget. Those take the text-only render, which is
+        exactly the marker form the route already reads, so the degradation needs no second
+        render path of its own.
         """
         if not hist_messages:
             return []
-        over_budget = (
-            {}
-            if text_only
-            else _history_media_over_budget(
-                builder=toolkit.input_builder, hist_messages=hist_messages
+        pack = None if text_only else self._pack_history(toolkit=toolkit, messages=hist_messages)
+        over_budget = pack.text_only if pack is not None else {}
+        if not text_only:
+            self.prefetcher.claim(
+                message_ids=[m.id for m in hist_messages if m.id not in over_budget],
+                key_index=toolkit.key_index,
             )
-        )
         tasks: list[Awaitable[EasyInputMessageParam]] = [
             toolkit.input_builder.process_single_message_text_only(message=m)
             if text_only or m.id in over_budget
@@ -934,13 +926,15 @@ class ReplyGeneratorCogs(commands.Cog):
             for m in hist_messages
         ]
         started = time.monotonic()
-        processed = await asyncio.gather(*tasks)
-        if not text_only:
+        with timed_stage(stage="history_render_text" if text_only else "history_render"):
+            processed = await asyncio.gather(*tasks)
+        if pack is not None:
             logfire.info(
                 "gen_reply history render done",
                 elapsed_seconds=time.monotonic() - started,
                 message_count=len(hist_messages),
                 media_capped=sum(over_budget.values()),
+                estimated_tokens=pack.tokens,
                 message_id=message_id,
             )
         header = EasyInputMessageParam(
@@ -966,6 +960,10 @@ class ReplyGeneratorCogs(commands.Cog):
         if not chain:
             return []
 
+        if not text_only:
+            self.prefetcher.claim(
+                message_ids=[ref.id for ref in chain], key_index=toolkit.key_index
+            )
         tasks: list[Awaitable[EasyInputMessageParam]] = []
         for ref in chain:
             if text_only:
@@ -1441,30 +1439,46 @@ class ReplyGeneratorCogs(commands.Cog):
         triage_model = toolkit.runtime_models.triage_model
         _dispatched_model.set(triage_model.name)
         started = time.monotonic()
-        try:
-            with logfire.span("gen_reply route", message_id=message.id):
-                responses = await self.openai_client.responses.parse(
-                    model=triage_model.deployment_name,
-                    instructions=ROUTE_PROMPT,
-                    input=cast("ResponseInputParam", message_list),
-                    text_format=RouteClassification,
-                    reasoning=triage_model.reasoning,
-                    service_tier="auto",
-                    extra_headers={"x-litellm-end-user-id": message.author.name},
+        fingerprint = triage_fingerprint(messages=message_list)
+        route = self.triage_cache.lookup(
+            kind="route",
+            model=triage_model.name,
+            fingerprint=fingerprint,
+            verdict_type=RouteClassification,
+        )
+        cached = route is not None
+        if route is None:
+            try:
+                with logfire.span("gen_reply route", message_id=message.id):
+                    responses = await self.openai_client.responses.parse(
+                        model=triage_model.deployment_name,
+                        instructions=ROUTE_PROMPT,
+                        input=cast("ResponseInputParam", message_list),
+                        text_format=RouteClassification,
+                        reasoning=triage_model.reasoning,
+                        service_tier="auto",
+                        extra_headers={"x-litellm-end-user-id": message.author.name},
+                    )
+                parsed = responses.output_parsed
+                route = parsed if parsed is not None else RouteClassification(decision="QA")
+                if parsed is not None:
+                    self.triage_cache.store(
+                        kind="route",
+                        model=triage_model.name,
+                        fingerprint=fingerprint,
+                        verdict=parsed,
+                    )
+            except ValidationError as exc:
+                # `responses.parse` validates before `output_parsed` is reachable, so an empty /
+                # safety-filtered response and a genuine schema mismatch both land here; the
+                # attached exception is the only way to tell them apart.
+                logfire.warn(
+                    "RouteClassification parse failed; defaulting to QA",
+                    message_id=message.id,
+                    model=triage_model.name,
+                    _exc_info=exc,
                 )
-            parsed = responses.output_parsed
-            route = parsed if parsed is not None else RouteClassification(decision="QA")
-        except ValidationError as exc:
-            # `responses.parse` validates before `output_parsed` is reachable, so an empty /
-            # safety-filtered response and a genuine schema mismatch both land here; the
-            # attached exception is the only way to tell them apart.
-            logfire.warn(
-                "RouteClassification parse failed; defaulting to QA",
-                message_id=message.id,
-                model=triage_model.name,
-                _exc_info=exc,
-            )
-            route = RouteClassification(decision="QA")
+                route = RouteClassification(decision="QA")
         # Route-call latency is logged on every path: this is the prime suspect for slow
         # replies, so the log file must show its duration directly, not just a span start.
         logfire.info(
@@ -1474,6 +1488,7 @@ class ReplyGeneratorCogs(commands.Cog):
             decision=route.decision,
             link_context_sources=route.link_context_sources,
             watch_video=route.watch_video,
+            cached=cached,
             message_id=message.id,
         )
         return route
@@ -1503,23 +1518,37 @@ class ReplyGeneratorCogs(commands.Cog):
 
         triage_model = toolkit.runtime_models.triage_model
         started = time.monotonic()
-        with logfire.span("gen_reply effort", message_id=message.id):
-            responses = await self.openai_client.responses.parse(
-                model=triage_model.deployment_name,
-                instructions=EFFORT_PROMPT,
-                input=cast("ResponseInputParam", message_list),
-                text_format=EffortGrade,
-                reasoning=triage_model.reasoning,
-                service_tier="auto",
-                extra_headers={"x-litellm-end-user-id": message.author.name},
-            )
-        parsed = responses.output_parsed
-        grade = parsed if parsed is not None else EffortGrade(effort="high")
+        fingerprint = triage_fingerprint(messages=message_list)
+        grade = self.triage_cache.lookup(
+            kind="effort",
+            model=triage_model.name,
+            fingerprint=fingerprint,
+            verdict_type=EffortGrade,
+        )
+        cached = grade is not None
+        if grade is None:
+            with logfire.span("gen_reply effort", message_id=message.id):
+                responses = await self.openai_client.responses.parse(
+                    model=triage_model.deployment_name,
+                    instructions=EFFORT_PROMPT,
+                    input=cast("ResponseInputParam", message_list),
+                    text_format=EffortGrade,
+                    reasoning=triage_model.reasoning,
+                    service_tier="auto",
+                    extra_headers={"x-litellm-end-user-id": message.author.name},
+                )
+            parsed = responses.output_parsed
+            grade = parsed if parsed is not None else EffortGrade(effort="high")
+            if parsed is not None:
+                self.triage_cache.store(
+                    kind="effort", model=triage_model.name, fingerprint=fingerprint, verdict=parsed
+                )
         logfire.info(
             "gen_reply effort done",
             elapsed_seconds=time.monotonic() - started,
             model=triage_model.name,
             effort=grade.effort,
+            cached=cached,
             message_id=message.id,
         )
         return grade
@@ -1662,7 +1691,7 @@ class ReplyGeneratorCogs(commands.Cog):
                 continue
             if item.name != "get_user_memory":
                 continue
-            for memory in resolve_user_memories(
+            for memory in await resolve_user_memories(
                 user_id_list=parse_user_id_list(arguments=item.arguments),
                 allowed=allowed,
                 context=read_context,
@@ -1676,7 +1705,7 @@ class ReplyGeneratorCogs(commands.Cog):
             memories=memories, input_tokens=input_tokens, output_tokens=output_tokens
         )
 
-    def _read_server_memory(self, *, message: Message) -> str:
+    async def _read_server_memory(self, *, message: Message) -> str:
         """Reads the current guild's raw server memory, or "" when there is none.
 
         Unlike user memory there is exactly one server memory per guild, so it needs no
@@ -1686,13 +1715,13 @@ class ReplyGeneratorCogs(commands.Cog):
         """
         if message.guild is None:
             return ""
-        return read_memory_document(
+        return await memory_io.read_memory_document(
             scope=server_scope(server_id=message.guild.id),
             compartments=[GLOBAL_COMPARTMENT],
             flavor="server",
         )
 
-    def _resolve_reply_memory_candidates(
+    async def _resolve_reply_memory_candidates(
         self, *, message: Message, server_memory: str, read_context: MemoryReadContext
     ) -> tuple[list[UserMemory], dict[int, MemoryCandidate], int]:
         """Resolves deterministic memories and derives disjoint optional alias candidates."""
@@ -1728,7 +1757,7 @@ class ReplyGeneratorCogs(commands.Cog):
 
         memories = [
             memory
-            for memory in resolve_user_memories(
+            for memory in await resolve_user_memories(
                 user_id_list=[str(user_id) for user_id in deterministic_allowed],
                 allowed=deterministic_allowed,
                 context=read_context,
@@ -1767,18 +1796,41 @@ class ReplyGeneratorCogs(commands.Cog):
             ),
         )
 
+    def _optional_selection_skippable(
+        self, *, message: Message, allowed: dict[int, MemoryCandidate]
+    ) -> bool:
+        """Whether this channel's last selection, over the same candidates, stands for this one.
+
+        See `MemorySelectionCache`: it does when it chose nobody, recently, and neither this message
+        nor its reference chain names any of the candidates.
+        """
+        reference_texts = [ref.content for ref in _walk_reference_chain(message=message)]
+        return self.selection_cache.may_skip(
+            channel_id=message.channel.id,
+            allowed=allowed,
+            texts=[message.content, *reference_texts],
+        )
+
     async def _await_optional_memory_selection(
         self,
         toolkit: GeminiKeyToolkit,
         *,
         task: asyncio.Task[MemorySelection],
         message: Message,
+        allowed: dict[int, MemoryCandidate],
         route_done: asyncio.Event,
     ) -> tuple[MemorySelection, float] | None:
-        """Awaits the optional selector without letting its failure affect direct memories."""
+        """Awaits the optional selector without letting its failure affect direct memories.
+
+        Every outcome is recorded in `selection_cache` against the candidates it was offered,
+        so only a selection that completed and chose nobody can stand in for the next one.
+        """
         started = time.monotonic()
         try:
-            with logfire.span("gen_reply memory selection", message_id=message.id):
+            with (
+                logfire.span("gen_reply memory selection", message_id=message.id),
+                timed_stage(stage="memory_selection"),
+            ):
                 selection = await _await_gated(
                     task=task,
                     label="memory selection",
@@ -1793,6 +1845,7 @@ class ReplyGeneratorCogs(commands.Cog):
                 model=toolkit.runtime_models.triage_model.name,
                 _exc_info=exc,
             )
+            self.selection_cache.forget(channel_id=message.channel.id)
             return None
         except Exception:
             logfire.warn(
@@ -1801,7 +1854,11 @@ class ReplyGeneratorCogs(commands.Cog):
                 model=toolkit.runtime_models.triage_model.name,
                 _exc_info=True,
             )
+            self.selection_cache.forget(channel_id=message.channel.id)
             return None
+        self.selection_cache.record(
+            channel_id=message.channel.id, allowed=allowed, selection=selection
+        )
         return selection, time.monotonic() - started
 
     async def _prepare_reply_context(  # noqa: PLR0913 -- the leased key plus the speculative build's inputs
@@ -1827,12 +1884,15 @@ class ReplyGeneratorCogs(commands.Cog):
         # Fetch channel history once. Its text-only twin is rendered below only if a narrowed
         # selector request is actually needed; the upload-bearing full render is always awaited
         # later because the answer consumes it.
-        raw_history = await self._fetch_history(message=message, limit=history_limit)
+        with timed_stage(stage="history_fetch"):
+            raw_history = await self._fetch_history(
+                toolkit=toolkit, message=message, limit=history_limit
+            )
 
         # The bot's own per-server memory is read once here and shared by both phases: it
         # primes selection (a `## 成員稱呼` nickname table maps spoken aliases to ids) and
         # rides into the answer as background context. One file read, no extra LLM call.
-        server_memory = self._read_server_memory(message=message)
+        server_memory = await self._read_server_memory(message=message)
         server_memory_block = (
             render_server_memory_block(memory=server_memory) if server_memory else None
         )
@@ -1844,7 +1904,10 @@ class ReplyGeneratorCogs(commands.Cog):
         # (their own preference for how the bot should sound, cross-server safe by
         # construction) and injected on every reply with no selection phase, including one
         # that runs with user memory off. One file read, no extra LLM call.
-        author_tone = read_tone(scope=user_scope(user_id=message.author.id))
+        author_scope = user_scope(user_id=message.author.id)
+        author_tone = await memory_io.run(
+            scope=author_scope, call=partial(read_tone, scope=author_scope)
+        )
         tone_block = render_tone_block(tone=author_tone) if author_tone else None
 
         # Code always resolves the current author, reply-chain authors, and current-message
@@ -1857,10 +1920,12 @@ class ReplyGeneratorCogs(commands.Cog):
         memory_block: EasyInputMessageParam | None = None
         remaining_slots = 0
         selection_task: asyncio.Task[MemorySelection] | None = None
-        memories, optional_allowed, deterministic_candidate_count = (
-            self._resolve_reply_memory_candidates(
-                message=message, server_memory=server_memory, read_context=read_context
-            )
+        (
+            memories,
+            optional_allowed,
+            deterministic_candidate_count,
+        ) = await self._resolve_reply_memory_candidates(
+            message=message, server_memory=server_memory, read_context=read_context
         )
         deterministic_memory_count = len(memories)
         if memories:
@@ -1876,7 +1941,13 @@ class ReplyGeneratorCogs(commands.Cog):
                 optional_slots=remaining_slots,
                 message_id=message.id,
             )
-            if optional_allowed and remaining_slots:
+            if (
+                optional_allowed
+                and remaining_slots
+                and not self._optional_selection_skippable(
+                    message=message, allowed=optional_allowed
+                )
+            ):
                 # Render the text-only history only for a real optional lookup. This request
                 # carries markers instead of file ids, so it never re-reads uploaded payloads.
                 history_text_only = await self._render_history(
@@ -1931,7 +2002,11 @@ class ReplyGeneratorCogs(commands.Cog):
                 # route_done gate: it usually already finished during the upload wait above, so
                 # this returns immediately; a slow one gets only the post-route grace.
                 selection_result = await self._await_optional_memory_selection(
-                    toolkit=toolkit, task=selection_task, message=message, route_done=route_done
+                    toolkit=toolkit,
+                    task=selection_task,
+                    message=message,
+                    allowed=optional_allowed,
+                    route_done=route_done,
                 )
                 if selection_result is not None:
                     selection, selection_elapsed = selection_result
@@ -2225,14 +2300,18 @@ class ReplyGeneratorCogs(commands.Cog):
     async def on_ready(self) -> None:
         """Resumes persisted memory work after a restart (runs once).
 
-        `on_ready` fires on every gateway reconnect, so `_resume_started` guards it
-        to a single sweep per process. The sweep is spawned, never awaited, so the
-        gateway is not blocked while it digests in the background.
+        `on_ready` fires on every new gateway session, so `_resume_started` guards it
+        to a single sweep per process; only the history cache is reset every time. The
+        sweep is spawned, never awaited, so the gateway is not blocked while it digests
+        in the background.
         """
+        # Before the once-only guard: `on_ready` fires again only after a fresh IDENTIFY, and the
+        # gateway replays nothing across one, so every window may now be missing messages.
+        self.history_cache.clear()
         if self._resume_started:
             return
         # Bound to this loop, so it starts here rather than at import: an unstarted
-        # service drops every commit request instead of binding its queue to whichever
+        # service drops every commit request instead of binding its event to whichever
         # loop happened to enqueue first.
         memory_git.start()
         self._resume_started = True
@@ -2327,8 +2406,15 @@ class ReplyGeneratorCogs(commands.Cog):
         Args:
             message: The message that was sent.
         """
-        # Ignore messages from bots.
+        # Every message feeds the history cache, the bot's own and other bots' included, since
+        # history renders them all; this runs first so the message is in place before any reply
+        # in this channel next reads the window.
+        self.history_cache.record(message=message)
+
+        # Ignore messages from bots, after noting the bot's own as activity for the prefetch.
         if message.author.bot:
+            if self.bot.user is not None and message.author.id == self.bot.user.id:
+                self.prefetcher.note_bot_activity(channel_id=message.channel.id)
             return
 
         # Match <@ID> in content, not message.mentions: reply notifications add
@@ -2336,6 +2422,7 @@ class ReplyGeneratorCogs(commands.Cog):
         # posts (e.g. Threads embeds, video downloads).
         is_dm = message.guild is None
         if not is_dm and not has_bot_mention(content=message.content, bot_user=self.bot.user):
+            self._maybe_prefetch_attachments(message=message)
             return
 
         # Skip a (mentioned) message typed inside a research thread the ResearchCogs cog is
@@ -2348,7 +2435,12 @@ class ReplyGeneratorCogs(commands.Cog):
             )
             return
 
-        toolkit = await self.lease_toolkit()
+        # The reply's latency waterfall starts here, before the key lease, so a lease queued
+        # behind the balancer shows up as a stage rather than vanishing before the pipeline.
+        timing = start_reply_timing(message_id=message.id)
+        with timed_stage(stage="key_lease"):
+            toolkit = await self.lease_toolkit()
+        timing.key_index = toolkit.key_index
         user_prompt = await toolkit.input_builder.get_user_prompt(content=message.content)
         has_attachment = bool(message.attachments or message.stickers)
         # A forward leaves content/attachments/stickers empty and puts the payload in
@@ -2418,6 +2510,48 @@ class ReplyGeneratorCogs(commands.Cog):
         finally:
             await reactions.flush()
 
+    def _maybe_prefetch_attachments(self, message: Message) -> None:
+        """Starts an early upload of a post's attachments when the prefetch admits it."""
+        if not (self.config.attachment_prefetch_enabled and self.config.file_api_enabled):
+            return
+        size = self.prefetcher.admit(
+            message=message,
+            research_thread=_in_active_research_thread(
+                bot=self.bot, channel_id=message.channel.id
+            ),
+        )
+        if size is not None:
+            self._spawn(self._prefetch_attachments(message=message, size=size))
+
+    async def _prefetch_attachments(self, message: Message, size: int) -> None:
+        """Renders a post's attachments on the key the next reply would lease."""
+        toolkit = self._toolkit_for(slot=await peek_gemini_key(config=self.config))
+        await self.prefetcher.prefetch(
+            message=message, builder=toolkit.input_builder, key_index=toolkit.key_index, size=size
+        )
+
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload: RawMessageUpdateEvent) -> None:
+        """Drops a cached window's stale tail when nextcord could not apply an edit in place.
+
+        With `cached_message` set, nextcord updated the very object the window holds, so there
+        is nothing to do; without it the window may hold an object nothing will ever update.
+        """
+        if payload.cached_message is None:
+            self.history_cache.invalidate_through(
+                channel_id=payload.channel_id, message_id=payload.message_id
+            )
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: RawMessageDeleteEvent) -> None:
+        """Removes a deleted message from its channel's history window."""
+        self.history_cache.forget(channel_id=payload.channel_id, message_ids=[payload.message_id])
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload: RawBulkMessageDeleteEvent) -> None:
+        """Removes a bulk deletion from its channel's history window."""
+        self.history_cache.forget(channel_id=payload.channel_id, message_ids=payload.message_ids)
+
     async def _run_reply_pipeline(  # noqa: PLR0915, C901, PLR0912 -- orchestrates route, speculative prep, threads context, and per-route dispatch in sequence
         self,
         toolkit: GeminiKeyToolkit,
@@ -2445,16 +2579,19 @@ class ReplyGeneratorCogs(commands.Cog):
                 # optional memory selection use the text-only renders, so neither waits on the Files
                 # API. The QA context builds speculatively in parallel with the route call
                 # since QA is the dominant route — non-QA routes discard it.
-                parts_task = asyncio.create_task(
-                    coro=self._get_reference_and_current(toolkit=toolkit, message=message)
-                )
-                text_reference, text_current = await self._get_reference_and_current(
-                    toolkit=toolkit, message=message, text_only=True
+                parts_task = timed_task(
+                    stage="parts",
+                    coro=self._get_reference_and_current(toolkit=toolkit, message=message),
                 )
+                with timed_stage(stage="text_parts"):
+                    text_reference, text_current = await self._get_reference_and_current(
+                        toolkit=toolkit, message=message, text_only=True
+                    )
                 # Signals optional memory selection that the route has returned: selection runs
                 # unbounded while this is clear and gets only a short grace once it is set.
                 route_done = asyncio.Event()
-                prep_task = asyncio.create_task(
+                prep_task = timed_task(
+                    stage="prep",
                     coro=self._prepare_reply_context(
                         toolkit=toolkit,
                         message=message,
@@ -2462,25 +2599,27 @@ class ReplyGeneratorCogs(commands.Cog):
                         parts_task=parts_task,
                         text_parts=(text_reference, text_current),
                         route_done=route_done,
-                    )
+                    ),
                 )
                 # Effort grading rides the same route_done gate as memory selection: it runs
                 # in parallel with the route and only the QA answer model consumes it, so
                 # IMAGE/VIDEO cancel it below.
-                effort_task = asyncio.create_task(
+                effort_task = timed_task(
+                    stage="effort",
                     coro=self._grade_effort(
                         toolkit=toolkit,
                         message=message,
                         reference_messages=text_reference,
                         current_message=text_current,
-                    )
-                )
-                route = await self._route_classify(
-                    toolkit=toolkit,
-                    message=message,
-                    reference_messages=text_reference,
-                    current_message=text_current,
+                    ),
                 )
+                with timed_stage(stage="route"):
+                    route = await self._route_classify(
+                        toolkit=toolkit,
+                        message=message,
+                        reference_messages=text_reference,
+                        current_message=text_current,
+                    )
                 if route.decision == "QA" and route.link_context_sources:
                     link_context_deadline = (
                         asyncio.get_running_loop().time() + LINK_CONTEXT_GRACE_SECONDS
@@ -2510,20 +2649,21 @@ class ReplyGeneratorCogs(commands.Cog):
                                 message_id=message.id,
                             )
                             continue
-                        link_tasks[link_source.name] = asyncio.create_task(
+                        link_build = link_source.build(
+                            url=link_url,
+                            answer_model_is_gemini=(
+                                "gemini" in toolkit.runtime_models.slow_model.name
+                            ),
+                            gemini_client=toolkit.gemini_client_if_configured,
+                            allow_media_ingest=link_source.media_ingest_allowed(
+                                config=self.config
+                            ),
+                        )
+                        link_tasks[link_source.name] = timed_task(
+                            stage=f"link_{link_source.name}",
                             coro=_run_until_deadline(
-                                awaitable=link_source.build(
-                                    url=link_url,
-                                    answer_model_is_gemini=(
-                                        "gemini" in toolkit.runtime_models.slow_model.name
-                                    ),
-                                    gemini_client=toolkit.gemini_client_if_configured,
-                                    allow_media_ingest=link_source.media_ingest_allowed(
-                                        config=self.config
-                                    ),
-                                ),
-                                deadline=link_context_deadline,
-                            )
+                                awaitable=link_build, deadline=link_context_deadline
+                            ),
                         )
                     if "threads" in link_tasks:
                         # Persistent marker (added directly, not via the status chain) saying a
@@ -2553,20 +2693,21 @@ class ReplyGeneratorCogs(commands.Cog):
                     # shielded upload keeps running and the finally must drain it.
                     media_context_task = prep_task
                     prep_task = None
-                    if route.decision == "IMAGE":
-                        await self._handle_image_reply(
-                            toolkit=toolkit,
-                            message=message,
-                            user_prompt=user_prompt,
-                            context_task=media_context_task,
-                        )
-                    else:
-                        await self._handle_video_reply(
-                            toolkit=toolkit,
-                            message=message,
-                            user_prompt=user_prompt,
-                            context_task=media_context_task,
-                        )
+                    with timed_stage(stage=route.decision.lower()):
+                        if route.decision == "IMAGE":
+                            await self._handle_image_reply(
+                                toolkit=toolkit,
+                                message=message,
+                                user_prompt=user_prompt,
+                                context_task=media_context_task,
+                            )
+                        else:
+                            await self._handle_video_reply(
+                                toolkit=toolkit,
+                                message=message,
+                                user_prompt=user_prompt,
+                                context_task=media_context_task,
+                            )
                 else:
                     reactions.advance(emoji="<:message:1517560873000898860>")
                     # Selection still gates the answer here; if this wait ever needs to go,
@@ -2619,20 +2760,21 @@ class ReplyGeneratorCogs(commands.Cog):
                     _log_pre_answer_latency(
                         started=pipeline_started, decision=route.decision, message_id=message.id
                     )
-                    await self._handle_message_reply(
-                        toolkit=toolkit,
-                        message=message,
-                        system_prompt=REPLY_PROMPT,
-                        context=context,
-                        effort=effort,
-                        allow_voice=True,
-                        allow_image=True,
-                        allow_music=True,
-                        allow_video=True,
-                        allow_research=_can_launch_research(message=message),
-                        describe_capabilities=True,
-                        yt_url=yt_url,
-                    )
+                    with timed_stage(stage="answer"):
+                        await self._handle_message_reply(
+                            toolkit=toolkit,
+                            message=message,
+                            system_prompt=REPLY_PROMPT,
+                            context=context,
+                            effort=effort,
+                            allow_voice=True,
+                            allow_image=True,
+                            allow_music=True,
+                            allow_video=True,
+                            allow_research=_can_launch_research(message=message),
+                            describe_capabilities=True,
+                            yt_url=yt_url,
+                        )
                 reactions.advance(emoji="<:greencheck:1517565102424068226>")
                 # End of the turn on the success path; the failure path is `gen_reply failed`,
                 # which carries the traceback. The console exporter prints no span-end line, so
@@ -2653,6 +2795,12 @@ class ReplyGeneratorCogs(commands.Cog):
             await _discard_link_tasks(
                 link_tasks=link_tasks, deadline=link_context_deadline, message_id=message.id
             )
+            # Closed before it is written, so a task this turn leaves running (a memory
+            # extraction, a research launch) cannot add to a waterfall already on disk.
+            timing = current_reply_timing()
+            if timing is not None:
+                timing.close(route=route_decision or UNROUTED_REPLY)
+                await self.timing_recorder.record(timing=timing)
             # One record per triggering message, not per delivered artifact: the inline
             # clips and the media persona reply are all parts of this same turn. A failure
             # is recorded too — someone still talked to the bot — under the route it had
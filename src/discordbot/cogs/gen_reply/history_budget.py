@@ -0,0 +1,243 @@
+"""How much channel history one answer reads, packed against one token budget.
+
+History used to be bounded on two separate axes: a character budget over message text, and a
+count of uploaded media parts. Neither could see the other's cost, and both were recomputed
+from scratch on every reply. Here every history message gets one estimated token cost, computed
+once per message (and edit) by `HistoryCostIndex`, and `pack_history` fills the answer tier's
+`ModelSettings.history_token_budget` from the newest message back.
+
+The estimator is tokenizer-free on purpose: it runs on every reply over hundreds of messages
+and only has to be right to within the margin the budget already leaves. Text is four
+characters to a token plus a fixed per-message overhead for the author header. A media part is
+priced by what it is: an image by its resolution, since a small one (a sticker, an emoji-sized
+upload) is a single 258-token tile to Gemini while anything larger costs the ~1.1k measured as
+the median per part across consecutive replies in one channel; video, audio and PDFs scale with
+their size; a text file with its bytes.
+
+Two rules from the media cap this replaces still hold, because they are about how the model
+reads history rather than about the arithmetic:
+
+- The files that ride as real uploads are an unbroken run ending at the present. Once one
+  message's media does not fit, it and every older message render text-only, with the
+  `[attachment: ...]` markers the route already reads, even when an older, smaller file would
+  slip into the leftover budget; admitting it would show an older attachment while a newer one
+  showed only a marker, which reads as files going missing at random.
+- The newest message carrying media keeps it even past the budget, so one post of many images
+  is never reduced to nothing but markers while the budget sits unspent. What it overshoots by
+  is left off the budget rather than charged to it, so one long video does not also push every
+  older message's text out; everything else is still bounded.
+
+Text is packed the same way, newest first, cut between messages rather than mid-text, and the
+newest message is always kept even when it alone exceeds the budget.
+"""
+
+import math
+from collections import OrderedDict
+from collections.abc import Sequence
+
+from nextcord import Message, StickerItem
+from pydantic import Field, BaseModel, ConfigDict, PrivateAttr, SkipValidation
+
+from discordbot.cogs.gen_reply.input import AttachmentSource, MessageInputBuilder
+
+# Text is estimated at this many characters to a token.
+CHARS_PER_TOKEN = 4
+# What a history message costs beyond its own text: the rendered form carries an author header,
+# and an attachment-only message has empty `content` but still renders.
+MESSAGE_OVERHEAD_TOKENS = 10
+# What one `[attachment: <kind>]` marker costs when a source renders text-only.
+MARKER_TOKENS = 6
+# An image no larger than this on either side is one tile to Gemini.
+SMALL_IMAGE_SIDE = 384
+SMALL_IMAGE_TOKENS = 258
+# Any other image, and any media part whose cost cannot be read off its metadata.
+MEDIA_PART_TOKENS = 1120
+# Video at roughly 290 tokens a second (a 258-token frame plus audio) over a ~4 Mbit/s upload.
+VIDEO_TOKENS_PER_MB = 580
+# Audio at 32 tokens a second over a ~128 kbit/s upload.
+AUDIO_TOKENS_PER_MB = 2000
+# A PDF at 258 tokens a page over ~100 KB a page.
+PDF_TOKENS_PER_MB = 2580
+# How many message costs are remembered; the least recently used drop first.
+HISTORY_COST_MAX_ENTRIES = 4096
+
+_MB = 1_000_000
+# Size-scaled file types, by MIME prefix; never below one small-image tile.
+_TOKENS_PER_MB = (
+    ("video/", VIDEO_TOKENS_PER_MB),
+    ("audio/", AUDIO_TOKENS_PER_MB),
+    ("application/pdf", PDF_TOKENS_PER_MB),
+)
+
+
+class MessageCost(BaseModel):
+    """One history message's estimated token cost.
+
+    Attributes:
+        text_tokens: The message rendered text-only: header, text and one marker per source.
+        media_tokens: What its sources add when they ride as real uploads instead of markers.
+        media_parts: How many sources it carries.
+    """
+
+    text_tokens: int = Field(..., description="Cost of the text-only render.")
+    media_tokens: int = Field(default=0, description="Extra cost of uploading its sources.")
+    media_parts: int = Field(default=0, description="How many sources it carries.")
+
+
+class HistoryPack(BaseModel):
+    """The history an answer reads, and which of it renders text-only.
+
+    Attributes:
+        messages: The kept history, oldest first.
+        text_only: Kept message ids whose media renders as markers, to how many sources each
+            held back; the count is what tells an operator how much the budget trimmed.
+        tokens: The estimated cost of the pack as it will render.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    messages: SkipValidation[list[Message]] = Field(
+        ..., description="The kept history, oldest first."
+    )
+    text_only: dict[int, int] = Field(
+        default_factory=dict, description="Kept message ids whose media renders as markers."
+    )
+    tokens: int = Field(default=0, description="Estimated cost of the pack as rendered.")
+
+
+def _text_tokens(text: str) -> int:
+    """Estimated tokens of a span of text."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _message_text(message: Message) -> str:
+    """The text a message renders, mirroring `get_cleaned_content`'s precedence."""
+    spans = [message.content or ""]
+    if not spans[0].strip():
+        spans.append(MessageInputBuilder.extract_embed_text(embeds=list(message.embeds)))
+    spans.extend(MessageInputBuilder.snapshot_text(snapshot=s) for s in message.snapshots)
+    return "\n".join(spans)
+
+
+def _file_tokens(content_type: str, size: int) -> int:
+    """Estimated tokens of a non-image file, scaled by its size where its type allows."""
+    if content_type.startswith("text/"):
+        return max(MARKER_TOKENS, math.ceil(size / CHARS_PER_TOKEN))
+    rate = next((rate for prefix, rate in _TOKENS_PER_MB if content_type.startswith(prefix)), None)
+    if rate is None:
+        return MEDIA_PART_TOKENS
+    return max(SMALL_IMAGE_TOKENS, math.ceil(size / _MB * rate))
+
+
+def estimate_source_tokens(source: AttachmentSource) -> int:
+    """Estimated tokens one source costs as an uploaded part.
+
+    Args:
+        source: A source classified by `collect_attachment_sources`.
+
+    Returns:
+        The part's estimated input tokens.
+    """
+    handle = source.handle
+    if isinstance(handle, StickerItem) or source.is_sticker:
+        return SMALL_IMAGE_TOKENS
+    if isinstance(handle, str):
+        # An embed image or thumbnail: no dimensions reach the source, so the median part.
+        return MEDIA_PART_TOKENS
+    if source.kind == "file":
+        return _file_tokens(content_type=source.content_type, size=int(handle.size or 0))
+    width, height = handle.width, handle.height
+    if width and height and max(width, height) <= SMALL_IMAGE_SIDE:
+        return SMALL_IMAGE_TOKENS
+    return MEDIA_PART_TOKENS
+
+
+class HistoryCostIndex(BaseModel):
+    """Per-message token costs, estimated once per message and edit, then reused."""
+
+    _costs: OrderedDict[tuple[int, object], MessageCost] = PrivateAttr(default_factory=OrderedDict)
+
+    def cost(self, builder: MessageInputBuilder, message: Message) -> MessageCost:
+        """Returns a message's cost, estimating it on first sight.
+
+        Keyed on the id plus the edit time, so an edit is re-estimated. A late embed unfurl
+        stamps no edit time, so its image can go uncounted until the entry ages out; one part
+        is within the margin the budget leaves.
+
+        Args:
+            builder: Any input builder; only its source classification is used.
+            message: A history message.
+
+        Returns:
+            The message's estimated cost. A message whose sources cannot be classified is
+            costed as text alone and not cached, so its render re-collects and logs the failure.
+        """
+        key = (message.id, message.edited_at)
+        cached = self._costs.get(key)
+        if cached is not None:
+            self._costs.move_to_end(key)
+            return cached
+        text = MESSAGE_OVERHEAD_TOKENS + _text_tokens(text=_message_text(message=message))
+        try:
+            sources = builder.collect_attachment_sources(message=message)
+        except Exception:
+            # Broad and silent for the same reason the render's own collect step is broad: an
+            # unexpected nextcord shape must cost one message its attachments, not the reply,
+            # and the render that follows hits the same failure and logs it with the traceback.
+            return MessageCost(text_tokens=text)
+        cost = MessageCost(
+            text_tokens=text + MARKER_TOKENS * len(sources),
+            media_tokens=sum(
+                estimate_source_tokens(source=source) - MARKER_TOKENS for source in sources
+            ),
+            media_parts=len(sources),
+        )
+        self._costs[key] = cost
+        if len(self._costs) > HISTORY_COST_MAX_ENTRIES:
+            self._costs.popitem(last=False)
+        return cost
+
+
+def pack_history(
+    costs: Sequence[MessageCost], messages: list[Message], budget: int
+) -> HistoryPack:
+    """Packs the newest history that fits `budget`, media first to go.
+
+    Args:
+        costs: Each message's cost, aligned with `messages`.
+        messages: Candidate history, oldest first.
+        budget: The answer tier's history token budget.
+
+    Returns:
+        The kept run of messages ending at the newest, and which of them render text-only.
+    """
+    kept: list[Message] = []
+    text_only: dict[int, int] = {}
+    spent = exempt = 0
+    media_open = first_media = True
+    for message, cost in zip(reversed(messages), reversed(costs), strict=True):
+        if spent + cost.text_tokens > budget and kept:
+            break
+        kept.append(message)
+        spent += cost.text_tokens
+        if not cost.media_parts:
+            continue
+        if media_open and spent + cost.media_tokens <= budget:
+            spent += cost.media_tokens
+        elif first_media:
+            exempt = cost.media_tokens
+        else:
+            text_only[message.id] = cost.media_parts
+            media_open = False
+        first_media = False
+    kept.reverse()
+    return HistoryPack(messages=kept, text_only=text_only, tokens=spent + exempt)
+
+
+__all__ = [
+    "HistoryCostIndex",
+    "HistoryPack",
+    "MessageCost",
+    "estimate_source_tokens",
+    "pack_history",
+]
@@ -0,0 +1,185 @@
+"""Gateway-fed channel history, so a reply reads its context without walking REST.
+
+Every message a reply reads as history was already delivered to this process once, as the
+`on_message` of the moment it was posted. `ChannelHistoryCache` keeps that copy: one bounded
+window per channel, appended by the gateway, pruned by deletes, and served to `_fetch_history`
+whenever it can vouch for the run of messages in front of the one being answered. REST is then
+asked only for what the window does not hold, which after the first reply in a channel is
+usually nothing at all.
+
+What makes a window servable is contiguity, not size. A window starts at the first message this
+process saw in the channel and holds everything after it, because nothing posted in between can
+reach the channel without also reaching the gateway. Two things break that, and both are handled
+by dropping rather than by repairing: a new gateway session (`on_ready` after an IDENTIFY) can
+have missed any number of events, so every window is cleared; and an edit the window cannot
+apply (the message has left nextcord's own cache, so nothing updated the object held here) cuts
+the window back to what is newer than it, which keeps the remainder contiguous.
+
+Edits the window CAN apply need no code at all: the objects held here are the ones nextcord
+keeps in its own message cache, and nextcord updates those in place before it dispatches
+`on_message_edit`, so a streamed reply reads as its final text without anyone copying it.
+"""
+
+from collections import OrderedDict, deque
+from collections.abc import Iterable
+
+from nextcord import Message
+from pydantic import Field, BaseModel, ConfigDict, PrivateAttr, SkipValidation
+
+# How many channels keep a window. Each one holds up to `max_messages` live `Message` objects on
+# top of nextcord's own 1000-message cache, so the bound is on memory rather than on usefulness;
+# the least recently active channel is the one dropped, and its next reply just pays one REST
+# walk to seed a fresh window.
+HISTORY_CACHE_MAX_CHANNELS = 64
+
+
+class HistoryWindow(BaseModel):
+    """The cached messages in front of one message, and what a REST top-up would start from.
+
+    Attributes:
+        messages: Cached history older than the message being answered, oldest first.
+        complete: Whether nothing older is needed: the window either holds `limit` messages or
+            reaches back to the channel's first message.
+        anchor: The oldest message the window vouches for, which a REST top-up pages back
+            from. Usually `messages[0]`; the answered message itself when the window starts
+            exactly there. None when the window holds more than `limit` and needs no top-up.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    messages: SkipValidation[list[Message]] = Field(
+        ..., description="Cached history older than the answered message, oldest first."
+    )
+    complete: bool = Field(..., description="Whether no REST top-up is needed.")
+    anchor: SkipValidation[Message | None] = Field(
+        ..., description="The oldest vouched-for message a REST top-up pages back from."
+    )
+
+
+class _ChannelWindow(BaseModel):
+    """One channel's contiguous run of messages, oldest first."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    messages: SkipValidation[deque[Message]] = Field(default_factory=deque)
+    reaches_start: bool = Field(
+        default=False, description="Whether the oldest held message is the channel's first."
+    )
+
+
+class ChannelHistoryCache(BaseModel):
+    """Per-channel bounded windows of gateway messages, served in place of `channel.history`.
+
+    Attributes:
+        max_messages: The most messages one channel window holds; the oldest drop first.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    max_messages: int = Field(
+        ..., description="The most messages one channel window holds; the oldest drop first."
+    )
+    _windows: OrderedDict[int, _ChannelWindow] = PrivateAttr(default_factory=OrderedDict)
+
+    def _window(self, channel_id: int) -> _ChannelWindow:
+        """Returns the channel's window, creating it and evicting the least recent if needed."""
+        window = self._windows.get(channel_id)
+        if window is None:
+            window = _ChannelWindow()
+            self._windows[channel_id] = window
+            if len(self._windows) > HISTORY_CACHE_MAX_CHANNELS:
+                self._windows.popitem(last=False)
+        self._windows.move_to_end(channel_id)
+        return window
+
+    def _trim(self, window: _ChannelWindow) -> None:
+        """Drops the oldest messages past `max_messages`; what remains is still contiguous."""
+        while len(window.messages) > self.max_messages:
+            window.messages.popleft()
+            window.reaches_start = False
+
+    def record(self, message: Message) -> None:
+        """Appends a gateway-delivered message to its channel's window.
+
+        Message ids are snowflakes, so they order a channel's messages by creation. The gateway
+        delivers a channel's creates in that order, so this is an append; a create that does
+        arrive out of order is slotted in by id rather than breaking the order `_fetch_history`
+        hands the model.
+        """
+        window = self._window(channel_id=message.channel.id)
+        messages = window.messages
+        if messages and messages[-1].id >= message.id:
+            if any(held.id == message.id for held in messages):
+                return
+            position = next(i for i, held in enumerate(messages) if held.id > message.id)
+            messages.insert(position, message)
+        else:
+            messages.append(message)
+        self._trim(window=window)
+
+    def forget(self, channel_id: int, message_ids: Iterable[int]) -> None:
+        """Removes deleted messages; a deletion leaves the rest of the window contiguous."""
+        window = self._windows.get(channel_id)
+        if window is None:
+            return
+        doomed = set(message_ids)
+        window.messages = deque(held for held in window.messages if held.id not in doomed)
+
+    def invalidate_through(self, channel_id: int, message_id: int) -> None:
+        """Cuts a window back to what is newer than a message it can no longer vouch for.
+
+        For an edit nextcord could not apply to the held object. Only that message is stale,
+        but dropping it alone would leave a hole the window would then serve as contiguous, so
+        it goes together with everything older; the next reply tops the window up over REST.
+        """
+        window = self._windows.get(channel_id)
+        if window is None or not any(held.id == message_id for held in window.messages):
+            return
+        window.messages = deque(held for held in window.messages if held.id > message_id)
+        window.reaches_start = False
+
+    def clear(self) -> None:
+        """Drops every window, for a new gateway session that may have missed events."""
+        self._windows.clear()
+
+    def window_before(self, message: Message, limit: int) -> HistoryWindow | None:
+        """The cached history in front of `message`, or None when the cache cannot vouch for it.
+
+        A window can vouch only for what is newer than the oldest message it holds, so a
+        window that starts after `message` (cleared and re-seeded while this reply was in
+        flight) serves nothing. A window that starts AT `message` serves nothing yet, but is
+        returned so the REST walk that fills it seeds the window for the next reply.
+        """
+        window = self._windows.get(message.channel.id)
+        if window is None or not window.messages or window.messages[0].id > message.id:
+            return None
+        self._windows.move_to_end(message.channel.id)
+        older = [held for held in window.messages if held.id < message.id]
+        kept = older[-limit:] if limit > 0 else []
+        complete = len(kept) >= limit or (len(kept) == len(older) and window.reaches_start)
+        if len(kept) < len(older):
+            anchor = None
+        elif older:
+            anchor = older[0]
+        else:
+            anchor = window.messages[0]
+        return HistoryWindow(messages=kept, complete=complete, anchor=anchor)
+
+    def backfill(self, anchor: Message, older: list[Message], reaches_start: bool) -> None:
+        """Prepends a REST top-up to the window it was fetched for, if that window still stands.
+
+        `older` must be the run immediately in front of `anchor`, oldest first. The top-up is
+        spliced in only while `anchor` is still the window's oldest message: one that lost a
+        race with an eviction, a cut or a clear no longer joins the window it was fetched
+        against, so it is dropped rather than spliced in with a gap. Room comes only from spare
+        capacity, so the window's own newer messages always win.
+        """
+        window = self._windows.get(anchor.channel.id)
+        if window is None or not window.messages or window.messages[0].id != anchor.id:
+            return
+        room = self.max_messages - len(window.messages)
+        if room <= 0:
+            return
+        admitted = older[-room:]
+        window.messages.extendleft(reversed(admitted))
+        window.reaches_start = reaches_start and len(admitted) == len(older)
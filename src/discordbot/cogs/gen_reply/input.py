@@ -104,6 +104,14 @@ class MessageInputBuilder(BaseModel):
     _attachment_cache: OrderedDict[
         tuple[int, datetime | None, tuple[int | str, ...]], tuple[datetime, list[RenderedPart]]
     ] = PrivateAttr(default_factory=OrderedDict)
+    # Renders still in flight, keyed like `_attachment_cache`, so a reply that reaches a
+    # message while its prefetch is still uploading waits for that render instead of
+    # starting a second one. Each entry notes its `allow_dead_cache`: a render that may
+    # reuse a dead handle is shared only with callers that allow the same.
+    _attachment_renders: dict[
+        tuple[int, datetime | None, tuple[int | str, ...]],
+        tuple["asyncio.Future[list[RenderedPart]]", bool],
+    ] = PrivateAttr(default_factory=dict)
 
     async def get_user_prompt(self, content: str) -> str:
         """Removes bot mention syntax from image/video generation prompts."""
@@ -515,8 +523,45 @@ class MessageInputBuilder(BaseModel):
             # values are immutable strings, so the copies stay cheap.
             return [part.copy() for part in cached[1]]
 
+        inflight = self._attachment_renders.get(cache_key)
+        if (
+            inflight is not None
+            and inflight[0].get_loop() is asyncio.get_running_loop()
+            and (allow_dead_cache or not inflight[1])
+        ):
+            logfire.debug(
+                "gen_reply attachment render joined",
+                message_id=message.id,
+                source_count=len(sources),
+            )
+            render = inflight[0]
+        else:
+            render = asyncio.ensure_future(
+                self._render_and_cache(
+                    message_id=message.id,
+                    sources=sources,
+                    cache_key=cache_key,
+                    allow_dead_cache=allow_dead_cache,
+                )
+            )
+            self._attachment_renders[cache_key] = (render, allow_dead_cache)
+            render.add_done_callback(
+                lambda done: self._forget_render(cache_key=cache_key, render=done)
+            )
+        # Shielded: the render may be shared, and one caller giving up is not the others'.
+        resolved = await asyncio.shield(render)
+        return [part.copy() for part in resolved]
+
+    async def _render_and_cache(
+        self,
+        message_id: int,
+        sources: list[AttachmentSource],
+        cache_key: tuple[int, datetime | None, tuple[int | str, ...]],
+        allow_dead_cache: bool,
+    ) -> list[RenderedPart]:
+        """Renders a message's sources and caches the parts unless any of them failed."""
         logfire.debug(
-            "gen_reply attachment render", message_id=message.id, source_count=len(sources)
+            "gen_reply attachment render", message_id=message_id, source_count=len(sources)
         )
         rendered = await self._render_attachment_parts(
             sources=sources, allow_dead_cache=allow_dead_cache
@@ -524,7 +569,7 @@ class MessageInputBuilder(BaseModel):
         resolved = [item[0] for item in rendered if item is not None]
         logfire.debug(
             "gen_reply attachment render done",
-            message_id=message.id,
+            message_id=message_id,
             resolved=len(resolved),
             dropped=len(sources) - len(resolved),
         )
@@ -539,6 +584,20 @@ class MessageInputBuilder(BaseModel):
                 self._attachment_cache.popitem(last=False)
         return resolved
 
+    def _forget_render(
+        self,
+        cache_key: tuple[int, datetime | None, tuple[int | str, ...]],
+        render: "asyncio.Future[list[RenderedPart]]",
+    ) -> None:
+        """Drops a finished render from the in-flight map, unless a newer one replaced it."""
+        inflight = self._attachment_renders.get(cache_key)
+        if inflight is not None and inflight[0] is render:
+            del self._attachment_renders[cache_key]
+        if not render.cancelled():
+            # Retrieved so a render every caller abandoned is not reported as unhandled;
+            # the callers that did await it have already seen the error.
+            render.exception()
+
     def _assemble_input_message(
         self,
         message: Message,
@@ -8,10 +8,11 @@ descriptions in `<generate-image>...</generate-image>` to have images generated
 one `<generate-video>...</generate-video>` description to have a short video generated and
 attached, or one `<deep-research>...</deep-research>` brief to launch a research thread; each such
 block (tags AND content) is REMOVED from the visible reply so the generation prompt never leaks
-into chat. `ResponseStreamer` extracts them at finalize time via `extract_inline_markers` and
-scrubs partial/complete tags from the live preview via `scrub_markers_for_preview`, so none flickers
-mid-stream. The asymmetry is deliberate: voice content is meant to stay visible, image / music /
-video content are meant to be pulled.
+into chat. `ResponseStreamer` feeds its deltas through a `MarkerScanner`, the streaming form of
+`extract_inline_markers` (at finalize) and `scrub_markers_for_preview` (for the live preview), so
+partial/complete tags never flicker mid-stream and a preview tick costs only the new text. The
+asymmetry is deliberate: voice content is meant to stay visible, image / music / video content
+are meant to be pulled.
 
 The tags are deliberately hyphenated (`generate-*`, like `<deep-research>`) so none collides with a
 real single-word HTML / SVG / SSML element — `<video>` is HTML5, `<image>` is SVG, `<voice>` is
@@ -20,8 +21,10 @@ generation request and stripped from the reply.
 """
 
 import re
+from functools import cache
+from collections import deque
 
-from pydantic import Field, BaseModel
+from pydantic import Field, BaseModel, PrivateAttr
 
 # Tag literals are the single source of truth shared by the prompt instructions and this parser.
 VOICE_OPEN = "<generate-voice>"
@@ -79,6 +82,9 @@ _ALL_TAGS = (
     DEEP_RESEARCH_OPEN,
     DEEP_RESEARCH_CLOSE,
 )
+# A live preview only ever trims a partial tag, at most one character short of the longest tag, so
+# everything in front of the last this-many non-whitespace characters is already settled.
+_SETTLED_GLYPHS = max(len(tag) for tag in _ALL_TAGS)
 
 
 class InlineMarkers(BaseModel):
@@ -223,10 +229,236 @@ def scrub_markers_for_preview(*, text: str) -> str:
     cleaned = _TRAILING_DEEP_RESEARCH_OPEN_RE.sub("", cleaned)
     cleaned = _VOICE_BLOCK_RE.sub(r"\1", cleaned)
     cleaned = _VOICE_TAG_RE.sub("", cleaned)
-    stripped = cleaned.rstrip()
+    return _trim_partial_tag(text=cleaned)
+
+
+def _trim_partial_tag(*, text: str) -> str:
+    """Right-strips a preview and drops a trailing fragment that is a prefix of any marker tag."""
+    stripped = text.rstrip()
     lowered = stripped.lower()
     for tag in _ALL_TAGS:
         for cut in range(len(tag) - 1, 1, -1):
             if lowered.endswith(tag[:cut].lower()):
                 return stripped[:-cut].rstrip()
     return stripped
+
+
+@cache
+def _tag_pattern(tags: tuple[str, ...]) -> re.Pattern[str]:
+    """Compiles a case-insensitive alternation of literal tags, the way the block regexes match."""
+    return re.compile("|".join(re.escape(tag) for tag in tags), re.IGNORECASE)
+
+
+def _undecided_start(*, text: str, tags: tuple[str, ...], start: int) -> int:
+    """Where the tail of `text` that could still grow into one of `tags` begins, else its end."""
+    position = text.find("<", max(start, len(text) - _SETTLED_GLYPHS + 1))
+    while position != -1:
+        tail = text[position:].lower()
+        if any(len(tail) < len(tag) and tag.startswith(tail) for tag in tags):
+            return position
+        position = text.find("<", position + 1)
+    return len(text)
+
+
+def _last_glyphs(*, text: str) -> list[int]:
+    """Indices of the last `_SETTLED_GLYPHS` non-whitespace characters of `text`, ascending."""
+    found: list[int] = []
+    for index in range(len(text) - 1, -1, -1):
+        if not text[index].isspace():
+            found.append(index)
+            if len(found) == _SETTLED_GLYPHS:
+                break
+    found.reverse()
+    return found
+
+
+class _MarkerLayer(BaseModel):
+    """One pass of `extract_inline_markers`, run over a reply while it is still streaming in.
+
+    With an open/close pair the layer is one block kind. Outside a block it watches only the
+    open tag and inside one only the close tag, passing every other tag on as plain text, which
+    is exactly how the non-greedy block regex pairs them. A pulled kind keeps the block's content
+    out of the text it passes on; voice passes it through. Without a pair the layer is the final
+    stray-tag scrub and drops every marker tag it meets. Text that could still grow into a
+    watched tag is held back until a later delta settles it.
+    """
+
+    open_tag: str | None = Field(default=None, description="The block's open tag; None scrubs.")
+    close_tag: str | None = Field(default=None, description="The block's close tag.")
+    pulls: bool = Field(
+        default=False, description="Whether block content is removed from the passed-on text."
+    )
+    matched: bool = Field(default=False, description="Whether any tag has been consumed yet.")
+    blocks: list[str] = Field(
+        default_factory=list, description="Every closed block's content, stripped, in order."
+    )
+    _inside: bool = PrivateAttr(default=False)
+    _pending: str = PrivateAttr(default="")
+    _content: list[str] = PrivateAttr(default_factory=list)
+
+    def _watched(self, *, inside: bool) -> tuple[str, ...]:
+        """The tags that move this layer on from its current state."""
+        if self.open_tag is None or self.close_tag is None:
+            return _ALL_TAGS
+        return (self.close_tag,) if inside else (self.open_tag,)
+
+    def scan(self, text: str, *, final: bool, record: bool) -> str:
+        """Runs `text` through the layer and returns what it passes on to the next one.
+
+        `final` releases the held-back tail as text, as at the end of the reply. Without
+        `record` nothing is kept, which is how a preview peeks at the undecided tails of every
+        layer without disturbing the real pass.
+        """
+        buffer = self._pending + text
+        inside = self._inside
+        passed: list[str] = []
+        position = 0
+        while True:
+            tags = self._watched(inside=inside)
+            match = _tag_pattern(tags).search(buffer, position)
+            if match is None:
+                break
+            self._take(
+                piece=buffer[position : match.start()], inside=inside, passed=passed, record=record
+            )
+            if self.open_tag is not None:
+                if record:
+                    if inside:
+                        self.blocks.append("".join(self._content).strip())
+                    self._content = []
+                inside = not inside
+            if record:
+                self.matched = True
+            position = match.end()
+        end = len(buffer) if final else _undecided_start(text=buffer, tags=tags, start=position)
+        self._take(piece=buffer[position:end], inside=inside, passed=passed, record=record)
+        if record:
+            self._inside = inside
+            self._pending = buffer[end:]
+        return "".join(passed)
+
+    def _take(self, *, piece: str, inside: bool, passed: list[str], record: bool) -> None:
+        """Routes one tag-free run of text into the block being read and/or onward."""
+        if not piece:
+            return
+        if inside and record:
+            self._content.append(piece)
+        if not (inside and self.pulls):
+            passed.append(piece)
+
+    @property
+    def unclosed(self) -> str | None:
+        """The stripped content of a block still open at the end of the reply, if any."""
+        return "".join(self._content).strip() if self._inside else None
+
+
+class MarkerScanner(BaseModel):
+    """`extract_inline_markers` and `scrub_markers_for_preview`, fed one delta at a time.
+
+    The streamer used to re-run every marker regex over the whole reply for each preview tick,
+    then once more to finalize, so a long reply cost its full length on every edit. The scanner
+    runs the same layers as `extract_inline_markers`, in the same order, as streaming passes that
+    each keep only an undecided tail of a few characters, so a delta costs its own length. The
+    visible text is kept as settled chunks; a preview reads only its head and the last few
+    characters, and `finish` hands back the same `InlineMarkers` the one-shot parser returns.
+
+    Attributes:
+        preview_chars: The longest preview `preview` returns, Discord's message limit.
+    """
+
+    preview_chars: int = Field(..., description="The longest preview `preview` returns.")
+    _layers: tuple[_MarkerLayer, ...] = PrivateAttr(
+        default_factory=lambda: (
+            _MarkerLayer(open_tag=IMAGE_OPEN, close_tag=IMAGE_CLOSE, pulls=True),
+            _MarkerLayer(open_tag=MUSIC_OPEN, close_tag=MUSIC_CLOSE, pulls=True),
+            _MarkerLayer(open_tag=VIDEO_OPEN, close_tag=VIDEO_CLOSE, pulls=True),
+            _MarkerLayer(open_tag=DEEP_RESEARCH_OPEN, close_tag=DEEP_RESEARCH_CLOSE, pulls=True),
+            _MarkerLayer(open_tag=VOICE_OPEN, close_tag=VOICE_CLOSE),
+            _MarkerLayer(),
+        )
+    )
+    _visible: list[str] = PrivateAttr(default_factory=list)
+    _visible_chars: int = PrivateAttr(default=0)
+    _head: str = PrivateAttr(default="")
+    _glyphs: deque[int] = PrivateAttr(default_factory=lambda: deque(maxlen=_SETTLED_GLYPHS))
+
+    def _settle(self, text: str) -> None:
+        """Appends text the last layer has passed on for good."""
+        if not text:
+            return
+        offset = self._visible_chars
+        self._glyphs.extend(offset + index for index in _last_glyphs(text=text))
+        if len(self._head) < self.preview_chars:
+            self._head += text[: self.preview_chars - len(self._head)]
+        self._visible.append(text)
+        self._visible_chars += len(text)
+
+    def _settled_from(self, start: int) -> str:
+        """The settled visible text from `start` on, read back from the newest chunk."""
+        pieces: list[str] = []
+        remaining = self._visible_chars - start
+        for chunk in reversed(self._visible):
+            if remaining <= 0:
+                break
+            pieces.append(chunk[-remaining:] if remaining < len(chunk) else chunk)
+            remaining -= len(chunk)
+        pieces.reverse()
+        return "".join(pieces)
+
+    def feed(self, text: str) -> None:
+        """Runs one streamed delta through every layer."""
+        for layer in self._layers:
+            text = layer.scan(text, final=False, record=True)
+        self._settle(text=text)
+
+    def preview(self) -> str:
+        """What `scrub_markers_for_preview` would show for the reply so far, capped.
+
+        The undecided tails are peeked through the layers as if the reply ended here, so a tag
+        is hidden from the moment it is recognisable. Trimming can only reach back over the
+        last `_SETTLED_GLYPHS` non-whitespace characters, so only that suffix is rebuilt and
+        trimmed; everything in front of it comes from the head kept for the cap.
+        """
+        tail = ""
+        for layer in self._layers:
+            tail = layer.scan(tail, final=True, record=False)
+        glyphs = [
+            *self._glyphs,
+            *(self._visible_chars + index for index in _last_glyphs(text=tail)),
+        ][-_SETTLED_GLYPHS:]
+        start = glyphs[0] if len(glyphs) == _SETTLED_GLYPHS else 0
+        if start >= self.preview_chars:
+            return (self._head + tail)[: self.preview_chars]
+        if start < self._visible_chars:
+            suffix = self._settled_from(start=start) + tail
+        else:
+            suffix = tail[start - self._visible_chars :]
+        prefix = (self._head + tail)[:start]
+        return (prefix + _trim_partial_tag(text=suffix))[: self.preview_chars]
+
+    def finish(self) -> InlineMarkers:
+        """Ends the reply and returns what `extract_inline_markers` returns for the whole of it."""
+        text = ""
+        for layer in self._layers:
+            text = layer.scan(text, final=True, record=True)
+        self._settle(text=text)
+        cleaned = "".join(self._visible)
+        # Same tidy-up rule as `extract_inline_markers`: only when a tag was actually removed.
+        if any(layer.matched for layer in self._layers):
+            cleaned = _COLLAPSE_BLANK_LINES_RE.sub("\n\n", cleaned).strip()
+        image, music, video, research, voice, _ = self._layers
+        image_prompts = [prompt for prompt in image.blocks if prompt]
+        if image.unclosed:
+            image_prompts.append(image.unclosed)
+        voice_segments = [segment for segment in voice.blocks if segment]
+        return InlineMarkers(
+            cleaned_text=cleaned,
+            voice_text="\n".join(voice_segments),
+            voice_requested=bool(voice_segments),
+            image_prompts=image_prompts,
+            music_prompt=next((p for p in music.blocks if p), None) or music.unclosed or None,
+            video_prompt=next((p for p in video.blocks if p), None) or video.unclosed or None,
+            research_brief=(
+                next((p for p in research.blocks if p), None) or research.unclosed or None
+            ),
+        )
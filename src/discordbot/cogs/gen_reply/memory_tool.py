@@ -16,6 +16,7 @@ construction, so they live outside the tree.
 
 import re
 import json
+from collections import OrderedDict
 
 from nextcord import User, Member, Message, DMChannel
 from pydantic import Field, BaseModel
@@ -30,8 +31,8 @@ from discordbot.services.memory.store import (
     user_scope,
     guild_compartment,
     list_compartments,
-    read_memory_document,
 )
+from discordbot.services.memory.store_io import memory_io
 
 # Returned for an allowed id that has no stored memory file, so the model still
 # sees an explicit signal. Also lets the usage footer tell "looked up" apart from
@@ -203,6 +204,14 @@ _MEMBER_ALIAS_SECTION_RE = re.compile(
 )
 _MEMBER_ALIAS_ID_RE = re.compile(r"\[id:\s*(?P<user_id>\d+)\]")
 
+# Parsed nickname tables, keyed by the document they came from. The reply path reads its
+# server memory through the store's render cache, which hands back the same string until a
+# write to that guild's memory, so every reply after the first finds its table here instead
+# of re-scanning the document (twice: once to widen, once for the absent members). Bounded
+# like the store's own caches, least recently used first out.
+_ALIAS_TABLE_CACHE_MAX_ENTRIES = 64
+_alias_tables: OrderedDict[str, tuple[tuple[int, str], ...]] = OrderedDict()
+
 
 def allowlist_ids_from_server_memory(*, memory: str) -> dict[int, str]:
     """Parses askable user ids out of a server memory's `## 成員稱呼` nickname table.
@@ -213,6 +222,18 @@ def allowlist_ids_from_server_memory(*, memory: str) -> dict[int, str]:
     id token becomes the label, escaped so a stored name can never inject a ping.
     Returns an empty map when the section is absent.
     """
+    table = _alias_tables.get(memory)
+    if table is None:
+        table = tuple(_parse_alias_table(memory=memory).items())
+        _alias_tables[memory] = table
+        if len(_alias_tables) > _ALIAS_TABLE_CACHE_MAX_ENTRIES:
+            _alias_tables.popitem(last=False)
+    _alias_tables.move_to_end(memory)
+    return dict(table)
+
+
+def _parse_alias_table(memory: str) -> dict[int, str]:
+    """Scans one document's nickname table; `allowlist_ids_from_server_memory` caches it."""
     section = _MEMBER_ALIAS_SECTION_RE.search(memory)
     if section is None:
         return {}
@@ -360,7 +381,7 @@ def compartments_for_reading(owner_id: int, context: MemoryReadContext) -> list[
     return [GLOBAL_COMPARTMENT]
 
 
-def resolve_user_memories(
+async def resolve_user_memories(
     *, user_id_list: list[str], allowed: dict[int, MemoryCandidate], context: MemoryReadContext
 ) -> list[UserMemory]:
     """Resolves requested ids to stored memory, enforcing the allowlist and the compartments.
@@ -369,7 +390,8 @@ def resolve_user_memories(
     are skipped, and duplicates collapse to one entry. Each surviving read opens only
     the compartments this conversation may see; an allowed id with no stored memory —
     or none in the compartments open here — returns an explicit no-memory signal rather
-    than being dropped.
+    than being dropped. An uncached read runs on the store's IO threads, so a large
+    compartment costs this reply its read time rather than stalling every other one.
     """
     results: list[UserMemory] = []
     seen: set[int] = set()
@@ -383,7 +405,7 @@ def resolve_user_memories(
             continue
         seen.add(user_id)
         candidate = allowed[user_id]
-        memory = read_memory_document(
+        memory = await memory_io.read_memory_document(
             scope=user_scope(user_id=user_id),
             compartments=compartments_for_reading(owner_id=user_id, context=context),
             flavor="user",
@@ -0,0 +1,240 @@
+"""Speculative attachment uploads, started when a file is posted instead of when it is asked about.
+
+A reply renders its history through `MessageInputBuilder.get_attachment_parts`, and that is the
+first moment a just-posted video is downloaded, uploaded and polled to ACTIVE, all while the
+user who asked about it waits. `AttachmentPrefetcher` moves that work to `on_message`: when a
+message with attachments lands in a channel the bot is likely to be asked about next, the same
+render runs in the background, so the reply that follows reads a warm per-message cache (and a
+warm upload registry) instead of paying the upload itself.
+
+"Likely to be asked about" is deliberately narrow, since an upload nobody asks about is spent
+for nothing: the bot itself posted in the channel within `PREFETCH_ACTIVE_WINDOW`, or the
+channel is a research thread still being driven. Every guild is also held to a rolling hourly
+byte budget, and at most `PREFETCH_CONCURRENCY` prefetches run at once, so they take only a
+corner of the shared `media_semaphore` and a live reply is never queued behind a guess.
+
+The upload is readable only by the key that made it, so a prefetch renders on the key the next
+reply would lease (`peek_gemini_key`) without counting a pick. Whether that guess held is what
+`claim` measures: a reply rendering a prefetched message on the same key is a hit, on another
+key a key miss, and a prefetch no reply ever reads within `PREFETCH_CLAIM_WINDOW` is waste.
+"""
+
+import time
+from collections import OrderedDict, deque
+
+import logfire
+from nextcord import Message
+from pydantic import Field, BaseModel, ConfigDict, PrivateAttr
+
+from discordbot.utils.asyncio_locks import LoopLocalSemaphore
+from discordbot.cogs.gen_reply.input import MessageInputBuilder
+
+# How recently the bot must have posted in a channel for a new attachment there to be worth
+# uploading ahead of any request.
+PREFETCH_ACTIVE_WINDOW = 600.0
+# The window a guild's byte budget is measured over.
+PREFETCH_BUDGET_WINDOW = 3600.0
+# How long a prefetched message waits for a reply to read it before it counts as waste.
+PREFETCH_CLAIM_WINDOW = 3600.0
+# Concurrent prefetches across every guild. Well under `MEDIA_CONCURRENCY`, so the reply path
+# always has most of the media slots to itself.
+PREFETCH_CONCURRENCY = 2
+# How many channels and prefetched messages are remembered; the oldest drop first.
+PREFETCH_MAX_TRACKED = 256
+
+_prefetch_slots = LoopLocalSemaphore(capacity_provider=lambda: PREFETCH_CONCURRENCY)
+
+
+class PrefetchStats(BaseModel):
+    """Running prefetch counters.
+
+    Attributes:
+        started: Prefetches admitted and launched.
+        bytes_started: Attachment bytes those prefetches were admitted for.
+        over_budget: Prefetches refused because the guild's hourly budget was spent.
+        hits: Prefetched messages a reply then rendered on the same key.
+        key_misses: Prefetched messages a reply rendered on a different key.
+        wasted: Prefetched messages no reply read within `PREFETCH_CLAIM_WINDOW`.
+    """
+
+    started: int = Field(default=0, description="Prefetches admitted and launched.")
+    bytes_started: int = Field(default=0, description="Attachment bytes admitted.")
+    over_budget: int = Field(default=0, description="Prefetches refused by the byte budget.")
+    hits: int = Field(default=0, description="Prefetches a reply read on the same key.")
+    key_misses: int = Field(default=0, description="Prefetches a reply read on another key.")
+    wasted: int = Field(default=0, description="Prefetches no reply read in time.")
+
+
+class _Prefetched(BaseModel):
+    """One prefetched message: which key it was uploaded under, its size, and when."""
+
+    key_index: int | None
+    size: int
+    started_at: float
+
+
+class AttachmentPrefetcher(BaseModel):
+    """Decides which posted attachments to upload early, and keeps score of the guesses.
+
+    Attributes:
+        guild_byte_budget: Attachment bytes one guild may prefetch per `PREFETCH_BUDGET_WINDOW`.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    guild_byte_budget: int = Field(
+        ..., description="Attachment bytes one guild may prefetch per rolling budget window."
+    )
+    # channel id -> monotonic time the bot last posted there.
+    _bot_activity: OrderedDict[int, float] = PrivateAttr(default_factory=OrderedDict)
+    # guild id -> (monotonic time, bytes) of each admitted prefetch inside the budget window.
+    _guild_spend: dict[int, deque[tuple[float, int]]] = PrivateAttr(default_factory=dict)
+    # message id -> the prefetch awaiting a reply to read it.
+    _prefetched: OrderedDict[int, _Prefetched] = PrivateAttr(default_factory=OrderedDict)
+    _stats: PrefetchStats = PrivateAttr(default_factory=PrefetchStats)
+
+    def note_bot_activity(self, channel_id: int) -> None:
+        """Marks the bot as active in a channel, which makes the channel worth prefetching."""
+        self._bot_activity[channel_id] = time.monotonic()
+        self._bot_activity.move_to_end(channel_id)
+        if len(self._bot_activity) > PREFETCH_MAX_TRACKED:
+            self._bot_activity.popitem(last=False)
+
+    def _recently_active(self, channel_id: int, now: float) -> bool:
+        """Whether the bot posted in the channel within `PREFETCH_ACTIVE_WINDOW`."""
+        posted_at = self._bot_activity.get(channel_id)
+        return posted_at is not None and now - posted_at < PREFETCH_ACTIVE_WINDOW
+
+    def admit(self, message: Message, *, research_thread: bool) -> int | None:
+        """Admits a message for prefetch and charges its guild, or returns None.
+
+        Only guild messages with attachments qualify: a DM reaches the bot at once anyway,
+        and stickers / embed images are small enough that uploading them with the reply
+        costs little. The size charged is what Discord reports for the attachments.
+
+        Args:
+            message: The message just posted.
+            research_thread: Whether the channel is a research thread still being driven.
+
+        Returns:
+            The bytes charged to the guild's budget, or None when the message is not admitted.
+        """
+        if message.guild is None or not message.attachments:
+            return None
+        now = time.monotonic()
+        if not research_thread and not self._recently_active(
+            channel_id=message.channel.id, now=now
+        ):
+            return None
+        size = sum(attachment.size for attachment in message.attachments)
+        spend = self._guild_spend.setdefault(message.guild.id, deque())
+        while spend and now - spend[0][0] >= PREFETCH_BUDGET_WINDOW:
+            spend.popleft()
+        spent = sum(amount for _at, amount in spend)
+        if spent + size > self.guild_byte_budget:
+            self._stats.over_budget += 1
+            logfire.debug(
+                "gen_reply attachment prefetch over budget",
+                guild_id=message.guild.id,
+                message_id=message.id,
+                size=size,
+                spent=spent,
+                budget=self.guild_byte_budget,
+            )
+            return None
+        spend.append((now, size))
+        self._stats.started += 1
+        self._stats.bytes_started += size
+        return size
+
+    async def prefetch(
+        self, message: Message, builder: MessageInputBuilder, key_index: int | None, size: int
+    ) -> None:
+        """Renders an admitted message's attachments on `builder`, warming its caches.
+
+        Args:
+            message: The admitted message.
+            builder: The input builder of the toolkit for the key the next reply would lease.
+            key_index: That key's number, remembered so `claim` can tell a hit from a miss.
+            size: The bytes `admit` charged, for the log.
+        """
+        self._prune(now=time.monotonic())
+        async with _prefetch_slots.get():
+            started = time.monotonic()
+            # Tracked from the moment the render starts: a reply arriving mid-upload joins
+            # the builder's in-flight render rather than starting its own, and that is a hit.
+            self._prefetched[message.id] = _Prefetched(
+                key_index=key_index, size=size, started_at=started
+            )
+            self._prefetched.move_to_end(message.id)
+            if len(self._prefetched) > PREFETCH_MAX_TRACKED:
+                self._prefetched.popitem(last=False)
+                self._stats.wasted += 1
+            try:
+                parts = await builder.get_attachment_parts(message=message)
+            except Exception as exc:
+                # Broad on purpose: a prefetch is a guess on a background task, and the reply
+                # that may follow renders the same message itself and surfaces its own errors.
+                self._prefetched.pop(message.id, None)
+                logfire.warn(
+                    "gen_reply attachment prefetch failed",
+                    message_id=message.id,
+                    error_type=type(exc).__name__,
+                    _exc_info=exc,
+                )
+                return
+        logfire.info(
+            "gen_reply attachment prefetched",
+            message_id=message.id,
+            key_index=key_index,
+            size=size,
+            parts=len(parts),
+            elapsed_seconds=time.monotonic() - started,
+        )
+
+    def claim(self, message_ids: list[int], key_index: int | None) -> None:
+        """Scores the prefetched messages a reply is rendering, on the key it leased.
+
+        Args:
+            message_ids: Every message whose attachments the reply renders.
+            key_index: The key the reply leased.
+        """
+        self._prune(now=time.monotonic())
+        hits = key_misses = 0
+        for message_id in message_ids:
+            prefetched = self._prefetched.pop(message_id, None)
+            if prefetched is None:
+                continue
+            if prefetched.key_index == key_index:
+                hits += 1
+            else:
+                key_misses += 1
+        if not hits and not key_misses:
+            return
+        self._stats.hits += hits
+        self._stats.key_misses += key_misses
+        logfire.info(
+            "gen_reply attachment prefetch claimed",
+            hits=hits,
+            key_misses=key_misses,
+            key_index=key_index,
+            total_hits=self._stats.hits,
+            total_key_misses=self._stats.key_misses,
+            total_wasted=self._stats.wasted,
+        )
+
+    def _prune(self, now: float) -> None:
+        """Counts prefetches past `PREFETCH_CLAIM_WINDOW` as waste and forgets them."""
+        while self._prefetched:
+            message_id, oldest = next(iter(self._prefetched.items()))
+            if now - oldest.started_at < PREFETCH_CLAIM_WINDOW:
+                return
+            del self._prefetched[message_id]
+            self._stats.wasted += 1
+
+    def stats(self) -> PrefetchStats:
+        """A snapshot of the running counters."""
+        return self._stats.model_copy()
+
+
+__all__ = ["AttachmentPrefetcher", "PrefetchStats"]
@@ -0,0 +1,162 @@
+"""Skipping the optional memory selection while a channel's candidates stay quiet.
+
+`_select_user_memories` is one triage-model round trip, run on a reply whose public channel
+has absent members in the server's `## 成員稱呼` nickname table, to ask whether the latest
+message obliquely refers to one of them. In an active conversation the answer is nearly
+always the one it was for the previous message: the candidates are the same table minus the
+same participants, and the conversation is still not about them.
+
+`MemorySelectionCache` remembers, per channel, a selection that chose nobody, keyed on the
+exact candidate set it was offered (ids and their table rows, so a table edit is a new set).
+The next reply in that channel skips the call only when all of these hold:
+
+* the candidates are exactly that set again;
+* the remembered selection is younger than `SELECTION_SKIP_TTL`;
+* the new message and its reference chain name none of the candidates' aliases
+  (`candidate_alias_terms`).
+
+A selection that chose somebody, failed or timed out is never a reason to skip, so it
+clears the channel's entry instead.
+
+The alias check is what keeps this a safe guess rather than a blind one: a message that
+names a table member, even mid-sentence, always goes to the selector. What it can miss is
+a reference that names nobody (a misspelling, a pronoun for someone the history never
+mentioned), and only for `SELECTION_SKIP_TTL` after a selection that already found the
+conversation was not about them.
+"""
+
+import re
+import time
+from collections import OrderedDict
+
+import logfire
+from pydantic import Field, BaseModel, PrivateAttr
+
+from discordbot.cogs.gen_reply.memory_tool import MemoryCandidate, MemorySelection
+
+# How long a selection that chose nobody stands in for the next ones in its channel.
+SELECTION_SKIP_TTL = 180.0
+# How many channels are remembered; the least recently used drop first.
+SELECTION_CACHE_MAX_ENTRIES = 512
+
+# What separates one alias from the next in a nickname-table row: whitespace, CJK and ASCII
+# punctuation, and the brackets around `(社群暱稱:...)`.
+_ALIAS_SEPARATOR_RE = re.compile(r"[\s、，,;；:：()（）\[\]【】|/・]+")
+# Shorter terms match inside unrelated words too often to mean anything.
+_MIN_ALIAS_CHARS = 2
+
+type CandidateSet = frozenset[tuple[int, str]]
+
+
+class MemorySelectionCacheStats(BaseModel):
+    """Running selection-cache counters.
+
+    Attributes:
+        skipped: Selections answered by the channel's remembered empty result.
+        ran: Selections that went to the model.
+    """
+
+    skipped: int = Field(default=0, description="Selections skipped on a quiet channel.")
+    ran: int = Field(default=0, description="Selections that went to the model.")
+
+
+def candidate_set(allowed: dict[int, MemoryCandidate]) -> CandidateSet:
+    """Returns the identity of an optional candidate set: each id with its table row."""
+    return frozenset((user_id, candidate.prompt_label) for user_id, candidate in allowed.items())
+
+
+def candidate_alias_terms(allowed: dict[int, MemoryCandidate]) -> frozenset[str]:
+    """Splits every candidate's table row into the casefolded aliases a message might name."""
+    return frozenset(
+        term
+        for candidate in allowed.values()
+        for term in _ALIAS_SEPARATOR_RE.split(candidate.prompt_label.casefold())
+        if len(term) >= _MIN_ALIAS_CHARS
+    )
+
+
+class MemorySelectionCache(BaseModel):
+    """Per-channel memory of the last optional selection that chose nobody."""
+
+    _quiet: OrderedDict[int, tuple[float, CandidateSet, frozenset[str]]] = PrivateAttr(
+        default_factory=OrderedDict
+    )
+    _stats: MemorySelectionCacheStats = PrivateAttr(default_factory=MemorySelectionCacheStats)
+
+    def may_skip(
+        self, channel_id: int, allowed: dict[int, MemoryCandidate], texts: list[str]
+    ) -> bool:
+        """Returns whether this reply can reuse the channel's last empty selection.
+
+        Args:
+            channel_id: The channel the reply is in.
+            allowed: The optional candidates this reply would offer the selector.
+            texts: The new message's content and its reference chain's.
+
+        Returns:
+            True when the selection call can be skipped, counting it either way.
+        """
+        entry = self._quiet.get(channel_id)
+        skip = False
+        if entry is not None:
+            recorded_at, candidates, terms = entry
+            if time.monotonic() - recorded_at >= SELECTION_SKIP_TTL:
+                self._quiet.pop(channel_id, None)
+            elif candidates == candidate_set(allowed=allowed):
+                self._quiet.move_to_end(channel_id)
+                folded = "\n".join(texts).casefold()
+                skip = not any(term in folded for term in terms)
+        if skip:
+            self._stats.skipped += 1
+        else:
+            self._stats.ran += 1
+        logfire.debug(
+            "gen_reply memory selection cache",
+            channel_id=channel_id,
+            outcome="skip" if skip else "run",
+            candidates=len(allowed),
+            skipped=self._stats.skipped,
+            ran=self._stats.ran,
+        )
+        return skip
+
+    def record(
+        self,
+        channel_id: int,
+        allowed: dict[int, MemoryCandidate],
+        selection: MemorySelection | None,
+    ) -> None:
+        """Remembers a selection that chose nobody; any other outcome forgets the channel.
+
+        Args:
+            channel_id: The channel the reply is in.
+            allowed: The optional candidates the selector was offered.
+            selection: What it chose, or None when it failed or ran out of time.
+        """
+        if selection is None or selection.memories:
+            self.forget(channel_id=channel_id)
+            return
+        self._quiet[channel_id] = (
+            time.monotonic(),
+            candidate_set(allowed=allowed),
+            candidate_alias_terms(allowed=allowed),
+        )
+        self._quiet.move_to_end(channel_id)
+        if len(self._quiet) > SELECTION_CACHE_MAX_ENTRIES:
+            self._quiet.popitem(last=False)
+
+    def forget(self, channel_id: int) -> None:
+        """Drops the channel's remembered selection, so its next reply asks the model."""
+        self._quiet.pop(channel_id, None)
+
+    def stats(self) -> MemorySelectionCacheStats:
+        """A snapshot of the running counters."""
+        return self._stats.model_copy()
+
+
+__all__ = [
+    "MemorySelectionCache",
+    "MemorySelectionCacheStats",
+    "candidate_alias_terms",
+    "candidate_set",
+]
@@ -19,9 +19,11 @@ from discordbot.typings.models import strip_key_suffix
 from discordbot.utils.reactions import update_reaction
 from discordbot.typings.timeouts import ANSWER_STREAM_MAX_ATTEMPTS
 from discordbot.utils.llm_errors import llm_status_code, is_retryable_llm_error
+from discordbot.utils.reply_timing import timed_stage, mark_reply_timing
 from discordbot.utils.model_pricing import get_token_rates
 from discordbot.cogs.gen_reply.input import MessageInputBuilder
 from discordbot.utils.discord_embeds import embed_spacer_payload
+from discordbot.utils.edit_scheduler import PreviewLane, preview_edit_scheduler
 from discordbot.utils.media_delivery import (
     MEDIA_ENVELOPE_MARGIN,
     MediaItem,
@@ -30,11 +32,7 @@ from discordbot.utils.media_delivery import (
     MediaDeliveryPlanner,
     upload_limit_for,
 )
-from discordbot.cogs.gen_reply.markers import (
-    MAX_INLINE_IMAGES,
-    extract_inline_markers,
-    scrub_markers_for_preview,
-)
+from discordbot.cogs.gen_reply.markers import MAX_INLINE_IMAGES, InlineMarkers, MarkerScanner
 from discordbot.cogs.gen_reply.generation import (
     VOICE_REPLY_FILENAME,
     VoiceOutcome,
@@ -86,6 +84,28 @@ REASONING_PREVIEW_MAX_LINES = 4
 REASONING_PREVIEW_MAX_CHARS = 320
 
 
+def _uncode_mentions(*, markers: InlineMarkers) -> InlineMarkers:
+    """Unwraps backtick-coded mentions in every part of a finished reply's markers.
+
+    Tags never sit inside a coded mention, so unwrapping after segmentation yields what
+    unwrapping the raw reply first did, without a second full pass over it.
+    """
+
+    def uncode(text: str) -> str:
+        return CODED_MENTION_RE.sub(r"\1", text)
+
+    return markers.model_copy(
+        update={
+            "cleaned_text": uncode(markers.cleaned_text),
+            "voice_text": uncode(markers.voice_text),
+            "image_prompts": [uncode(prompt) for prompt in markers.image_prompts],
+            "music_prompt": markers.music_prompt and uncode(markers.music_prompt),
+            "video_prompt": markers.video_prompt and uncode(markers.video_prompt),
+            "research_brief": markers.research_brief and uncode(markers.research_brief),
+        }
+    )
+
+
 def _count_url_citations(*, output: list[ResponseOutputItem]) -> int:
     """Counts the grounding citations a completed response carried.
 
@@ -121,7 +141,6 @@ class ResponseStreamer(BaseModel):
     message: SkipValidation[Message] = Field(
         ..., description="The Discord message being answered and replied to."
     )
-    stored_content: str = Field(default="", description="The accumulated reply text.")
     reasoning_content: str = Field(
         default="", description="The accumulated reasoning-summary text shown before content."
     )
@@ -158,7 +177,11 @@ class ResponseStreamer(BaseModel):
         default=1, description="How many times the answer stream was opened for this reply."
     )
     preview_interval_seconds: float = Field(
-        default=1.0, description="Cadence of the snapshot editor's Discord edits while streaming."
+        default=1.0,
+        description=(
+            "Fastest cadence of the snapshot editor's Discord edits while streaming; the shared "
+            "edit scheduler stretches it when the channel is busy or Discord pushes back."
+        ),
     )
     model_name: str = Field(
         default="", description="The model name reported by the stream, for the usage footer."
@@ -249,13 +272,22 @@ class ResponseStreamer(BaseModel):
     )
     _editor_task: asyncio.Task[None] | None = PrivateAttr(default=None)
     _editor_stop: asyncio.Event = PrivateAttr(default_factory=asyncio.Event)
+    # The running editor's seat in `preview_edit_scheduler`, None while no editor runs.
+    _preview_lane: PreviewLane | None = PrivateAttr(default=None)
+    # The reply text as the deltas that built it, joined only when someone reads `stored_content`,
+    # plus the marker scanner those deltas are fed through as they land, so neither a preview
+    # tick nor finalize re-parses the whole reply (see `MarkerScanner`).
+    _content_chunks: list[str] = PrivateAttr(default_factory=list)
+    _markers: MarkerScanner = PrivateAttr(
+        default_factory=lambda: MarkerScanner(preview_chars=DISCORD_MESSAGE_LIMIT)
+    )
     # The usage footer appended to stored_content, kept so the media edit can splice any hosted-URL
     # line BEFORE it (USAGE_FOOTER_RE strips only a footer at end-of-message).
     _usage_footer: str = PrivateAttr(default="")
     # Set when the reply message was deleted while streaming, so the media step knows the
     # difference between "never sent" (a real problem, worth a hint) and "sent then deleted".
     _reply_deleted: bool = PrivateAttr(default=False)
-    # Set once the preview editor has reported a failed snapshot write, so the 1s cadence does
+    # Set once the preview editor has reported a failed snapshot write, so the preview cadence does
     # not repeat the same warn for the rest of the stream. Deliberately survives a retry reset:
     # a Discord edit that failed on one attempt fails on the next for the same reason.
     _preview_error_logged: bool = PrivateAttr(default=False)
@@ -272,6 +304,17 @@ class ResponseStreamer(BaseModel):
     # answer. See the grounding note in CLAUDE.md's Responses API Gotchas.
     _url_citations: int | None = PrivateAttr(default=None)
 
+    @property
+    def stored_content(self) -> str:
+        """The accumulated reply text (after finalize: the cleaned reply plus its footer)."""
+        return "".join(self._content_chunks)
+
+    @stored_content.setter
+    def stored_content(self, value: str) -> None:
+        self._content_chunks = [value] if value else []
+        self._markers = MarkerScanner(preview_chars=DISCORD_MESSAGE_LIMIT)
+        self._markers.feed(text=value)
+
     @staticmethod
     def _split_reply_for_discord(content: str, footer: str) -> tuple[str, list[str]]:
         """Splits a completed reply into one parent message plus follow-up chunks."""
@@ -308,7 +351,7 @@ class ResponseStreamer(BaseModel):
         budget keeps its own tail behind an ellipsis, so the newest thought always shows.
         """
         if self.content_started:
-            return scrub_markers_for_preview(text=self.stored_content)[:DISCORD_MESSAGE_LIMIT]
+            return self._markers.preview()
         if not self.reasoning_content:
             return ""
         # Mentions are escaped because this transient text is never meant to ping;
@@ -358,49 +401,64 @@ class ResponseStreamer(BaseModel):
         self.displayed_content = preview
 
     async def _preview_editor(self) -> None:
-        """Edits the reply with the latest snapshot on a fixed cadence until stopped.
-
-        Stopping uses the event rather than task cancellation so an in-flight Discord
-        write always completes before `_finalize_reply` runs; a cancel landing inside
-        the first `message.reply` could otherwise orphan the created message and let
-        the finalizer create a duplicate.
+        """Edits the reply with the latest snapshot whenever the shared scheduler grants a slot.
+
+        Slots come from `preview_edit_scheduler`, which paces this reply against every other
+        preview streaming into the same channel and backs off when Discord pushes back, so the
+        cadence is `preview_interval_seconds` at best. Stopping uses the event rather than task
+        cancellation so an in-flight Discord write always completes before `_finalize_reply`
+        runs; a cancel landing inside the first `message.reply` could otherwise orphan the
+        created message and let the finalizer create a duplicate.
         """
-        while True:
+        async with preview_edit_scheduler.lane(
+            channel_id=self.message.channel.id, min_interval=self.preview_interval_seconds
+        ) as lane:
+            self._preview_lane = lane
             try:
-                await asyncio.wait_for(
-                    self._editor_stop.wait(), timeout=self.preview_interval_seconds
-                )
-            except TimeoutError:
-                try:
-                    await self._write_preview_snapshot()
-                except NotFound:
-                    # The reply was deleted mid-stream; a normal end, handled again in
-                    # _write_final_message. Nothing to repair, so stop previewing.
-                    logfire.info(
-                        "Reply deleted while streaming; stopping preview edits",
-                        message_id=self.message.id,
-                    )
-                    return
-                except Exception as exc:
-                    # Broad on purpose: the preview is best-effort and must never break the
-                    # stream, but a persistent failure kills the whole live-preview UX, so the
-                    # first one is recorded. Logged once because displayed_content is not
-                    # advanced on failure, so the same error repeats every tick.
-                    if not self._preview_error_logged:
-                        self._preview_error_logged = True
-                        logfire.warn(
-                            "Preview snapshot edit failed; continuing to stream",
+                while await lane.next_slot(stop=self._editor_stop):
+                    started = time.monotonic()
+                    try:
+                        await self._write_preview_snapshot()
+                    except NotFound:
+                        # The reply was deleted mid-stream; a normal end, handled again in
+                        # _write_final_message. Nothing to repair, so stop previewing.
+                        logfire.info(
+                            "Reply deleted while streaming; stopping preview edits",
                             message_id=self.message.id,
-                            error_type=type(exc).__name__,
-                            _exc_info=exc,
                         )
-            else:
-                return
+                        return
+                    except Exception as exc:
+                        lane.settle(
+                            seconds=time.monotonic() - started,
+                            rate_limited=isinstance(exc, HTTPException) and exc.status == 429,
+                        )
+                        # Broad on purpose: the preview is best-effort and must never break the
+                        # stream, but a persistent failure kills the whole live-preview UX, so
+                        # the first one is recorded. Logged once because displayed_content is
+                        # not advanced on failure, so the same error repeats every slot.
+                        if not self._preview_error_logged:
+                            self._preview_error_logged = True
+                            logfire.warn(
+                                "Preview snapshot edit failed; continuing to stream",
+                                message_id=self.message.id,
+                                error_type=type(exc).__name__,
+                                _exc_info=exc,
+                            )
+                    else:
+                        lane.settle(seconds=time.monotonic() - started)
+            finally:
+                self._preview_lane = None
 
     def _ensure_editor_started(self) -> None:
-        """Starts the snapshot editor task on the first delta that gives it work."""
+        """Starts the snapshot editor on the first delta that gives it work.
+
+        Every later delta marks the editor's lane changed instead, which is what lets the
+        scheduler skip a slot when nothing new arrived and count the deltas an edit coalesced.
+        """
         if self._editor_task is None:
             self._editor_task = asyncio.create_task(coro=self._preview_editor())
+        elif self._preview_lane is not None:
+            self._preview_lane.touch()
 
     async def _stop_editor(self) -> None:
         """Signals the editor to stop and waits out any in-flight Discord write."""
@@ -460,6 +518,7 @@ class ResponseStreamer(BaseModel):
                 return
             if not self._reasoning_logged:
                 self._reasoning_logged = True
+                mark_reply_timing(name="first_reasoning")
                 logfire.info(
                     "gen_reply first reasoning delta",
                     elapsed_seconds=time.monotonic() - self.created_at,
@@ -478,13 +537,15 @@ class ResponseStreamer(BaseModel):
             self.content_started = True
             if not self.content_ever_started:
                 self.content_ever_started = True
+                mark_reply_timing(name="first_content")
                 logfire.info(
                     "gen_reply first content delta",
                     elapsed_seconds=time.monotonic() - self.created_at,
                     model=self.model_name,
                     message_id=self.message.id,
                 )
-        self.stored_content += delta
+        self._content_chunks.append(delta)
+        self._markers.feed(text=delta)
         self._ensure_editor_started()
 
     def reset_for_retry(self) -> None:
@@ -651,13 +712,13 @@ class ResponseStreamer(BaseModel):
         input_rate, output_rate = get_token_rates(model_name=reported_model)
         cost = input_rate * self.input_tokens + output_rate * self.output_tokens
 
-        self.stored_content = CODED_MENTION_RE.sub(r"\1", self.stored_content)
         # The answer model may wrap <generate-voice> segments (spoken aloud, kept in the reply) plus
         # <generate-image> / <generate-music> / <generate-video> / <deep-research> blocks (requests,
-        # removed from the reply). Extract them all before the footer is built or anything is
-        # written. The <generate-voice> segments stay in the visible text; only they (not the whole
-        # reply) feed the spoken clip so the audio matches what is read.
-        markers = extract_inline_markers(text=self.stored_content)
+        # removed from the reply). The scanner already split them out as the deltas landed; finish
+        # it before the footer is built or anything is written. The <generate-voice> segments stay
+        # in the visible text; only they (not the whole reply) feed the spoken clip so the audio
+        # matches what is read.
+        markers = _uncode_mentions(markers=self._markers.finish())
         self.stored_content = markers.cleaned_text
         self.voice_requested = markers.voice_requested
         self.image_prompts = markers.image_prompts
@@ -705,7 +766,8 @@ class ResponseStreamer(BaseModel):
         if self.carries_turn_notices:
             current_answer_streamer.set(None)
 
-        await self._attach_generated_media()
+        with timed_stage(stage="media_attach"):
+            await self._attach_generated_media()
         logfire.info(
             "gen_reply reply finalized",
             message_id=self.message.id,
@@ -1111,7 +1173,8 @@ class ResponseStreamer(BaseModel):
             # reported as answer latency.
             self._answer_seconds = time.monotonic() - self.created_at
             await self._stop_editor()
-        return await self._finalize_reply()
+        with timed_stage(stage="finalize"):
+            return await self._finalize_reply()
 
 
 # The turn's UNFINISHED answer, so the pipeline's failure path can land its error on the reply
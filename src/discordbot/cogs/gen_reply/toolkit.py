@@ -205,6 +205,7 @@ class GeminiKeyToolkit(BaseModel):
             attachment_handler=build_attachment_handler(
                 model_name=self.runtime_models.slow_model.name,
                 gemini_api_key=self.slot.api_key if self.slot is not None else "",
+                gemini_key_index=self.key_index,
             ),
         )
 
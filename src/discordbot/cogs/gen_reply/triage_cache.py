@@ -0,0 +1,174 @@
+"""Reuse of route and effort verdicts across replies whose triage input reads the same.
+
+`_route_classify` and `_grade_effort` each spend one triage-model round trip before the answer
+can start, and both read only the text-only render: cleaned text plus `[attachment: <kind>]`
+markers, never the bytes. So two messages whose render says the same thing get the same verdict
+from both calls — the "hi", the sticker-only reaction, the same meme link posted in three
+channels — and `TriageCache` hands the first verdict back for the rest instead of asking again.
+
+The fingerprint is that render with who-said-it stripped out: the `Name (name) [id: N]:` sender
+prefix and the header naming the author carry nothing the verdict depends on, and keeping them
+would make every author's "hi" a separate entry. Roles stay (the bot's own turn reads
+differently), as does the order of the reference chain.
+
+A verdict is reused only where it is a safe guess. Long inputs and attachment-heavy ones
+bypass the cache entirely, since there the model's reading of the wording matters most and a
+repeat is rare anyway; and only a verdict the model actually produced is stored, never the
+QA/high default a failed call falls back to. Entries are keyed on the triage model too and
+expire after `TRIAGE_CACHE_TTL`, so one unlucky verdict is repeated for minutes, not for good.
+"""
+
+import re
+import time
+from typing import Literal
+import hashlib
+from collections import OrderedDict
+
+import logfire
+from pydantic import Field, BaseModel, PrivateAttr
+from openai.types.responses.response_input_param import EasyInputMessageParam
+
+from discordbot.typings.models import EffortGrade, RouteClassification
+
+# How long a verdict is reused.
+TRIAGE_CACHE_TTL = 600.0
+# How many verdicts are kept; the least recently used drop first.
+TRIAGE_CACHE_MAX_ENTRIES = 512
+# Inputs whose normalized text runs longer than this bypass the cache.
+TRIAGE_CACHE_MAX_CHARS = 280
+# Inputs carrying more attachment markers than this bypass the cache.
+TRIAGE_CACHE_MAX_ATTACHMENTS = 1
+
+# Everything up to and including a sender's `[id: N]`, with the `:` / `.` that follows it: the
+# sender prefix on a message and the author clause in a block header.
+_SENDER_RE = re.compile(r"^.*?\[id: \d+\][:.]?\s*", flags=re.DOTALL)
+_ATTACHMENT_MARKER_RE = re.compile(r"^\[attachment: [a-z]+\]$")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+type TriageKind = Literal["route", "effort"]
+
+
+class TriageCacheStats(BaseModel):
+    """Running triage-cache counters.
+
+    Attributes:
+        hits: Lookups answered from the cache.
+        misses: Lookups that went to the model.
+        bypassed: Inputs too long or attachment-heavy to be looked up at all.
+    """
+
+    hits: int = Field(default=0, description="Lookups answered from the cache.")
+    misses: int = Field(default=0, description="Lookups that went to the model.")
+    bypassed: int = Field(default=0, description="Inputs that skipped the cache.")
+
+
+def _texts(item: EasyInputMessageParam) -> list[str]:
+    """Every text an input message carries, in order."""
+    content = item.get("content", "")
+    if isinstance(content, str):
+        return [content]
+    return [str(part.get("text", "")) for part in content if isinstance(part, dict)]
+
+
+def triage_fingerprint(messages: list[EasyInputMessageParam]) -> str | None:
+    """Returns the cache key for a triage input, or None when the input should bypass it.
+
+    Args:
+        messages: The text-only reference and current parts both triage calls read.
+
+    Returns:
+        A digest of the normalized render, or None for a long or attachment-heavy input.
+    """
+    normalized: list[str] = []
+    chars = 0
+    attachments = 0
+    for item in messages:
+        texts = _texts(item=item)
+        attachments += sum(1 for text in texts if _ATTACHMENT_MARKER_RE.match(text))
+        body = " ".join(
+            _WHITESPACE_RE.sub(" ", _SENDER_RE.sub("", text, count=1)).strip().casefold()
+            for text in texts
+        )
+        if item.get("role") != "system":
+            chars += len(body)
+        normalized.append(f"{item.get('role', 'user')}:{body}")
+    if chars > TRIAGE_CACHE_MAX_CHARS or attachments > TRIAGE_CACHE_MAX_ATTACHMENTS:
+        return None
+    return hashlib.sha256("\n".join(normalized).encode()).hexdigest()
+
+
+class TriageCache(BaseModel):
+    """Bounded TTL cache of route and effort verdicts, keyed on `triage_fingerprint`."""
+
+    _entries: OrderedDict[
+        tuple[TriageKind, str, str], tuple[float, RouteClassification | EffortGrade]
+    ] = PrivateAttr(default_factory=OrderedDict)
+    _stats: TriageCacheStats = PrivateAttr(default_factory=TriageCacheStats)
+
+    def lookup[VerdictT: (RouteClassification, EffortGrade)](
+        self, kind: TriageKind, model: str, fingerprint: str | None, verdict_type: type[VerdictT]
+    ) -> VerdictT | None:
+        """Returns a fresh cached verdict, counting the lookup as a hit, miss or bypass.
+
+        Args:
+            kind: Which triage call is asking.
+            model: The triage model name, so a tier change never reads the old model's verdict.
+            fingerprint: `triage_fingerprint` of the input; None means bypass.
+            verdict_type: The verdict model the caller expects back.
+
+        Returns:
+            A copy of the cached verdict, or None on a miss or bypass.
+        """
+        if fingerprint is None:
+            self._stats.bypassed += 1
+            self._log(kind=kind, outcome="bypass")
+            return None
+        key = (kind, model, fingerprint)
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] >= TRIAGE_CACHE_TTL:
+            self._entries.pop(key, None)
+            self._stats.misses += 1
+            self._log(kind=kind, outcome="miss")
+            return None
+        self._entries.move_to_end(key)
+        self._stats.hits += 1
+        self._log(kind=kind, outcome="hit")
+        return verdict_type.model_validate(entry[1].model_dump())
+
+    def store(
+        self,
+        kind: TriageKind,
+        model: str,
+        fingerprint: str | None,
+        verdict: RouteClassification | EffortGrade,
+    ) -> None:
+        """Remembers a verdict the model produced; a bypassed input is never stored."""
+        if fingerprint is None:
+            return
+        key = (kind, model, fingerprint)
+        self._entries[key] = (time.monotonic(), verdict.model_copy(deep=True))
+        self._entries.move_to_end(key)
+        if len(self._entries) > TRIAGE_CACHE_MAX_ENTRIES:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Forgets every cached verdict."""
+        self._entries.clear()
+
+    def _log(self, kind: TriageKind, outcome: str) -> None:
+        """Reports one lookup with the running totals."""
+        logfire.debug(
+            "gen_reply triage cache",
+            kind=kind,
+            outcome=outcome,
+            hits=self._stats.hits,
+            misses=self._stats.misses,
+            bypassed=self._stats.bypassed,
+        )
+
+    def stats(self) -> TriageCacheStats:
+        """A snapshot of the running counters."""
+        return self._stats.model_copy()
+
+
+__all__ = ["TriageCache", "TriageCacheStats", "triage_fingerprint"]
@@ -3,7 +3,10 @@
 import re
 from typing import Any, Final
 import asyncio
+from functools import partial
 import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
 
 import logfire
 from nextcord import Message, DMChannel
@@ -15,6 +18,15 @@ from discordbot.utils.sqlite_config import configure_sqlite_connection
 
 CONTROL_CHARS_RE = re.compile(pattern=r"\x00")
 
+# The writer flushes once this many rows wait, or once this long has passed since the last
+# flush, whichever comes first. Sized so a busy guild's burst lands as a handful of
+# transactions while a quiet one still sees its rows on disk within the second.
+MESSAGE_LOG_BATCH_ROWS: Final[int] = 256
+MESSAGE_LOG_FLUSH_SECONDS: Final[float] = 1.0
+# Rows that may wait at once before new messages are dropped. Generous on purpose: it only
+# binds when the disk has stalled for minutes, and then memory is the thing to protect.
+MESSAGE_LOG_MAX_PENDING: Final[int] = 10_000
+
 # Single shared engine — putting create_engine() on a per-message
 # cached_property leaked the connection pool, dialect cache and inspector
 # cache for every Discord message.
@@ -106,16 +118,16 @@ ON CONFLICT (discord_message_id) WHERE discord_message_id IS NOT NULL DO UPDATE
 """
 
 
-def _write_row_sync(row: dict[str, str]) -> None:
-    """Ensures the canonical messages table exists and inserts one row.
+def _write_rows_sync(rows: list[dict[str, str]]) -> None:
+    """Ensures the canonical messages table exists and upserts `rows` in one transaction.
 
-    SQLite writes run off the event loop via `asyncio.to_thread`; the table
-    readiness marker is therefore guarded with a thread lock. The marker tracks
-    the current engine object so tests can swap `_sql_engine` without leaking
-    readiness from a previous temp DB.
+    One transaction per batch is the point of batching: in WAL mode each commit fsyncs the
+    WAL, so a batch pays for one fsync however many rows it carries. The table readiness
+    marker is guarded with a thread lock and tracks the current engine object, so tests can
+    swap `_sql_engine` without leaking readiness from a previous temp DB.
 
     Args:
-        row: Mapping matching the schema declared in `_CREATE_MESSAGES_TABLE_SQL`.
+        rows: Mappings matching the schema declared in `_CREATE_MESSAGES_TABLE_SQL`.
     """
     global _MESSAGES_TABLE_READY_FOR  # noqa: PLW0603 -- module-level cache by engine identity
 
@@ -128,13 +140,124 @@ def _write_row_sync(row: dict[str, str]) -> None:
             conn.execute(statement=text(text=_CREATE_MESSAGES_TABLE_SQL))
             for statement in _CREATE_MESSAGES_INDEX_SQL:
                 conn.execute(statement=text(text=statement))
-        conn.execute(statement=text(text=_INSERT_MESSAGE_SQL), parameters=row)
+        conn.execute(statement=text(text=_INSERT_MESSAGE_SQL), parameters=rows)
 
     if needs_create:
         with _MESSAGES_TABLE_LOCK:
             _MESSAGES_TABLE_READY_FOR = _sql_engine
 
 
+class MessageLogWriter:
+    """The one writer of messages.db: a coalescing queue drained in batches by one thread.
+
+    Every logged message and edit used to be its own detached task, thread hop and
+    transaction, and a streamed reply edits itself several times, so the fsync per commit
+    was most of what logging cost. Rows now wait here keyed by `discord_message_id`: a
+    newer version of a row still waiting replaces it in place, so a reply's edits collapse
+    into one write of its final state. A worker flushes whatever is waiting once
+    `MESSAGE_LOG_BATCH_ROWS` have gathered or `MESSAGE_LOG_FLUSH_SECONDS` have passed,
+    whichever is first, as one transaction on a single dedicated thread. That thread is
+    the only one that ever checks a connection out of `_sql_engine`'s pool, so it holds
+    the same one throughout, and two batches can never race for the write lock.
+
+    Under overload (the disk stalls and rows keep arriving) at most
+    `MESSAGE_LOG_MAX_PENDING` rows wait; a row for a message not already waiting is then
+    dropped and counted, and the count is logged once the writer catches up. An edit of a
+    waiting message is never dropped, since it replaces rather than adds. `close` writes
+    whatever is still waiting before it returns.
+
+    The worker starts on the first `enqueue`, on whichever loop the cog runs on.
+    """
+
+    def __init__(self) -> None:
+        """Initializes an empty writer; the worker and its thread start on first use."""
+        self._pending: dict[str, dict[str, str]] = {}
+        self._ready = asyncio.Event()
+        self._worker: asyncio.Task[None] | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._closed = False
+        self.dropped = 0
+        self._dropped_reported = 0
+
+    def enqueue(self, row: dict[str, str]) -> None:
+        """Queues one row, replacing a waiting row for the same message. Never blocks."""
+        if self._closed:
+            return
+        key = row["discord_message_id"]
+        if key not in self._pending and len(self._pending) >= MESSAGE_LOG_MAX_PENDING:
+            self.dropped += 1
+            return
+        self._pending[key] = row
+        if self._worker is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="message-log")
+            self._worker = asyncio.create_task(self._run())
+        if len(self._pending) >= MESSAGE_LOG_BATCH_ROWS:
+            self._ready.set()
+
+    async def _run(self) -> None:
+        """Flushes a batch whenever one fills up or the flush interval passes, until closed."""
+        while not self._closed:
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._ready.wait(), timeout=MESSAGE_LOG_FLUSH_SECONDS)
+            self._ready.clear()
+            await self._flush()
+
+    async def _flush(self) -> None:
+        """Writes everything waiting as one batch on the writer thread, best-effort."""
+        if not self._pending or self._executor is None:
+            return
+        rows = list(self._pending.values())
+        self._pending = {}
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self._executor, partial(_write_rows_sync, rows=rows))
+        except Exception as exc:
+            # Stays broad: the worker must outlive any one failed batch, or every message
+            # after it would wait forever. The batch is lost, as a failed single write was.
+            logfire.error(
+                "Failed to log messages",
+                rows=len(rows),
+                error_type=type(exc).__name__,
+                _exc_info=exc,
+            )
+            return
+        if self.dropped > self._dropped_reported:
+            logfire.warn(
+                "Message log dropped rows under overload",
+                dropped=self.dropped - self._dropped_reported,
+                max_pending=MESSAGE_LOG_MAX_PENDING,
+            )
+            self._dropped_reported = self.dropped
+
+    def close(self) -> None:
+        """Stops the worker and writes what is still waiting, blocking until it has landed.
+
+        Synchronous because it runs from `cog_unload`, which the bot's `close` calls before
+        the gateway goes down; shutting the executor down with `wait=True` also waits out a
+        batch the worker had already handed to the thread. The worker is woken rather than
+        cancelled, so that batch's `_flush` still sees it land (or fail) and logs as usual,
+        and the loop then ends on `_closed`.
+        """
+        self._closed = True
+        self._ready.set()
+        executor = self._executor
+        self._executor = None
+        rows = list(self._pending.values())
+        self._pending = {}
+        if executor is None:
+            return
+        final = executor.submit(_write_rows_sync, rows=rows) if rows else None
+        executor.shutdown(wait=True)
+        error = final.exception() if final is not None else None
+        if error is not None:
+            logfire.error(
+                "Failed to log messages",
+                rows=len(rows),
+                error_type=type(error).__name__,
+                _exc_info=error,
+            )
+
+
 class MessageLogger(BaseModel):
     """Persists a Discord message and its metadata to SQLite.
 
@@ -199,19 +322,15 @@ class MessageLogger(BaseModel):
             return f"{self.message.author.id}"
         return f"{self.message.channel.id}"
 
-    async def _save_messages(self) -> None:
-        """Persists the message row off the event loop.
+    def to_row(self) -> dict[str, str]:
+        """Builds the row this message is stored as.
 
-        SQLite I/O is synchronous; running it from the coroutine directly
-        would block the entire event loop while the WAL frame is fsynced.
-        Offloading via `asyncio.to_thread` lets Discord events, LLM streams
-        and game settlements keep ticking while the row lands on disk.
-        SQLite serializes the threads via its file-level write lock plus
-        the connection's `busy_timeout`.
+        Returns:
+            A mapping matching the schema declared in `_CREATE_MESSAGES_TABLE_SQL`.
         """
         attachment_paths = [attachment.url for attachment in self.message.attachments]
         sticker_paths = [sticker.url for sticker in self.message.stickers]
-        row: dict[str, str] = {
+        return {
             "discord_message_id": str(self.message.id),
             "source_type": self.source_type,
             "author": self.sanitize_text(s=self.message.author.name),
@@ -223,20 +342,22 @@ class MessageLogger(BaseModel):
             "attachments": ";".join(attachment_paths),
             "stickers": ";".join(sticker_paths),
         }
-        await asyncio.to_thread(_write_row_sync, row=row)
 
-    async def log(self) -> None:
-        """Persists the message row.
+    def log(self, writer: MessageLogWriter) -> None:
+        """Queues the message row on `writer`, which persists it off the event loop.
 
         Author filtering (human or this bot's own reply) lives in
         `LogMessageCog` so this method stays generic and is safe to call from
         anywhere that already knows the message is loggable.
+
+        Args:
+            writer: The writer that owns messages.db.
         """
         try:
-            await self._save_messages()
+            writer.enqueue(row=self.to_row())
         except Exception as exc:
-            # Stays broad: this runs as a detached create_task, so anything not caught
-            # here surfaces only as "Task exception was never retrieved".
+            # Stays broad: this runs inside a gateway listener, and a message that cannot be
+            # logged must never cost the other listeners their event.
             logfire.error(
                 "Failed to log message",
                 discord_message_id=self.message.id,
@@ -261,6 +382,15 @@ class LogMessageCog(commands.Cog):
             bot: The Discord bot instance.
         """
         self.bot = bot
+        self.writer = MessageLogWriter()
+
+    def cog_unload(self) -> None:
+        """Writes every row still waiting before the cog goes away.
+
+        The bot's `close` unloads every extension before it disconnects, so this is also
+        the shutdown flush.
+        """
+        self.writer.close()
 
     def _should_log(self, message: Message) -> bool:
         """Returns True for human messages or this bot's own replies.
@@ -275,14 +405,14 @@ class LogMessageCog(commands.Cog):
 
     @commands.Cog.listener()
     async def on_message(self, message: Message) -> None:
-        """Listens for messages and logs them asynchronously.
+        """Listens for messages and queues them for the message-log writer.
 
         Args:
             message: The message that was sent.
         """
         if not self._should_log(message=message):
             return
-        asyncio.create_task(MessageLogger(message=message).log())  # noqa: RUF006
+        MessageLogger(message=message).log(writer=self.writer)
 
     @commands.Cog.listener()
     async def on_message_edit(self, _before: Message, after: Message) -> None:
@@ -293,8 +423,9 @@ class LogMessageCog(commands.Cog):
         transient reasoning preview rather than the answer (a stream that finishes
         before the first preview tick creates the reply complete instead, and never
         reaches here). Every subsequent `reply.edit(...)` fires
-        here; the UPSERT on `discord_message_id` collapses them into a single row
-        whose content matches what is actually on Discord.
+        here; the writer coalesces the ones that arrive before its next flush, and the
+        UPSERT on `discord_message_id` collapses the rest into a single row whose content
+        matches what is actually on Discord.
 
         Args:
             _before: The pre-edit message snapshot (unused; only `after.id`
@@ -303,7 +434,7 @@ class LogMessageCog(commands.Cog):
         """
         if not self._should_log(message=after):
             return
-        asyncio.create_task(MessageLogger(message=after).log())  # noqa: RUF006
+        MessageLogger(message=after).log(writer=self.writer)
 
     @commands.Cog.listener()
     async def on_command_completion(self, context: commands.Context[commands.Bot]) -> None:
@@ -312,7 +443,7 @@ class LogMessageCog(commands.Cog):
         Args:
             context: The context of the command.
         """
-        asyncio.create_task(MessageLogger(message=context.message).log())  # noqa: RUF006
+        MessageLogger(message=context.message).log(writer=self.writer)
 
 
 def setup(bot: commands.Bot) -> None:
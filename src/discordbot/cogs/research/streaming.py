@@ -2,29 +2,33 @@
 
 Paints the agent's thought-summary text onto the research thread's opening status
 message while the run is in flight, mirroring the QA reply streamer's cadence-editor
-UX (`gen_reply/streaming.py`): a snapshot editor task edits the message on a fixed
-interval with a windowed tail of `-#` reasoning lines under a `Researching...` header,
-so the user watches the agent think instead of a 15s-polled snapshot of one thought.
+UX (`gen_reply/streaming.py`): a snapshot editor task edits the message whenever the shared
+`preview_edit_scheduler` grants it a slot, with a windowed tail of `-#` reasoning lines
+under a `Researching...` header, so the user watches the agent think instead of a
+15s-polled snapshot of one thought.
 
 Purpose-built and self-contained on purpose: it never touches the SDK, the interaction
 id, the reconnect loop, or the final result (those live in `agent.py::_StreamDriver`);
 it only consumes the already-opened Interactions SSE stream and renders reasoning. The
 report itself is delivered separately by `delivery.py` after the run settles, so this
 only ever shows thinking. It deliberately does NOT reuse `ResponseStreamer` (tightly
-coupled to the QA reply) nor extract a shared base from it.
+coupled to the QA reply) nor extract a shared base from it; the edit pacing is the one
+piece the two share, through `utils/edit_scheduler.py`, because they compete for the same
+Discord rate limits.
 """
 
 import time
 from typing import TYPE_CHECKING
 import asyncio
-import contextlib
 from collections.abc import AsyncIterator
 
 import logfire
-from nextcord import Message, AllowedMentions
+from nextcord import Message, HTTPException, AllowedMentions
 from pydantic import Field, BaseModel, ConfigDict, PrivateAttr, SkipValidation
 from nextcord.utils import escape_mentions
 
+from discordbot.utils.edit_scheduler import preview_edit_scheduler
+
 if TYPE_CHECKING:
     from google.genai.interactions import InteractionSSEEvent
 
@@ -55,7 +59,7 @@ class ResearchProgressStreamer(BaseModel):
     preview_interval_seconds: float = Field(
         default=3.0,
         description=(
-            "Cadence of the editor's Discord edits; research runs for minutes so a slower "
+            "Fastest cadence of the editor's Discord edits; research runs for minutes so a slower "
             "interval than QA's 1s keeps the single message well under Discord's edit rate limit."
         ),
     )
@@ -120,21 +124,33 @@ class ResearchProgressStreamer(BaseModel):
         self._displayed = preview
 
     async def _preview_editor(self) -> None:
-        """Edits the status message with the latest snapshot on a fixed cadence until stopped.
+        """Edits the status message with the latest snapshot on every scheduler slot until stopped.
 
-        Stops via the event rather than task cancellation so an in-flight Discord write always
-        lands before `deliver_report` reuses the same status message (a cancel could orphan it).
+        The lane does not wait for new reasoning: the header's elapsed timer changes on its own,
+        so every slot has something to show. Stops via the event rather than task cancellation
+        so an in-flight Discord write always lands before `deliver_report` reuses the same
+        status message (a cancel could orphan it).
         """
-        while True:
-            try:
-                await asyncio.wait_for(
-                    self._editor_stop.wait(), timeout=self.preview_interval_seconds
-                )
-            except TimeoutError:
-                with contextlib.suppress(Exception):
+        if self.status is None:
+            return
+        async with preview_edit_scheduler.lane(
+            channel_id=self.status.channel.id,
+            min_interval=self.preview_interval_seconds,
+            wait_for_change=False,
+        ) as lane:
+            while await lane.next_slot(stop=self._editor_stop):
+                started = time.monotonic()
+                try:
                     await self._write_preview_snapshot()
-            else:
-                return
+                except Exception as exc:
+                    # Broad, as the old suppress was: the live view is best-effort and a failed
+                    # edit only costs one frame; a 429 among them still slows the channel down.
+                    lane.settle(
+                        seconds=time.monotonic() - started,
+                        rate_limited=isinstance(exc, HTTPException) and exc.status == 429,
+                    )
+                else:
+                    lane.settle(seconds=time.monotonic() - started)
 
     def _ensure_editor_started(self) -> None:
         """Starts the cadence editor task once, only when there is a status message to edit."""
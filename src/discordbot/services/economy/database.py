@@ -43,30 +43,30 @@ as the per-user rows, so runtime casino and jackpot settlement applies the
 player delta and the house-side mirror in one atomic SQLite transaction.
 """
 
-from time import monotonic
 from typing import Any, Final
 import asyncio
 from datetime import datetime, timedelta
-from collections.abc import Sequence
+from collections.abc import Callable, Sequence
 
 import logfire
+from pydantic import Field, BaseModel, ConfigDict
 from sqlalchemy import (
+    Text,
     Index,
     String,
     Boolean,
     Integer,
+    Computed,
     DateTime,
     case,
-    desc,
-    func,
     text,
     event,
     select,
     update,
 )
-from sqlalchemy.orm import Mapped, DeclarativeBase, mapped_column
+from sqlalchemy.orm import Mapped, Session, DeclarativeBase, mapped_column
 from sqlalchemy.sql.dml import ReturningInsert
-from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, AsyncConnection, create_async_engine
 from sqlalchemy.dialects.sqlite import insert
 
 from discordbot.utils.timezone import as_taipei as _as_taipei
@@ -81,6 +81,7 @@ from discordbot.typings.economy import (
     LOAN_PROPOSAL_TIMEOUT_SECONDS,
     AdminAccount,
     CreditResult,
+    IncomeCredit,
     PortfolioView,
     LoanLenderType,
     TransferResult,
@@ -100,6 +101,7 @@ from discordbot.typings.economy import (
     CasinoLedgerSnapshot,
     LossLeaderboardEntry,
     RoundSettlementResult,
+    EconomyAggregatesCheck,
     BalanceAdjustmentResult,
     JackpotSettlementResult,
     JackpotSettlementRequest,
@@ -109,9 +111,11 @@ from discordbot.typings.economy import (
 )
 from discordbot.utils.asyncio_locks import LoopLocalLock
 from discordbot.utils.sqlite_config import ensure_sqlite_hooks, configure_sqlite_connection
-from discordbot.utils.stored_integer import StoredInteger
+from discordbot.utils.stored_integer import StoredInteger, int_add_text, stored_int_sort_key_sql
 from discordbot.utils.stored_integer import stored_int_to_int as _stored_int_to_int
 from discordbot.utils.stored_integer import stored_int_to_text as _stored_int_to_text
+from discordbot.utils.stored_integer import stored_int_sort_key as _stored_int_sort_key
+from discordbot.services.economy.leaderboards import RankedRow, TopKBoard
 
 # SELECT-then-conditional-UPDATE loops keep a small retry budget. With WAL +
 # busy_timeout, contention is rare and resolves on the first or second retry;
@@ -119,7 +123,17 @@ from discordbot.utils.stored_integer import stored_int_to_text as _stored_int_to
 _VIP_PURCHASE_MAX_RETRIES: Final[int] = 8
 _CLAMPED_DELTA_MAX_RETRIES: Final[int] = 8
 _JACKPOT_CLAIM_MAX_RETRIES: Final[int] = 8
-_ECONOMY_LEADERBOARD_CACHE_TTL_SECONDS: Final[float] = 5.0
+# Rows each in-process leaderboard holds: the public boards show ten, and the rest absorb
+# exclusions, hidden accounts and members dropping out before a reseed is needed.
+_LEADERBOARD_CAPACITY: Final[int] = 50
+# Age at which a leaderboard reseeds from SQL however many notes it has absorbed.
+_LEADERBOARD_RECONCILE_SECONDS: Final[float] = 300.0
+# `Session.info` key under which a transaction stages its leaderboard notes.
+_LEADERBOARD_NOTES_KEY: Final[str] = "economy_leaderboard_notes"
+# `Session.info` key under which a transaction sums its `economy_aggregates` changes.
+_AGGREGATE_DELTAS_KEY: Final[str] = "economy_aggregate_deltas"
+# Rows per multi-row income UPSERT, well under SQLite's bound-parameter limit.
+_INCOME_BATCH_ROWS: Final[int] = 256
 # Blackjack VIP perk: 1.2x payout on winning rounds, applied as floor(delta * 6 / 5).
 _VIP_WIN_MULTIPLIER_NUM: Final[int] = 6
 _VIP_WIN_MULTIPLIER_DEN: Final[int] = 5
@@ -203,10 +217,10 @@ class UserWallet(Base):
 
     __tablename__ = "user_wallet"
     __table_args__ = (
-        # StoredInteger persists decimal text, so /leaderboard uses an integer-aware
-        # ORDER BY expression. This index still helps point lookups and future
-        # schema migration paths, but it cannot satisfy that computed sort by itself.
-        Index("ix_user_wallet_balance", "balance"),
+        # StoredInteger persists decimal text, which does not sort numerically;
+        # balance_key does, so /leaderboard walks this index backwards and
+        # central-bank capacity range-scans its positive end.
+        Index("ix_user_wallet_balance_key", "balance_key"),
     )
 
     user_id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -217,6 +231,9 @@ class UserWallet(Base):
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=_database_now, onupdate=_database_now
     )
+    balance_key: Mapped[str] = mapped_column(
+        Text, Computed(stored_int_sort_key_sql(column="balance"), persisted=False)
+    )
 
 
 class CasinoAccount(Base):
@@ -230,15 +247,14 @@ class CasinoAccount(Base):
         daily_win: Current-day gross win from player-side casino settlements, stored as a decimal string.
         daily_net: Current-day signed net casino result, stored as a decimal string.
         updated_at: Taiwan-local timestamp of the last casino counter write.
+        daily_loss_key: `daily_loss` as a generated sort key, for the loss leaderboard.
     """
 
     __tablename__ = "casino_account"
     __table_args__ = (
-        # /loss_leaderboard filters to one Taipei day, which this index serves.
-        # Its ordering half does not: the counters are decimal text, so the
-        # query sorts by length(daily_loss) first and SQLite falls back to a
-        # temp B-tree for the ORDER BY.
-        Index("ix_casino_account_day_loss", "day_started_at", "daily_loss"),
+        # /loss_leaderboard filters to one Taipei day and reads this index
+        # backwards from its largest loss key, with no sort step.
+        Index("ix_casino_account_day_loss_key", "day_started_at", "daily_loss_key"),
     )
 
     user_id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -250,6 +266,9 @@ class CasinoAccount(Base):
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=_database_now, onupdate=_database_now
     )
+    daily_loss_key: Mapped[str] = mapped_column(
+        Text, Computed(stored_int_sort_key_sql(column="daily_loss"), persisted=False)
+    )
 
 
 class LoanProposal(Base):
@@ -397,6 +416,35 @@ class CasinoLedger(Base):
 CASINO_LEDGER_ID: Final[str] = "casino"
 
 
+class EconomyAggregates(Base):
+    """Running totals that would otherwise take a full table scan to compute.
+
+    One row (`ECONOMY_AGGREGATES_ID`), seeded by a scan when the table first appears
+    and then kept current by the wallet and loan write helpers: each stages its
+    change on the session, and the whole transaction's change lands in one UPDATE
+    as it commits, so the row moves atomically with the writes it sums. The admin
+    `aggregates` command verifies it against the scan and can rebuild it.
+
+    Attributes:
+        aggregate_id: Stable identifier (e.g. `"economy"`); primary key.
+        total_positive_balance: Sum of every wallet balance above zero.
+        central_bank_principal: Principal outstanding on active central-bank loans.
+        updated_at: Taiwan-local timestamp of the last write.
+    """
+
+    __tablename__ = "economy_aggregates"
+
+    aggregate_id: Mapped[str] = mapped_column(String(length=32), primary_key=True)
+    total_positive_balance: Mapped[int] = mapped_column(StoredInteger(), default=0, nullable=False)
+    central_bank_principal: Mapped[int] = mapped_column(StoredInteger(), default=0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=_database_now, onupdate=_database_now
+    )
+
+
+ECONOMY_AGGREGATES_ID: Final[str] = "economy"
+
+
 # On-the-house seed amount for each registered jackpot pool. The seed is
 # bookkeeping only — no wallet and no casino ledger row is debited to fund it,
 # so /casino P&L stays unaffected by the donation. Seeded pools are also
@@ -421,61 +469,235 @@ def _jackpot_seed_amount(game_id: str) -> int:
 _schema_ready_for: AsyncEngine | None = None
 _schema_lock = LoopLocalLock()
 _loan_accept_lock = LoopLocalLock()
-type _TopNCacheKey = tuple[int, int | None, tuple[int, ...], bool]
-type _TopLosersCacheKey = tuple[int, int, tuple[int, ...], bool, datetime]
-_top_n_cache: dict[_TopNCacheKey, tuple[float, tuple[LeaderboardEntry, ...]]] = {}
-_top_losers_cache: dict[_TopLosersCacheKey, tuple[float, tuple[LossLeaderboardEntry, ...]]] = {}
+
+
+class _EngineLeaderboards(BaseModel):
+    """The in-process leaderboards of one economy engine."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    engine: AsyncEngine = Field(..., description="The engine the boards were seeded from.")
+    balance: TopKBoard = Field(..., description="Balances, hidden accounts included.")
+    loss: TopKBoard = Field(..., description="One Taipei day's positive gross losses.")
+    loss_day: datetime | None = Field(default=None, description="The day `loss` ranks.")
+
+    def loss_board_for(self, day: datetime) -> TopKBoard:
+        """Returns the loss board, emptied first if it still ranks an earlier day."""
+        if self.loss_day != day:
+            self.loss.invalidate()
+            self.loss_day = day
+        return self.loss
+
+    def note_loss(self, user_id: int, day: datetime, daily_loss: int, name: str) -> None:
+        """Applies a committed daily-loss write; another day's board ignores it."""
+        if self.loss_day == day:
+            self.loss.note(user_id=user_id, score=daily_loss, name=name)
+
+
+_leaderboards: _EngineLeaderboards | None = None
+
+
+def _current_leaderboards() -> _EngineLeaderboards:
+    """Returns the current engine's leaderboards, starting empty ones after an engine swap."""
+    global _leaderboards  # noqa: PLW0603 -- module-level boards by engine identity
+    if _leaderboards is None or _leaderboards.engine is not _engine:
+        _leaderboards = _EngineLeaderboards(
+            engine=_engine,
+            balance=TopKBoard(
+                capacity=_LEADERBOARD_CAPACITY,
+                reconcile_seconds=_LEADERBOARD_RECONCILE_SECONDS,
+                label="balance",
+            ),
+            loss=TopKBoard(
+                capacity=_LEADERBOARD_CAPACITY,
+                reconcile_seconds=_LEADERBOARD_RECONCILE_SECONDS,
+                label="daily_loss",
+            ),
+        )
+    return _leaderboards
 
 
 def invalidate_economy_leaderboard_cache() -> None:
-    """Clears process-local leaderboard row caches.
+    """Makes both leaderboards reseed on their next read.
 
-    These are keyed on the query, so a write leaves them holding the wrong answer
-    until they are cleared. The rendered board images are keyed on the rows
-    themselves and expire on their own, which is why nothing here reaches into a
-    renderer.
+    Every write path in this module keeps the boards current through post-commit notes,
+    so this is for writes that bypass them, such as a direct UPDATE in a maintenance
+    script. The rendered board images are keyed on the rows themselves and expire on
+    their own, which is why nothing here reaches into a renderer.
     """
-    _top_n_cache.clear()
-    _top_losers_cache.clear()
+    if _leaderboards is not None:
+        _leaderboards.balance.invalidate()
+        _leaderboards.loss.invalidate()
 
 
-def _cached_top_n_rows(cache_key: _TopNCacheKey) -> list[LeaderboardEntry] | None:
-    """Returns cached balance leaderboard rows when the short TTL is still valid."""
-    cached = _top_n_cache.get(cache_key)
-    if cached is None:
-        return None
-    cached_at, rows = cached
-    if monotonic() - cached_at > _ECONOMY_LEADERBOARD_CACHE_TTL_SECONDS:
-        _top_n_cache.pop(cache_key, None)
-        return None
-    return list(rows)
+class _EconomySession(Session):
+    """Sync session class for economy sessions, so their commits can publish notes."""
 
 
-def _cached_top_loser_rows(cache_key: _TopLosersCacheKey) -> list[LossLeaderboardEntry] | None:
-    """Returns cached loss leaderboard rows when the short TTL is still valid."""
-    cached = _top_losers_cache.get(cache_key)
-    if cached is None:
-        return None
-    cached_at, rows = cached
-    if monotonic() - cached_at > _ECONOMY_LEADERBOARD_CACHE_TTL_SECONDS:
-        _top_losers_cache.pop(cache_key, None)
-        return None
-    return list(rows)
+def _stage_leaderboard_note(
+    session: AsyncSession, note: Callable[[_EngineLeaderboards], None]
+) -> None:
+    """Queues a leaderboard update to apply only if the session's transaction commits."""
+    session.info.setdefault(_LEADERBOARD_NOTES_KEY, []).append(note)
+
+
+def _stage_aggregate_delta(session: AsyncSession, column: str, delta: int) -> None:
+    """Adds to the change this transaction makes to one `economy_aggregates` column."""
+    if delta == 0:
+        return
+    deltas: dict[str, int] = session.info.setdefault(_AGGREGATE_DELTAS_KEY, {})
+    deltas[column] = deltas.get(column, 0) + delta
+
+
+def _note_wallet_write(  # noqa: PLR0913 -- a wallet write's outcome plus the identity it carried
+    session: AsyncSession,
+    user_id: int,
+    balance: int,
+    delta: int,
+    name: str = "",
+    avatar_url: str = "",
+) -> None:
+    """Stages a wallet write's effects on the balance leaderboard and the aggregates.
+
+    Args:
+        session: The session whose transaction made the write.
+        user_id: The wallet written.
+        balance: Its balance after the write.
+        delta: The change the write applied, so `balance - delta` was the balance before.
+        name: Display name the write carried, else empty.
+        avatar_url: Avatar URL the write carried, else empty.
+    """
+    _stage_leaderboard_note(
+        session=session,
+        note=lambda boards: boards.balance.note(
+            user_id=user_id, score=balance, name=name, avatar_url=avatar_url
+        ),
+    )
+    _stage_aggregate_delta(
+        session=session,
+        column="total_positive_balance",
+        delta=max(balance, 0) - max(balance - delta, 0),
+    )
+
+
+@event.listens_for(_EconomySession, "before_commit")
+def _write_aggregate_deltas(session: Session) -> None:
+    """Folds a transaction's staged aggregate changes into the row, inside that transaction."""
+    deltas: dict[str, int] | None = session.info.pop(_AGGREGATE_DELTAS_KEY, None)
+    values: dict[str, Any] = {
+        column: getattr(EconomyAggregates, column) + delta
+        for column, delta in (deltas or {}).items()
+        if delta != 0
+    }
+    if not values:
+        return
+    session.execute(
+        statement=update(EconomyAggregates)
+        .where(EconomyAggregates.aggregate_id == ECONOMY_AGGREGATES_ID)
+        .values(**values, updated_at=_database_now())
+    )
+
+
+@event.listens_for(_EconomySession, "after_commit")
+def _publish_leaderboard_notes(session: Session) -> None:
+    """Applies a committed transaction's notes to the boards of the engine it wrote."""
+    notes = session.info.pop(_LEADERBOARD_NOTES_KEY, None)
+    boards = _leaderboards
+    if not notes or boards is None or session.bind is not boards.engine.sync_engine:
+        return
+    for note in notes:
+        note(boards)
+
+
+@event.listens_for(_EconomySession, "after_rollback")
+def _discard_staged_effects(session: Session) -> None:
+    """Drops the notes and aggregate changes of a transaction that rolled back."""
+    session.info.pop(_LEADERBOARD_NOTES_KEY, None)
+    session.info.pop(_AGGREGATE_DELTAS_KEY, None)
+
+
+# Sort-key columns added after their tables first shipped, with the index that replaced the
+# one each table used to keep on the raw decimal text.
+_SORT_KEY_UPGRADES: Final[tuple[tuple[type[Base], str, str, str], ...]] = (
+    (UserWallet, "balance_key", "ix_user_wallet_balance_key", "ix_user_wallet_balance"),
+    (
+        CasinoAccount,
+        "daily_loss_key",
+        "ix_casino_account_day_loss_key",
+        "ix_casino_account_day_loss",
+    ),
+)
+
+
+async def _upgrade_sort_keys(conn: AsyncConnection) -> None:
+    """Adds the generated sort-key columns and their indexes to a pre-existing database.
+
+    `create_all` never alters a table it finds, so an economy.db from before the keys gets
+    them here. The columns are VIRTUAL: adding one rewrites no row, and building its index
+    computes every existing row's key, so there is no separate backfill.
+    """
+    for model, column_name, index_name, legacy_index_name in _SORT_KEY_UPGRADES:
+        table = model.__table__
+        pragma = await conn.execute(statement=text(f'PRAGMA table_xinfo("{table.name}")'))
+        if column_name not in {row[1] for row in pragma.all()}:
+            expression = table.c[column_name].computed.sqltext
+            await conn.execute(
+                statement=text(
+                    f'ALTER TABLE "{table.name}" ADD COLUMN "{column_name}" TEXT '
+                    f"GENERATED ALWAYS AS ({expression}) VIRTUAL"
+                )
+            )
+            logfire.info("economy sort key column added", table=table.name, column=column_name)
+        index = next(index for index in table.indexes if index.name == index_name)
+        await conn.run_sync(
+            lambda sync_conn, index=index: index.create(sync_conn, checkfirst=True)
+        )
+        await conn.execute(statement=text(f'DROP INDEX IF EXISTS "{legacy_index_name}"'))
+
+
+async def _scan_economy_aggregates(executor: AsyncConnection | AsyncSession) -> tuple[int, int]:
+    """Sums the positive wallet balances and the active central-bank principal from scratch.
+
+    Returns:
+        `(total_positive_balance, central_bank_principal)` as the tables stand.
+    """
+    balance_result = await executor.execute(
+        statement=select(UserWallet.balance).where(
+            UserWallet.balance_key > _stored_int_sort_key(value=0)
+        )
+    )
+    principal_result = await executor.execute(
+        statement=select(LoanContract.principal_remaining).where(
+            LoanContract.lender_type == LoanLenderType.CENTRAL_BANK,
+            LoanContract.status == LoanContractStatus.ACTIVE,
+        )
+    )
+    return sum(balance_result.scalars().all()), sum(principal_result.scalars().all())
 
 
-def _stored_integer_desc_order(column: Any) -> tuple[Any, ...]:  # noqa: ANN401 -- SQLAlchemy columns are generic expressions
-    """Returns ORDER BY terms for descending numeric order over decimal text."""
-    sign = func.discordbot_int_compare_text(column, _stored_int_to_text(value=0))
-    positive_length = case((sign > 0, func.length(column)), else_=0)
-    negative_length = case((sign < 0, func.length(column)), else_=0)
-    positive_text = case((sign > 0, column), else_="")
-    negative_text = case((sign < 0, column), else_="")
-    return (
-        desc(sign),
-        desc(positive_length),
-        desc(positive_text),
-        negative_length.asc(),
-        negative_text.asc(),
+async def _seed_economy_aggregates(conn: AsyncConnection) -> None:
+    """Creates the aggregates row from a full scan when the database does not have one yet.
+
+    A fresh database scans two empty tables; an economy.db from before the row scans once,
+    here, and never again.
+    """
+    existing = await conn.execute(
+        statement=select(EconomyAggregates.aggregate_id).where(
+            EconomyAggregates.aggregate_id == ECONOMY_AGGREGATES_ID
+        )
+    )
+    if existing.scalar_one_or_none() is not None:
+        return
+    total_positive_balance, central_bank_principal = await _scan_economy_aggregates(executor=conn)
+    await conn.execute(
+        statement=insert(EconomyAggregates)
+        .values(
+            aggregate_id=ECONOMY_AGGREGATES_ID,
+            total_positive_balance=total_positive_balance,
+            central_bank_principal=central_bank_principal,
+            updated_at=_database_now(),
+        )
+        .on_conflict_do_nothing(index_elements=["aggregate_id"])
     )
 
 
@@ -490,7 +712,7 @@ def _current_loan_accept_lock() -> asyncio.Lock:
 
 
 async def _ensure_schema() -> None:
-    """Bootstraps the economy schema, jackpot seeds, and casino ledger once per engine."""
+    """Bootstraps the economy schema, jackpot seeds, casino ledger and aggregates once per engine."""
     global _schema_ready_for  # noqa: PLW0603 -- module-level cache by engine identity
     ensure_sqlite_hooks(
         engine=_engine,
@@ -504,6 +726,7 @@ async def _ensure_schema() -> None:
             return
         async with _engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            await _upgrade_sort_keys(conn=conn)
             for seed_game_id, seed_amount in _JACKPOT_SEEDS:
                 await conn.execute(
                     statement=insert(JackpotPool)
@@ -529,6 +752,7 @@ async def _ensure_schema() -> None:
                 )
                 .on_conflict_do_nothing(index_elements=["ledger_id"])
             )
+            await _seed_economy_aggregates(conn=conn)
         _schema_ready_for = _engine
 
 
@@ -543,7 +767,7 @@ def open_session() -> AsyncSession:
         on_connect_fn=_configure_sqlite,
         on_checkout_fn=_configure_sqlite_on_checkout,
     )
-    return AsyncSession(bind=_engine, expire_on_commit=False)
+    return AsyncSession(bind=_engine, expire_on_commit=False, sync_session_class=_EconomySession)
 
 
 def monthly_rate_percent_to_bps(monthly_rate_percent: float) -> int:
@@ -685,7 +909,7 @@ async def _apply_daily_casino_delta_in_session(
     win_delta_text = str(win_delta)
     delta_text = str(delta)
     same_day = CasinoAccount.day_started_at == today_midnight
-    await session.execute(
+    result = await session.execute(
         statement=insert(CasinoAccount)
         .values(
             user_id=user_id,
@@ -702,28 +926,31 @@ async def _apply_daily_casino_delta_in_session(
                 "name": name or str(user_id),
                 "day_started_at": today_midnight,
                 "daily_loss": case(
-                    (
-                        same_day,
-                        func.discordbot_int_add_text(CasinoAccount.daily_loss, loss_delta_text),
-                    ),
+                    (same_day, int_add_text(column=CasinoAccount.daily_loss, delta=loss_delta)),
                     else_=loss_delta_text,
                 ),
                 "daily_win": case(
-                    (
-                        same_day,
-                        func.discordbot_int_add_text(CasinoAccount.daily_win, win_delta_text),
-                    ),
+                    (same_day, int_add_text(column=CasinoAccount.daily_win, delta=win_delta)),
                     else_=win_delta_text,
                 ),
                 "daily_net": case(
-                    (same_day, func.discordbot_int_add_text(CasinoAccount.daily_net, delta_text)),
+                    (same_day, int_add_text(column=CasinoAccount.daily_net, delta=delta)),
                     else_=delta_text,
                 ),
                 "updated_at": now,
             },
         )
+        .returning(CasinoAccount.daily_loss)
     )
-    invalidate_economy_leaderboard_cache()
+    daily_loss = result.scalar_one()
+    if loss_delta > 0:
+        account_name = name or str(user_id)
+        _stage_leaderboard_note(
+            session=session,
+            note=lambda boards: boards.note_loss(
+                user_id=user_id, day=today_midnight, daily_loss=daily_loss, name=account_name
+            ),
+        )
 
 
 async def _credit_with_repayment_in_session(  # noqa: PLR0913 -- session helper keeps income writes atomic
@@ -743,12 +970,103 @@ async def _credit_with_repayment_in_session(  # noqa: PLR0913 -- session helper
         statement=_build_credit_upsert(user_id=user_id, name=name, amount=amount, now=now)
     )
     new_balance = result.scalar_one()
-    invalidate_economy_leaderboard_cache()
+    _note_wallet_write(
+        session=session,
+        user_id=user_id,
+        balance=new_balance,
+        delta=amount,
+        name=name,
+        avatar_url=avatar_url,
+    )
     return CreditResult(
         new_balance=new_balance, credited_amount=amount, principal_repaid=0, remaining_debt=0
     )
 
 
+async def _credit_income_batch_in_session(
+    session: AsyncSession, incomes: Sequence[IncomeCredit], now: datetime
+) -> None:
+    """Credits a batch of positive incomes with one UPSERT per table per distinct amount.
+
+    Rows are grouped by amount so each statement adds a literal, which keeps the wallet
+    arithmetic on the native `StoredInteger` path; message rewards are one flat amount,
+    so a flush is normally two statements however many users it carries. A credit with
+    no name rides in a statement of its own that leaves the stored name alone, as the
+    single-credit path does.
+    """
+    by_amount: dict[tuple[int, bool], list[IncomeCredit]] = {}
+    by_naming: dict[bool, list[IncomeCredit]] = {}
+    identities: dict[int, IncomeCredit] = {}
+    for credit in incomes:
+        by_amount.setdefault((credit.amount, bool(credit.name)), []).append(credit)
+        by_naming.setdefault(bool(credit.name), []).append(credit)
+        identities[credit.user_id] = credit
+    for named, group in by_naming.items():
+        for start in range(0, len(group), _INCOME_BATCH_ROWS):
+            account_stmt = insert(UserAccount).values([
+                {
+                    "user_id": credit.user_id,
+                    "name": credit.name or str(credit.user_id),
+                    "avatar_url": credit.avatar_url,
+                    "updated_at": now,
+                    "is_vip": False,
+                    "is_admin": False,
+                    "is_central_banker": False,
+                    "hide_from_leaderboard": False,
+                }
+                for credit in group[start : start + _INCOME_BATCH_ROWS]
+            ])
+            account_set: dict[str, Any] = {
+                "avatar_url": case(
+                    (account_stmt.excluded.avatar_url != "", account_stmt.excluded.avatar_url),
+                    else_=UserAccount.avatar_url,
+                ),
+                "updated_at": now,
+            }
+            if named:
+                account_set["name"] = account_stmt.excluded.name
+            await session.execute(
+                statement=account_stmt.on_conflict_do_update(
+                    index_elements=["user_id"], set_=account_set
+                )
+            )
+    for (amount, named), group in by_amount.items():
+        for start in range(0, len(group), _INCOME_BATCH_ROWS):
+            wallet_stmt = insert(UserWallet).values([
+                {
+                    "user_id": credit.user_id,
+                    "name": credit.name or str(credit.user_id),
+                    "balance": amount,
+                    "total_earned": amount,
+                    "total_spent": 0,
+                    "updated_at": now,
+                }
+                for credit in group[start : start + _INCOME_BATCH_ROWS]
+            ])
+            wallet_set: dict[str, Any] = {
+                "balance": UserWallet.balance + amount,
+                "total_earned": UserWallet.total_earned + amount,
+                "updated_at": now,
+            }
+            if named:
+                wallet_set["name"] = wallet_stmt.excluded.name
+            wallet_result = await session.execute(
+                statement=wallet_stmt.on_conflict_do_update(
+                    index_elements=["user_id"], set_=wallet_set
+                ).returning(UserWallet.user_id, UserWallet.balance)
+            )
+            for user_id, balance in wallet_result.all():
+                credit = identities[user_id]
+                _note_wallet_write(
+                    session=session,
+                    user_id=user_id,
+                    balance=balance,
+                    delta=amount,
+                    name=credit.name,
+                    avatar_url=credit.avatar_url,
+                )
+
+
 async def _apply_clamped_delta_in_session(  # noqa: PLR0913 -- session helper needs identity and delta state
     session: AsyncSession, user_id: int, name: str, avatar_url: str, delta: int, now: datetime
 ) -> tuple[int, int]:
@@ -822,7 +1140,9 @@ async def _try_insert_clamped_positive_delta_in_session(
     inserted_balance = insert_result.scalar_one_or_none()
     if inserted_balance is None:
         return None
-    invalidate_economy_leaderboard_cache()
+    _note_wallet_write(
+        session=session, user_id=user_id, balance=inserted_balance, delta=delta, name=name
+    )
     return inserted_balance, delta
 
 
@@ -854,7 +1174,9 @@ async def _try_update_clamped_delta_in_session(  # noqa: PLR0913 -- conditional
     if update_result.scalar_one_or_none() is None:
         return None
     if applied != 0:
-        invalidate_economy_leaderboard_cache()
+        _note_wallet_write(
+            session=session, user_id=user_id, balance=new_balance, delta=applied, name=name
+        )
     return new_balance, applied
 
 
@@ -874,7 +1196,14 @@ async def _apply_signed_delta_in_session(  # noqa: PLR0913 -- session helper nee
     result = await session.execute(statement=stmt)
     new_balance = result.scalar_one()
     if delta != 0:
-        invalidate_economy_leaderboard_cache()
+        _note_wallet_write(
+            session=session,
+            user_id=user_id,
+            balance=new_balance,
+            delta=delta,
+            name=name,
+            avatar_url=avatar_url,
+        )
     return new_balance
 
 
@@ -1102,10 +1431,33 @@ async def credit_with_repayment(
             now=now,
         )
         await session.commit()
-        invalidate_economy_leaderboard_cache()
         return result
 
 
+async def credit_income_batch(incomes: Sequence[IncomeCredit]) -> int:
+    """Credits many users' income in one transaction through the shared income path.
+
+    The batched form of `credit_with_repayment` for write-behind callers: the same
+    wallet and account effects and the same leaderboard notes, in one commit for the
+    whole batch. Each user should appear once; a caller merges repeat credits first.
+
+    Args:
+        incomes: The incomes to apply; non-positive amounts are skipped.
+
+    Returns:
+        How many users were credited.
+    """
+    await _ensure_schema()
+    positive = [credit for credit in incomes if credit.amount > 0]
+    if not positive:
+        return 0
+    now = _database_now()
+    async with open_session() as session:
+        await _credit_income_batch_in_session(session=session, incomes=positive, now=now)
+        await session.commit()
+    return len(positive)
+
+
 async def adjust_balance(
     user_id: int, name: str, delta: int, allow_negative: bool = False, avatar_url: str = ""
 ) -> BalanceAdjustmentResult:
@@ -1154,7 +1506,6 @@ async def adjust_balance(
                 now=now,
             )
         await session.commit()
-        invalidate_economy_leaderboard_cache()
         return BalanceAdjustmentResult(new_balance=new_balance, applied_delta=applied_delta)
 
 
@@ -1193,7 +1544,6 @@ async def apply_ordered_wallet_deltas(
             await session.rollback()
             return None
         await session.commit()
-        invalidate_economy_leaderboard_cache()
         return OrderedWalletDeltaResult(new_balance=balance, applied_deltas=tuple(applied))
 
 
@@ -1211,6 +1561,7 @@ async def _apply_ordered_wallet_deltas_in_session(  # noqa: PLR0913 -- session h
     )
     balance = balance_result.scalar_one_or_none() or 0
     effective_name = name or str(user_id)
+    net_delta = 0
     for leg in deltas:
         delta = leg.delta
         if delta == 0:
@@ -1224,6 +1575,7 @@ async def _apply_ordered_wallet_deltas_in_session(  # noqa: PLR0913 -- session h
             )
             balance = credit_result.scalar_one()
             applied.append(delta)
+            net_delta += delta
             continue
         debit = -delta
         debit_result = await session.execute(
@@ -1242,8 +1594,11 @@ async def _apply_ordered_wallet_deltas_in_session(  # noqa: PLR0913 -- session h
             return None
         balance = new_balance
         applied.append(delta)
-    if any(delta != 0 for delta in applied):
-        invalidate_economy_leaderboard_cache()
+        net_delta += delta
+    if net_delta != 0:
+        _note_wallet_write(
+            session=session, user_id=user_id, balance=balance, delta=net_delta, name=name
+        )
     return balance
 
 
@@ -1300,7 +1655,6 @@ async def apply_round_settlement(
         except Exception:
             await _rollback_sessions(session)
             raise
-    invalidate_economy_leaderboard_cache()
     return RoundSettlementResult(player_balance=player_balance, casino_balance=casino_balance)
 
 
@@ -1693,8 +2047,6 @@ async def apply_jackpot_settlement_batch(
                 )
 
             await session.commit()
-            if any(delta != 0 for delta in applied_player_deltas.values()):
-                invalidate_economy_leaderboard_cache()
             return JackpotSettlementBatchResult(
                 player_balances=player_balances,
                 applied_player_deltas=applied_player_deltas,
@@ -1781,8 +2133,15 @@ async def buy_vip(user_id: int, name: str, avatar_url: str = "") -> VipPurchaseR
                 await session.rollback()
                 continue
 
+            _note_wallet_write(
+                session=session,
+                user_id=user_id,
+                balance=wallet_row[0],
+                delta=-cost,
+                name=name,
+                avatar_url=avatar_url,
+            )
             await session.commit()
-            invalidate_economy_leaderboard_cache()
             return VipPurchaseResult(new_balance=wallet_row[0], cost=cost)
 
         return None
@@ -2090,9 +2449,24 @@ async def transfer(  # noqa: PLR0913 -- transfer needs sender and receiver ident
         )
         credit_result = await session.execute(statement=credit_stmt)
         receiver_balance = credit_result.scalar_one()
+        _note_wallet_write(
+            session=session,
+            user_id=sender_id,
+            balance=sender_balance,
+            delta=-amount,
+            name=sender_name,
+            avatar_url=sender_avatar_url,
+        )
+        _note_wallet_write(
+            session=session,
+            user_id=receiver_id,
+            balance=receiver_balance,
+            delta=net,
+            name=receiver_name,
+            avatar_url=receiver_avatar_url,
+        )
 
         await session.commit()
-        invalidate_economy_leaderboard_cache()
         return TransferResult(
             sender_balance=sender_balance,
             receiver_balance=receiver_balance,
@@ -2109,9 +2483,9 @@ async def top_n(
     Hidden accounts are the only thing dropped by default (`include_hidden`).
     The one production caller (`cogs/economy/cog.py`, `/leaderboard`) does not pass
     `exclude_user_ids`: the bot is an ordinary player here and the casino's own P&L
-    is a `casino_ledger` row, not a wallet. Stored integer values are
-    sorted in SQL with explicit decimal-text aware order terms so the query
-    can still apply `LIMIT` before rows reach Python.
+    is a `casino_ledger` row, not a wallet. A limit up to `_LEADERBOARD_CAPACITY`
+    is served from the in-process balance board, which costs no query while the
+    board is current; anything larger reads `ix_user_wallet_balance_key` directly.
 
     Args:
         limit: Maximum number of accounts to return, or `None` to return all
@@ -2127,11 +2501,26 @@ async def top_n(
     await _ensure_schema()
     if limit is not None and limit <= 0:
         return []
-    exclude_key = tuple(sorted(exclude_user_ids))
-    cache_key: _TopNCacheKey = (id(_engine), limit, exclude_key, include_hidden)
-    cached_rows = _cached_top_n_rows(cache_key=cache_key)
-    if cached_rows is not None:
-        return cached_rows
+    if limit is not None and limit <= _LEADERBOARD_CAPACITY:
+        board = _current_leaderboards().balance
+        ranked = board.read(
+            limit=limit, exclude_user_ids=exclude_user_ids, include_hidden=include_hidden
+        )
+        if ranked is None:
+            await _seed_balance_board(board=board)
+            ranked = board.read(
+                limit=limit, exclude_user_ids=exclude_user_ids, include_hidden=include_hidden
+            )
+        if ranked is not None:
+            return [
+                LeaderboardEntry(
+                    user_id=row.user_id,
+                    name=row.name,
+                    balance=row.score,
+                    avatar_url=row.avatar_url,
+                )
+                for row in ranked
+            ]
     async with open_session() as session:
         stmt = select(
             UserWallet.user_id, UserAccount.name, UserWallet.balance, UserAccount.avatar_url
@@ -2140,16 +2529,39 @@ async def top_n(
             stmt = stmt.where(UserAccount.hide_from_leaderboard.is_(False))
         if exclude_user_ids:
             stmt = stmt.where(UserWallet.user_id.notin_(other=exclude_user_ids))
-        stmt = stmt.order_by(*_stored_integer_desc_order(column=UserWallet.balance))
+        stmt = stmt.order_by(UserWallet.balance_key.desc())
         if limit is not None:
             stmt = stmt.limit(limit=limit)
         result = await session.execute(statement=stmt)
-        rows = tuple(
+        return [
             LeaderboardEntry(user_id=row[0], name=row[1], balance=row[2], avatar_url=row[3] or "")
             for row in result.all()
+        ]
+
+
+async def _seed_balance_board(board: TopKBoard) -> None:
+    """Reseeds the balance board from the top of `ix_user_wallet_balance_key`."""
+    version = board.begin_seed()
+    async with open_session() as session:
+        result = await session.execute(
+            statement=select(
+                UserWallet.user_id,
+                UserAccount.name,
+                UserWallet.balance,
+                UserAccount.avatar_url,
+                UserAccount.hide_from_leaderboard,
+            )
+            .join(UserAccount, UserAccount.user_id == UserWallet.user_id)
+            .order_by(UserWallet.balance_key.desc())
+            .limit(limit=board.capacity + 1)
         )
-        _top_n_cache[cache_key] = (monotonic(), rows)
-        return list(rows)
+        rows = [
+            RankedRow(
+                user_id=row[0], name=row[1], avatar_url=row[3] or "", score=row[2], hidden=row[4]
+            )
+            for row in result.all()
+        ]
+    board.seed(rows=rows, version=version)
 
 
 async def top_losers(
@@ -2160,7 +2572,8 @@ async def top_losers(
     The leaderboard reads persisted `casino_account` daily counters. Writes lazily reset stale
     counters at the first casino settlement after Taipei midnight, while this
     query filters by today's `day_started_at` so yesterday's counters
-    never leak into a new day.
+    never leak into a new day. Like `top_n`, it is served from an in-process
+    board for today, which a new Taipei day empties.
 
     Args:
         limit: Maximum number of accounts to return.
@@ -2177,17 +2590,26 @@ async def top_losers(
         return []
     now = _database_now()
     today_midnight = _taipei_midnight(now=now)
-    exclude_key = tuple(sorted(exclude_user_ids))
-    cache_key: _TopLosersCacheKey = (
-        id(_engine),
-        limit,
-        exclude_key,
-        include_hidden,
-        today_midnight,
-    )
-    cached_rows = _cached_top_loser_rows(cache_key=cache_key)
-    if cached_rows is not None:
-        return cached_rows
+    if limit <= _LEADERBOARD_CAPACITY:
+        board = _current_leaderboards().loss_board_for(day=today_midnight)
+        ranked = board.read(
+            limit=limit, exclude_user_ids=exclude_user_ids, include_hidden=include_hidden
+        )
+        if ranked is None:
+            await _seed_loss_board(board=board, day=today_midnight)
+            ranked = board.read(
+                limit=limit, exclude_user_ids=exclude_user_ids, include_hidden=include_hidden
+            )
+        if ranked is not None:
+            return [
+                LossLeaderboardEntry(
+                    user_id=row.user_id,
+                    name=row.name,
+                    loss_amount=row.score,
+                    avatar_url=row.avatar_url,
+                )
+                for row in ranked
+            ]
 
     async with open_session() as session:
         stmt = (
@@ -2199,8 +2621,11 @@ async def top_losers(
             )
             .select_from(CasinoAccount)
             .join(UserAccount, UserAccount.user_id == CasinoAccount.user_id)
-            .where(CasinoAccount.day_started_at == today_midnight, CasinoAccount.daily_loss != "0")
-            .order_by(desc(func.length(CasinoAccount.daily_loss)), desc(CasinoAccount.daily_loss))
+            .where(
+                CasinoAccount.day_started_at == today_midnight,
+                CasinoAccount.daily_loss_key > _stored_int_sort_key(value=0),
+            )
+            .order_by(CasinoAccount.daily_loss_key.desc())
             .limit(limit=limit)
         )
         if not include_hidden:
@@ -2221,10 +2646,43 @@ async def top_losers(
                     avatar_url=row[2] or "",
                 )
             )
-        _top_losers_cache[cache_key] = (monotonic(), tuple(rows))
         return rows
 
 
+async def _seed_loss_board(board: TopKBoard, day: datetime) -> None:
+    """Reseeds the loss board with `day`'s biggest positive gross losses."""
+    version = board.begin_seed()
+    async with open_session() as session:
+        result = await session.execute(
+            statement=select(
+                CasinoAccount.user_id,
+                CasinoAccount.name,
+                UserAccount.avatar_url,
+                CasinoAccount.daily_loss,
+                UserAccount.hide_from_leaderboard,
+            )
+            .select_from(CasinoAccount)
+            .join(UserAccount, UserAccount.user_id == CasinoAccount.user_id)
+            .where(
+                CasinoAccount.day_started_at == day,
+                CasinoAccount.daily_loss_key > _stored_int_sort_key(value=0),
+            )
+            .order_by(CasinoAccount.daily_loss_key.desc())
+            .limit(limit=board.capacity + 1)
+        )
+        rows = [
+            RankedRow(
+                user_id=row[0],
+                name=row[1] or str(row[0]),
+                avatar_url=row[2] or "",
+                score=_stored_int_to_int(value=row[3]),
+                hidden=row[4],
+            )
+            for row in result.all()
+        ]
+    board.seed(rows=rows, version=version)
+
+
 def _loan_proposal_view(proposal: LoanProposal) -> LoanProposalView:
     """Projects an ORM loan proposal into an immutable API view."""
     return LoanProposalView(
@@ -2326,22 +2784,26 @@ async def _accrue_contract_interest_in_session(
 async def _central_bank_status_in_session(
     session: AsyncSession, exclude_user_ids: tuple[int, ...] = ()
 ) -> CentralBankStatus:
-    """Computes central-bank lending capacity from positive user balances."""
-    balance_stmt = select(UserWallet.balance)
-    if exclude_user_ids:
-        balance_stmt = balance_stmt.where(UserWallet.user_id.notin_(other=exclude_user_ids))
-    total_result = await session.execute(statement=balance_stmt)
-    total_positive_user_balance = sum(
-        balance for balance in total_result.scalars().all() if balance > 0
-    )
+    """Computes central-bank lending capacity from the running `economy_aggregates` totals.
 
-    debt_result = await session.execute(
-        statement=select(LoanContract.principal_remaining).where(
-            LoanContract.lender_type == LoanLenderType.CENTRAL_BANK,
-            LoanContract.status == LoanContractStatus.ACTIVE,
-        )
+    One primary-key read, plus a point lookup per excluded wallet to take its positive
+    balance back out, instead of a scan over every wallet and contract. Changes staged
+    by this session land only as it commits, so the totals are the committed ones.
+    """
+    aggregate_result = await session.execute(
+        statement=select(
+            EconomyAggregates.total_positive_balance, EconomyAggregates.central_bank_principal
+        ).where(EconomyAggregates.aggregate_id == ECONOMY_AGGREGATES_ID)
     )
-    outstanding_principal = sum(debt_result.scalars().all())
+    total_positive_user_balance, outstanding_principal = aggregate_result.one()
+    if exclude_user_ids:
+        excluded_result = await session.execute(
+            statement=select(UserWallet.balance).where(
+                UserWallet.user_id.in_(other=exclude_user_ids),
+                UserWallet.balance_key > _stored_int_sort_key(value=0),
+            )
+        )
+        total_positive_user_balance -= sum(excluded_result.scalars().all())
     # Central-bank loans mint into user balances, so subtract outstanding
     # principal once to estimate the pre-loan pool and once for already-used
     # capacity.
@@ -2362,6 +2824,66 @@ async def get_central_bank_status(exclude_user_ids: tuple[int, ...] = ()) -> Cen
         )
 
 
+async def verify_economy_aggregates(rebuild: bool = False) -> EconomyAggregatesCheck:
+    """Compares the running `economy_aggregates` totals with a full scan, optionally fixing them.
+
+    The row is touched before the scan, which takes SQLite's write lock first: no other
+    write can commit between the scan and a rebuild, so a rebuild cannot lose one.
+
+    Args:
+        rebuild: Whether to overwrite the stored totals with the scanned ones.
+
+    Returns:
+        The stored totals as found, the scanned totals, and whether they were rebuilt.
+    """
+    await _ensure_schema()
+    aggregate_row = EconomyAggregates.aggregate_id == ECONOMY_AGGREGATES_ID
+    async with open_session() as session:
+        stored_result = await session.execute(
+            statement=update(EconomyAggregates)
+            .where(aggregate_row)
+            .values(updated_at=_database_now())
+            .returning(
+                EconomyAggregates.total_positive_balance, EconomyAggregates.central_bank_principal
+            )
+        )
+        stored_balance, stored_principal = stored_result.one()
+        scanned_balance, scanned_principal = await _scan_economy_aggregates(executor=session)
+        rebuilt = rebuild and (stored_balance, stored_principal) != (
+            scanned_balance,
+            scanned_principal,
+        )
+        if rebuilt:
+            await session.execute(
+                statement=update(EconomyAggregates)
+                .where(aggregate_row)
+                .values(
+                    total_positive_balance=scanned_balance,
+                    central_bank_principal=scanned_principal,
+                )
+            )
+            await session.commit()
+        else:
+            await session.rollback()
+    check = EconomyAggregatesCheck(
+        stored_total_positive_balance=stored_balance,
+        scanned_total_positive_balance=scanned_balance,
+        stored_central_bank_principal=stored_principal,
+        scanned_central_bank_principal=scanned_principal,
+        rebuilt=rebuilt,
+    )
+    if not check.consistent:
+        logfire.warn(
+            "economy aggregates drifted from the scan",
+            stored_total_positive_balance=stored_balance,
+            scanned_total_positive_balance=scanned_balance,
+            stored_central_bank_principal=stored_principal,
+            scanned_central_bank_principal=scanned_principal,
+            rebuilt=rebuilt,
+        )
+    return check
+
+
 async def create_personal_loan_request(  # noqa: PLR0913 -- proposal needs both identities
     borrower_id: int,
     borrower_name: str,
@@ -2460,7 +2982,16 @@ async def _refund_proposal_escrow_in_session(
             now=now,
         )
     )
-    return credit_result.scalar_one()
+    lender_balance = credit_result.scalar_one()
+    _note_wallet_write(
+        session=session,
+        user_id=proposal.lender_id,
+        balance=lender_balance,
+        delta=proposal.escrow_amount,
+        name=proposal.lender_name,
+        avatar_url=proposal.lender_avatar_url,
+    )
+    return lender_balance
 
 
 async def reject_expired_loan_proposal(proposal_id: int) -> LoanProposalView | None:
@@ -2592,7 +3123,7 @@ async def accept_loan_proposal(  # noqa: PLR0913 -- approval needs proposal, act
         )
 
 
-async def _accept_loan_proposal_locked(  # noqa: C901, PLR0911, PLR0913 -- proposal-kind branches must stay in one transaction
+async def _accept_loan_proposal_locked(  # noqa: C901, PLR0911, PLR0912, PLR0913 -- proposal-kind branches must stay in one transaction
     proposal_id: int,
     actor_id: int,
     actor_name: str,
@@ -2649,6 +3180,13 @@ async def _accept_loan_proposal_locked(  # noqa: C901, PLR0911, PLR0913 -- propo
             if lender_balance is None:
                 await session.rollback()
                 return None
+            _note_wallet_write(
+                session=session,
+                user_id=actor_id,
+                balance=lender_balance,
+                delta=-proposal.amount,
+                name=actor_name,
+            )
             proposal.lender_name = actor_name or proposal.lender_name
             proposal.lender_avatar_url = actor_avatar_url or proposal.lender_avatar_url
         elif proposal.kind == LoanProposalKind.CENTRAL_BANK_REQUEST:
@@ -2692,7 +3230,18 @@ async def _accept_loan_proposal_locked(  # noqa: C901, PLR0911, PLR0913 -- propo
             )
         )
         borrower_balance = credit_result.scalar_one()
-        invalidate_economy_leaderboard_cache()
+        _note_wallet_write(
+            session=session,
+            user_id=proposal.borrower_id,
+            balance=borrower_balance,
+            delta=proposal.amount,
+            name=proposal.borrower_name,
+            avatar_url=proposal.borrower_avatar_url,
+        )
+        if proposal.lender_type == LoanLenderType.CENTRAL_BANK:
+            _stage_aggregate_delta(
+                session=session, column="central_bank_principal", delta=proposal.amount
+            )
         # Prepay MIN_INTEREST_DAYS of interest so borrowers cannot dodge interest
         # by repaying immediately. last_interest_accrued_at points past the
         # prepaid window, so _loan_interest_delta returns 0 until real time
@@ -2723,7 +3272,6 @@ async def _accept_loan_proposal_locked(  # noqa: C901, PLR0911, PLR0913 -- propo
         )
         session.add(contract)
         await session.commit()
-        invalidate_economy_leaderboard_cache()
         if proposal.kind == LoanProposalKind.CENTRAL_BANK_REQUEST:
             central_status = await get_central_bank_status(
                 exclude_user_ids=central_bank_exclude_user_ids
@@ -2760,7 +3308,7 @@ async def _loan_contracts_for_payment_in_session(
     return list(result.scalars().all())
 
 
-async def _apply_loan_payment_in_session(  # noqa: PLR0913 -- payment needs actor identity and contract set
+async def _apply_loan_payment_in_session(  # noqa: C901, PLR0913 -- payment needs actor identity, contract set and per-lender bookkeeping
     session: AsyncSession,
     contracts: Sequence[LoanContract],
     borrower_id: int,
@@ -2805,6 +3353,10 @@ async def _apply_loan_payment_in_session(  # noqa: PLR0913 -- payment needs acto
         principal_paid = min(paid - interest_paid, contract.principal_remaining)
         contract.interest_due -= interest_paid
         contract.principal_remaining -= principal_paid
+        if contract.lender_type == LoanLenderType.CENTRAL_BANK:
+            _stage_aggregate_delta(
+                session=session, column="central_bank_principal", delta=-principal_paid
+            )
         contract.total_interest_paid += interest_paid
         contract.total_principal_paid += principal_paid
         contract.updated_at = now
@@ -2827,8 +3379,14 @@ async def _apply_loan_payment_in_session(  # noqa: PLR0913 -- payment needs acto
                 )
             )
             lender_balance = credit_result.scalar_one()
-            # The borrower debit above already cleared the leaderboard cache for
-            # this transaction, so the lender credit needs no extra invalidation.
+            _note_wallet_write(
+                session=session,
+                user_id=contract.lender_id,
+                balance=lender_balance,
+                delta=paid,
+                name=contract.lender_name,
+                avatar_url=contract.lender_avatar_url,
+            )
 
         total_paid += paid
         total_interest_paid += interest_paid
@@ -2883,7 +3441,6 @@ async def repay_personal_loans(
             await session.rollback()
             return None
         await session.commit()
-        invalidate_economy_leaderboard_cache()
         return result
 
 
@@ -2923,7 +3480,6 @@ async def call_personal_loans(
             await session.rollback()
             return None
         await session.commit()
-        invalidate_economy_leaderboard_cache()
         return result
 
 
@@ -2950,7 +3506,6 @@ async def repay_central_bank_loans(
             await session.rollback()
             return None
         await session.commit()
-        invalidate_economy_leaderboard_cache()
         return result
 
 
@@ -2983,7 +3538,6 @@ async def call_central_bank_loans(
             await session.rollback()
             return None
         await session.commit()
-        invalidate_economy_leaderboard_cache()
         return result
 
 
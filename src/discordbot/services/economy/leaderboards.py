@@ -0,0 +1,150 @@
+"""In-process top-K leaderboards maintained from the economy's own writes.
+
+`/leaderboard` and `/loss_leaderboard` used to read through short-TTL query caches
+that every wallet write cleared wholesale, so under steady chat traffic they almost
+never hit. A `TopKBoard` instead holds the top rows of one ranking, seeded by a single
+query, and is patched in place from the post-commit values the write paths already
+have in hand (`RETURNING balance`, the new daily loss).
+
+The board keeps one invariant: every row it holds scores at least `outside_bound`,
+and every row it does not hold scores at most that. While that holds, its rows are
+the true top of the table, and a note can only:
+
+* **patch a member** whose score stays at or above the bound, in place;
+* **drop a member** that falls below it: whoever was outside still scores at most the
+  bound, so the invariant survives with one row fewer;
+* **be ignored** for a non-member that stays at or below the bound, which is nearly
+  every chat reward;
+* **invalidate the board** when a non-member climbs past the bound, or when the table
+  was small enough to be held whole and a row appears that the board has not seen.
+  Either needs the account's hidden flag, which only the table has, so the next read
+  reseeds rather than guessing.
+
+A read is served only while the board is valid, younger than `reconcile_seconds`,
+and still holds enough rows to fill the request after exclusions. The age bound is
+the periodic reconciliation: a write that bypasses the notes (an operator's direct
+UPDATE, a hidden flag flipped out of band) lasts at most that long.
+
+Seeding is versioned: every note and invalidation bumps the board's version, and a seed
+whose query raced one is not installed, so a write that committed mid-query is never
+papered over; that one read falls through to the caller's own query.
+"""
+
+import time
+
+import logfire
+from pydantic import Field, BaseModel, ConfigDict, PrivateAttr
+
+
+class RankedRow(BaseModel):
+    """One account's row on a board.
+
+    Attributes:
+        user_id: Discord user ID.
+        name: Display name as the leaderboard shows it.
+        avatar_url: Last-seen avatar URL, empty when unknown.
+        score: The ranked amount: a balance, or a day's gross loss.
+        hidden: Whether the account is hidden from public leaderboards.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    user_id: int = Field(..., description="Discord user ID.")
+    name: str = Field(..., description="Display name.")
+    avatar_url: str = Field(default="", description="Last-seen avatar URL.")
+    score: int = Field(..., description="The ranked amount.")
+    hidden: bool = Field(default=False, description="Hidden from public leaderboards.")
+
+
+class TopKBoard(BaseModel):
+    """The top `capacity` rows of one ranking, patched from post-commit write notes."""
+
+    capacity: int = Field(..., description="Rows seeded and held.")
+    reconcile_seconds: float = Field(..., description="Age at which a read reseeds anyway.")
+    label: str = Field(..., description="Board name for log lines.")
+
+    _rows: dict[int, RankedRow] = PrivateAttr(default_factory=dict)
+    # None when the seed held the whole table, so no row is outside the board.
+    _outside_bound: int | None = PrivateAttr(default=None)
+    _valid: bool = PrivateAttr(default=False)
+    _seeded_at: float = PrivateAttr(default=0.0)
+    _version: int = PrivateAttr(default=0)
+
+    def begin_seed(self) -> int:
+        """Returns the version a seed query must still match to be installed."""
+        return self._version
+
+    def seed(self, rows: list[RankedRow], version: int) -> None:
+        """Installs a seed query's rows, fetched `capacity + 1` deep.
+
+        Args:
+            rows: The query's rows in rank order; one past `capacity` says the table
+                goes on, and its score becomes the outside bound.
+            version: What `begin_seed` returned before the query ran.
+        """
+        if version != self._version:
+            return
+        held = rows[: self.capacity]
+        if self._valid and time.monotonic() - self._seeded_at >= self.reconcile_seconds:
+            drifted = [row.user_id for row in held if self._rows.get(row.user_id, row) != row]
+            if drifted:
+                logfire.info(
+                    "economy leaderboard reconciled", board=self.label, drifted_rows=len(drifted)
+                )
+        self._rows = {row.user_id: row for row in held}
+        self._outside_bound = rows[self.capacity].score if len(rows) > self.capacity else None
+        self._valid = True
+        self._seeded_at = time.monotonic()
+
+    def read(
+        self, limit: int, exclude_user_ids: tuple[int, ...], include_hidden: bool
+    ) -> list[RankedRow] | None:
+        """Returns the top `limit` matching rows, or None when only a reseed can answer."""
+        if not self._valid or time.monotonic() - self._seeded_at >= self.reconcile_seconds:
+            return None
+        ranked = sorted(self._rows.values(), key=lambda row: row.score, reverse=True)
+        matching = [
+            row
+            for row in ranked
+            if row.user_id not in exclude_user_ids and (include_hidden or not row.hidden)
+        ]
+        if len(matching) < limit and self._outside_bound is not None:
+            return None
+        return matching[:limit]
+
+    def note(self, user_id: int, score: int, name: str = "", avatar_url: str = "") -> None:
+        """Applies one committed write's new score for an account.
+
+        Args:
+            user_id: The account written.
+            score: Its score after the write.
+            name: Its display name when the write set one, else empty.
+            avatar_url: Its avatar URL when the write set one, else empty.
+        """
+        self._version += 1
+        if not self._valid:
+            return
+        bound = self._outside_bound
+        member = self._rows.get(user_id)
+        if member is None:
+            if bound is None or score > bound:
+                self._valid = False
+            return
+        if bound is not None and score < bound:
+            del self._rows[user_id]
+            return
+        self._rows[user_id] = member.model_copy(
+            update={
+                "score": score,
+                "name": name or member.name,
+                "avatar_url": avatar_url or member.avatar_url,
+            }
+        )
+
+    def invalidate(self) -> None:
+        """Forces the next read to reseed."""
+        self._version += 1
+        self._valid = False
+
+
+__all__ = ["RankedRow", "TopKBoard"]
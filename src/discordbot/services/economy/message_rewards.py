@@ -0,0 +1,254 @@
+"""Write-behind batching for the per-message chat reward.
+
+`DiscordBot.on_message` pays `BASE_MESSAGE_REWARD_AMOUNT` to any author off cooldown,
+which in a busy guild is most of what economy.db is asked to write: one transaction per
+rewarded chat line. `MessageRewardAggregator` takes the
+credit in memory instead, merged per user, and a single worker writes everything pending
+through `credit_income_batch`:
+
+* **Every few seconds or every few users.** A flush runs `_FLUSH_INTERVAL_SECONDS` after
+  the oldest pending credit, or as soon as `_FLUSH_MAX_USERS` users are waiting,
+  whichever comes first. One flush is one transaction.
+* **A bounded loss window.** A graceful shutdown (`stop`, from `DiscordBot.close`) writes
+  what is pending before the engine goes. A hard crash loses at most the credits taken
+  since the last flush; at one reward per user per `MESSAGE_REWARD_COOLDOWN_SECONDS`,
+  that is one reward for each user who spoke in the last `_FLUSH_INTERVAL_SECONDS`.
+* **Failures keep the credits.** A flush that raises merges its batch back into the
+  pending set for the next one, so a database outage delays rewards rather than
+  dropping them. Pending state is one entry per user, so an outage cannot grow it
+  without bound.
+
+Leaderboards and balance reads lag chat by up to one flush interval, well inside the
+reward's own cooldown.
+"""
+
+import time
+import asyncio
+import contextlib
+
+import logfire
+from pydantic import Field, BaseModel, ConfigDict
+
+from discordbot.typings.economy import IncomeCredit
+from discordbot.utils.asyncio_locks import LoopLocalLock
+from discordbot.services.economy.database import credit_income_batch
+
+# How long the oldest pending credit waits for company before it is written.
+_FLUSH_INTERVAL_SECONDS = 5.0
+# Pending users that trigger a flush without waiting out the interval.
+_FLUSH_MAX_USERS = 64
+
+
+class MessageRewardStats(BaseModel):
+    """A snapshot of the aggregator, for its per-flush log line and for tests.
+
+    Attributes:
+        pending_users: Users with a credit not yet written.
+        credits: Credits accepted since the process started.
+        flushes: Batches written.
+        credits_saved: Credits that rode on another credit's transaction.
+        last_flush_seconds: Wall time of the latest flush.
+        consecutive_failures: Failed flushes since the last one that succeeded.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    pending_users: int = Field(..., description="Users with an unwritten credit.")
+    credits: int = Field(..., description="Credits accepted.")
+    flushes: int = Field(..., description="Batches written.")
+    credits_saved: int = Field(..., description="Credits coalesced into another write.")
+    last_flush_seconds: float = Field(..., description="Wall time of the latest flush.")
+    consecutive_failures: int = Field(..., description="Failures since the last success.")
+
+
+class MessageRewardAggregator(BaseModel):
+    """In-memory, per-user accumulator for message rewards, flushed by one worker."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    def __init__(self, **data: object) -> None:
+        """Initializes an empty aggregator with no worker; `start` binds it to a loop."""
+        super().__init__(**data)
+        self._pending: dict[int, IncomeCredit] = {}
+        self._oldest_at = 0.0
+        self._wakeup: asyncio.Event | None = None
+        self._stopping: asyncio.Event | None = None
+        self._worker: asyncio.Task[None] | None = None
+        self._lock = LoopLocalLock()
+        self._credits = 0
+        self._flushes = 0
+        self._failures = 0
+        self._last_flush_seconds = 0.0
+
+    def start(self) -> None:
+        """Starts the flush worker on the running loop; a second call is a no-op."""
+        if self._worker is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._worker = asyncio.create_task(self._run())
+        if self._pending:
+            self._wakeup.set()
+
+    async def stop(self) -> None:
+        """Stops the worker and writes whatever is still pending.
+
+        The worker is asked to stop, not cancelled, so a flush it has in flight finishes
+        its write before the final flush here picks up what came in meanwhile.
+        """
+        worker = self._worker
+        wakeup = self._wakeup
+        stopping = self._stopping
+        self._worker = None
+        self._wakeup = None
+        self._stopping = None
+        if worker is not None and wakeup is not None and stopping is not None:
+            stopping.set()
+            wakeup.set()
+            await worker
+        await self.flush()
+
+    def add(self, user_id: int, name: str, avatar_url: str, amount: int) -> None:
+        """Takes one credit for the next flush. Never blocks, never raises, never awaits.
+
+        A user already pending has the amount added and the newest identity kept; an
+        empty avatar URL keeps the one already pending.
+        """
+        if amount <= 0:
+            return
+        pending = self._pending.get(user_id)
+        if pending is None:
+            if not self._pending:
+                self._oldest_at = time.monotonic()
+            self._pending[user_id] = IncomeCredit(
+                user_id=user_id, name=name, avatar_url=avatar_url, amount=amount
+            )
+        else:
+            self._pending[user_id] = IncomeCredit(
+                user_id=user_id,
+                name=name or pending.name,
+                avatar_url=avatar_url or pending.avatar_url,
+                amount=pending.amount + amount,
+            )
+        self._credits += 1
+        wakeup = self._wakeup
+        if wakeup is not None and (len(self._pending) == 1 or self._due()):
+            wakeup.set()
+
+    async def flush(self) -> int:
+        """Writes every pending credit in one batch, keeping them pending if it fails.
+
+        Returns:
+            How many users were credited; 0 when nothing was pending or the write failed.
+        """
+        async with self._lock.get():
+            if not self._pending:
+                return 0
+            batch = list(self._pending.values())
+            self._pending = {}
+            started = time.monotonic()
+            write = asyncio.ensure_future(credit_income_batch(incomes=batch))
+            try:
+                written = await asyncio.shield(write)
+            except asyncio.CancelledError:
+                # The transaction is already on its way: let it land, and take the credits
+                # back only if it then fails, so a cancelled flush neither loses nor
+                # repeats them.
+                write.add_done_callback(
+                    lambda done: self._restore_if_failed(write=done, batch=batch)
+                )
+                raise
+            except Exception as exc:
+                # Broad on purpose: the credits go back for the next flush whatever the
+                # reason, and the worker must outlive a database outage.
+                self._failures += 1
+                self._restore(batch=batch)
+                logfire.warn(
+                    "Failed to flush message rewards; keeping them for the next flush",
+                    users=len(batch),
+                    consecutive_failures=self._failures,
+                    error_type=type(exc).__name__,
+                    _exc_info=exc,
+                )
+                return 0
+            self._failures = 0
+            self._flushes += 1
+            self._last_flush_seconds = time.monotonic() - started
+        stats = self.stats()
+        logfire.debug(
+            "Flushed message rewards",
+            users=written,
+            pending_users=stats.pending_users,
+            flushes=stats.flushes,
+            credits_saved=stats.credits_saved,
+            last_flush_seconds=stats.last_flush_seconds,
+        )
+        return written
+
+    def stats(self) -> MessageRewardStats:
+        """Returns queue depth, flush latency and what batching saved, as of now."""
+        return MessageRewardStats(
+            pending_users=len(self._pending),
+            credits=self._credits,
+            flushes=self._flushes,
+            credits_saved=max(self._credits - self._flushes - len(self._pending), 0),
+            last_flush_seconds=self._last_flush_seconds,
+            consecutive_failures=self._failures,
+        )
+
+    def _due(self) -> bool:
+        """Whether the pending credits should be written now."""
+        return bool(self._pending) and (
+            len(self._pending) >= _FLUSH_MAX_USERS
+            or time.monotonic() - self._oldest_at >= _FLUSH_INTERVAL_SECONDS
+        )
+
+    def _restore(self, batch: list[IncomeCredit]) -> None:
+        """Merges a failed batch back under anything credited while it was in flight."""
+        self._oldest_at = time.monotonic()
+        for credit in batch:
+            newer = self._pending.get(credit.user_id)
+            if newer is None:
+                self._pending[credit.user_id] = credit
+                continue
+            self._pending[credit.user_id] = newer.model_copy(
+                update={
+                    "avatar_url": newer.avatar_url or credit.avatar_url,
+                    "amount": newer.amount + credit.amount,
+                }
+            )
+
+    def _restore_if_failed(self, write: "asyncio.Future[int]", batch: list[IncomeCredit]) -> None:
+        """Takes back a batch whose write outlived a cancelled flush, if it did not land."""
+        if write.cancelled() or write.exception() is not None:
+            self._failures += 1
+            self._restore(batch=batch)
+
+    async def _run(self) -> None:
+        """Flushes whenever the pending credits come due, until `stop` asks it to end."""
+        wakeup = self._wakeup
+        stopping = self._stopping
+        if wakeup is None or stopping is None:
+            return
+        while not stopping.is_set():
+            if not self._due():
+                wakeup.clear()
+                timeout = None
+                if self._pending:
+                    elapsed = time.monotonic() - self._oldest_at
+                    timeout = max(_FLUSH_INTERVAL_SECONDS - elapsed, 0.0)
+                # Expected: the timeout is the interval running out, which is a flush.
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(wakeup.wait(), timeout=timeout)
+                continue
+            await self.flush()
+            if self._failures:
+                # A full batch is due again at once; without the pause a dead database
+                # would be retried as fast as it can fail. `stop` cuts the pause short.
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(stopping.wait(), timeout=_FLUSH_INTERVAL_SECONDS)
+
+
+message_rewards = MessageRewardAggregator()
+
+__all__ = ["MessageRewardAggregator", "MessageRewardStats", "message_rewards"]
@@ -67,6 +67,20 @@ async def _persist(day: str, key_index: int, count: int) -> None:
         )
 
 
+async def _roll_day(day: str) -> None:
+    """Rebuilds the counts from the database when `day` is not the window held. Under the lock."""
+    global _counted_day  # noqa: PLW0603 -- module-level day window for the counts below
+    if _counted_day != day:
+        _counts.clear()
+        _counts.update(await _load_counts(day=day))
+        _counted_day = day
+
+
+def _least_used(keys: list[GeminiKeySlot]) -> GeminiKeySlot:
+    """The key with today's lowest count, ties going to the lowest number."""
+    return min(keys, key=lambda slot: (_counts.get(slot.index, 0), slot.index))
+
+
 async def pick_gemini_key(config: LLMConfig) -> GeminiKeySlot | None:
     """Hands out the least-used configured key for today and counts the hand-out.
 
@@ -84,12 +98,8 @@ async def pick_gemini_key(config: LLMConfig) -> GeminiKeySlot | None:
         return None
     day = _today()
     async with _state_lock.get():
-        global _counted_day  # noqa: PLW0603 -- module-level day window for the counts below
-        if _counted_day != day:
-            _counts.clear()
-            _counts.update(await _load_counts(day=day))
-            _counted_day = day
-        chosen = min(keys, key=lambda slot: (_counts.get(slot.index, 0), slot.index))
+        await _roll_day(day=day)
+        chosen = _least_used(keys=keys)
         count = _counts.get(chosen.index, 0) + 1
         _counts[chosen.index] = count
     # Outside the lock so a slow write cannot queue the next reply's pick behind it; this
@@ -100,6 +110,28 @@ async def pick_gemini_key(config: LLMConfig) -> GeminiKeySlot | None:
     return chosen
 
 
+async def peek_gemini_key(config: LLMConfig) -> GeminiKeySlot | None:
+    """Returns the key the next `pick_gemini_key` would hand out, without counting it.
+
+    For speculative work done ahead of a reply (the attachment prefetch): it has to land on
+    the key that reply will most likely lease, since an upload is readable by its own key's
+    project only, yet it is not a reply and must not shift the split. Another reply picking
+    in between can still move the next pick elsewhere; the caller treats that as a miss.
+
+    Args:
+        config: Runtime LLM config supplying the configured keys.
+
+    Returns:
+        The key that is currently least used today, or None when none is configured.
+    """
+    keys = config.gemini_keys
+    if not keys:
+        return None
+    async with _state_lock.get():
+        await _roll_day(day=_today())
+        return _least_used(keys=keys)
+
+
 async def lease_model_catalog(config: LLMConfig) -> RuntimeModelCatalog:
     """Leases a key and returns a model catalog with every tier pinned to it.
 
@@ -124,4 +156,4 @@ def reset_balancer_state() -> None:
     _counts.clear()
 
 
-__all__ = ["lease_model_catalog", "pick_gemini_key", "reset_balancer_state"]
+__all__ = ["lease_model_catalog", "peek_gemini_key", "pick_gemini_key", "reset_balancer_state"]
@@ -1,4 +1,4 @@
-"""Per-day Gemini key usage counts (`data/database/llm_keys.db`).
+"""Per-day Gemini key usage counts and the Files API upload registry (`data/database/llm_keys.db`).
 
 One row per (day, key), holding how many times that key was handed out. The balancer above
 this keeps the authoritative counts in memory and treats these rows as a snapshot: they exist
@@ -10,6 +10,10 @@ because the new key would be the lowest for as long as it took to catch up with
 history, and would absorb every reply in the meantime. Rolling the window daily bounds that
 catch-up to one day's traffic.
 
+The upload registry shares the file because it is keyed the same way: a Files API upload is
+readable only by the project of the key that made it, so a row is one (content, key) pair.
+`services/gemini_keys/uploads.py` is the layer that reads and writes it.
+
 Its own file rather than a table in `reply.db`, because the keys are not a reply concept:
 every cog that calls a Gemini model draws from the same pool. Engine, PRAGMA hooks and the
 lazy schema bootstrap follow `services/memory/database.py`, including the module-level
@@ -18,8 +22,9 @@ dialect cache).
 """
 
 from typing import Any
+from datetime import datetime
 
-from sqlalchemy import String, Integer, event, select
+from sqlalchemy import String, Integer, DateTime, event, delete, select
 from sqlalchemy.orm import Mapped, DeclarativeBase, mapped_column
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.dialects.sqlite import insert
@@ -68,6 +73,40 @@ class GeminiKeyUsageRow(Base):
     count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
 
 
+class GeminiFileUploadRow(Base):
+    """One ACTIVE Files API upload of one exact byte content under one key.
+
+    Attributes:
+        content_hash: SHA-256 hex digest of the uploaded bytes.
+        key_index: The key whose project owns the file, the same number `GeminiKeySlot` has.
+        uri: The full file uri an answer references.
+        expires_at: The provider-reported `expiration_time`, as naive UTC.
+    """
+
+    __tablename__ = "gemini_file_upload"
+
+    content_hash: Mapped[str] = mapped_column(String(length=64), primary_key=True)
+    key_index: Mapped[int] = mapped_column(Integer, primary_key=True)
+    uri: Mapped[str] = mapped_column(String(length=1024), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+
+
+class GeminiUploadSourceRow(Base):
+    """Which content an attachment source resolved to, so a reuse needs no download.
+
+    Attributes:
+        source_hash: SHA-256 hex digest of the source's cache key (attachment / sticker id or
+            embed url). Hashed rather than stored, because an embed url can carry a signed
+            CDN token.
+        content_hash: The bytes that source downloaded as.
+    """
+
+    __tablename__ = "gemini_upload_source"
+
+    source_hash: Mapped[str] = mapped_column(String(length=64), primary_key=True)
+    content_hash: Mapped[str] = mapped_column(String(length=64), nullable=False, index=True)
+
+
 _schema_ready_for: AsyncEngine | None = None
 _schema_lock = LoopLocalLock()
 
@@ -139,4 +178,136 @@ async def record_pick(day: str, key_index: int, count: int) -> None:
         await session.commit()
 
 
-__all__ = ["Base", "GeminiKeyUsageRow", "open_session", "read_day_counts", "record_pick"]
+async def read_upload_for_source(
+    source_hash: str, key_index: int, live_after: datetime
+) -> tuple[str, datetime] | None:
+    """Returns the upload a known source resolved to under `key_index`, if still live.
+
+    Args:
+        source_hash: Digest of the source's cache key.
+        key_index: The key the caller uploads with.
+        live_after: Naive-UTC instant the upload must still be alive past.
+
+    Returns:
+        `(uri, expires_at)` with `expires_at` naive UTC, or None.
+    """
+    await _ensure_schema()
+    async with open_session() as session:
+        row = await session.execute(
+            select(GeminiFileUploadRow.uri, GeminiFileUploadRow.expires_at)
+            .join(
+                GeminiUploadSourceRow,
+                GeminiUploadSourceRow.content_hash == GeminiFileUploadRow.content_hash,
+            )
+            .where(
+                GeminiUploadSourceRow.source_hash == source_hash,
+                GeminiFileUploadRow.key_index == key_index,
+                GeminiFileUploadRow.expires_at > live_after,
+            )
+        )
+        found = row.first()
+        return (found.uri, found.expires_at) if found is not None else None
+
+
+async def read_upload_for_content(
+    content_hash: str, key_index: int, live_after: datetime
+) -> tuple[str, datetime] | None:
+    """Returns a live upload of exactly these bytes under `key_index`, if any.
+
+    Args:
+        content_hash: Digest of the bytes about to be uploaded.
+        key_index: The key the caller uploads with.
+        live_after: Naive-UTC instant the upload must still be alive past.
+
+    Returns:
+        `(uri, expires_at)` with `expires_at` naive UTC, or None.
+    """
+    await _ensure_schema()
+    async with open_session() as session:
+        row = await session.execute(
+            select(GeminiFileUploadRow.uri, GeminiFileUploadRow.expires_at).where(
+                GeminiFileUploadRow.content_hash == content_hash,
+                GeminiFileUploadRow.key_index == key_index,
+                GeminiFileUploadRow.expires_at > live_after,
+            )
+        )
+        found = row.first()
+        return (found.uri, found.expires_at) if found is not None else None
+
+
+async def record_upload(
+    source_hash: str, content_hash: str, key_index: int, uri: str | None, expires_at: datetime
+) -> None:
+    """Maps a source to its content and, given a `uri`, stores that content's upload.
+
+    Args:
+        source_hash: Digest of the source's cache key.
+        content_hash: Digest of the bytes the source downloaded as.
+        key_index: The key the upload was made with.
+        uri: The ACTIVE file uri, or None to record only the source-to-content mapping (a
+            reuse by content, whose upload row already exists).
+        expires_at: Naive-UTC provider expiry of the upload; ignored without a `uri`.
+    """
+    await _ensure_schema()
+    async with open_session() as session:
+        source = insert(GeminiUploadSourceRow).values(
+            source_hash=source_hash, content_hash=content_hash
+        )
+        await session.execute(
+            source.on_conflict_do_update(
+                index_elements=[GeminiUploadSourceRow.source_hash],
+                set_={"content_hash": content_hash},
+            )
+        )
+        if uri is not None:
+            upload = insert(GeminiFileUploadRow).values(
+                content_hash=content_hash, key_index=key_index, uri=uri, expires_at=expires_at
+            )
+            await session.execute(
+                upload.on_conflict_do_update(
+                    index_elements=[
+                        GeminiFileUploadRow.content_hash,
+                        GeminiFileUploadRow.key_index,
+                    ],
+                    set_={"uri": uri, "expires_at": expires_at},
+                )
+            )
+        await session.commit()
+
+
+async def delete_expired_uploads(before: datetime) -> int:
+    """Drops uploads that expire before `before`, and sources left pointing at nothing.
+
+    Args:
+        before: Naive-UTC cutoff; an upload expiring earlier is no longer reusable.
+
+    Returns:
+        How many upload rows were removed.
+    """
+    await _ensure_schema()
+    async with open_session() as session:
+        removed = await session.execute(
+            delete(GeminiFileUploadRow).where(GeminiFileUploadRow.expires_at <= before)
+        )
+        await session.execute(
+            delete(GeminiUploadSourceRow).where(
+                GeminiUploadSourceRow.content_hash.not_in(select(GeminiFileUploadRow.content_hash))
+            )
+        )
+        await session.commit()
+        return removed.rowcount or 0
+
+
+__all__ = [
+    "Base",
+    "GeminiFileUploadRow",
+    "GeminiKeyUsageRow",
+    "GeminiUploadSourceRow",
+    "delete_expired_uploads",
+    "open_session",
+    "read_day_counts",
+    "read_upload_for_content",
+    "read_upload_for_source",
+    "record_pick",
+    "record_upload",
+]
@@ -0,0 +1,169 @@
+"""Reuse of Gemini Files API uploads across restarts, toolkits and duplicate attachments.
+
+The attachment uploader (`cogs/gen_reply/attachment/gemini_file_api.py`) and the rendered-part
+cache above it are per process, so every restart used to re-download and re-upload the whole
+history window of every channel, and the same image posted twice under two attachment ids was
+uploaded twice. The registry behind this module remembers, per key, which exact bytes already
+live on the Files API and until when, plus which bytes each attachment source turned out to be.
+
+That gives two ways to skip an upload. A source seen before resolves straight to its upload
+with no download at all (`find_upload_for_source`); a new source is downloaded and hashed, and
+bytes already uploaded under that key are reused instead of sent again
+(`find_upload_for_content`). An upload is reused only while it has `UPLOAD_REUSE_MARGIN` of
+life left, the same margin the per-message cache keeps, because a uri that expires mid-answer
+400s the whole reply.
+
+Like the balancer, every database call is best-effort: the registry only ever saves work, so
+an unreadable database degrades to a plain upload and never reaches the reply. Expired rows
+are swept on the write path at most once per `UPLOAD_SWEEP_INTERVAL`.
+"""
+
+import time
+import hashlib
+from datetime import UTC, datetime, timedelta
+
+import logfire
+
+from discordbot.services.gemini_keys.database import (
+    record_upload,
+    delete_expired_uploads,
+    read_upload_for_source,
+    read_upload_for_content,
+)
+
+# How much life an upload must have left to be handed out again.
+UPLOAD_REUSE_MARGIN = timedelta(hours=2)
+# How often the write path sweeps uploads that can no longer be reused.
+UPLOAD_SWEEP_INTERVAL = timedelta(hours=1)
+
+_last_sweep: float | None = None
+
+
+def content_digest(data: bytes) -> str:
+    """The registry's identity for a file's bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def _source_digest(cache_key: int | str) -> str:
+    """The registry's identity for an attachment source, without storing a signed url."""
+    return hashlib.sha256(str(cache_key).encode()).hexdigest()
+
+
+def _naive_utc(moment: datetime) -> datetime:
+    """The naive-UTC form the registry stores (SQLite drops the offset)."""
+    return moment.astimezone(tz=UTC).replace(tzinfo=None)
+
+
+def _reuse_cutoff() -> datetime:
+    """The naive-UTC instant a reusable upload must outlive."""
+    return _naive_utc(datetime.now(tz=UTC) + UPLOAD_REUSE_MARGIN)
+
+
+async def find_upload_for_source(
+    cache_key: int | str, key_index: int
+) -> tuple[str, datetime] | None:
+    """Returns the live upload a previously seen source resolved to, or None.
+
+    Args:
+        cache_key: The attachment source's cache key.
+        key_index: The key the caller uploads with.
+
+    Returns:
+        `(uri, expires_at)` with an aware UTC expiry, or None on a miss or a database error.
+    """
+    try:
+        found = await read_upload_for_source(
+            source_hash=_source_digest(cache_key=cache_key),
+            key_index=key_index,
+            live_after=_reuse_cutoff(),
+        )
+    except Exception as error:
+        logfire.warn(
+            "gemini upload registry unavailable; uploading afresh",
+            key_index=key_index,
+            error_type=type(error).__name__,
+            _exc_info=error,
+        )
+        return None
+    return (found[0], found[1].replace(tzinfo=UTC)) if found is not None else None
+
+
+async def find_upload_for_content(
+    cache_key: int | str, content_hash: str, key_index: int
+) -> tuple[str, datetime] | None:
+    """Returns a live upload of the same bytes under this key, mapping the source to it.
+
+    Args:
+        cache_key: The attachment source's cache key, remembered on a hit so the next
+            reference skips the download too.
+        content_hash: `content_digest` of the downloaded bytes.
+        key_index: The key the caller uploads with.
+
+    Returns:
+        `(uri, expires_at)` with an aware UTC expiry, or None on a miss or a database error.
+    """
+    try:
+        found = await read_upload_for_content(
+            content_hash=content_hash, key_index=key_index, live_after=_reuse_cutoff()
+        )
+        if found is not None:
+            await record_upload(
+                source_hash=_source_digest(cache_key=cache_key),
+                content_hash=content_hash,
+                key_index=key_index,
+                uri=None,
+                expires_at=found[1],
+            )
+    except Exception as error:
+        logfire.warn(
+            "gemini upload registry unavailable; uploading afresh",
+            key_index=key_index,
+            error_type=type(error).__name__,
+            _exc_info=error,
+        )
+        return None
+    return (found[0], found[1].replace(tzinfo=UTC)) if found is not None else None
+
+
+async def remember_upload(
+    cache_key: int | str, content_hash: str, key_index: int, uri: str, expires_at: datetime
+) -> None:
+    """Records a fresh ACTIVE upload for reuse, sweeping expired rows now and then.
+
+    Args:
+        cache_key: The attachment source's cache key.
+        content_hash: `content_digest` of the uploaded bytes.
+        key_index: The key the upload was made with.
+        uri: The ACTIVE file uri.
+        expires_at: The provider-reported expiry.
+    """
+    global _last_sweep  # noqa: PLW0603 -- module-level sweep throttle
+    try:
+        await record_upload(
+            source_hash=_source_digest(cache_key=cache_key),
+            content_hash=content_hash,
+            key_index=key_index,
+            uri=uri,
+            expires_at=_naive_utc(expires_at),
+        )
+        now = time.monotonic()
+        if _last_sweep is None or now - _last_sweep >= UPLOAD_SWEEP_INTERVAL.total_seconds():
+            _last_sweep = now
+            removed = await delete_expired_uploads(before=_reuse_cutoff())
+            logfire.debug("gemini upload registry swept", removed=removed)
+    except Exception as error:
+        logfire.warn(
+            "gemini upload not recorded for reuse",
+            key_index=key_index,
+            error_type=type(error).__name__,
+            _exc_info=error,
+        )
+
+
+__all__ = [
+    "UPLOAD_REUSE_MARGIN",
+    "content_digest",
+    "find_upload_for_content",
+    "find_upload_for_source",
+    "remember_upload",
+]
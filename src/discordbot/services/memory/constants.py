@@ -69,10 +69,27 @@ RECENT_CONTEXT_TTL_DAYS = 30
 MEMORY_INJECTION_MAX_CHARS = 30_000
 MEMORY_INJECTION_WARN_CHARS = 24_000
 
-# Bound on the rendered-document cache. One live entry per (scope, reading context)
-# is the working set, so this is only here to stop a long-lived process holding keys
-# for scopes it will never serve again; the whole cache is dropped when it is hit.
+# Bounds on the store's two read caches, each evicted least recently used first. The
+# rendered-document cache holds one live entry per (scope, reading context), the parsed-fact
+# cache under it one per (scope, compartment). Neither bound fires on a normal working set;
+# they stop a long-lived process holding entries for scopes it will never serve again.
 RENDER_CACHE_MAX_ENTRIES = 512
+FACT_CACHE_MAX_ENTRIES = 1024
+
+# Worker threads for the store's file IO (`store_io.py`). A small pool, not one per
+# scope: the work is disk-bound and one scope holds at most one of them at a time, so
+# more threads would only let more scopes rewrite megabytes at once.
+MEMORY_IO_WORKERS = 4
+
+# One store call that holds its thread longer than this is logged. Before the calls
+# moved off the event loop this was how long every cog stalled; now it only says the
+# disk or the compartment has grown into something an operator should look at.
+MEMORY_IO_SLOW_SECONDS = 0.25
+
+# A packed compartment's segment (`segments.py`) is rewritten down to its live records once
+# superseded ones outweigh them and pass this floor. Most batches update a fact in place, so
+# without the floor a small segment would be rewritten on nearly every consolidation.
+SEGMENT_COMPACT_MIN_BYTES = 65_536
 
 # Net fact loss a single consolidation batch may cause before it is refused, as
 # `deletes - creates > max(this, existing // 2)`. Net rather than raw deletes
@@ -128,3 +145,9 @@ MEMORY_REPLY_MAX_CHARS = 8_000
 # compartments rather than one call and so is bounded by nothing upstream:
 # `MEMORY_CONSOLIDATE_TIMEOUT_SECONDS` in `typings/timeouts.py`, with the rest of the bot's
 # deadlines. It is also what caps a single stuck compartment now that the inner bound is gone.
+
+# How fast a queued consolidation gains priority while it waits (`scheduler.py`), in backlog
+# bytes per second. The queue serves the largest raw backlog first; this is what stops a small
+# one starving behind a steady stream of larger ones. At this rate under ten minutes of waiting
+# outranks a full RAW_CONSOLIDATION_MAX_BYTES of backlog.
+CONSOLIDATION_AGING_BYTES_PER_SECOND = 32
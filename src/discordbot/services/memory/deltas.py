@@ -41,9 +41,9 @@ from discordbot.services.memory.store import (
     DM_COMPARTMENT,
     GLOBAL_COMPARTMENT,
     read_facts,
-    write_fact,
-    delete_fact,
+    write_facts,
     guild_compartment,
+    read_indexed_facts,
 )
 from discordbot.services.memory.constants import (
     RECENT_CONTEXT_TTL_DAYS,
@@ -51,6 +51,7 @@ from discordbot.services.memory.constants import (
     STABLE_FRESHNESS_WINDOW_DAYS,
 )
 from discordbot.services.memory.extraction import MemoryFactDelta
+from discordbot.services.memory.fact_index import FactIndex
 
 # One raw entry's `## <ISO timestamp>` header, and one observation block inside it.
 _ENTRY_HEADER_RE = re.compile(r"^## (?P<timestamp>\d{4}-\d{2}-\d{2}T\S+)\s*$")
@@ -180,7 +181,8 @@ def apply_deltas(  # noqa: PLR0913 -- one compartment's identity (scope/compartm
     only ever be temporarily missing (it re-forms from evidence) instead of temporarily
     present in both — the one ordering that cannot widen a fact's reach.
     """
-    existing = {fact.fact_id: fact for fact in read_facts(scope=scope, compartment=compartment)}
+    indexed = read_indexed_facts(scope=scope, compartment=compartment)
+    existing = {fact.fact_id: fact for fact in indexed.facts}
     allowed = sections_for_flavor(flavor=flavor)
     now = utc_now()
     dropped = 0
@@ -188,7 +190,7 @@ def apply_deltas(  # noqa: PLR0913 -- one compartment's identity (scope/compartm
     to_write: list[MemoryFact] = []
     for delta in deltas:
         resolved = _resolve_delta(
-            delta=delta, compartment=compartment, existing=existing, allowed=allowed
+            delta=delta, compartment=compartment, indexed=indexed, allowed=allowed
         )
         if resolved is None:
             dropped += 1
@@ -228,10 +230,8 @@ def apply_deltas(  # noqa: PLR0913 -- one compartment's identity (scope/compartm
         # consolidation's whole job, and the median scope holds a handful of facts, so
         # a raw-delete ceiling would refuse the common case.
         return DeltaOutcome(dropped=dropped, rejected="mass deletion")
-    for fact_id in sorted(to_delete):
-        delete_fact(scope=scope, compartment=compartment, fact_id=fact_id)
-    for fact in to_write:
-        write_fact(scope=scope, fact=fact)
+    # One call for the whole batch, so the packed layout appends it with a single fsync.
+    write_facts(scope=scope, compartment=compartment, writes=to_write, deletes=to_delete)
     return DeltaOutcome(
         created=created,
         updated=len(to_write) - created,
@@ -242,10 +242,7 @@ def apply_deltas(  # noqa: PLR0913 -- one compartment's identity (scope/compartm
 
 
 def _resolve_delta(  # noqa: PLR0911 -- one early return per way a delta can be dropped or re-aimed
-    delta: MemoryFactDelta,
-    compartment: str,
-    existing: dict[str, MemoryFact],
-    allowed: frozenset[MemorySection],
+    delta: MemoryFactDelta, compartment: str, indexed: FactIndex, allowed: frozenset[MemorySection]
 ) -> tuple[str, bool] | None:
     """Resolves one delta to `(fact_id, is_delete)`, or None when it must be dropped.
 
@@ -253,13 +250,15 @@ def _resolve_delta(  # noqa: PLR0911 -- one early return per way a delta can be
     the batch is a retry against a changed tree), and a `create` whose evidence keys
     already back an existing fact becomes an `update` of that fact. The second rule is
     what makes a retried batch idempotent: ids are minted from the summary, so a model
-    that rewords slightly on the retry would otherwise file a duplicate.
+    that rewords slightly on the retry would otherwise file a duplicate. The keys are
+    looked up in the compartment's index rather than matched against every fact, so a
+    batch costs its own keys, not its keys times the compartment.
     """
     if delta.section not in allowed:
         logfire.warn("Memory delta names an unknown section; dropping", section=delta.section)
         return None
     named_id = delta.fact_id.strip()
-    known = named_id if FACT_ID_RE.match(named_id) and named_id in existing else ""
+    known = named_id if FACT_ID_RE.match(named_id) and named_id in indexed.rank else ""
     if delta.action == "delete":
         return (known, True) if known else None
     if not delta.summary.strip() or not _delta_body(delta=delta):
@@ -270,7 +269,7 @@ def _resolve_delta(  # noqa: PLR0911 -- one early return per way a delta can be
         return None
     if known:
         return known, False
-    matched = _fact_sharing_keys(delta=delta, existing=existing)
+    matched = indexed.sharing_keys(keys=delta.from_keys)
     if matched is not None:
         return matched, False
     return mint_fact_id(compartment=compartment, summary=delta.summary), False
@@ -317,17 +316,6 @@ def _merged_keys(delta: MemoryFactDelta, previous: MemoryFact | None) -> tuple[s
     return tuple(sorted({*existing_keys, *(key for key in delta.from_keys if key)}))
 
 
-def _fact_sharing_keys(delta: MemoryFactDelta, existing: dict[str, MemoryFact]) -> str | None:
-    """Returns an existing fact id whose evidence keys overlap this delta's."""
-    if not delta.from_keys:
-        return None
-    wanted = set(delta.from_keys)
-    for fact_id, fact in existing.items():
-        if wanted & set(fact.keys):
-            return fact_id
-    return None
-
-
 def sweep_stale_facts(scope: str, compartment: str, today: datetime) -> int:
     """Deletes facts the freshness rules have aged out, returning how many went.
 
@@ -345,7 +333,7 @@ def sweep_stale_facts(scope: str, compartment: str, today: datetime) -> int:
     facts = read_facts(scope=scope, compartment=compartment)
     stable = [fact.last_confirmed for fact in facts if fact.durability == "stable"]
     latest_stable = max(stable) if stable else None
-    removed = 0
+    expired_ids: set[str] = set()
     for fact in facts:
         if (
             fact.durability == "permanent"
@@ -364,9 +352,11 @@ def sweep_stale_facts(scope: str, compartment: str, today: datetime) -> int:
             )
         else:
             expired = False
-        if expired and delete_fact(scope=scope, compartment=compartment, fact_id=fact.fact_id):
-            removed += 1
-    return removed
+        if expired:
+            expired_ids.add(fact.fact_id)
+    if not expired_ids:
+        return 0
+    return write_facts(scope=scope, compartment=compartment, writes=[], deletes=expired_ids)
 
 
 def _compartment_for_block(block: str) -> str:
@@ -0,0 +1,121 @@
+"""Sidecar entry indexes for the store's two append logs, ``raw.md`` and ``detail.md``.
+
+Both files are a run of ``## <timestamp>`` entries, and every question the pipeline asks
+of them used to be answered by reading the whole file and splitting it: how many raw
+entries are waiting (asked for every scope on a restart sweep), whether one more entry
+overflows the raw cap, and where to cut an overflowing ``detail.md``. The index answers
+those from entry offsets instead. It lives next to its file as ``<name>.idx``::
+
+    <file size after the append> <offset of each entry header the append added> ...
+
+one line per append, so keeping it current costs one short append of its own. The last
+line's size is the check: an index whose size does not match the file (a crash between
+the two appends, a hand edit, a sidecar that was never written) is rebuilt by one scan of
+the memory-mapped file for entry headers, without decoding it. Only a writer — holding the
+scope's lock — ever stores a rebuilt index; a reader that finds one stale rebuilds it in
+memory and leaves the file alone, so it can never race a writer's append to the sidecar.
+"""
+
+import os
+import re
+import mmap
+from pathlib import Path
+
+from pydantic import Field, BaseModel, ConfigDict
+
+INDEX_SUFFIX = ".idx"
+
+# The bytes twin of `store._RAW_ENTRY_HEADER_RE`: a header is the start of an entry.
+_ENTRY_HEADER_RE = re.compile(rb"^## \d{4}-\d{2}-\d{2}T", flags=re.MULTILINE)
+
+
+class EntryIndex(BaseModel):
+    """Where one append log's entries start.
+
+    Attributes:
+        offsets: Byte offset of every entry header, in file order.
+        size: Size of the file the offsets describe.
+        stored: Whether the sidecar on disk already says exactly this.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    offsets: tuple[int, ...] = Field(default=(), description="Offset of every entry header.")
+    size: int = Field(default=0, description="Size of the file the offsets describe.")
+    stored: bool = Field(default=False, description="Whether the sidecar matches on disk.")
+
+
+def index_path(path: Path) -> Path:
+    """Returns the sidecar path for one append log."""
+    return path.with_name(f"{path.name}{INDEX_SUFFIX}")
+
+
+def _scan(path: Path) -> EntryIndex:
+    """Rebuilds an index from the file itself, memory-mapped rather than read."""
+    try:
+        with path.open(mode="rb") as handle:
+            size = os.fstat(handle.fileno()).st_size
+            if size == 0:
+                return EntryIndex()
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                offsets = tuple(match.start() for match in _ENTRY_HEADER_RE.finditer(view))
+    except FileNotFoundError:
+        return EntryIndex()
+    return EntryIndex(offsets=offsets, size=size)
+
+
+def read_entry_index(path: Path) -> EntryIndex:
+    """Returns the entry index of `path`, rebuilt in memory when the sidecar is stale.
+
+    A missing file is an empty log. Never writes: storing a rebuilt index is left to the
+    next writer (`append_entries`, `store_entry_index`).
+    """
+    try:
+        size = path.stat().st_size
+    except FileNotFoundError:
+        return EntryIndex()
+    try:
+        lines = index_path(path=path).read_text(encoding="ascii").splitlines()
+        rows = [[int(field) for field in line.split()] for line in lines]
+    except (OSError, ValueError):
+        rows = []
+    if not rows or not rows[-1] or rows[-1][0] != size:
+        return _scan(path=path)
+    offsets = tuple(offset for row in rows for offset in row[1:])
+    return EntryIndex(offsets=offsets, size=size, stored=True)
+
+
+def append_entries(path: Path, index: EntryIndex, chunk: bytes) -> EntryIndex:
+    """Appends `chunk` to the log `index` describes and records it, returning the new index.
+
+    `chunk` must start on a new line (or at the start of the file) so any header it
+    carries is found where a full scan would find it.
+    """
+    with path.open(mode="ab") as handle:
+        handle.write(chunk)
+    added = tuple(index.size + match.start() for match in _ENTRY_HEADER_RE.finditer(chunk))
+    updated = EntryIndex(offsets=index.offsets + added, size=index.size + len(chunk))
+    if not index.stored:
+        # The sidecar on disk does not describe the file this chunk was appended to, so
+        # appending a line to it would only extend a wrong index; write it whole instead.
+        return store_entry_index(path=path, index=updated)
+    with index_path(path=path).open(mode="a", encoding="ascii") as handle:
+        handle.write(" ".join(str(value) for value in (updated.size, *added)) + "\n")
+    return updated.model_copy(update={"stored": True})
+
+
+def store_entry_index(path: Path, index: EntryIndex) -> EntryIndex:
+    """Writes `index` as the whole sidecar of `path` (tmp + `os.replace`)."""
+    sidecar = index_path(path=path)
+    tmp_path = sidecar.with_name(f"{sidecar.name}.tmp")
+    values = (index.size, *index.offsets)
+    tmp_path.write_text(" ".join(str(value) for value in values) + "\n", encoding="ascii")
+    os.replace(src=tmp_path, dst=sidecar)
+    return index.model_copy(update={"stored": True})
+
+
+def drop_entry_index(path: Path) -> None:
+    """Removes the sidecar of `path` (and a stranded tmp), ahead of a rewrite or delete."""
+    sidecar = index_path(path=path)
+    sidecar.unlink(missing_ok=True)
+    sidecar.with_name(f"{sidecar.name}.tmp").unlink(missing_ok=True)
@@ -0,0 +1,63 @@
+"""An inverted index over one compartment's facts, cached with the facts themselves.
+
+Consolidation dedup asks one question per delta: does an existing fact already carry any
+of these evidence keys? Answered by scanning the compartment it costs every fact for
+every delta, so a large compartment consolidated against a large batch went quadratic.
+The index answers it with one lookup per key.
+
+It is built in the same pass that parses the compartment (`store.read_indexed_facts`)
+and cached in the same entry, under the same generation stamp, so it is exactly as
+fresh as the facts it was built from and is rebuilt only when a write to that
+compartment invalidates both. Nothing persists it: everything in it is a header field
+the parse already reads, so one more dict per compartment is cheaper than a sidecar
+that would have to be kept in step with two fact layouts and the store's git history.
+"""
+
+from collections.abc import Iterable
+
+from pydantic import Field, BaseModel, ConfigDict
+
+from discordbot.typings.memory import MemoryFact
+
+
+class FactIndex(BaseModel):
+    """One compartment's facts, in id order, with their lookups.
+
+    Attributes:
+        facts: Every parseable fact, in id order.
+        by_key: Evidence key to the ids of the facts citing it.
+        rank: Each fact id's position in id order, which decides between matches.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    facts: tuple[MemoryFact, ...] = Field(default=(), description="Facts in id order.")
+    by_key: dict[str, tuple[str, ...]] = Field(
+        default_factory=dict, description="Evidence key to the fact ids citing it."
+    )
+    rank: dict[str, int] = Field(default_factory=dict, description="Each id's position.")
+
+    def sharing_keys(self, keys: Iterable[str]) -> str | None:
+        """Returns the first fact, in id order, citing any of `keys`; None when none does."""
+        matched = {fact_id for key in keys for fact_id in self.by_key.get(key, ())}
+        return min(matched, key=self.rank.__getitem__) if matched else None
+
+
+def build_fact_index(facts: Iterable[MemoryFact]) -> FactIndex:
+    """Indexes a compartment's facts, which must already be in id order.
+
+    Keyed the way consolidation sees a compartment, one fact per id: should a hand-edited
+    tree hold two files claiming one id, the later file's keys answer for it, at the
+    earlier one's position.
+    """
+    ordered = tuple(facts)
+    by_id = {fact.fact_id: fact for fact in ordered}
+    by_key: dict[str, list[str]] = {}
+    for fact_id, fact in by_id.items():
+        for key in dict.fromkeys(fact.keys):
+            by_key.setdefault(key, []).append(fact_id)
+    return FactIndex(
+        facts=ordered,
+        by_key={key: tuple(ids) for key, ids in by_key.items()},
+        rank={fact_id: position for position, fact_id in enumerate(by_id)},
+    )
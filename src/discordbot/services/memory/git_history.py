@@ -5,14 +5,22 @@
 never creates it: an operator runs ``git init`` once, and a missing repository disables
 this quietly rather than filling an ignored directory with one nobody asked for.
 
-Three properties are what make committing from inside a running bot safe:
+Four properties are what make committing from inside a running bot safe:
 
-* **One worker.** Every invocation goes through a single queue and one process-wide
+* **One worker.** Every invocation goes through a single worker and one process-wide
   lock. ``MEMORY_GLOBAL_CONCURRENCY`` is 24, and ``git commit`` takes ``.git/index.lock``,
   so unserialised commits would start failing exactly when the store is busiest.
-* **Under the scope lock.** A delta batch is N renames, not one atomic replace, so a
-  commit taken mid-batch would record a tree that never existed. The worker takes the
-  same ``scope_lock`` the writer used; it is background work, so waiting costs nothing.
+* **Coalesced.** A change request is not a commit. Requests are debounced per scope,
+  and every scope that has settled (quiet for ``_DEBOUNCE_SECONDS``, or pending for
+  ``_MAX_DELAY_SECONDS`` however busy), with any close to settling, goes into one commit
+  staged with one pathspec list. A consolidation wave that touches two hundred scopes is
+  then a handful of subprocess pairs, not two hundred of them queued for minutes behind
+  each other.
+* **A snapshot under the scope locks.** A delta batch is N renames, not one atomic
+  replace, so a commit taken mid-batch would record a tree that never existed. The
+  worker takes the same ``scope_lock`` every batched scope's writer used, but only for
+  ``status`` and ``add``: once the index holds the snapshot the locks are released, and
+  ``commit`` writes from the index while the reply path has its scopes back.
 * **Never load-bearing.** Every failure is swallowed and counted, and a run of them
   disables the service for the rest of the process. Nothing upstream branches on whether
   a commit happened.
@@ -23,6 +31,7 @@ history therefore outlives a clear. That is a deliberate, recorded decision on #
 an oversight — the store is a private, unpushed, single-operator repository.
 """
 
+import time
 import asyncio
 import contextlib
 
@@ -32,6 +41,7 @@ from pydantic import Field, BaseModel, ConfigDict
 from discordbot.typings.memory import MemoryConfig
 from discordbot.utils.asyncio_locks import LoopLocalLock
 from discordbot.services.memory.store import scope_lock, memory_root
+from discordbot.services.memory.entry_index import INDEX_SUFFIX
 
 # Consecutive failures before the service stops trying. A repository that is missing,
 # locked by an operator, or out of disk fails every time, and a background task that
@@ -44,16 +54,47 @@ _MAX_CONSECUTIVE_FAILURES = 5
 _COMMITTER_NAME = "discordbot"
 _COMMITTER_EMAIL = "discordbot@localhost"
 
+# A scope is committed once it has had no change request for this long, or once its
+# oldest pending request is this old, whichever comes first: the first lets a burst of
+# writes to one scope land as one commit, the second stops a scope under constant churn
+# from never being committed at all.
+_DEBOUNCE_SECONDS = 2.0
+_MAX_DELAY_SECONDS = 30.0
 
-class _GitRequest(BaseModel):
-    """One queued commit of a single scope's directory."""
+# Kept out of history by pathspec rather than by the operator's `.gitignore`: the logs'
+# `.idx` entry indexes are derived state the store rebuilds whenever they disagree with
+# their file, so committing them would only put a noise diff beside every real one.
+_UNTRACKED = f":(exclude,glob)**/*{INDEX_SUFFIX}"
+
+
+class _PendingScope(BaseModel):
+    """One scope waiting to settle, with every reason it was requested for."""
+
+    reasons: list[str] = Field(default_factory=list, description="What changed, in order.")
+    first_at: float = Field(..., description="`time.monotonic()` of the oldest request.")
+    last_at: float = Field(..., description="`time.monotonic()` of the newest request.")
+
+
+class MemoryGitStats(BaseModel):
+    """A snapshot of the committer, for its per-commit log line and for tests.
+
+    Attributes:
+        queue_depth: Scopes with an uncommitted change request.
+        requests: Change requests accepted since the worker started.
+        commits: Commits made since the worker started.
+        commits_saved: Requests that rode on another request's commit.
+        last_commit_seconds: Wall time of the latest commit, lock wait and git included.
+        consecutive_failures: Failed commits since the last one that succeeded.
+    """
 
     model_config = ConfigDict(frozen=True)
 
-    scope: str = Field(..., description="Scope directory to stage, relative to the store root.")
-    reason: str = Field(
-        ..., description="What changed, for the commit subject.", examples=["update"]
-    )
+    queue_depth: int = Field(..., description="Scopes with an uncommitted request.")
+    requests: int = Field(..., description="Change requests accepted.")
+    commits: int = Field(..., description="Commits made.")
+    commits_saved: int = Field(..., description="Requests coalesced into another commit.")
+    last_commit_seconds: float = Field(..., description="Wall time of the latest commit.")
+    consecutive_failures: int = Field(..., description="Failures since the last success.")
 
 
 class MemoryGitService(BaseModel):
@@ -66,17 +107,21 @@ class MemoryGitService(BaseModel):
     def __init__(self, **data: object) -> None:
         """Initializes the service with no worker; `start` binds it to a loop."""
         super().__init__(**data)
-        self._queue: asyncio.Queue[_GitRequest] | None = None
+        self._pending: dict[str, _PendingScope] = {}
+        self._wakeup: asyncio.Event | None = None
         self._worker: asyncio.Task[None] | None = None
         self._failures = 0
+        self._requests = 0
+        self._commits = 0
+        self._last_commit_seconds = 0.0
         self._lock = LoopLocalLock()
 
     def start(self) -> None:
         """Starts the single worker, if git history is enabled and a repository exists.
 
-        Called from a cog's `on_ready`, so the queue is created on the running loop.
-        Deliberately not lazy: an unstarted service drops every request instead of
-        binding a queue to whichever loop happened to enqueue first.
+        Called from a cog's `on_ready`, so the wakeup event is created on the running
+        loop. Deliberately not lazy: an unstarted service drops every request instead of
+        binding its event to whichever loop happened to enqueue first.
         """
         if not self.enabled or self._worker is not None:
             return
@@ -84,14 +129,16 @@ class MemoryGitService(BaseModel):
             logfire.info("Memory git history disabled: the store is not a git repository")
             self.enabled = False
             return
-        self._queue = asyncio.Queue()
+        self._pending = {}
+        self._wakeup = asyncio.Event()
         self._worker = asyncio.create_task(self._run())
 
     async def stop(self) -> None:
-        """Cancels the worker, leaving any queued commits undone."""
+        """Cancels the worker, leaving any pending commits undone."""
         worker = self._worker
         self._worker = None
-        self._queue = None
+        self._wakeup = None
+        self._pending = {}
         if worker is None:
             return
         worker.cancel()
@@ -101,33 +148,94 @@ class MemoryGitService(BaseModel):
             await worker
 
     def enqueue(self, scope: str, reason: str) -> None:
-        """Requests a commit of one scope. Never blocks, never raises, never awaits."""
-        queue = self._queue
-        if queue is None or not self.enabled:
+        """Requests a commit of one scope. Never blocks, never raises, never awaits.
+
+        A scope already pending only has its quiet period restarted (and the reason
+        recorded), so a burst of writes becomes one commit.
+        """
+        wakeup = self._wakeup
+        if wakeup is None or not self.enabled:
             return
-        queue.put_nowait(_GitRequest(scope=scope, reason=reason))
+        now = time.monotonic()
+        pending = self._pending.setdefault(scope, _PendingScope(first_at=now, last_at=now))
+        pending.last_at = now
+        if reason not in pending.reasons:
+            pending.reasons.append(reason)
+        self._requests += 1
+        wakeup.set()
+
+    def stats(self) -> MemoryGitStats:
+        """Returns queue depth, commit latency and what coalescing saved, as of now."""
+        return MemoryGitStats(
+            queue_depth=len(self._pending),
+            requests=self._requests,
+            commits=self._commits,
+            commits_saved=max(self._requests - self._commits - len(self._pending), 0),
+            last_commit_seconds=self._last_commit_seconds,
+            consecutive_failures=self._failures,
+        )
 
     async def _run(self) -> None:
-        """Drains the queue one request at a time, discarding requests once disabled."""
-        queue = self._queue
-        if queue is None:
+        """Commits settled scopes in batches, discarding requests once disabled."""
+        wakeup = self._wakeup
+        if wakeup is None:
             return
         while True:
-            request = await queue.get()
-            if not self.enabled:
+            if not self._pending:
+                wakeup.clear()
+                await wakeup.wait()
+                continue
+            settled, next_due = self._settled(now=time.monotonic())
+            if not settled:
+                # A new request can only push a scope's quiet period further out, never
+                # bring one in, so sleeping to the earliest due time misses nothing.
+                await asyncio.sleep(next_due - time.monotonic())
                 continue
-            await self._commit(request=request)
+            batch = {scope: self._pending.pop(scope) for scope in settled}
+            if self.enabled:
+                await self._commit(batch=batch)
+
+    def _settled(self, now: float) -> tuple[list[str], float]:
+        """Returns the scopes due for a commit and, for the rest, the earliest due time.
+
+        Once one scope is due, any scope already quiet for half the debounce rides along:
+        a wave writes its scopes a few milliseconds apart, and without the slack each of
+        them would come due, and be committed, on its own.
+        """
+        due_at = {
+            scope: min(pending.last_at + _DEBOUNCE_SECONDS, pending.first_at + _MAX_DELAY_SECONDS)
+            for scope, pending in self._pending.items()
+        }
+        if not any(due <= now for due in due_at.values()):
+            return [], min(due_at.values(), default=float("inf"))
+        settled: list[str] = []
+        next_due = float("inf")
+        for scope, due in due_at.items():
+            if due - _DEBOUNCE_SECONDS / 2 <= now:
+                settled.append(scope)
+            else:
+                next_due = min(next_due, due)
+        return settled, next_due
 
-    async def _commit(self, request: _GitRequest) -> None:
-        """Stages and commits one scope, swallowing and counting any failure."""
+    async def _commit(self, batch: dict[str, _PendingScope]) -> None:
+        """Snapshots and commits a batch of scopes, swallowing and counting any failure."""
+        started_at = time.monotonic()
         try:
-            async with self._lock.get(), scope_lock(scope=request.scope):
-                if not await self._has_changes(scope=request.scope):
+            async with self._lock.get():
+                async with contextlib.AsyncExitStack() as locks:
+                    # Sorted, so two batches can never take an overlapping set of scope
+                    # locks in opposite orders.
+                    for scope in sorted(batch):
+                        await locks.enter_async_context(scope_lock(scope=scope))
+                    changed = await self._changed_scopes(scopes=sorted(batch))
+                    if not changed:
+                        return
                     # `git add` on a path that was never tracked and no longer exists
-                    # exits 128, so this guard is required rather than an optimization.
-                    return
-                await self._git("add", "-A", "--", request.scope)
-                await self._git("commit", "-m", f"chore(memory): {request.reason} {request.scope}")
+                    # exits 128, so only scopes with a change are staged, which makes the
+                    # status pass required rather than an optimization.
+                    await self._git("add", "-A", "--", *changed, _UNTRACKED)
+                # The index is the snapshot now; the commit needs no scope lock.
+                await self._git("commit", "-m", _commit_message(batch=batch, changed=changed))
         except Exception as error:
             # Broad on purpose: this is a background best-effort path, and every git
             # failure mode (missing binary, index lock, full disk, hook rejection)
@@ -135,7 +243,7 @@ class MemoryGitService(BaseModel):
             self._failures += 1
             logfire.warn(
                 "Memory git commit failed",
-                scope=request.scope,
+                scopes=len(batch),
                 failures=self._failures,
                 error_type=type(error).__name__,
                 _exc_info=error,
@@ -145,10 +253,34 @@ class MemoryGitService(BaseModel):
                 self.enabled = False
             return
         self._failures = 0
+        self._commits += 1
+        self._last_commit_seconds = time.monotonic() - started_at
+        stats = self.stats()
+        logfire.debug(
+            "Memory git commit",
+            scopes=len(changed),
+            seconds=round(stats.last_commit_seconds, 3),
+            queue_depth=stats.queue_depth,
+            commits_saved=stats.commits_saved,
+        )
 
-    async def _has_changes(self, scope: str) -> bool:
-        """Whether the scope's directory differs from HEAD."""
-        return bool(await self._git("status", "--porcelain", "--", scope))
+    async def _changed_scopes(self, scopes: list[str]) -> list[str]:
+        """Returns which of `scopes` differ from HEAD, from one status over all of them."""
+        status = await self._git(
+            "status",
+            "--porcelain",
+            "--no-renames",
+            "--untracked-files=all",
+            "--",
+            *scopes,
+            _UNTRACKED,
+        )
+        paths = [line[3:] for line in status.splitlines() if len(line) > 3]
+        return [
+            scope
+            for scope in scopes
+            if any(path == scope or path.startswith(f"{scope}/") for path in paths)
+        ]
 
     async def _git(self, *args: str) -> str:
         """Runs one git command in the store, returning stdout.
@@ -188,5 +320,13 @@ class MemoryGitService(BaseModel):
         return stdout.decode(errors="replace")
 
 
+def _commit_message(batch: dict[str, _PendingScope], changed: list[str]) -> str:
+    """Returns the commit message: one scope in the subject, or a count and one line each."""
+    lines = [f"{' '.join(batch[scope].reasons)} {scope}" for scope in changed]
+    if len(lines) == 1:
+        return f"chore(memory): {lines[0]}"
+    return f"chore(memory): {len(lines)} scopes\n\n" + "\n".join(lines)
+
+
 # One service per process, mirroring the single repository it commits to.
 memory_git = MemoryGitService(enabled=MemoryConfig().git_history_enabled)
@@ -10,6 +10,7 @@ import time
 from typing import Literal
 import asyncio
 from datetime import UTC, datetime
+from functools import partial
 from collections.abc import Awaitable
 
 import logfire
@@ -43,7 +44,6 @@ from discordbot.services.memory.store import (
     list_compartments,
     prune_compartment,
     delete_memory_files,
-    read_memory_document,
 )
 from discordbot.services.memory.deltas import (
     DeltaOutcome,
@@ -54,6 +54,7 @@ from discordbot.services.memory.deltas import (
     render_existing_facts,
     tone_evidence_from_raw,
 )
+from discordbot.services.memory.store_io import memory_io
 from discordbot.services.memory.constants import (
     COMPACTION_TRIGGER_CHARS,
     MEMORY_GLOBAL_CONCURRENCY,
@@ -65,6 +66,10 @@ from discordbot.services.memory.constants import (
     MEMORY_REGENERATION_COOLDOWN_SECONDS,
     MEMORY_CONSOLIDATION_COOLDOWN_SECONDS,
 )
+from discordbot.services.memory.scheduler import (
+    consolidation_scheduler,
+    estimate_consolidation_tokens,
+)
 from discordbot.services.memory.extraction import (
     MemoryExtractorAI,
     ConsolidatedMemory,
@@ -254,7 +259,9 @@ async def _clear_scope_critical(scope: str) -> tuple[bool, bool]:
             scope=scope, flavor=flavor_of(scope=scope), token=memory_db.new_token()
         )
         try:
-            removed_files = delete_memory_files(scope=scope)
+            removed_files = await memory_io.run(
+                scope=scope, call=partial(delete_memory_files, scope=scope)
+            )
         finally:
             # A caller may cancel while this task is running, but the next memory
             # lifetime still begins only after the tombstone and file pass finish.
@@ -293,8 +300,10 @@ async def clear_scope_memory(scope: str) -> bool:
 
     The scope lock is deliberately NOT taken, since waiting for it would park a
     user-facing command behind a minutes-long consolidation. Every FILE write
-    sits immediately after a `cleared_since` guard with no `await` in between,
-    so an in-flight task cannot interleave one past the stamp. The much shorter
+    sits immediately after a `cleared_since` guard with no `await` in between —
+    or, when it runs on `memory_io`'s threads, re-checks that guard there under
+    the same per-scope thread lock the clear's own file pass takes — so an
+    in-flight task cannot interleave one past the stamp. The much shorter
     per-scope staging lock serializes reply.db staging with the tombstone write:
     an earlier INSERT is scrubbed by the newer tombstone, and a turn captured
     during the clear waits for the closing stamp then writes nothing.
@@ -575,11 +584,9 @@ async def _run_memory_update(  # noqa: PLR0913, PLR0911 -- schedule_memory_updat
         # turn stamps the same source; a pre-source row (or the server flavor) parses
         # to None and renders without the source/sharing fields.
         source = parse_subject_source(subject=subject)
-        recent_detail = read_detail_tail(scope=scope, max_chars=MEMORY_DETAIL_CONTEXT_MAX_CHARS)
+        existing_text = await memory_io.run(scope=scope, call=partial(_dedup_window, scope=scope))
         deduped_observations = filter_duplicate_observations(
-            observations=draft.observations,
-            existing_text="\n\n".join((read_raw_entries(scope=scope), recent_detail)),
-            source=source,
+            observations=draft.observations, existing_text=existing_text, source=source
         )
         if not deduped_observations:
             logfire.debug(
@@ -589,23 +596,32 @@ async def _run_memory_update(  # noqa: PLR0913, PLR0911 -- schedule_memory_updat
             )
             await _safe(coro=memory_db.mark_done(scope=scope, token=token))
             return
-        append_raw_entry(
+        # Re-guarded on the IO thread, since the dedup read above was an await: a clear
+        # that landed since turns the append into a no-op instead of resurrecting memory.
+        await memory_io.run_unless_cleared(
             scope=scope,
-            entry_text=render_memory_observations(
-                observations=deduped_observations, source=source
+            started_at=captured_at,
+            call=partial(
+                append_raw_entry,
+                scope=scope,
+                entry_text=render_memory_observations(
+                    observations=deduped_observations, source=source
+                ),
             ),
         )
+        if cleared_since(scope=scope, started_at=captured_at):
+            await _safe(coro=memory_db.mark_done(scope=scope, token=token))
+            return
         # Phase-1 is durable in raw.md now; record success before the (best-effort,
         # self-healing) consolidation so a consolidation crash never re-runs extraction.
         await _safe(coro=memory_db.mark_done(scope=scope, token=token))
         if not _should_consolidate(scope=scope):
             return
-        # Recorded at attempt time, not success time, so repeated LLM failures
-        # are rate-limited by the same cooldown instead of retrying every turn.
-        _last_consolidation[scope] = time.monotonic()
-        await _consolidate_locked(
-            scope=scope, started_at=captured_at, extractor=extractor, identity=identity
-        )
+    # Outside the lock and the permit: waiting for admission must not stall this scope's
+    # next extraction, nor hold a permit another scope's extraction needs.
+    await _admitted_consolidation(
+        scope=scope, started_at=captured_at, extractor=extractor, identity=identity
+    )
 
 
 async def safe_list_resumable() -> list[memory_db.MemoryJob]:
@@ -621,6 +637,18 @@ async def safe_list_resumable() -> list[memory_db.MemoryJob]:
         return []
 
 
+def _dedup_window(scope: str) -> str:
+    """Returns the stored evidence a new observation is deduplicated against."""
+    recent_detail = read_detail_tail(scope=scope, max_chars=MEMORY_DETAIL_CONTEXT_MAX_CHARS)
+    return "\n\n".join((read_raw_entries(scope=scope), recent_detail))
+
+
+def _retire_raw_batch(scope: str, raw_entries: str) -> None:
+    """Moves a consumed raw batch into the cold-tier detail file and empties raw.md."""
+    append_detail(scope=scope, text=raw_entries)
+    clear_raw(scope=scope)
+
+
 def needs_consolidation(scope: str) -> bool:
     """Public sync pre-check for the boot sweep so it only spawns over-threshold scopes.
 
@@ -635,22 +663,58 @@ async def consolidate_if_needed(scope: str, extractor: MemoryExtractorAI, identi
     """Consolidates a scope whose raw backlog is over threshold; best-effort, self-logging.
 
     The boot-sweep entry point: `_consolidate_locked` is private and assumes the
-    scope lock and the semaphore permit are held, so this wrapper takes both and
-    re-checks the threshold under the lock. It swallows its own errors (a background
-    digest must never surface), so the caller just spawns it.
+    scope lock and the semaphore permit are held, so this wrapper queues the scope on
+    `consolidation_scheduler`, then takes both and re-checks the threshold under the
+    lock. It swallows its own errors (a background digest must never surface), so the
+    caller just spawns it.
     """
     try:
-        async with scope_lock(scope=scope), _memory_semaphore():
-            if not _should_consolidate(scope=scope):
-                return
-            _last_consolidation[scope] = time.monotonic()
-            await _consolidate_locked(
-                scope=scope, started_at=time.monotonic(), extractor=extractor, identity=identity
-            )
+        await _admitted_consolidation(
+            scope=scope, started_at=time.monotonic(), extractor=extractor, identity=identity
+        )
     except Exception:
         logfire.warn("Background memory consolidation sweep failed", scope=scope, _exc_info=True)
 
 
+async def _admitted_consolidation(
+    scope: str, started_at: float, extractor: MemoryExtractorAI, identity: str
+) -> None:
+    """Waits for `consolidation_scheduler` to admit this scope, then consolidates it.
+
+    Admission is awaited holding nothing; the lock and permit are taken only after, and
+    the threshold re-checked under them, since a regeneration or a clear may have emptied
+    the backlog while this scope waited its turn. A turn that comes due while the scope is
+    already queued joins that wait with the fresher backlog, and whichever caller takes
+    the lock second finds the backlog consolidated and returns.
+    """
+    backlog_bytes = raw_file_bytes(scope=scope)
+    evidence_bytes = backlog_bytes + min(
+        detail_file_bytes(scope=scope), MEMORY_DETAIL_CONTEXT_MAX_CHARS
+    )
+    # One call per existing compartment plus the tone note; a compartment this batch
+    # creates is not counted, which an estimate can afford.
+    await consolidation_scheduler.admit(
+        scope=scope,
+        backlog_bytes=backlog_bytes,
+        estimated_tokens=estimate_consolidation_tokens(
+            prompt_bytes=len(extractor.consolidate_prompt.encode("utf-8")),
+            evidence_bytes=evidence_bytes,
+            calls=len(list_compartments(scope=scope)) + 1,
+        ),
+    )
+    async with scope_lock(scope=scope), _memory_semaphore():
+        if cleared_since(scope=scope, started_at=started_at) or not _should_consolidate(
+            scope=scope
+        ):
+            return
+        # Recorded at attempt time, not success time, so repeated LLM failures
+        # are rate-limited by the same cooldown instead of retrying every turn.
+        _last_consolidation[scope] = time.monotonic()
+        await _consolidate_locked(
+            scope=scope, started_at=started_at, extractor=extractor, identity=identity
+        )
+
+
 def _should_consolidate(scope: str) -> bool:
     """Whether the raw backlog warrants a consolidation right now."""
     if raw_file_bytes(scope=scope) >= RAW_CONSOLIDATION_MAX_BYTES:
@@ -691,9 +755,12 @@ async def _consolidate_locked(
     """
     flavor = flavor_of(scope=scope)
     owner = parse_identity(identity=identity, fallback_owner_id=scope_owner_id(scope=scope))
-    raw_entries = read_raw_entries(scope=scope)
+    raw_entries = await memory_io.run(scope=scope, call=partial(read_raw_entries, scope=scope))
     buckets = partition_raw_entries(raw_text=raw_entries, flavor=flavor)
-    detail_tail = read_detail_tail(scope=scope, max_chars=MEMORY_DETAIL_CONTEXT_MAX_CHARS)
+    detail_tail = await memory_io.run(
+        scope=scope,
+        call=partial(read_detail_tail, scope=scope, max_chars=MEMORY_DETAIL_CONTEXT_MAX_CHARS),
+    )
     # The detail window is up to MEMORY_DETAIL_CONTEXT_MAX_CHARS and used to be sliced
     # rather than parsed; splitting it into observation blocks is a real stall on a
     # heavy scope, and this runs on the same loop as the reply path. Pure function, no
@@ -713,7 +780,10 @@ async def _consolidate_locked(
                     # cross-server evidence there was no global call to take it from, and
                     # a guild compartment still must not restate what is already shared.
                     global_reference = render_existing_facts(
-                        facts=read_facts(scope=scope, compartment=GLOBAL_COMPARTMENT)
+                        facts=await memory_io.run(
+                            scope=scope,
+                            call=partial(read_facts, scope=scope, compartment=GLOBAL_COMPARTMENT),
+                        )
                     )
                 if cleared_since(scope=scope, started_at=started_at):
                     return
@@ -737,7 +807,10 @@ async def _consolidate_locked(
                     return
                 if compartment == GLOBAL_COMPARTMENT:
                     global_reference = render_existing_facts(
-                        facts=read_facts(scope=scope, compartment=compartment)
+                        facts=await memory_io.run(
+                            scope=scope,
+                            call=partial(read_facts, scope=scope, compartment=compartment),
+                        )
                     )
     except TimeoutError:
         logfire.warn(
@@ -762,11 +835,15 @@ async def _consolidate_locked(
     # free. Synchronous and after the clear guard, like every other write here.
     for compartment in list_compartments(scope=scope):
         sweep_stale_facts(scope=scope, compartment=compartment, today=today_utc())
-    _report_injection_size(scope=scope, flavor=flavor)
+    await _report_injection_size(scope=scope, flavor=flavor)
     # The consumed batch's content is preserved in the cold-tier detail file; every
     # failure path above returns before this, so it can never retire an unread bucket.
-    append_detail(scope=scope, text=raw_entries)
-    clear_raw(scope=scope)
+    # The size report above awaited, so the clear guard is re-checked on the IO thread.
+    await memory_io.run_unless_cleared(
+        scope=scope,
+        started_at=started_at,
+        call=partial(_retire_raw_batch, scope=scope, raw_entries=raw_entries),
+    )
     # Best-effort and deliberately fire-and-forget: the worker takes this same scope
     # lock, so it commits once the caller releases it and never sees a half-written batch.
     memory_git.enqueue(scope=scope, reason="update")
@@ -803,7 +880,9 @@ async def _consolidate_compartment(  # noqa: PLR0913 -- one compartment's identi
     than a rule the prompt asks the model to follow. The tone note, which is genuinely
     cross-compartment, is therefore NOT written here — see `_update_tone_note`.
     """
-    existing = read_facts(scope=scope, compartment=compartment)
+    existing = await memory_io.run(
+        scope=scope, call=partial(read_facts, scope=scope, compartment=compartment)
+    )
     rendered = render_existing_facts(facts=existing)
     is_global = compartment == GLOBAL_COMPARTMENT
     result = await extractor.consolidate(
@@ -968,7 +1047,7 @@ def _compartment_note(compartment: str, flavor: MemoryFlavor) -> str:
     return f"memory readable only inside Discord server {compartment.removeprefix('g/')}"
 
 
-def _report_injection_size(scope: str, flavor: MemoryFlavor) -> None:
+async def _report_injection_size(scope: str, flavor: MemoryFlavor) -> None:
     """Logs when a scope's injectable document approaches or passes the hard cap.
 
     A post-write backstop, not a budget: the read path already stops rendering at the
@@ -982,7 +1061,7 @@ def _report_injection_size(scope: str, flavor: MemoryFlavor) -> None:
     # The owner's own DM reads every compartment at once, so it is the only combination
     # that can overflow while each individual reading context stays inside the cap.
     widest = len(
-        read_memory_document(
+        await memory_io.read_memory_document(
             scope=scope,
             compartments=compartments,
             flavor=flavor,
@@ -1115,8 +1194,11 @@ async def regenerate_main_memory(
             return RegenerationReport(result="cooldown")
         flavor = flavor_of(scope=scope)
         owner = parse_identity(identity=identity, fallback_owner_id=scope_owner_id(scope=scope))
-        raw_entries = read_raw_entries(scope=scope)
-        recent_detail = read_detail_tail(scope=scope, max_chars=MEMORY_DETAIL_CONTEXT_MAX_CHARS)
+        raw_entries = await memory_io.run(scope=scope, call=partial(read_raw_entries, scope=scope))
+        recent_detail = await memory_io.run(
+            scope=scope,
+            call=partial(read_detail_tail, scope=scope, max_chars=MEMORY_DETAIL_CONTEXT_MAX_CHARS),
+        )
         # Detail entries are retired raw entries verbatim with the same
         # `## <ISO timestamp>` headers, so the combined corpus (oldest first)
         # slots into the raw-entries consolidation input unchanged.
@@ -1139,15 +1221,17 @@ async def regenerate_main_memory(
             async with asyncio.timeout(MEMORY_CONSOLIDATE_TIMEOUT_SECONDS):
                 for compartment in compartments:
                     raw_bucket = buckets.get(compartment, "")
-                    if not raw_bucket and not read_facts(scope=scope, compartment=compartment):
+                    if not raw_bucket and not await memory_io.run(
+                        scope=scope, call=partial(read_facts, scope=scope, compartment=compartment)
+                    ):
                         # A leftover directory with nothing to distil and nothing to keep:
                         # the model would be handed an empty corpus and could only answer
                         # with an empty batch, so the prune alone reaches the same state.
                         # It also removes the emptied directory, which is what stops the
                         # leftover costing another call — and another way to fail the
                         # compartments that do have something — on every later rebuild.
-                        unreadable_removed += _prune_rebuilt_compartment(
-                            scope=scope, compartment=compartment, keep=set()
+                        unreadable_removed += await _prune_rebuilt_compartment(
+                            scope=scope, compartment=compartment, keep=set(), started_at=started_at
                         )
                         continue
                     result = await extractor.consolidate(
@@ -1183,12 +1267,13 @@ async def regenerate_main_memory(
                         return RegenerationReport(
                             result="failed", unreadable_removed=unreadable_removed
                         )
-                    unreadable_removed += _replace_compartment(
+                    unreadable_removed += await _replace_compartment(
                         scope=scope,
                         compartment=compartment,
                         flavor=flavor,
                         owner=owner,
                         result=result,
+                        started_at=started_at,
                     )
                 await _rebuild_tone_note(
                     scope=scope,
@@ -1203,12 +1288,15 @@ async def regenerate_main_memory(
                 "Memory regeneration timed out", scope=scope, compartments=len(compartments)
             )
             return RegenerationReport(result="failed", unreadable_removed=unreadable_removed)
-        _report_injection_size(scope=scope, flavor=flavor)
+        await _report_injection_size(scope=scope, flavor=flavor)
         if raw_entries:
             # The rebuild consumed the raw batch; retire it to the cold tier
             # exactly like a consolidation so it cannot be re-ingested.
-            append_detail(scope=scope, text=raw_entries)
-            clear_raw(scope=scope)
+            await memory_io.run_unless_cleared(
+                scope=scope,
+                started_at=started_at,
+                call=partial(_retire_raw_batch, scope=scope, raw_entries=raw_entries),
+            )
         memory_git.enqueue(scope=scope, reason="rebuild")
         return RegenerationReport(result="regenerated", unreadable_removed=unreadable_removed)
 
@@ -1278,12 +1366,13 @@ def _compartments_to_rebuild(scope: str, buckets: dict[str, str]) -> list[str]:
     return ordered
 
 
-def _replace_compartment(
+async def _replace_compartment(  # noqa: PLR0913 -- the compartment's identity plus the batch and its stamp
     scope: str,
     compartment: str,
     flavor: MemoryFlavor,
     owner: MemoryOwner,
     result: ConsolidatedMemory,
+    started_at: float,
 ) -> int:
     """Replaces a compartment's contents with a from-scratch rebuild's facts.
 
@@ -1304,12 +1393,14 @@ def _replace_compartment(
         owner=owner,
         allow_mass_delete=True,
     )
-    return _prune_rebuilt_compartment(
-        scope=scope, compartment=compartment, keep=set(outcome.written)
+    return await _prune_rebuilt_compartment(
+        scope=scope, compartment=compartment, keep=set(outcome.written), started_at=started_at
     )
 
 
-def _prune_rebuilt_compartment(scope: str, compartment: str, keep: set[str]) -> int:
+async def _prune_rebuilt_compartment(
+    scope: str, compartment: str, keep: set[str], started_at: float
+) -> int:
     """Reduces a rebuilt compartment to `keep`, reporting what it left and what it took.
 
     The prune reads the directory rather than the facts read back from it, so a file no
@@ -1327,7 +1418,14 @@ def _prune_rebuilt_compartment(scope: str, compartment: str, keep: set[str]) ->
     unreadable one, which is the ONLY thing that path ever removes: a compartment reaches
     it precisely when nothing in it could be read.
     """
-    pruned = prune_compartment(scope=scope, compartment=compartment, keep=keep)
+    pruned = await memory_io.run_unless_cleared(
+        scope=scope,
+        started_at=started_at,
+        call=partial(prune_compartment, scope=scope, compartment=compartment, keep=keep),
+    )
+    if pruned is None:
+        # A clear won the race for the IO thread; there is nothing left to prune.
+        return 0
     if pruned.unaccounted:
         logfire.warn(
             "Memory rebuild left files it cannot account for",
@@ -0,0 +1,231 @@
+"""Cross-scope admission for background memory consolidations, under a token budget.
+
+Every scope consolidates on its own task, and a consolidation is one LLM call per
+compartment plus the tone note. On a busy evening, and above all on the restart sweep,
+hundreds of scopes cross `RAW_CONSOLIDATION_THRESHOLD` together, and what stood between
+them and the proxy was only `MEMORY_GLOBAL_CONCURRENCY` — a cap on how many run at once,
+not on how much they send, and served in whatever order the tasks happened to wake.
+
+``consolidation_scheduler`` is the gate in front of that. A due consolidation waits here
+*before* it takes its scope lock or a global permit, so waiting holds nothing a phase-1
+extraction needs. When the queue is served, the waiter with the largest raw backlog goes
+first, and every waiter gains priority the longer it waits
+(`CONSOLIDATION_AGING_BYTES_PER_SECOND`), so a small backlog is delayed, never starved.
+A waiter is admitted once its estimated input fits in the rolling minute's budget
+(`MEMORY_CONSOLIDATION_TPM`); a consolidation larger than the whole budget is admitted
+alone into an empty minute rather than never. With no budget configured every waiter is
+admitted at once, which is the behaviour from before the gate existed. A scope waits at
+most once: a second request for a scope already queued joins its waiter and refreshes
+its backlog and estimate, so a busy scope is charged one consolidation, not one per turn.
+
+The estimate is the consolidation's input, sized before anything is read: the prompt
+once per compartment plus the raw backlog and the detail window. Evidence is mostly
+Traditional Chinese, three UTF-8 bytes and about one token per character, so bytes are
+divided by three. It is a pacing estimate, not a bill: the budget should sit somewhat
+under the provider's real limit.
+
+What it does not do is pack requests together. One call per compartment is what keeps a
+guild's evidence out of every other compartment's prompt, so two scopes (or two
+compartments) can never share one request; and the Batch API helper in
+`scripts/batch_dev.py` has a 24-hour completion window, which is a prompt-development
+tool, not a way to keep a live memory current.
+"""
+
+import math
+import time
+import asyncio
+import itertools
+from collections import deque
+from collections.abc import Iterator
+
+import logfire
+from pydantic import Field, BaseModel, ConfigDict, PrivateAttr, SkipValidation
+
+from discordbot.typings.memory import MemoryConfig
+from discordbot.services.memory.constants import CONSOLIDATION_AGING_BYTES_PER_SECOND
+
+# The budget window, in seconds: the budget is tokens per minute.
+_WINDOW_SECONDS = 60.0
+
+# Raw evidence is mostly CJK: three UTF-8 bytes per character and roughly one token each.
+_BYTES_PER_TOKEN = 3
+
+
+def estimate_consolidation_tokens(prompt_bytes: int, evidence_bytes: int, calls: int) -> int:
+    """Estimates one consolidation's input tokens: the prompt per call, the evidence once."""
+    return math.ceil((prompt_bytes * max(calls, 1) + evidence_bytes) / _BYTES_PER_TOKEN)
+
+
+class ConsolidationStats(BaseModel):
+    """A snapshot of the scheduler, for the admission log line and for tests.
+
+    Attributes:
+        queue_depth: Consolidations waiting for admission right now.
+        admitted: Consolidations admitted since the scheduler was (re)bound.
+        admitted_last_minute: Of those, how many in the rolling budget window.
+        tokens_last_minute: Estimated input tokens admitted in the same window.
+        mean_request_tokens: Estimated input tokens per admitted consolidation.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    queue_depth: int = Field(..., description="Consolidations waiting for admission.")
+    admitted: int = Field(..., description="Consolidations admitted since (re)binding.")
+    admitted_last_minute: int = Field(..., description="Admitted in the budget window.")
+    tokens_last_minute: int = Field(..., description="Estimated tokens in the budget window.")
+    mean_request_tokens: float = Field(..., description="Estimated tokens per consolidation.")
+
+
+class _Waiter(BaseModel):
+    """One consolidation waiting for its turn."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    scope: str = Field(..., description="The scope that is due.")
+    backlog_bytes: int = Field(..., description="Its raw backlog as of the latest request.")
+    tokens: int = Field(..., description="Its estimated input tokens, as of the same.")
+    enqueued_at: float = Field(..., description="`time.monotonic()` when it started waiting.")
+    sequence: int = Field(..., description="Arrival order, the final tie-break.")
+    admitted: SkipValidation[asyncio.Future[None]] = Field(
+        ..., description="Resolved when the waiter is admitted."
+    )
+    callers: int = Field(default=1, description="Requests waiting on this admission.")
+
+    def priority(self, now: float) -> tuple[float, int]:
+        """Larger backlog first, aged by the wait; earlier arrival breaks a tie."""
+        aged = self.backlog_bytes + (now - self.enqueued_at) * CONSOLIDATION_AGING_BYTES_PER_SECOND
+        return aged, -self.sequence
+
+
+class ConsolidationScheduler(BaseModel):
+    """Prioritized, token-budgeted admission for background consolidations.
+
+    Loop-local like the primitives in `utils/asyncio_locks.py`: its waiters are futures of
+    one event loop, so everything is dropped when the running loop changes.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    tokens_per_minute: int = Field(
+        default=0, description="Estimated input tokens admitted per minute; 0 is no budget."
+    )
+
+    _waiters: dict[str, _Waiter] = PrivateAttr(default_factory=dict)
+    _spent: deque[tuple[float, int]] = PrivateAttr(default_factory=deque)
+    _admitted: int = PrivateAttr(default=0)
+    _tokens_admitted: int = PrivateAttr(default=0)
+    _sequence: Iterator[int] = PrivateAttr(default_factory=itertools.count)
+    _wakeup: asyncio.TimerHandle | None = PrivateAttr(default=None)
+    _loop: asyncio.AbstractEventLoop | None = PrivateAttr(default=None)
+
+    def _bind(self) -> asyncio.AbstractEventLoop:
+        """Returns the running loop, dropping every waiter and count from a stale one."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._waiters = {}
+            self._spent = deque()
+            self._admitted = 0
+            self._tokens_admitted = 0
+            self._wakeup = None
+            self._loop = loop
+        return loop
+
+    async def admit(self, scope: str, backlog_bytes: int, estimated_tokens: int) -> None:
+        """Waits until this consolidation's turn comes up under the budget.
+
+        Call it holding nothing: not the scope lock, not a global permit. A scope already
+        waiting is joined rather than queued twice: this request's backlog and estimate
+        replace the waiter's, it keeps its place in the aging, and every caller is admitted
+        together on one charge. Admission charges the estimate to the budget; a caller that
+        then finds nothing left to do (another task consolidated the scope first) has spent
+        that share of the minute.
+        """
+        loop = self._bind()
+        waiter = self._waiters.get(scope)
+        if waiter is None:
+            waiter = _Waiter(
+                scope=scope,
+                backlog_bytes=backlog_bytes,
+                tokens=estimated_tokens,
+                enqueued_at=time.monotonic(),
+                sequence=next(self._sequence),
+                admitted=loop.create_future(),
+            )
+            self._waiters[scope] = waiter
+        else:
+            waiter.backlog_bytes = backlog_bytes
+            waiter.tokens = estimated_tokens
+            waiter.callers += 1
+        self._dispatch()
+        try:
+            # Shielded: the future is shared, and one caller's cancellation is not the others'.
+            await asyncio.shield(waiter.admitted)
+        except asyncio.CancelledError:
+            waiter.callers -= 1
+            if not waiter.callers and self._waiters.get(scope) is waiter:
+                # The last caller cancelled while still queued: it was charged nothing,
+                # and leaving the queue may be what lets the next waiter fit.
+                del self._waiters[scope]
+                self._dispatch()
+            raise
+        stats = self.stats()
+        logfire.debug(
+            "Memory consolidation admitted",
+            scope=scope,
+            waited_seconds=round(time.monotonic() - waiter.enqueued_at, 3),
+            estimated_tokens=estimated_tokens,
+            backlog_bytes=backlog_bytes,
+            queue_depth=stats.queue_depth,
+            tokens_last_minute=stats.tokens_last_minute,
+            admitted_last_minute=stats.admitted_last_minute,
+        )
+
+    def stats(self) -> ConsolidationStats:
+        """Returns queue depth, throughput and estimated cost, as of now."""
+        self._expire(now=time.monotonic())
+        return ConsolidationStats(
+            queue_depth=len(self._waiters),
+            admitted=self._admitted,
+            admitted_last_minute=len(self._spent),
+            tokens_last_minute=sum(tokens for _at, tokens in self._spent),
+            mean_request_tokens=self._tokens_admitted / self._admitted if self._admitted else 0.0,
+        )
+
+    def _expire(self, now: float) -> None:
+        """Forgets admissions that have left the rolling window."""
+        while self._spent and now - self._spent[0][0] >= _WINDOW_SECONDS:
+            self._spent.popleft()
+
+    def _dispatch(self) -> None:
+        """Admits waiters in priority order for as long as the budget has room."""
+        if self._wakeup is not None:
+            # At most one wakeup is ever pending; this pass schedules a fresh one if needed.
+            self._wakeup.cancel()
+            self._wakeup = None
+        now = time.monotonic()
+        self._expire(now=now)
+        while self._waiters:
+            head = max(self._waiters.values(), key=lambda waiter: waiter.priority(now=now))
+            spent = sum(tokens for _at, tokens in self._spent)
+            if (
+                self.tokens_per_minute
+                and self._spent
+                and spent + head.tokens > self.tokens_per_minute
+            ):
+                # Nothing frees up until the oldest admission leaves the window.
+                delay = self._spent[0][0] + _WINDOW_SECONDS - now
+                loop = self._loop or asyncio.get_running_loop()
+                self._wakeup = loop.call_later(max(delay, 0.0), self._dispatch)
+                return
+            del self._waiters[head.scope]
+            self._spent.append((now, head.tokens))
+            self._admitted += 1
+            self._tokens_admitted += head.tokens
+            if not head.admitted.done():
+                head.admitted.set_result(None)
+
+
+# One gate per process, across users and servers alike: the budget is the proxy's.
+consolidation_scheduler = ConsolidationScheduler(
+    tokens_per_minute=MemoryConfig().consolidation_tokens_per_minute
+)
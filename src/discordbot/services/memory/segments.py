@@ -0,0 +1,191 @@
+"""The packed fact layout: one append-only segment file per compartment.
+
+One file per fact makes a cold read an ``iterdir`` plus an open, a read and a parse per
+fact, and a consolidation batch N tmp writes and N renames. A segment holds the same fact
+files, byte for byte, as length-prefixed records in one file inside the same compartment
+directory — so the directory is still the privacy boundary, and nothing here can put a
+fact where a reader for another guild would open it.
+
+The format is plain text, so a segment stays greppable::
+
+    %memory-segment 1
+    +<fact id> <body bytes>
+    <the fact file, byte for byte as `render_fact_file` writes it>
+    -<fact id>
+
+A ``+`` record writes a fact and a ``-`` record deletes one; the last record for an id
+wins. Every header carries its body's length, so one sequential read is also the offset
+index: ``scan_segment`` walks the headers, skips the bodies and maps each live id to its
+slice, and only the records still live are ever decoded. A batch is appended with one
+write and one fsync. Superseded records are dead weight until a compaction rewrites the
+segment down to its live records through tmp + ``os.replace``, like every other rewrite in
+the store.
+
+A crash mid-append can only leave an incomplete LAST record. The scan reports it as
+``torn`` and stops there, and the next append cuts it off before it writes. Anything else
+that does not parse is ``corrupt``: readers keep what came before it, and writers refuse,
+because appending after bytes nobody can parse would bury every later write with them.
+"""
+
+import os
+from pathlib import Path
+
+from pydantic import Field, BaseModel, ConfigDict
+
+from discordbot.services.memory.facts import FACT_ID_RE
+
+SEGMENT_NAME = "facts.seg"
+_MAGIC = b"%memory-segment 1\n"
+
+
+class SegmentScan(BaseModel):
+    """What one pass over a segment's headers found.
+
+    Attributes:
+        live: Each live fact id mapped to the `(offset, length)` of its body.
+        valid_end: Offset just past the last record that parsed.
+        dead_bytes: Bytes held by superseded records and tombstones.
+        torn: The file ends in an incomplete record (an interrupted append).
+        corrupt: A record that cannot be parsed sits before the end of the file.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    live: dict[str, tuple[int, int]] = Field(
+        default={}, description="Live fact id to the (offset, length) of its body."
+    )
+    valid_end: int = Field(default=0, description="Offset just past the last good record.")
+    dead_bytes: int = Field(default=0, description="Bytes held by superseded records.")
+    torn: bool = Field(default=False, description="Whether the last record is incomplete.")
+    corrupt: bool = Field(default=False, description="Whether an unparsable record was hit.")
+
+    @property
+    def live_bytes(self) -> int:
+        """Bytes held by the live records' bodies."""
+        return sum(length for _offset, length in self.live.values())
+
+
+def scan_segment(data: bytes) -> SegmentScan:  # noqa: PLR0911 -- one early return per way a record can stop the scan
+    """Indexes a segment's records without decoding a single body.
+
+    An empty file is a valid empty segment; a file that does not start with the format
+    line is reported corrupt with nothing live, so a stray `facts.seg` is never read as
+    facts and never appended to.
+    """
+    if not data:
+        return SegmentScan()
+    if not data.startswith(_MAGIC):
+        return SegmentScan(corrupt=True)
+    live: dict[str, tuple[int, int]] = {}
+    record_bytes: dict[str, int] = {}
+    dead = 0
+    offset = len(_MAGIC)
+    while offset < len(data):
+        newline = data.find(b"\n", offset)
+        if newline < 0:
+            return _stopped(live=live, end=offset, dead=dead, torn=True)
+        header = data[offset:newline].decode(encoding="ascii", errors="replace")
+        kind, _, rest = header.partition(" ") if header[:1] == "+" else (header, "", "")
+        fact_id = kind[1:]
+        if kind[:1] not in {"+", "-"} or not FACT_ID_RE.fullmatch(fact_id):
+            return _stopped(live=live, end=offset, dead=dead, corrupt=True)
+        dead += record_bytes.pop(fact_id, 0)
+        live.pop(fact_id, None)
+        if kind[:1] == "-":
+            dead += newline + 1 - offset
+            offset = newline + 1
+            continue
+        if not rest.isdigit():
+            return _stopped(live=live, end=offset, dead=dead, corrupt=True)
+        start, length = newline + 1, int(rest)
+        end = start + length
+        if end + 1 > len(data):
+            return _stopped(live=live, end=offset, dead=dead, torn=True)
+        if data[end : end + 1] != b"\n":
+            return _stopped(live=live, end=offset, dead=dead, corrupt=True)
+        live[fact_id] = (start, length)
+        record_bytes[fact_id] = end + 1 - offset
+        offset = end + 1
+    return SegmentScan(live=live, valid_end=offset, dead_bytes=dead)
+
+
+def _stopped(
+    live: dict[str, tuple[int, int]],
+    end: int,
+    dead: int,
+    torn: bool = False,
+    corrupt: bool = False,
+) -> SegmentScan:
+    """Returns the scan of everything before the record that stopped it."""
+    return SegmentScan(live=live, valid_end=end, dead_bytes=dead, torn=torn, corrupt=corrupt)
+
+
+def read_segment(path: Path) -> tuple[bytes, SegmentScan]:
+    """Reads a whole segment in one go, a missing file counting as an empty one."""
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        return b"", SegmentScan()
+    return data, scan_segment(data=data)
+
+
+def live_bodies(data: bytes, scan: SegmentScan) -> dict[str, bytes]:
+    """Slices out the live records' bodies, keyed by fact id, still undecoded."""
+    return {
+        fact_id: data[start : start + length] for fact_id, (start, length) in scan.live.items()
+    }
+
+
+def encode_records(writes: dict[str, bytes], deletes: set[str]) -> bytes:
+    """Encodes one batch, deletes first, as the bytes one append writes."""
+    parts = [f"-{fact_id}\n".encode("ascii") for fact_id in sorted(deletes)]
+    parts.extend(
+        f"+{fact_id} {len(body)}\n".encode("ascii") + body + b"\n"
+        for fact_id, body in writes.items()
+    )
+    return b"".join(parts)
+
+
+def append_records(path: Path, scan: SegmentScan, records: bytes) -> None:
+    """Appends one encoded batch with a single write and a single fsync.
+
+    `scan` is the caller's scan of the file as it stands; a torn tail it found is cut off
+    first so the new records start on a record boundary.
+
+    Raises:
+        ValueError: The segment is corrupt. Appending would hide these records behind
+            bytes no reader gets past, so the batch fails instead and the caller's usual
+            failure path (keep the raw batch, retry later) applies.
+    """
+    if scan.corrupt:
+        raise ValueError(f"memory segment is corrupt: {path}")
+    with path.open(mode="r+b" if path.exists() else "wb") as handle:
+        if scan.valid_end == 0:
+            handle.truncate(0)
+            handle.write(_MAGIC)
+        else:
+            handle.seek(scan.valid_end)
+            handle.truncate()
+        handle.write(records)
+        handle.flush()
+        os.fsync(handle.fileno())
+
+
+def after_append(data: bytes, scan: SegmentScan, records: bytes) -> tuple[bytes, SegmentScan]:
+    """Returns the segment as `append_records` just left it, without reading it back."""
+    appended = (data[: scan.valid_end] if scan.valid_end else _MAGIC) + records
+    return appended, scan_segment(data=appended)
+
+
+def write_segment(path: Path, bodies: dict[str, bytes]) -> None:
+    """Atomically rewrites a segment to exactly `bodies`, in id order (the compaction).
+
+    Bodies are copied as bytes, so a record no reader could decode survives a compaction
+    unchanged rather than being silently re-encoded into something else.
+    """
+    tmp_path = path.with_name(f"{SEGMENT_NAME}.tmp")
+    with tmp_path.open(mode="wb") as handle:
+        handle.write(_MAGIC + encode_records(writes=dict(sorted(bodies.items())), deletes=set()))
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(src=tmp_path, dst=path)
@@ -15,29 +15,39 @@ construction and its evidence carries no source to route by.
 The remaining tiers are per-scope and unchanged: ``raw.md`` accumulates phase-1 entries
 until consolidation consumes them, ``detail.md`` is the append-only cold evidence log
 (read as a tail window, trimmed to a hard byte cap), and ``tone.md`` is the short
-always-read note of how the user wants the bot to sound.
-
-IO is synchronous, which one fact per file would otherwise make untenable on the reply
-path: ``read_memory_document`` is cached under a per-scope generation counter that
-every write bumps, so a repeat read costs no syscalls at all. The counter is exact
-because every write in this process goes through here under ``scope_lock``; editing the
-tree from outside while the bot runs is not supported (nor is it today, for
-``_cleared_at``).
+always-read note of how the user wants the bot to sound. The two logs each keep a
+``.idx`` sidecar of entry offsets (``entry_index.py``), so counting, sizing and trimming
+them never re-reads and re-splits the file.
+
+IO is synchronous here; the bot itself reaches it through ``store_io.memory_io``, which
+runs these calls on a small thread pool so a megabyte trim or a long directory walk never
+stalls the event loop. Reads are cached at two levels, both checked against write
+generations: ``read_facts`` keeps each compartment's parsed facts, with the inverted
+index built from them (``fact_index.py``), under that compartment's own counter, and ``read_memory_document`` keeps rendered documents under
+the counters of the compartments they were built from. A write to ``g/<id>/`` therefore
+leaves the ``global/`` parse warm for every other reading context, a repeat read costs no
+syscalls at all and is served without a thread hop, and both caches evict least recently
+used rather than all at once. The counters are exact because every write in this process
+goes through here under ``scope_lock``; editing the tree from outside while the bot runs
+is not supported (nor is it today, for ``_cleared_at``).
 """
 
 import os
 import re
 import time
+import shutil
 import asyncio
 from pathlib import Path
 from datetime import UTC, datetime
 import itertools
+import threading
 import contextlib
+from collections import OrderedDict
 
 import logfire
 from pydantic import Field, BaseModel, ConfigDict
 
-from discordbot.typings.memory import MemoryFact, MemoryOwner
+from discordbot.typings.memory import MemoryFact, MemoryOwner, MemoryConfig
 from discordbot.utils.asyncio_locks import LoopLocalRegistry
 from discordbot.services.memory.facts import (
     FACT_ID_RE,
@@ -46,14 +56,34 @@ from discordbot.services.memory.facts import (
     render_fact_file,
     render_memory_document,
 )
+from discordbot.services.memory.segments import (
+    SEGMENT_NAME,
+    SegmentScan,
+    live_bodies,
+    after_append,
+    read_segment,
+    write_segment,
+    append_records,
+    encode_records,
+)
 from discordbot.services.memory.constants import (
     RAW_FILE_MAX_BYTES,
     TONE_FILE_MAX_BYTES,
     DETAIL_FILE_MAX_BYTES,
+    FACT_CACHE_MAX_ENTRIES,
     RENDER_CACHE_MAX_ENTRIES,
+    SEGMENT_COMPACT_MIN_BYTES,
     MEMORY_INJECTION_MAX_CHARS,
     DETAIL_FILE_TRIM_TARGET_BYTES,
 )
+from discordbot.services.memory.fact_index import FactIndex, build_fact_index
+from discordbot.services.memory.entry_index import (
+    EntryIndex,
+    append_entries,
+    drop_entry_index,
+    read_entry_index,
+    store_entry_index,
+)
 
 _MEMORY_DIR = Path("./data/memories")
 
@@ -78,10 +108,24 @@ _RAW_ENTRY_HEADER_RE = re.compile(r"^## \d{4}-\d{2}-\d{2}T", flags=re.MULTILINE)
 _scope_locks: LoopLocalRegistry[str, asyncio.Lock] = LoopLocalRegistry()
 # Manual-clear timestamps; monotonic, so it is not loop-keyed and tests reset it.
 _cleared_at: dict[str, float] = {}
-# Per-scope write counter and the rendered-document cache keyed on it. Not loop-bound
-# (plain dicts, no asyncio primitive), but reset by the test fixture like `_cleared_at`.
+# Write counters and the two read caches stamped with them. Not loop-bound (plain dicts,
+# no asyncio primitive), but reset by the test fixture like `_cleared_at`. The per-scope
+# counter is bumped by what removes a whole scope, the per-compartment one by every
+# write to that compartment; a cache entry is current while every counter it was stamped
+# with is unchanged.
 _write_generation: dict[str, int] = {}
-_render_cache: dict[tuple[str, tuple[str, ...], MemoryFlavor, int], tuple[int, str]] = {}
+_compartment_generation: dict[tuple[str, str], int] = {}
+_fact_cache: OrderedDict[tuple[str, str], tuple[tuple[int, ...], FactIndex]] = OrderedDict()
+_render_cache: OrderedDict[
+    tuple[str, tuple[str, ...], MemoryFlavor, int], tuple[tuple[int, ...], str]
+] = OrderedDict()
+# Reads and writes run on `store_io`'s worker threads, so bumps and every cache access
+# are guarded: a lost increment would leave a stale entry cached as current, and two
+# threads evicting from one OrderedDict at once can corrupt its order.
+_cache_lock = threading.Lock()
+# Which layout new fact writes use (`segments.py` has the packed one). Both are always read,
+# so this only decides where the next write lands.
+_packed_storage = MemoryConfig().storage == "packed"
 
 
 def user_scope(user_id: int) -> str:
@@ -263,22 +307,57 @@ def cleared_since(scope: str, started_at: float) -> bool:
     return cleared is not None and cleared >= started_at
 
 
-def _bump_generation(scope: str) -> None:
-    """Invalidates the scope's cached documents after a write."""
-    _write_generation[scope] = _write_generation.get(scope, 0) + 1
+def _bump_generation(scope: str, compartment: str | None = None) -> None:
+    """Invalidates what a write changed: one compartment, or with None the whole scope."""
+    with _cache_lock:
+        if compartment is None:
+            _write_generation[scope] = _write_generation.get(scope, 0) + 1
+        else:
+            key = (scope, compartment)
+            _compartment_generation[key] = _compartment_generation.get(key, 0) + 1
 
 
-def read_facts(scope: str, compartment: str) -> list[MemoryFact]:
-    """Returns one compartment's parseable facts; unreadable files are skipped.
+def _stamp(scope: str, compartments: list[str]) -> tuple[int, ...]:
+    """Returns the counters a read of `compartments` depends on; call under `_cache_lock`."""
+    return (
+        _write_generation.get(scope, 0),
+        *(_compartment_generation.get((scope, compartment), 0) for compartment in compartments),
+    )
 
-    A file can vanish between the listing and the read (a concurrent delete, an offline
-    edit), and a malformed one is reported by `parse_fact_file`; either way the rest of
-    the compartment still reaches the reply.
+
+def compartment_texts(scope: str, compartment: str) -> dict[str, str]:
+    """Returns every stored fact's text in one compartment, keyed by fact id, unparsed.
+
+    Segment records are read first and a loose `<id>.md` replaces the record for the same
+    id: a packed write removes the loose copy before it appends, so a loose file that is
+    still there was written after the record, in the file-per-fact layout. A body that
+    cannot be decoded reads as "", which every caller skips like an unparsable one.
     """
-    facts: list[MemoryFact] = []
-    for path in _fact_paths(directory=compartment_dir(scope=scope, compartment=compartment)):
+    directory = compartment_dir(scope=scope, compartment=compartment)
+    try:
+        data, scan = read_segment(path=directory / SEGMENT_NAME)
+    except OSError as error:
+        logfire.warn(
+            "Memory segment could not be read; skipping",
+            compartment=compartment,
+            error_type=type(error).__name__,
+        )
+        data, scan = b"", SegmentScan()
+    if scan.torn or scan.corrupt:
+        logfire.warn(
+            "Memory segment ends in a record that cannot be read; keeping what precedes it",
+            compartment=compartment,
+            torn=scan.torn,
+        )
+    texts: dict[str, str] = {}
+    for fact_id, body in live_bodies(data=data, scan=scan).items():
+        try:
+            texts[fact_id] = body.decode(encoding="utf-8")
+        except UnicodeDecodeError:
+            texts[fact_id] = ""
+    for path in _fact_paths(directory=directory):
         try:
-            text = _read_text(path=path)
+            texts[path.stem] = _read_text(path=path)
         except (OSError, UnicodeDecodeError) as error:
             # A file that cannot even be decoded is skipped like one that cannot be
             # parsed, rather than raised: `_scope_has_memory` reads through here, so one
@@ -290,13 +369,79 @@ def read_facts(scope: str, compartment: str) -> list[MemoryFact]:
                 compartment=compartment,
                 error_type=type(error).__name__,
             )
-            continue
+    return texts
+
+
+def read_facts(scope: str, compartment: str) -> list[MemoryFact]:
+    """Returns one compartment's parseable facts, in id order; unreadable ones are skipped.
+
+    A file can vanish between the listing and the read (a concurrent delete, an offline
+    edit), and a malformed one is reported by `parse_fact_file`; either way the rest of
+    the compartment still reaches the reply.
+    """
+    return list(read_indexed_facts(scope=scope, compartment=compartment).facts)
+
+
+def read_indexed_facts(scope: str, compartment: str) -> FactIndex:
+    """Returns one compartment's facts together with their inverted index (`fact_index.py`).
+
+    Cached per compartment: a repeat read of one nothing has written since returns the
+    facts parsed, and the index built, last time. The stamp is taken BEFORE the files are
+    read, so a write that lands mid-read leaves the entry already stale rather than
+    cached as current.
+    """
+    key = (scope, compartment)
+    with _cache_lock:
+        stamp = _stamp(scope=scope, compartments=[compartment])
+        cached = _fact_cache.get(key)
+        if cached is not None and cached[0] == stamp:
+            _fact_cache.move_to_end(key)
+            return cached[1]
+    facts: list[MemoryFact] = []
+    for _fact_id, text in sorted(compartment_texts(scope=scope, compartment=compartment).items()):
         if not text:
             continue
         fact = parse_fact_file(text=text, compartment=compartment)
         if fact is not None:
             facts.append(fact)
-    return facts
+    index = build_fact_index(facts=facts)
+    with _cache_lock:
+        _fact_cache[key] = (stamp, index)
+        _fact_cache.move_to_end(key)
+        if len(_fact_cache) > FACT_CACHE_MAX_ENTRIES:
+            _fact_cache.popitem(last=False)
+    return index
+
+
+def cached_memory_document(
+    scope: str,
+    compartments: list[str],
+    flavor: MemoryFlavor,
+    max_chars: int = MEMORY_INJECTION_MAX_CHARS,
+) -> str | None:
+    """Returns the cached document for unchanged compartments, or None when it must be read.
+
+    Touches no file, so `store_io` answers a hit on the event loop and only hands a miss
+    to its thread pool.
+    """
+    key = (scope, tuple(compartments), flavor, max_chars)
+    with _cache_lock:
+        cached = _render_cache.get(key)
+        if cached is None or cached[0] != _stamp(scope=scope, compartments=compartments):
+            return None
+        _render_cache.move_to_end(key)
+        return cached[1]
+
+
+def drop_read_caches() -> None:
+    """Forgets every cached parse and render, so the next read of each compartment is cold.
+
+    Nothing in the bot needs it (a write invalidates exactly what it touched); it is how
+    `scripts/memory_bench.py` measures a cold read without restarting the process.
+    """
+    with _cache_lock:
+        _fact_cache.clear()
+        _render_cache.clear()
 
 
 def read_memory_document(
@@ -313,62 +458,157 @@ def read_memory_document(
     rather than by which compartment they came from, so a large shared tier cannot
     silently starve a guild's own memory.
 
-    Cached on the scope's write generation: a repeat read of an unchanged scope returns
-    without touching the filesystem, which is what keeps eight per-reply lookups
-    affordable now that one fact is one file.
+    Cached on the write generations of exactly the compartments read: a repeat read
+    returns without touching the filesystem, and after a write only the compartment
+    written is re-parsed (`read_facts`) before the document is rendered again.
     """
-    key = (scope, tuple(compartments), flavor, max_chars)
-    cached = _render_cache.get(key)
-    generation = _write_generation.get(scope, 0)
-    if cached is not None and cached[0] == generation:
-        return cached[1]
+    cached = cached_memory_document(
+        scope=scope, compartments=compartments, flavor=flavor, max_chars=max_chars
+    )
+    if cached is not None:
+        return cached
+    with _cache_lock:
+        stamp = _stamp(scope=scope, compartments=compartments)
     facts = [
         fact
         for compartment in compartments
         for fact in read_facts(scope=scope, compartment=compartment)
     ]
     document = render_memory_document(facts=facts, flavor=flavor, max_chars=max_chars)
-    if len(_render_cache) >= RENDER_CACHE_MAX_ENTRIES:
-        # Whole-cache reset rather than an LRU: entries are cheap to rebuild and the
-        # working set is one entry per (scope, reading context), so the bound is only
-        # here to stop a long-lived process accumulating stale keys forever.
-        _render_cache.clear()
-    _render_cache[key] = (generation, document)
+    key = (scope, tuple(compartments), flavor, max_chars)
+    with _cache_lock:
+        _render_cache[key] = (stamp, document)
+        _render_cache.move_to_end(key)
+        if len(_render_cache) > RENDER_CACHE_MAX_ENTRIES:
+            _render_cache.popitem(last=False)
     return document
 
 
 def write_fact(scope: str, fact: MemoryFact) -> None:
-    """Atomically writes one fact file into its compartment."""
-    directory = compartment_dir(scope=scope, compartment=fact.compartment)
+    """Writes one fact into its compartment."""
+    write_facts(scope=scope, compartment=fact.compartment, writes=[fact], deletes=set())
+
+
+def delete_fact(scope: str, compartment: str, fact_id: str) -> bool:
+    """Deletes one fact, returning whether it existed."""
+    return write_facts(scope=scope, compartment=compartment, writes=[], deletes={fact_id}) > 0
+
+
+def write_facts(scope: str, compartment: str, writes: list[MemoryFact], deletes: set[str]) -> int:
+    """Applies one compartment's batch, deletes before writes, and returns the deletes that hit.
+
+    In the file-per-fact layout each write is its own tmp write + `os.replace`. In the
+    packed one the whole batch is one append and one fsync on the compartment's segment;
+    a loose copy of any id the batch touches is removed FIRST, so a crash in between
+    leaves a fact briefly missing (it re-forms, the raw batch is not retired yet) rather
+    than a stale loose copy shadowing the record just appended. Either way a delete also
+    tombstones a record left over from the other layout, so switching layouts never
+    resurrects a fact. A corrupt segment refuses the batch before anything is removed.
+    """
+    directory = compartment_dir(scope=scope, compartment=compartment)
+    segment = directory / SEGMENT_NAME
+    data, scan = read_segment(path=segment)
+    tombstones = deletes & scan.live.keys()
+    if scan.corrupt and (_packed_storage or tombstones):
+        # Refused before anything is unlinked: the append below would fail anyway, and
+        # a loose copy removed ahead of it would take its fact down with the batch.
+        raise ValueError(f"memory segment is corrupt: {segment}")
+    touched = deletes | ({fact.fact_id for fact in writes} if _packed_storage else set())
+    unlinked: set[str] = set()
+    try:
+        for fact_id in touched:
+            with contextlib.suppress(FileNotFoundError):
+                (directory / f"{fact_id}.md").unlink()
+                unlinked.add(fact_id)
+        if _packed_storage:
+            puts = {fact.fact_id: render_fact_file(fact=fact).encode("utf-8") for fact in writes}
+            if puts or tombstones:
+                directory.mkdir(parents=True, exist_ok=True)
+                records = encode_records(writes=puts, deletes=tombstones)
+                append_records(path=segment, scan=scan, records=records)
+                _compact_if_wasteful(path=segment, data=data, scan=scan, records=records)
+        else:
+            if tombstones:
+                append_records(
+                    path=segment, scan=scan, records=encode_records(writes={}, deletes=tombstones)
+                )
+            for fact in writes:
+                _write_fact_file(directory=directory, fact=fact)
+    finally:
+        # Also on the way out of a failure: whatever was unlinked or appended before it
+        # is already on disk, and a cached read must not keep serving the old state.
+        if writes or unlinked or tombstones:
+            _bump_generation(scope=scope, compartment=compartment)
+    return len((unlinked & deletes) | tombstones)
+
+
+def _write_fact_file(directory: Path, fact: MemoryFact) -> None:
+    """Atomically writes one fact as its own file."""
     directory.mkdir(parents=True, exist_ok=True)
     path = directory / f"{fact.fact_id}.md"
     tmp_path = path.with_suffix(".md.tmp")
     tmp_path.write_text(data=render_fact_file(fact=fact), encoding="utf-8")
     os.replace(src=tmp_path, dst=path)
-    _bump_generation(scope=scope)
 
 
-def delete_fact(scope: str, compartment: str, fact_id: str) -> bool:
-    """Deletes one fact file, returning whether it existed."""
-    path = compartment_dir(scope=scope, compartment=compartment) / f"{fact_id}.md"
-    try:
-        path.unlink()
-    except FileNotFoundError:
-        return False
-    _bump_generation(scope=scope)
-    return True
+def _compact_if_wasteful(path: Path, data: bytes, scan: SegmentScan, records: bytes) -> None:
+    """Rewrites a segment down to its live records once dead ones outweigh them.
+
+    Rescans what was just appended in memory rather than re-reading the file. The floor
+    keeps a small segment from being rewritten on every batch that updates a fact in
+    place, which is most of them.
+    """
+    appended, rescanned = after_append(data=data, scan=scan, records=records)
+    if rescanned.dead_bytes < max(SEGMENT_COMPACT_MIN_BYTES, rescanned.live_bytes):
+        return
+    write_segment(path=path, bodies=live_bodies(data=appended, scan=rescanned))
+
+
+def compact_compartment(scope: str, compartment: str) -> int:
+    """Packs a compartment into one freshly written segment, returning the facts it holds.
+
+    The segment is rewritten to what a reader sees — its live records, with every loose
+    fact file folded in over the record it replaces — and only then are the loose files
+    removed. This is how a store written one file per fact moves to the packed layout
+    (`scripts/export_memories.py --pack`), and it works on bytes, so a fact no reader can
+    parse is carried over as it was rather than dropped. A compartment left with nothing
+    loses its segment and directory, like an emptied one after a prune.
+    """
+    directory = compartment_dir(scope=scope, compartment=compartment)
+    segment = directory / SEGMENT_NAME
+    data, scan = read_segment(path=segment)
+    if scan.corrupt:
+        raise ValueError(f"memory segment is corrupt: {segment}")
+    bodies = live_bodies(data=data, scan=scan)
+    loose = _fact_paths(directory=directory)
+    for path in loose:
+        bodies[path.stem] = path.read_bytes()
+    if bodies:
+        write_segment(path=segment, bodies=bodies)
+    else:
+        segment.unlink(missing_ok=True)
+    for path in loose:
+        path.unlink(missing_ok=True)
+    _bump_generation(scope=scope, compartment=compartment)
+    if not bodies:
+        with contextlib.suppress(OSError):
+            directory.rmdir()
+    return len(bodies)
 
 
 def _is_store_file(path: Path) -> bool:
     r"""Whether one entry of a compartment directory is a file the store itself wrote.
 
-    Matched by NAME — `<fact id>.md`, or the `.md.tmp` a crash between `write_fact`'s tmp
-    write and its `os.replace` can strand — the way the media reaper matches its own
+    Matched by NAME — `<fact id>.md`, the packed layout's `facts.seg`, or the `.tmp` a
+    crash between a tmp write and its `os.replace` can strand — the way the media reaper
+    matches its own
     files. Every name the store mints is a `mint_fact_id` digest, so a `notes.md` an
     operator dropped in beside the facts fails the test and a prune cannot take it.
     `fullmatch`, not `match`, for the reason the reaper uses it too: `$` also matches
     before a trailing newline, so `<fact id>\\n.md` would otherwise pass for one of ours.
     """
+    if path.name in {SEGMENT_NAME, f"{SEGMENT_NAME}.tmp"}:
+        return path.is_file()
     stem, _, suffix = path.name.partition(".")
     return path.is_file() and suffix in {"md", "md.tmp"} and FACT_ID_RE.fullmatch(stem) is not None
 
@@ -437,7 +677,8 @@ def prune_compartment(scope: str, compartment: str, keep: set[str]) -> PrunedCom
     rather than by the caller before it applied its batch: a rebuild that re-emits the
     same summary mints the same id and OVERWRITES the broken file, which is a fact
     regenerated and not a fact destroyed. A stranded `.md.tmp` is not counted either —
-    `_fact_paths` globs `*.md`, so no reader ever saw one to lose.
+    `_fact_paths` globs `*.md`, so no reader ever saw one to lose. A packed compartment's
+    segment is rewritten to the kept records on the same terms (`_prune_segment`).
     """
     directory = compartment_dir(scope=scope, compartment=compartment)
     removed = False
@@ -448,7 +689,7 @@ def prune_compartment(scope: str, compartment: str, keep: set[str]) -> PrunedCom
     readable = {fact.fact_id for fact in read_facts(scope=scope, compartment=compartment)}
     unreadable: list[str] = []
     for path in children:
-        if not _is_store_file(path=path):
+        if not _is_store_file(path=path) or path.name == SEGMENT_NAME:
             continue
         if path.suffix == ".md":
             if path.stem in keep:
@@ -457,8 +698,11 @@ def prune_compartment(scope: str, compartment: str, keep: set[str]) -> PrunedCom
                 unreadable.append(path.name)
         path.unlink(missing_ok=True)
         removed = True
+    removed |= _prune_segment(
+        path=directory / SEGMENT_NAME, keep=keep, readable=readable, unreadable=unreadable
+    )
     if removed:
-        _bump_generation(scope=scope)
+        _bump_generation(scope=scope, compartment=compartment)
     with contextlib.suppress(OSError):
         directory.rmdir()
         if compartment.startswith(f"{_GUILD_DIR_NAME}/"):
@@ -472,6 +716,30 @@ def prune_compartment(scope: str, compartment: str, keep: set[str]) -> PrunedCom
     )
 
 
+def _prune_segment(path: Path, keep: set[str], readable: set[str], unreadable: list[str]) -> bool:
+    """Rewrites a compartment's segment down to `keep`, returning whether it changed.
+
+    Records dropped unread are added to `unreadable` as `facts.seg:<id>`, and an
+    unparsable tail the rewrite cannot carry over as `facts.seg:<tail>`, so the rebuild's
+    report covers the packed layout on the same terms as loose files.
+    """
+    data, scan = read_segment(path=path)
+    bodies = live_bodies(data=data, scan=scan)
+    dropped = bodies.keys() - keep
+    lost_tail = scan.valid_end < len(data)
+    if not dropped and not lost_tail:
+        return False
+    unreadable.extend(f"{SEGMENT_NAME}:{fact_id}" for fact_id in dropped - readable)
+    if lost_tail:
+        unreadable.append(f"{SEGMENT_NAME}:<tail>")
+    kept = {fact_id: body for fact_id, body in bodies.items() if fact_id in keep}
+    if kept:
+        write_segment(path=path, bodies=kept)
+    else:
+        path.unlink(missing_ok=True)
+    return True
+
+
 def read_owner(scope: str) -> MemoryOwner:
     """Recovers the stored owner identity from any one of the scope's facts.
 
@@ -526,12 +794,23 @@ def append_raw_entry(scope: str, entry_text: str) -> None:
     files (raw entries flow verbatim into the detail file); an observation body may
     carry the code-stamped conversation source (`- source: guild <id>` / `dm`) — that is
     provenance of where a conversation happened, not identity.
+
+    An entry that fits under `RAW_FILE_MAX_BYTES` is a plain append, sized against the
+    file's entry index (`entry_index.py`) rather than a re-read of the file. Only an
+    overflow reads and rewrites it, to evict the oldest entries.
     """
     _scope_dir(scope=scope).mkdir(parents=True, exist_ok=True)
     timestamp = datetime.now(UTC).isoformat(timespec="seconds")
     raw_path = _raw_path(scope=scope)
-    combined = f"{_read_text(path=raw_path)}\n\n## {timestamp}\n{entry_text.strip()}"
-    entries = _split_raw_entries(text=combined)
+    entry = f"## {timestamp}\n{entry_text.strip()}"
+    index = read_entry_index(path=raw_path)
+    separator = "\n" if index.size else ""
+    chunk = f"{separator}{entry}\n".encode()
+    # The file's rendered size excludes its trailing newline, as `_entries_bytes` counts it.
+    if index.size + len(chunk) - 1 <= RAW_FILE_MAX_BYTES:
+        append_entries(path=raw_path, index=index, chunk=chunk)
+        return
+    entries = _split_raw_entries(text=f"{_read_text(path=raw_path)}\n\n{entry}")
     evicted: list[str] = []
     while len(entries) > 1 and _entries_bytes(entries=entries) > RAW_FILE_MAX_BYTES:
         evicted.append(entries.pop(0))
@@ -542,7 +821,11 @@ def append_raw_entry(scope: str, entry_text: str) -> None:
         # file still honors the advertised hard cap (memory is best-effort,
         # and the truncated tail is the only loss not kept in the detail file).
         rendered = encoded[:RAW_FILE_MAX_BYTES].decode(encoding="utf-8", errors="ignore")
+    # Dropped before the rewrite, so a crash in between leaves no index at all rather
+    # than one that might happen to match the new file's size.
+    drop_entry_index(path=raw_path)
     raw_path.write_text(data=rendered + "\n", encoding="utf-8")
+    store_entry_index(path=raw_path, index=read_entry_index(path=raw_path))
     if evicted:
         # Move to the detail file only after the raw write succeeded so a
         # failed write cannot retire entries that still live in the raw file.
@@ -563,38 +846,47 @@ def append_detail(scope: str, text: str) -> None:
         return
     _scope_dir(scope=scope).mkdir(parents=True, exist_ok=True)
     detail_path = _detail_path(scope=scope)
-    with detail_path.open(mode="a", encoding="utf-8") as handle:
-        if handle.tell() > 0:
-            handle.write("\n")
-        handle.write(block + "\n")
-    if detail_path.stat().st_size > DETAIL_FILE_MAX_BYTES:
-        _trim_detail(path=detail_path)
+    index = read_entry_index(path=detail_path)
+    separator = "\n" if index.size else ""
+    chunk = f"{separator}{block}\n".encode()
+    index = append_entries(path=detail_path, index=index, chunk=chunk)
+    if index.size > DETAIL_FILE_MAX_BYTES:
+        _trim_detail(path=detail_path, index=index)
 
 
-def _trim_detail(path: Path) -> None:
+def _trim_detail(path: Path, index: EntryIndex) -> None:
     """Drops the oldest detail entries until the file fits the trim target.
 
     The dropped entries are deleted permanently instead of cascading into yet
     another unbounded file: nothing can read past the consolidation window, so
     they carry no functional value. The headroom between the cap and the trim
-    target amortizes this O(file) rewrite to roughly once per megabyte of
-    appended evidence; the write goes through tmp + os.replace so a crash
-    cannot leave a half-trimmed file.
+    target amortizes this rewrite to roughly once per megabyte of appended
+    evidence. The cut is the first entry offset whose tail fits, read off the
+    index, and the tail is copied across as bytes, never decoded; the write goes
+    through tmp + os.replace so a crash cannot leave a half-trimmed file.
     """
-    entries = _split_raw_entries(text=_read_text(path=path))
-    # Track the rendered size incrementally; recomputing the joined size per
-    # dropped entry would be O(n^2) on a megabyte-scale file and stall the
-    # event loop, since store IO is synchronous by design.
-    sizes = [len(entry.encode("utf-8")) for entry in entries]
-    total = sum(sizes) + 2 * max(len(entries) - 1, 0)
-    start = 0
-    while len(entries) - start > 1 and total > DETAIL_FILE_TRIM_TARGET_BYTES:
-        # Dropping an entry also drops one "\n\n" separator (2 bytes).
-        total -= sizes[start] + 2
-        start += 1
+    fallback = index.offsets[-1] if index.offsets else index.size
+    cut = next(
+        (
+            offset
+            for offset in index.offsets
+            if index.size - offset <= DETAIL_FILE_TRIM_TARGET_BYTES
+        ),
+        fallback,
+    )
+    drop_entry_index(path=path)
     tmp_path = path.with_suffix(".md.tmp")
-    tmp_path.write_text(data="\n\n".join(entries[start:]) + "\n", encoding="utf-8")
+    with path.open(mode="rb") as source, tmp_path.open(mode="wb") as target:
+        source.seek(cut)
+        shutil.copyfileobj(source, target)
     os.replace(src=tmp_path, dst=path)
+    store_entry_index(
+        path=path,
+        index=EntryIndex(
+            offsets=tuple(offset - cut for offset in index.offsets if offset >= cut),
+            size=index.size - cut,
+        ),
+    )
 
 
 def read_detail_tail(scope: str, max_chars: int) -> str:
@@ -627,13 +919,14 @@ def read_detail_tail(scope: str, max_chars: int) -> str:
 
 
 def count_raw_entries(scope: str) -> int:
-    """Returns how many raw entries are waiting for consolidation."""
-    return len(_split_raw_entries(text=_read_text(path=_raw_path(scope=scope))))
+    """Returns how many raw entries are waiting for consolidation, off the entry index."""
+    return len(read_entry_index(path=_raw_path(scope=scope)).offsets)
 
 
 def raw_file_bytes(scope: str) -> int:
     """Returns the raw file size in bytes, with a missing file counting as zero."""
-    return len(_read_text(path=_raw_path(scope=scope)).encode("utf-8"))
+    path = _raw_path(scope=scope)
+    return path.stat().st_size if path.is_file() else 0
 
 
 def detail_file_bytes(scope: str) -> int:
@@ -654,6 +947,7 @@ def read_raw_entries(scope: str) -> str:
 def clear_raw(scope: str) -> None:
     """Deletes the raw file after a consolidation consumed it."""
     _raw_path(scope=scope).unlink(missing_ok=True)
+    drop_entry_index(path=_raw_path(scope=scope))
 
 
 def clear_tone(scope: str) -> None:
@@ -687,10 +981,11 @@ def delete_memory_files(scope: str) -> bool:
     Walks the compartment tree as well as the three single-file tiers, taking every
     `.md` it finds — a foreign one included, because a clear is a wipe its owner asked
     for and sparing a file that might carry their memory would be the wrong answer here
-    (`unaccounted_files` is the opposite contract) — plus the `.md.tmp` leftovers a crash
-    between a tmp write and its `os.replace` can strand. Anything with another suffix is
-    left alone. Empty directories are then removed bottom-up; a non-empty or missing one
-    is left for offline maintenance instead of failing the clear.
+    (`unaccounted_files` is the opposite contract) — plus a packed compartment's
+    `facts.seg`, the `.idx` entry indexes of the two logs, and the `.tmp` leftovers a
+    crash between a tmp write and its `os.replace` can strand. Anything with another
+    suffix is left alone. Empty directories are then removed bottom-up; a non-empty or
+    missing one is left for offline maintenance instead of failing the clear.
 
     Returns:
         True when at least one memory file existed and was removed.
@@ -707,12 +1002,16 @@ def delete_memory_files(scope: str) -> bool:
             continue
         finally:
             (scope_dir / f"{name}.tmp").unlink(missing_ok=True)
+            drop_entry_index(path=scope_dir / name)
     for compartment in list_compartments(scope=scope):
         directory = compartment_dir(scope=scope, compartment=compartment)
         for path in _fact_paths(directory=directory):
             path.unlink(missing_ok=True)
             removed = True
-        for leftover in directory.glob("*.md.tmp"):
+        with contextlib.suppress(FileNotFoundError):
+            (directory / SEGMENT_NAME).unlink()
+            removed = True
+        for leftover in (*directory.glob("*.md.tmp"), directory / f"{SEGMENT_NAME}.tmp"):
             leftover.unlink(missing_ok=True)
         with contextlib.suppress(OSError):
             directory.rmdir()
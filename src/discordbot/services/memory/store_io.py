@@ -0,0 +1,195 @@
+"""Runs the memory store's synchronous file IO off the event loop.
+
+``store.py`` is plain synchronous file IO, and most of it used to run straight on the loop
+that also streams replies and answers game buttons: a cache miss in ``read_memory_document``
+walks and parses a whole compartment, an overflowing ``raw.md`` is rewritten to evict its
+oldest entries, an overflowing ``detail.md`` is cut down by megabytes, and a rebuild's prune
+lists, parses and unlinks a directory. Each of those froze every cog for as long as the disk took.
+``memory_io`` moves them onto a small dedicated thread pool and hands the caller an await.
+
+Two orderings have to survive the move, and both are kept by a per-scope job chain on the
+loop: a job reaches the pool only once the scope's previous job has finished on its thread,
+so one scope holds at most one worker and a busy scope cannot starve the others' reads.
+
+* **Writes stay serialized per scope.** Writers still hold ``scope_lock`` across their
+  awaits, exactly as before, so two of them never submit at once. The chain covers the
+  one way a job can outlive its writer: a cancelled await (a consolidation timeout)
+  releases the scope lock while the thread is still writing, and the chain waits for the
+  thread, not the await.
+* **A clear still cannot be overtaken.** The clear deliberately skips ``scope_lock``, and
+  what stopped an in-flight write landing after it was that every write sat directly after
+  a ``cleared_since`` guard with no ``await`` in between. A write submitted here takes its
+  ``started_at`` along and re-checks the guard in its turn, right before it touches a
+  file; the clear's own file pass runs through here too, so it either follows a write it
+  then removes or precedes one that sees the stamp and writes nothing.
+
+A cached document is answered on the loop without a thread hop, so the common reply-path
+read costs what it did. A call that held its thread past ``MEMORY_IO_SLOW_SECONDS`` is
+logged with how long it ran (the stall the loop used to take) and how long it queued (what
+it costs the caller now), and inside a reply every call is a ``memory_io`` stage of the
+latency waterfall (``scripts/latency_report.py``).
+"""
+
+import time
+from typing import Any
+import asyncio
+from functools import partial
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+import logfire
+
+from discordbot.utils.reply_timing import timed_stage
+from discordbot.services.memory.facts import MemoryFlavor
+from discordbot.services.memory.store import (
+    cleared_since,
+    read_memory_document,
+    cached_memory_document,
+)
+from discordbot.services.memory.constants import (
+    MEMORY_IO_WORKERS,
+    MEMORY_IO_SLOW_SECONDS,
+    MEMORY_INJECTION_MAX_CHARS,
+)
+
+
+def _operation(call: Callable[[], object]) -> str:
+    """Names the store function behind a call, for the slow-IO log line."""
+    target = call.func if isinstance(call, partial) else call
+    return getattr(target, "__name__", repr(target))
+
+
+class MemoryStoreIO:
+    """Bounded, per-scope-ordered executor for the memory store's file IO."""
+
+    def __init__(self, workers: int = MEMORY_IO_WORKERS) -> None:
+        """Creates the facade; the pool itself starts on the first call."""
+        self._workers = workers
+        self._executor: ThreadPoolExecutor | None = None
+        # scope -> its newest job, which the next one waits out; dropped once it finishes.
+        self._tails: dict[str, asyncio.Task[Any]] = {}
+
+    def _pool(self) -> ThreadPoolExecutor:
+        """Returns the worker pool, starting it on first use."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._workers, thread_name_prefix="memory-io"
+            )
+        return self._executor
+
+    @staticmethod
+    def _job[T](scope: str, call: Callable[[], T], operation: str, submitted: float) -> T:
+        """Runs one call on a worker thread, logging it when it held the thread too long."""
+        began = time.monotonic()
+        try:
+            return call()
+        finally:
+            ran = time.monotonic() - began
+            if ran >= MEMORY_IO_SLOW_SECONDS:
+                logfire.warn(
+                    "Memory store IO was slow; ran off the event loop",
+                    scope=scope,
+                    operation=operation,
+                    io_seconds=round(ran, 3),
+                    queued_seconds=round(began - submitted, 3),
+                )
+
+    async def _in_turn[T](
+        self, previous: "asyncio.Task[Any] | None", job: Callable[[], T], abandoned: asyncio.Event
+    ) -> T:
+        """Waits out the scope's previous job, then runs this one on the pool."""
+        if previous is not None:
+            # `wait`, not an await of the task: its outcome is its own caller's business.
+            await asyncio.wait([previous])
+        if abandoned.is_set():
+            # Its caller gave up before it reached a thread, as a job still queued in the
+            # pool used to be cancelled; the next job's turn comes up now.
+            raise asyncio.CancelledError
+        return await asyncio.get_running_loop().run_in_executor(self._pool(), job)
+
+    def _finished(self, scope: str, task: "asyncio.Task[Any]") -> None:
+        """Drops a scope's chain once its newest job is done, so idle scopes cost nothing."""
+        if self._tails.get(scope) is task:
+            del self._tails[scope]
+        if not task.cancelled():
+            # Retrieved so a job whose caller gave up does not log as unhandled.
+            task.exception()
+
+    async def _submit[T](self, scope: str, call: Callable[[], T], operation: str) -> T:
+        """Queues one call behind the scope's previous job, timed as a reply stage if any.
+
+        The job runs on a task of its own, so a cancelled caller neither frees the scope
+        while its thread still runs nor lets the next job overtake one still waiting.
+        """
+        loop = asyncio.get_running_loop()
+        job = partial(
+            self._job, scope=scope, call=call, operation=operation, submitted=time.monotonic()
+        )
+        previous = self._tails.get(scope)
+        if previous is not None and previous.get_loop() is not loop:
+            previous = None
+        abandoned = asyncio.Event()
+        task: asyncio.Task[T] = loop.create_task(
+            self._in_turn(previous=previous, job=job, abandoned=abandoned)
+        )
+        self._tails[scope] = task
+        task.add_done_callback(lambda done: self._finished(scope=scope, task=done))
+        with timed_stage(stage="memory_io"):
+            try:
+                return await asyncio.shield(task)
+            except asyncio.CancelledError:
+                abandoned.set()
+                raise
+
+    async def run[T](self, scope: str, call: Callable[[], T]) -> T:
+        """Runs one store call for `scope` on the pool and returns what it returned.
+
+        For reads, and for the clear's own file pass, which must run whatever the clear
+        stamp says. A write that an in-flight clear should cancel goes through
+        `run_unless_cleared` instead.
+        """
+        return await self._submit(scope=scope, call=call, operation=_operation(call=call))
+
+    async def run_unless_cleared[T](
+        self, scope: str, started_at: float, call: Callable[[], T]
+    ) -> T | None:
+        """Runs one store write unless the scope was cleared at or after `started_at`.
+
+        The guard is re-checked on the worker, in the scope's turn, immediately before the
+        write; None means the clear won and nothing was written.
+        """
+
+        def guarded() -> T | None:
+            if cleared_since(scope=scope, started_at=started_at):
+                return None
+            return call()
+
+        return await self._submit(scope=scope, call=guarded, operation=_operation(call=call))
+
+    async def read_memory_document(
+        self,
+        scope: str,
+        compartments: list[str],
+        flavor: MemoryFlavor,
+        max_chars: int = MEMORY_INJECTION_MAX_CHARS,
+    ) -> str:
+        """`store.read_memory_document`, with a cache hit answered on the loop."""
+        cached = cached_memory_document(
+            scope=scope, compartments=compartments, flavor=flavor, max_chars=max_chars
+        )
+        if cached is not None:
+            return cached
+        return await self.run(
+            scope=scope,
+            call=partial(
+                read_memory_document,
+                scope=scope,
+                compartments=compartments,
+                flavor=flavor,
+                max_chars=max_chars,
+            ),
+        )
+
+
+# Process-wide facade every async caller of the store goes through.
+memory_io = MemoryStoreIO()
@@ -132,6 +132,24 @@ class CreditResult(BaseModel):
     )
 
 
+class IncomeCredit(BaseModel):
+    """One user's share of a batched income write.
+
+    Attributes:
+        user_id: Discord user ID receiving the credit.
+        name: Last-seen Discord username to store on the account.
+        avatar_url: Last-seen Discord avatar URL; empty keeps the stored one.
+        amount: Gross income to credit.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    user_id: int = Field(..., description="Discord user ID receiving the credit.")
+    name: str = Field(..., description="Last-seen Discord username.")
+    avatar_url: str = Field(default="", description="Last-seen Discord avatar URL.")
+    amount: int = Field(..., description="Gross income to credit.")
+
+
 class BalanceAdjustmentResult(BaseModel):
     """Outcome of a manual balance adjustment.
 
@@ -460,6 +478,36 @@ class CentralBankStatus(BaseModel):
     available_credit: int = Field(..., description="Remaining central bank lending capacity.")
 
 
+class EconomyAggregatesCheck(BaseModel):
+    """The stored `economy_aggregates` totals beside a full scan of what they sum."""
+
+    model_config = ConfigDict(frozen=True)
+
+    stored_total_positive_balance: int = Field(
+        ..., description="Running total of positive wallet balances as stored."
+    )
+    scanned_total_positive_balance: int = Field(
+        ..., description="The same total summed from every wallet row."
+    )
+    stored_central_bank_principal: int = Field(
+        ..., description="Running central-bank principal outstanding as stored."
+    )
+    scanned_central_bank_principal: int = Field(
+        ..., description="The same principal summed from every active central-bank contract."
+    )
+    rebuilt: bool = Field(
+        default=False, description="Whether the stored totals were overwritten with the scan."
+    )
+
+    @property
+    def consistent(self) -> bool:
+        """Whether the stored totals matched the scan."""
+        return (
+            self.stored_total_positive_balance == self.scanned_total_positive_balance
+            and self.stored_central_bank_principal == self.scanned_central_bank_principal
+        )
+
+
 class PortfolioView(BaseModel):
     """Aggregated wallet and debt view."""
 
@@ -491,6 +539,8 @@ __all__ = [
     "CasinoLedgerSnapshot",
     "CentralBankStatus",
     "CreditResult",
+    "EconomyAggregatesCheck",
+    "IncomeCredit",
     "JackpotSettlementBatchResult",
     "JackpotSettlementRequest",
     "JackpotSettlementResult",
@@ -81,6 +81,12 @@ class LLMConfig(BaseSettings):
             reference; when false attachments inline as base64 instead and link media is not
             uploaded at all. Provider-agnostic on purpose: the Gemini path is the only one
             wired today, but the switch answers the same question for every uploader.
+        attachment_prefetch_enabled: Opt-in for uploading a new attachment as soon as it is
+            posted in a channel the bot is likely to be asked about, so the reply that follows
+            finds it already uploaded. Off by default: a prefetch nobody asks about is an
+            upload spent for nothing.
+        attachment_prefetch_guild_bytes: How many attachment bytes one guild may prefetch per
+            rolling hour; a post that would exceed it waits for its reply like before.
     """
 
     model_config = SettingsConfigDict(arbitrary_types_allowed=True)
@@ -171,6 +177,16 @@ class LLMConfig(BaseSettings):
         description="Whether media may reach the answer model as a provider Files API reference.",
         validation_alias=AliasChoices("FILE_API_ENABLED"),
     )
+    attachment_prefetch_enabled: bool = Field(
+        default=False,
+        description="Whether new attachments upload on arrival, ahead of the reply that reads them.",
+        validation_alias=AliasChoices("ATTACHMENT_PREFETCH_ENABLED"),
+    )
+    attachment_prefetch_guild_bytes: int = Field(
+        default=512 * 1024 * 1024,
+        description="Attachment bytes one guild may prefetch per rolling hour.",
+        validation_alias=AliasChoices("ATTACHMENT_PREFETCH_GUILD_BYTES"),
+    )
 
     @property
     def gemini_keys(self) -> list[GeminiKeySlot]:
@@ -22,6 +22,7 @@ from datetime import datetime
 from pydantic import Field, BaseModel, ConfigDict, AliasChoices
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+type MemoryStorage = Literal["files", "packed"]
 type MemoryCategory = Literal[
     "stable_preference", "stable_fact", "interaction_style", "recurring_pattern", "recent_context"
 ]
@@ -147,12 +148,18 @@ class MemoryConfig(BaseSettings):
     """Deployment switches for long-term memory, read from environment variables.
 
     Kept apart from `LLMConfig` because memory itself has no kill-switch — it is always
-    on — and this is about how the store is kept on disk, not about a model call.
+    on — and this is about how the store is kept and paced, not about which model answers.
 
     Attributes:
         git_history_enabled: Whether a successful consolidation commits the scope it
-            wrote to the store's own git repository. Best-effort either way: the bot
-            never creates the repository, and a missing one disables this silently.
+            wrote to the store's own git repository, batched with every other scope that
+            settled alongside it. Best-effort either way: the bot never creates the
+            repository, and a missing one disables this silently.
+        storage: How a compartment's facts are kept: one file per fact (`files`), or one
+            append-only segment per compartment (`packed`). Both are always readable, so
+            switching is a restart, not a migration.
+        consolidation_tokens_per_minute: Estimated input tokens per minute the background
+            consolidations may start, across every scope; 0 leaves them unbudgeted.
     """
 
     model_config = SettingsConfigDict(arbitrary_types_allowed=True)
@@ -162,3 +169,16 @@ class MemoryConfig(BaseSettings):
         description="Whether memory changes are committed to the store's git repository.",
         validation_alias=AliasChoices("MEMORY_GIT_ENABLED"),
     )
+    storage: MemoryStorage = Field(
+        default="files",
+        description="Fact layout inside a compartment: one file per fact, or one segment.",
+        examples=["files", "packed"],
+        validation_alias=AliasChoices("MEMORY_STORAGE"),
+    )
+    consolidation_tokens_per_minute: int = Field(
+        default=0,
+        ge=0,
+        description="Estimated consolidation input tokens started per minute; 0 is no budget.",
+        examples=[0, 200_000],
+        validation_alias=AliasChoices("MEMORY_CONSOLIDATION_TPM"),
+    )
@@ -39,6 +39,9 @@ class ModelSettings(BaseModel):
         key_index: Gemini key this tier is pinned to for the current reply, or None when
             unpinned. Only `deployment_name` reads it; see there for why the pin never
             reaches `name`.
+        history_token_budget: Estimated input tokens of channel history this tier reads per
+            reply, packed by `gen_reply.history_budget.pack_history`. Zero for every tier that
+            reads no history, which then keeps only the newest message.
     """
 
     name: str = Field(
@@ -73,6 +76,11 @@ class ModelSettings(BaseModel):
         description="Gemini key this tier is pinned to for the current reply; None is unpinned.",
         examples=[None, 1, 2],
     )
+    history_token_budget: int = Field(
+        default=0,
+        description="Estimated input tokens of channel history this tier reads per reply.",
+        examples=[0, 16_000],
+    )
 
     @property
     def deployment_name(self) -> str:
@@ -311,9 +319,22 @@ class RuntimeModelCatalog(BaseModel):
         # needed. Uncomment to restore.
         # if self.is_peak:
         #     return ModelSettings(
-        #         name="gemini-3.1-pro-preview", effort="high", key_index=self.key_index
+        #         name="gemini-3.1-pro-preview",
+        #         effort="high",
+        #         key_index=self.key_index,
+        #         history_token_budget=16_000,
         #     )
-        return ModelSettings(name="gemini-3.7-flash", effort="high", key_index=self.key_index)
+        #
+        # The history budget is sized to what the char budget and media cap it replaced sent
+        # together: ~4k tokens of text plus ten ~1.1k media parts. The context window allows
+        # far more; what holds it here is the answer's input cost and the upload time on the
+        # path to first token, so widen it against those rather than against the window.
+        return ModelSettings(
+            name="gemini-3.7-flash",
+            effort="high",
+            key_index=self.key_index,
+            history_token_budget=16_000,
+        )
 
     @property
     def memory_extractor_model(self) -> ModelSettings:
@@ -0,0 +1,349 @@
+"""One shared pacer for every live-preview edit the bot streams into Discord.
+
+The QA reply (`gen_reply/streaming.py`) and the research progress view
+(`research/streaming.py`) both repaint one message on a cadence while a model works. Each used
+to run its own fixed-interval loop, so two or three replies streaming into one channel raced
+each other into Discord's per-channel edit limit (about five edits per five seconds); nextcord
+then parks the over-limit request until the bucket resets, and because its rate-limit lock is
+per route the stall lands on every edit in that channel at once, final writes included.
+
+`EditScheduler` hands out edit slots instead. A preview opens a `PreviewLane` for its channel
+and asks it for the next slot; a slot is granted once the lane's own interval has passed, the
+lane has something new to show (when it asked to wait for changes), and both the channel's and
+the process-wide token buckets hold a token. Lanes of one channel queue for tokens in arrival
+order, so a busy channel rotates between its streams rather than letting the fastest one take
+every edit. Snapshots that change while a lane waits are coalesced for free: the streamer
+renders only when its slot comes, so however many deltas landed in between cost one edit.
+
+Backpressure is read from the edits themselves. A 429 that reaches the caller, or an edit that
+took longer than `SLOW_EDIT_SECONDS` (nextcord sleeping out a rate limit looks exactly like
+that from outside), doubles the channel's cadence multiplier and empties its bucket; every fast
+edit eases the multiplier back toward 1.
+
+State is loop-local like `utils/asyncio_locks.py`: the events and buckets rebind when the
+running event loop changes, so the module-level instance survives the fresh loop every test
+runs on. The counters in `EditSchedulerStats` are process-wide and are what `stats()` returns.
+"""
+
+import time
+import asyncio
+import contextlib
+from contextlib import asynccontextmanager
+from collections import deque
+from collections.abc import AsyncIterator
+
+import logfire
+from pydantic import Field, BaseModel, ConfigDict, PrivateAttr
+
+# Discord allows about five message edits per five seconds in one channel; a burst of five and
+# a refill of one per second tracks that bucket without ever tripping it.
+PREVIEW_CHANNEL_EDITS_PER_SECOND = 1.0
+PREVIEW_CHANNEL_BURST = 5
+# Previews share the bot's global 50-requests-per-second allowance with everything else it
+# does, so they are held to well under half of it.
+PREVIEW_GLOBAL_EDITS_PER_SECOND = 20.0
+PREVIEW_GLOBAL_BURST = 20
+# An edit slower than this was almost certainly parked behind a rate limit.
+SLOW_EDIT_SECONDS = 1.5
+# The most a channel's preview cadence is stretched under sustained backpressure.
+MAX_BACKOFF_FACTOR = 8.0
+# How much of the stretch one fast edit gives back.
+BACKOFF_RECOVERY = 0.75
+
+
+class EditSchedulerStats(BaseModel):
+    """Process-wide preview-edit counters, as returned by `EditScheduler.stats`."""
+
+    edits: int = Field(default=0, description="Edit slots granted.")
+    coalesced_snapshots: int = Field(
+        default=0, description="Snapshot changes folded into a later edit instead of their own."
+    )
+    rate_limit_waits: int = Field(
+        default=0, description="Slots that had to wait for a channel or global token."
+    )
+    rate_limit_wait_seconds: float = Field(
+        default=0.0, description="Total time slots spent waiting for tokens."
+    )
+    throttled_edits: int = Field(
+        default=0, description="Edits that came back 429 or slower than `SLOW_EDIT_SECONDS`."
+    )
+
+
+class _TokenBucket(BaseModel):
+    """A refilling token bucket on the monotonic clock."""
+
+    rate: float = Field(..., description="Tokens added per second.")
+    capacity: float = Field(..., description="The most tokens the bucket holds.")
+    _tokens: float = PrivateAttr(default=0.0)
+    _stamp: float = PrivateAttr(default_factory=time.monotonic)
+
+    def model_post_init(self, _context: object, /) -> None:
+        """Starts full, so the first burst of edits goes out without waiting."""
+        self._tokens = self.capacity
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def wait_seconds(self, now: float) -> float:
+        """How long until a token is available; 0 when one is available now."""
+        self._refill(now=now)
+        return 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        """Spends one token."""
+        self._refill(now=now)
+        self._tokens -= 1
+
+    def drain(self, now: float) -> None:
+        """Empties the bucket, after Discord pushed back."""
+        self._refill(now=now)
+        self._tokens = min(self._tokens, 0.0)
+
+    def is_full(self, now: float) -> bool:
+        """Whether the bucket has refilled completely (nothing left to remember)."""
+        self._refill(now=now)
+        return self._tokens >= self.capacity
+
+
+class _ChannelState(BaseModel):
+    """One channel's token bucket, cadence multiplier and queue of lanes waiting for a token."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    bucket: _TokenBucket = Field(..., description="The channel's edit bucket.")
+    backoff: float = Field(default=1.0, description="Multiplier on every lane's interval.")
+    lanes: int = Field(default=0, description="Open lanes in this channel.")
+    queue: deque["PreviewLane"] = Field(default_factory=deque)
+    turn: asyncio.Event = Field(default_factory=asyncio.Event)
+
+    def pass_turn(self) -> None:
+        """Wakes every queued lane to re-check whether it is at the head now."""
+        self.turn.set()
+        self.turn = asyncio.Event()
+
+
+async def _sleep_unless(
+    *, stop: asyncio.Event, wake: asyncio.Event | None, seconds: float | None
+) -> bool:
+    """Waits for `stop`, `wake` or `seconds`, whichever comes first; True when `stop` is set."""
+    if stop.is_set():
+        return True
+    waiters = [asyncio.ensure_future(stop.wait())]
+    if wake is not None:
+        waiters.append(asyncio.ensure_future(wake.wait()))
+    try:
+        await asyncio.wait(waiters, timeout=seconds, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for waiter in waiters:
+            waiter.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await asyncio.gather(*waiters, return_exceptions=True)
+    return stop.is_set()
+
+
+class PreviewLane(BaseModel):
+    """One live preview's place in the scheduler, opened with `EditScheduler.lane`.
+
+    The owner calls `touch` whenever its snapshot changes, loops on `next_slot`, and reports
+    each edit back through `settle` so the scheduler can feel Discord pushing back.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    channel_id: int = Field(..., description="The channel the previewed message lives in.")
+    min_interval: float = Field(..., description="The lane's own cadence, before backoff.")
+    wait_for_change: bool = Field(
+        ..., description="Whether a slot also waits for `touch`; off for a ticking timer."
+    )
+    scheduler: "EditScheduler" = Field(..., description="The scheduler that opened the lane.")
+    edits: int = Field(default=0, description="Slots this lane was granted.")
+    coalesced_snapshots: int = Field(default=0, description="Changes this lane folded away.")
+    rate_limit_waits: int = Field(default=0, description="Slots this lane waited tokens for.")
+    _changes: int = PrivateAttr(default=1)
+    _changed: asyncio.Event = PrivateAttr(default_factory=asyncio.Event)
+    _last_slot: float = PrivateAttr(default_factory=time.monotonic)
+
+    def model_post_init(self, _context: object, /) -> None:
+        """Starts dirty: a lane is opened by the first change it has to show."""
+        self._changed.set()
+
+    def touch(self) -> None:
+        """Marks the preview as changed since its last edit."""
+        self._changes += 1
+        self._changed.set()
+
+    async def next_slot(self, *, stop: asyncio.Event) -> bool:
+        """Waits for this lane's next edit slot; False once `stop` is set instead."""
+        channel = self.scheduler.channel(channel_id=self.channel_id)
+        delay = self._last_slot + self.min_interval * channel.backoff - time.monotonic()
+        if delay > 0 and await _sleep_unless(stop=stop, wake=None, seconds=delay):
+            return False
+        if self.wait_for_change and await _sleep_unless(
+            stop=stop, wake=self._changed, seconds=None
+        ):
+            return False
+        if not await self._take_token(channel=channel, stop=stop):
+            return False
+        self._last_slot = time.monotonic()
+        coalesced = max(0, self._changes - 1)
+        self._changes = 0
+        self._changed.clear()
+        self.edits += 1
+        self.coalesced_snapshots += coalesced
+        self.scheduler.record_slot(coalesced=coalesced)
+        return True
+
+    async def _take_token(self, *, channel: _ChannelState, stop: asyncio.Event) -> bool:
+        """Queues for the channel and global buckets; False when `stop` is set while queued."""
+        channel.queue.append(self)
+        waited = 0.0
+        try:
+            while True:
+                now = time.monotonic()
+                wait: float | None = None
+                if channel.queue[0] is self:
+                    wait = max(
+                        channel.bucket.wait_seconds(now=now),
+                        self.scheduler.global_bucket().wait_seconds(now=now),
+                    )
+                    if wait <= 0:
+                        channel.bucket.take(now=now)
+                        self.scheduler.global_bucket().take(now=now)
+                        break
+                started = time.monotonic()
+                stopped = await _sleep_unless(stop=stop, wake=channel.turn, seconds=wait)
+                waited += time.monotonic() - started
+                if stopped:
+                    return False
+        finally:
+            channel.queue.remove(self)
+            channel.pass_turn()
+        if waited > 0:
+            self.rate_limit_waits += 1
+            self.scheduler.record_wait(seconds=waited)
+        return True
+
+    def settle(self, *, seconds: float, rate_limited: bool = False) -> None:
+        """Reports how the edit of the last slot went, stretching or easing the cadence."""
+        self.scheduler.record_edit(
+            channel_id=self.channel_id, throttled=rate_limited or seconds > SLOW_EDIT_SECONDS
+        )
+
+
+class EditScheduler(BaseModel):
+    """Paces live-preview edits under per-channel and process-wide token budgets.
+
+    Attributes:
+        channel_rate: Edits per second one channel's bucket refills.
+        channel_burst: The most edits one channel may spend back to back.
+        global_rate: Edits per second the process-wide bucket refills.
+        global_burst: The most edits all channels together may spend back to back.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    channel_rate: float = Field(default=PREVIEW_CHANNEL_EDITS_PER_SECOND)
+    channel_burst: int = Field(default=PREVIEW_CHANNEL_BURST)
+    global_rate: float = Field(default=PREVIEW_GLOBAL_EDITS_PER_SECOND)
+    global_burst: int = Field(default=PREVIEW_GLOBAL_BURST)
+    _channels: dict[int, _ChannelState] = PrivateAttr(default_factory=dict)
+    _global: _TokenBucket | None = PrivateAttr(default=None)
+    _loop: asyncio.AbstractEventLoop | None = PrivateAttr(default=None)
+    _stats: EditSchedulerStats = PrivateAttr(default_factory=EditSchedulerStats)
+
+    def _bind(self) -> None:
+        """Drops per-loop state (events, queues, buckets) when the running loop changed."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._channels = {}
+            self._global = None
+            self._loop = loop
+
+    def global_bucket(self) -> _TokenBucket:
+        """The process-wide edit bucket."""
+        self._bind()
+        if self._global is None:
+            self._global = _TokenBucket(rate=self.global_rate, capacity=self.global_burst)
+        return self._global
+
+    def channel(self, channel_id: int) -> _ChannelState:
+        """The channel's state, created on first use."""
+        self._bind()
+        state = self._channels.get(channel_id)
+        if state is None:
+            state = _ChannelState(
+                bucket=_TokenBucket(rate=self.channel_rate, capacity=self.channel_burst)
+            )
+            self._channels[channel_id] = state
+        return state
+
+    def _prune(self) -> None:
+        """Forgets idle channels whose bucket has refilled and whose cadence has recovered."""
+        now = time.monotonic()
+        for channel_id, state in list(self._channels.items()):
+            if state.lanes == 0 and state.backoff <= 1.0 and state.bucket.is_full(now=now):
+                del self._channels[channel_id]
+
+    @asynccontextmanager
+    async def lane(
+        self, *, channel_id: int, min_interval: float, wait_for_change: bool = True
+    ) -> AsyncIterator[PreviewLane]:
+        """Opens a preview lane for one channel for the life of the context."""
+        self._bind()
+        self._prune()
+        state = self.channel(channel_id=channel_id)
+        state.lanes += 1
+        lane = PreviewLane(
+            channel_id=channel_id,
+            min_interval=min_interval,
+            wait_for_change=wait_for_change,
+            scheduler=self,
+        )
+        try:
+            yield lane
+        finally:
+            state.lanes -= 1
+            logfire.debug(
+                "preview edit lane closed",
+                channel_id=channel_id,
+                edits=lane.edits,
+                coalesced_snapshots=lane.coalesced_snapshots,
+                rate_limit_waits=lane.rate_limit_waits,
+                backoff=state.backoff,
+            )
+
+    def record_slot(self, *, coalesced: int) -> None:
+        """Counts a granted slot and the snapshot changes it folded away."""
+        self._stats.edits += 1
+        self._stats.coalesced_snapshots += coalesced
+
+    def record_wait(self, *, seconds: float) -> None:
+        """Counts a slot that had to wait for a token."""
+        self._stats.rate_limit_waits += 1
+        self._stats.rate_limit_wait_seconds += seconds
+
+    def record_edit(self, *, channel_id: int, throttled: bool) -> None:
+        """Stretches the channel's cadence after a throttled edit, eases it after a fast one."""
+        state = self.channel(channel_id=channel_id)
+        if throttled:
+            self._stats.throttled_edits += 1
+            state.backoff = min(MAX_BACKOFF_FACTOR, state.backoff * 2)
+            state.bucket.drain(now=time.monotonic())
+            logfire.info(
+                "preview edits throttled; slowing the channel down",
+                channel_id=channel_id,
+                backoff=state.backoff,
+            )
+        else:
+            state.backoff = max(1.0, state.backoff * BACKOFF_RECOVERY)
+
+    def stats(self) -> EditSchedulerStats:
+        """A snapshot of the process-wide counters."""
+        return self._stats.model_copy()
+
+
+# Module-level so the QA reply and the research view share one set of budgets; a per-streamer
+# scheduler would hand every stream its own full channel allowance, which is the race this
+# exists to stop.
+preview_edit_scheduler = EditScheduler()
@@ -0,0 +1,257 @@
+"""Per-reply latency waterfalls, one JSON line per reply, for finding the critical path.
+
+The reply pipeline runs its stages as concurrent tasks — route, effort, the speculative
+context build, the attachment uploads, every link builder — and each logs its own
+`elapsed_seconds` line when it ends. Those lines say how long a stage took, never what it
+overlapped or what the answer was actually waiting on, and piecing one reply back together
+from a day of interleaved log lines is not something anyone does twice. A `ReplyTiming`
+collects every stage of one reply onto one timeline instead: a start and an end per stage,
+both in seconds since the reply began, plus the first-reasoning and first-content marks of
+the answer stream. `scripts/latency_report.py` reads a day of them and prints percentiles per
+stage.
+
+The timing travels in a ContextVar rather than through every signature, for the reason
+`gen_reply.cog._dispatched_model` does: the stages live several frames and several tasks
+below the pipeline, and `asyncio.create_task` copies the context, so every task a reply
+starts records into that reply's timing while another reply's tasks never can. Code running
+outside a reply (an attachment prefetch, a background job) finds no timing and records
+nothing, so `timed_stage` and friends are safe to call from anywhere.
+
+A stage may be recorded more than once per reply — each wait on `media_semaphore` is its own
+`media_queue` interval — and the report sums them. Records are written like `usage_log`'s:
+to their own directory, off the event loop, best-effort, with their own kill-switch.
+"""
+
+import time
+from typing import Any
+import asyncio
+from pathlib import Path
+from datetime import datetime
+import threading
+from contextlib import contextmanager, asynccontextmanager
+from contextvars import ContextVar
+from collections.abc import Iterator, Coroutine, AsyncIterator
+
+import logfire
+from pydantic import Field, BaseModel, PrivateAttr, AliasChoices
+from pydantic_settings import BaseSettings
+
+from discordbot.utils.timezone import database_now
+
+# Serialised writes, for the same reason and of the same kind as `usage_log._WRITE_LOCK`.
+_WRITE_LOCK = threading.Lock()
+
+_current: ContextVar["ReplyTiming | None"] = ContextVar("reply_timing", default=None)
+
+
+class ReplyTimingConfig(BaseSettings):
+    """Reply-timing settings, read from environment variables.
+
+    Attributes:
+        enabled: Kill-switch; when false nothing is recorded and no file is created.
+        directory: Directory the daily record files are written into.
+    """
+
+    enabled: bool = Field(
+        default=True,
+        description="Whether per-reply latency waterfalls are recorded at all.",
+        examples=[True],
+        validation_alias=AliasChoices("REPLY_TIMING_ENABLED"),
+    )
+    directory: str = Field(
+        default="./data/timing",
+        description="Directory the daily reply-timing files are written into.",
+        examples=["./data/timing"],
+        validation_alias=AliasChoices("REPLY_TIMING_DIR"),
+    )
+
+
+class StageTiming(BaseModel):
+    """One interval of one stage, in seconds since the reply began.
+
+    Attributes:
+        stage: The stage name, e.g. `route` or `media_queue`.
+        start: When the stage started.
+        end: When it ended, successfully or not.
+    """
+
+    stage: str = Field(..., description="The stage name.", examples=["route", "media_queue"])
+    start: float = Field(..., description="Seconds since the reply began when it started.")
+    end: float = Field(..., description="Seconds since the reply began when it ended.")
+
+
+class ReplyTiming(BaseModel):
+    """The latency waterfall of one reply.
+
+    Attributes:
+        at: When the reply began, in Asia/Taipei, which also names its day file.
+        message_id: The triggering message.
+        route: The route the reply took, filled in when the pipeline ends.
+        key_index: The Gemini key the reply leased, or None when unpinned.
+        total: Seconds from the reply's start to the end of the pipeline.
+        stages: Every recorded stage interval, in the order they ended.
+        marks: One-off points on the timeline, e.g. `first_content`.
+    """
+
+    at: datetime = Field(default_factory=database_now, description="When the reply began.")
+    message_id: int = Field(..., description="The triggering message.")
+    route: str = Field(default="", description="The route the reply took.")
+    key_index: int | None = Field(default=None, description="The Gemini key the reply leased.")
+    total: float = Field(default=0.0, description="Seconds from start to pipeline end.")
+    stages: list[StageTiming] = Field(
+        default_factory=list, description="Every recorded stage interval."
+    )
+    marks: dict[str, float] = Field(
+        default_factory=dict, description="One-off points on the timeline."
+    )
+    _started: float = PrivateAttr(default_factory=time.monotonic)
+    _closed: bool = PrivateAttr(default=False)
+
+    def offset(self, at: float | None = None) -> float:
+        """Seconds since the reply began, at `at` (a monotonic time) or now."""
+        return (time.monotonic() if at is None else at) - self._started
+
+    def add(self, stage: str, start: float, end: float) -> None:
+        """Records one interval, given as monotonic times; a closed timing ignores it."""
+        if self._closed:
+            return
+        self.stages.append(
+            StageTiming(stage=stage, start=self.offset(at=start), end=self.offset(at=end))
+        )
+
+    def mark(self, name: str) -> None:
+        """Records a point once; a repeat (a retried answer's first delta) keeps the first."""
+        if not self._closed:
+            self.marks.setdefault(name, self.offset())
+
+    def close(self, route: str) -> None:
+        """Stamps the route and total, and stops accepting stages from tasks that outlive it."""
+        if self._closed:
+            return
+        self.route = route
+        self.total = self.offset()
+        self._closed = True
+
+
+def start_reply_timing(message_id: int) -> ReplyTiming:
+    """Starts the timing of the reply to `message_id` and makes it current for this context."""
+    timing = ReplyTiming(message_id=message_id)
+    _current.set(timing)
+    return timing
+
+
+def current_reply_timing() -> ReplyTiming | None:
+    """The timing of the reply this code runs for, or None outside a reply."""
+    return _current.get()
+
+
+@contextmanager
+def timed_stage(stage: str) -> Iterator[None]:
+    """Records the enclosed block as one interval of `stage` on the current reply, if any."""
+    timing = _current.get()
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        if timing is not None:
+            timing.add(stage=stage, start=started, end=time.monotonic())
+
+
+def timed_task[T](stage: str, coro: Coroutine[Any, Any, T]) -> asyncio.Task[T]:
+    """Starts `coro` as a task whose whole life is recorded as one interval of `stage`.
+
+    Timed from the outside, by a done callback, rather than by wrapping the coroutine: a task
+    cancelled before its first step never runs a wrapper's body, which would leave the wrapped
+    coroutine un-awaited and warn about it.
+    """
+    task = asyncio.create_task(coro)
+    timing = _current.get()
+    if timing is not None:
+        started = time.monotonic()
+        task.add_done_callback(
+            lambda _done: timing.add(stage=stage, start=started, end=time.monotonic())
+        )
+    return task
+
+
+def mark_reply_timing(name: str) -> None:
+    """Marks a point on the current reply's timeline, if there is one."""
+    timing = _current.get()
+    if timing is not None:
+        timing.mark(name=name)
+
+
+@asynccontextmanager
+async def queued_slot(semaphore: asyncio.Semaphore, stage: str) -> AsyncIterator[None]:
+    """Holds `semaphore`, recording only the wait to acquire it as an interval of `stage`."""
+    with timed_stage(stage=stage):
+        await semaphore.acquire()
+    try:
+        yield
+    finally:
+        semaphore.release()
+
+
+def _append_sync(directory: Path, timing: ReplyTiming) -> None:
+    """Appends one JSON line to the timing's own day file."""
+    with _WRITE_LOCK:
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{timing.at:%Y-%m-%d}.jsonl"
+        with path.open(mode="a", encoding="utf-8") as handle:
+            handle.write(f"{timing.model_dump_json()}\n")
+
+
+class ReplyTimingRecorder(BaseModel):
+    """Appends reply timings to a daily JSONL file.
+
+    Attributes:
+        config: The reply-timing configuration backing this recorder.
+    """
+
+    config: ReplyTimingConfig = Field(
+        default_factory=ReplyTimingConfig,
+        description="The reply-timing configuration backing this recorder.",
+    )
+
+    async def record(self, timing: ReplyTiming) -> None:
+        """Writes one closed timing, off the event loop and best-effort.
+
+        Also logs it as one line, so a reply's waterfall can be read next to the rest of its
+        log without opening the day file.
+        """
+        logfire.info(
+            "gen_reply latency waterfall",
+            message_id=timing.message_id,
+            route=timing.route,
+            total_seconds=timing.total,
+            stages={s.stage: round(s.end - s.start, 3) for s in timing.stages},
+            marks=timing.marks,
+        )
+        if not self.config.enabled:
+            return
+        try:
+            await asyncio.to_thread(
+                _append_sync, directory=Path(self.config.directory), timing=timing
+            )
+        except Exception as exc:
+            # Broad on purpose, as in `UsageRecorder.record`: timing a reply must never cost it.
+            logfire.warn(
+                "Failed to record reply timing",
+                message_id=timing.message_id,
+                error_type=type(exc).__name__,
+                _exc_info=exc,
+            )
+
+
+__all__ = [
+    "ReplyTiming",
+    "ReplyTimingConfig",
+    "ReplyTimingRecorder",
+    "StageTiming",
+    "current_reply_timing",
+    "mark_reply_timing",
+    "queued_slot",
+    "start_reply_timing",
+    "timed_stage",
+    "timed_task",
+]
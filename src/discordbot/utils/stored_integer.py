@@ -2,10 +2,25 @@
 
 from typing import Any, cast
 
-from sqlalchemy import Text, func
+from sqlalchemy import Text, Integer, case, func
+from sqlalchemy import cast as sql_cast
 from sqlalchemy.types import TypeDecorator
 from sqlalchemy.sql.elements import ColumnElement
 
+# Digits reserved for the length field of a sort key; no balance gets near 10**99999.
+_SORT_KEY_LENGTH_WIDTH = 5
+_SORT_KEY_LENGTH_CEILING = 10**_SORT_KEY_LENGTH_WIDTH - 1
+# Sign bands of a sort key: every negative sorts below zero, and zero below every positive.
+_SORT_KEY_NEGATIVE = "0"
+_SORT_KEY_ZERO = "1"
+_SORT_KEY_POSITIVE = "2"
+_NINES_COMPLEMENT = str.maketrans("0123456789", "9876543210")
+# Native fast path bounds. Stored text of at most this many characters (sign included) is
+# below 10**18 in magnitude, and so is any operand the fast path accepts, so neither the
+# CAST nor a sum of the two can leave SQLite's signed 64-bit range (about 9.2 * 10**18).
+_NATIVE_MAX_CHARS = 18
+_NATIVE_OPERAND_LIMIT = 10**18
+
 
 def stored_int_to_int(value: object) -> int:
     """Parses a persisted decimal-string integer into a Python int."""
@@ -27,6 +42,46 @@ def stored_int_to_text(value: int) -> str:
     return str(value)
 
 
+def stored_int_sort_key(value: int) -> str:
+    """Returns text whose byte order matches the numeric order of `value`.
+
+    A sign band comes first, then the digit count as a fixed-width field, then the digits.
+    Negative values store the count as its complement to `_SORT_KEY_LENGTH_CEILING` and
+    every digit as its nines' complement, so a larger magnitude sorts lower.
+    """
+    if value == 0:
+        return _SORT_KEY_ZERO
+    digits = str(abs(value))
+    if value > 0:
+        return f"{_SORT_KEY_POSITIVE}{len(digits):0{_SORT_KEY_LENGTH_WIDTH}d}{digits}"
+    length = _SORT_KEY_LENGTH_CEILING - len(digits)
+    complement = digits.translate(_NINES_COMPLEMENT)
+    return f"{_SORT_KEY_NEGATIVE}{length:0{_SORT_KEY_LENGTH_WIDTH}d}{complement}"
+
+
+def stored_int_sort_key_sql(column: str) -> str:
+    """Returns the SQLite expression computing `stored_int_sort_key` from a decimal-text column.
+
+    Plain built-in functions only, so it can define a generated column and its index: the
+    registered UDFs are not deterministic as far as SQLite knows, and a connection without
+    them would not be able to read the schema at all.
+    """
+    magnitude = f"substr({column}, 2)"
+    # Two passes so no digit is rewritten twice: digits to letters, letters to complements.
+    for digit in "0123456789":
+        magnitude = f"replace({magnitude}, '{digit}', '{chr(ord('a') + int(digit))}')"
+    for digit in "0123456789":
+        magnitude = f"replace({magnitude}, '{chr(ord('a') + int(digit))}', '{9 - int(digit)}')"
+    width = f"'%0{_SORT_KEY_LENGTH_WIDTH}d'"
+    negative_length = f"{_SORT_KEY_LENGTH_CEILING + 1} - length({column})"
+    return (
+        f"CASE WHEN {column} = '0' THEN '{_SORT_KEY_ZERO}' "
+        f"WHEN substr({column}, 1, 1) = '-' THEN "
+        f"'{_SORT_KEY_NEGATIVE}' || printf({width}, {negative_length}) || {magnitude} "
+        f"ELSE '{_SORT_KEY_POSITIVE}' || printf({width}, length({column})) || {column} END"
+    )
+
+
 def sqlite_int_add_text(left: Any, right: Any) -> str:  # noqa: ANN401 -- SQLite UDF inputs can be any scalar type
     """Adds two persisted integers and returns canonical decimal text."""
     return stored_int_to_text(value=stored_int_to_int(value=left) + stored_int_to_int(value=right))
@@ -39,23 +94,46 @@ def sqlite_int_compare_text(left: Any, right: Any) -> int:  # noqa: ANN401 -- SQ
     return (left_int > right_int) - (left_int < right_int)
 
 
+def _fits_native(column: ColumnElement[Any]) -> ColumnElement[bool]:
+    """Builds the SQLite predicate under which `column` is safe to CAST to INTEGER."""
+    return func.length(column) <= _NATIVE_MAX_CHARS
+
+
 def int_add_text(column: ColumnElement[Any], delta: int) -> ColumnElement[Any]:
-    """Builds a SQLite expression that adds `delta` to a decimal-text column."""
-    return cast(
+    """Builds a SQLite expression that adds `delta` to a decimal-text column.
+
+    Rows whose text fits the native range add as SQLite integers and render back to
+    canonical text; only wider rows, or a `delta` beyond `_NATIVE_OPERAND_LIMIT`, call the
+    big-integer UDF.
+    """
+    big = cast(
         "ColumnElement[Any]", func.discordbot_int_add_text(column, stored_int_to_text(value=delta))
     )
+    if abs(delta) >= _NATIVE_OPERAND_LIMIT:
+        return big
+    native = sql_cast(sql_cast(column, Integer) + delta, Text)
+    return cast("ColumnElement[Any]", case((_fits_native(column=column), native), else_=big))
 
 
 def int_compare_text(column: ColumnElement[Any], value: int) -> ColumnElement[int]:
-    """Builds a SQLite expression that compares a decimal-text column."""
-    return cast(
+    """Builds a SQLite expression that compares a decimal-text column.
+
+    Evaluates to -1, 0 or 1, natively for rows and values in the native range and through
+    the big-integer UDF otherwise.
+    """
+    big = cast(
         "ColumnElement[int]",
         func.discordbot_int_compare_text(column, stored_int_to_text(value=value)),
     )
+    if abs(value) >= _NATIVE_OPERAND_LIMIT:
+        return big
+    native_value = sql_cast(column, Integer)
+    native = case((native_value > value, 1), (native_value < value, -1), else_=0)
+    return cast("ColumnElement[int]", case((_fits_native(column=column), native), else_=big))
 
 
 class StoredIntegerComparator(TypeDecorator.Comparator[int]):
-    """Routes SQL arithmetic and comparisons through integer-aware UDFs."""
+    """Routes SQL arithmetic and comparisons through integer-aware expressions."""
 
     def __add__(self, other: object) -> ColumnElement[Any]:
         return int_add_text(
@@ -105,9 +183,11 @@ class StoredInteger(TypeDecorator[int]):
 
     Text rather than INTEGER because a balance can outgrow SQLite's 64-bit integer, which
     Python's own int never does; the comparator keeps SQL arithmetic and comparisons
-    numeric. Ordering is NOT covered: SQLAlchemy exposes no `ORDER BY` hook here, so a bare
-    `order_by` on one of these columns sorts lexically, and every DB-side ranking builds its
-    own decimal-aware order terms instead.
+    numeric, as native SQLite integer operations while a row's text fits 64 bits and
+    through the registered big-integer UDFs once it does not. Ordering is NOT covered:
+    SQLAlchemy exposes no `ORDER BY` hook here, so a bare `order_by` on one of these
+    columns sorts lexically. A table that ranks by one keeps a generated sibling column of
+    `stored_int_sort_key_sql` and orders by (and indexes) that.
     """
 
     impl = Text
@@ -134,6 +214,8 @@ __all__ = [
     "configure_sqlite_stored_integer_functions",
     "int_add_text",
     "int_compare_text",
+    "stored_int_sort_key",
+    "stored_int_sort_key_sql",
     "stored_int_to_int",
     "stored_int_to_text",
 ]
@@ -11,6 +11,7 @@ out of every test whether or not it asked for them.
 import os
 from pathlib import Path
 from itertools import count
+from collections import OrderedDict
 from collections.abc import AsyncIterator
 
 import pytest
@@ -73,15 +74,20 @@ def memory_isolated_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path
     memories_dir = tmp_path / "memories"
     monkeypatch.setattr("discordbot.services.memory.store._MEMORY_DIR", memories_dir)
     monkeypatch.setattr("discordbot.services.memory.store._cleared_at", {})
-    # The render cache is keyed on a per-scope write counter, and both live for the
+    # The read caches are stamped with write counters, and all of them live for the
     # process; without the reset a scope id reused across tests would serve the previous
-    # test's document from a tmp_path that no longer exists.
+    # test's facts from a tmp_path that no longer exists.
     monkeypatch.setattr("discordbot.services.memory.store._write_generation", {})
-    monkeypatch.setattr("discordbot.services.memory.store._render_cache", {})
+    monkeypatch.setattr("discordbot.services.memory.store._compartment_generation", {})
+    monkeypatch.setattr("discordbot.services.memory.store._fact_cache", OrderedDict())
+    monkeypatch.setattr("discordbot.services.memory.store._render_cache", OrderedDict())
+    # Read from `MEMORY_STORAGE` at import, so a deployment's `.env` would otherwise pick
+    # the layout every file-level assertion runs against; the packed tests opt in.
+    monkeypatch.setattr("discordbot.services.memory.store._packed_storage", False)
     # No test may ever run git against the real store, so the committer stays off and
-    # its queue stays unbound; `memory_git.start()` is exercised on its own.
+    # its wakeup stays unbound; `memory_git.start()` is exercised on its own.
     monkeypatch.setattr("discordbot.services.memory.git_history.memory_git.enabled", False)
-    monkeypatch.setattr("discordbot.services.memory.git_history.memory_git._queue", None)
+    monkeypatch.setattr("discordbot.services.memory.git_history.memory_git._wakeup", None)
     monkeypatch.setattr("discordbot.services.memory.pipeline._inflight_tasks", {})
     monkeypatch.setattr("discordbot.services.memory.pipeline._pending_updates", {})
     monkeypatch.setattr("discordbot.services.memory.pipeline._inflight_loop", None)
@@ -123,6 +129,19 @@ def usage_log_isolated_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> P
     return usage_dir
 
 
+@pytest.fixture(autouse=True)
+def reply_timing_isolated_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Points every reply-timing recorder built during a test at a throwaway directory.
+
+    Autouse for the reason `usage_log_isolated_dir` is: any reply a test drives through a
+    cog would otherwise append its waterfall to the live `data/timing` files.
+    """
+    timing_dir = tmp_path / "timing"
+    monkeypatch.setenv(name="REPLY_TIMING_DIR", value=str(timing_dir))
+    monkeypatch.setenv(name="REPLY_TIMING_ENABLED", value="true")
+    return timing_dir
+
+
 @pytest.fixture(autouse=True)
 def file_api_enabled_by_default(monkeypatch: pytest.MonkeyPatch) -> None:
     """Pins the Files API kill-switch on for every test.
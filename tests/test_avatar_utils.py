@@ -114,23 +114,20 @@ async def test_guild_avatar_url_falls_back_to_global_avatar() -> None:
 
 
 async def test_message_reward_stores_guild_avatar(monkeypatch: "pytest.MonkeyPatch") -> None:
-    """Base message rewards pass the guild avatar into the economy DB facade."""
+    """Base message rewards pass the guild avatar into the reward aggregator."""
     captured_avatar_url = ""
 
-    async def fake_credit_with_repayment(
-        user_id: int, name: str, avatar_url: str, amount: int
-    ) -> SimpleNamespace:
-        """Records the avatar URL passed to the DB facade."""
+    def fake_add(user_id: int, name: str, avatar_url: str, amount: int) -> None:
+        """Records the avatar URL passed to the reward aggregator."""
         nonlocal captured_avatar_url
         del user_id, name, amount
         captured_avatar_url = avatar_url
-        return SimpleNamespace(new_balance=0)
 
     async def noop_process_commands(message: SimpleNamespace) -> None:
         """Ignores command processing during the reward test."""
         del message
 
-    monkeypatch.setattr(cli, "credit_with_repayment", fake_credit_with_repayment)
+    monkeypatch.setattr(cli, "message_rewards", SimpleNamespace(add=fake_add))
     author = FakeUser(user_id=7, avatar_url="https://cdn.test/global.png")
     author.bot = False
     message = SimpleNamespace(
@@ -21,7 +21,10 @@ _PICKER_GATE_KEYWORD = "default_member_permissions"
 # its own refusal embed shows the user, so a refused member reads one name for the flag.
 _ACCOUNT_FLAG_GATES: dict[str, tuple[str, tuple[str, ...]] | None] = {
     "is_vip": None,
-    "is_admin": ("economy admins only", ("/admin refund_tax", "/admin collect_tax")),
+    "is_admin": (
+        "economy admins only",
+        ("/admin refund_tax", "/admin collect_tax", "/admin aggregates"),
+    ),
     "is_central_banker": ("central bankers only", ("/central_bank call",)),
     "hide_from_leaderboard": None,
 }
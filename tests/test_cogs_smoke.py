@@ -43,6 +43,7 @@ from discordbot.typings.economy import (
     LoanProposalStatus,
     CasinoLedgerSnapshot,
     LossLeaderboardEntry,
+    EconomyAggregatesCheck,
     LoanProposalAcceptResult,
 )
 from discordbot.cogs.auto_unmute import cog as auto_unmute
@@ -58,7 +59,6 @@ from discordbot.utils.media_delivery import MediaHostingService, MediaDeliveryPl
 from discordbot.cogs.parse_threads.cog import ThreadsCogs
 from discordbot.services.economy.database import (
     VIP_PURCHASE_COST,
-    CreditResult,
     TransferResult,
     VipPurchaseResult,
     BalanceAdjustmentResult,
@@ -1598,6 +1598,44 @@ async def test_economy_admin_rejects_non_admin(monkeypatch: pytest.MonkeyPatch)
     assert "權限不足" in admin_rejection_title
 
 
+async def test_economy_admin_aggregates_checks_and_rebuilds_for_admins_only(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """`/admin aggregates` passes `rebuild` through for admins and refuses everyone else."""
+    requested: list[bool] = []
+    is_admin = False
+
+    async def fake_get_admin_flag(user_id: int) -> bool:
+        """Returns the admin flag the current step of the test wants."""
+        return is_admin
+
+    async def fake_verify(rebuild: bool = False) -> EconomyAggregatesCheck:
+        """Records the rebuild flag and reports drift that a rebuild repaired."""
+        requested.append(rebuild)
+        return EconomyAggregatesCheck(
+            stored_total_positive_balance=900,
+            scanned_total_positive_balance=1_000,
+            stored_central_bank_principal=0,
+            scanned_central_bank_principal=0,
+            rebuilt=rebuild,
+        )
+
+    monkeypatch.setattr(economy, "get_admin", fake_get_admin_flag)
+    monkeypatch.setattr(economy, "verify_economy_aggregates", fake_verify)
+    cog = EconomyCogs(bot=as_bot(fake=SimpleNamespace(user=None)))
+
+    refused = FakeInteraction(user=FakeUser(user_id=1))
+    await EconomyCogs.admin_aggregates.callback(cog, refused, rebuild=True)
+    is_admin = True
+    checked = FakeInteraction(user=FakeUser(user_id=1))
+    await EconomyCogs.admin_aggregates.callback(cog, checked, rebuild=True)
+
+    assert requested == [True]
+    assert refused.followup.sent[0]["embed"].title == "權限不足"
+    assert checked.followup.sent[0].get("ephemeral") is True
+    assert "已依全表掃描重建" in (checked.followup.sent[0]["embed"].description or "")
+
+
 def test_parse_admin_amount_accepts_formatted_text() -> None:
     """Verifies admin adjustment text parsing avoids Discord integer option limits."""
     assert (
@@ -2739,14 +2777,13 @@ async def test_cli_message_and_command_error_branches(monkeypatch: pytest.Monkey
         """Records messages passed to process_commands."""
         processed.append(message)
 
-    async def record_reward(**kwargs: Any) -> CreditResult:  # noqa: ANN401 -- test double accepts heterogeneous kwargs
-        """Records base reward arguments and returns a fake credit result."""
+    def record_reward(**kwargs: Any) -> None:  # noqa: ANN401 -- test double accepts heterogeneous kwargs
+        """Records base reward arguments."""
         rewards.append(kwargs)
-        return CreditResult(
-            new_balance=5_000, credited_amount=5_000, principal_repaid=0, remaining_debt=0
-        )
 
-    monkeypatch.setattr(target=cli, name="credit_with_repayment", value=record_reward)
+    monkeypatch.setattr(
+        target=cli, name="message_rewards", value=SimpleNamespace(add=record_reward)
+    )
     bot = SimpleNamespace(
         user=FakeUser(user_id=999, bot=True),
         process_commands=record_processed,
@@ -2827,16 +2864,15 @@ async def test_cli_message_reward_cooldown_suppresses_rapid_repeat(
     """A second message within the cooldown earns nothing; a later one earns again."""
     rewards: list[dict[str, Any]] = []
 
-    async def record_reward(**kwargs: Any) -> CreditResult:  # noqa: ANN401 -- command facade double
+    def record_reward(**kwargs: Any) -> None:  # noqa: ANN401 -- aggregator double
         rewards.append(kwargs)
-        return CreditResult(
-            new_balance=10, credited_amount=10, principal_repaid=0, remaining_debt=0
-        )
 
     async def noop_process(message: SimpleNamespace) -> None:
         del message
 
-    monkeypatch.setattr(target=cli, name="credit_with_repayment", value=record_reward)
+    monkeypatch.setattr(
+        target=cli, name="message_rewards", value=SimpleNamespace(add=record_reward)
+    )
     bot = SimpleNamespace(
         user=FakeUser(user_id=999, bot=True), process_commands=noop_process, _message_reward_at={}
     )
@@ -2858,16 +2894,15 @@ async def test_cli_message_reward_cooldown_prunes_expired_users(
     """Expired per-user cooldown slots are dropped lazily on later messages."""
     rewards: list[dict[str, Any]] = []
 
-    async def record_reward(**kwargs: Any) -> CreditResult:  # noqa: ANN401 -- command facade double
+    def record_reward(**kwargs: Any) -> None:  # noqa: ANN401 -- aggregator double
         rewards.append(kwargs)
-        return CreditResult(
-            new_balance=10, credited_amount=10, principal_repaid=0, remaining_debt=0
-        )
 
     async def noop_process(message: SimpleNamespace) -> None:
         del message
 
-    monkeypatch.setattr(target=cli, name="credit_with_repayment", value=record_reward)
+    monkeypatch.setattr(
+        target=cli, name="message_rewards", value=SimpleNamespace(add=record_reward)
+    )
     monkeypatch.setattr(target=cli, name="monotonic", value=lambda: 1_000.0)
     bot = SimpleNamespace(
         user=FakeUser(user_id=999, bot=True),
@@ -2892,20 +2927,26 @@ async def test_cli_message_reward_cooldown_rolls_back_on_credit_failure(
 ) -> None:
     """A failed credit must not leave the user on cooldown for the next message."""
     attempts = 0
+    rewards: list[dict[str, Any]] = []
 
-    async def flaky_reward(**kwargs: Any) -> CreditResult:  # noqa: ANN401 -- command facade double
+    async def flaky_avatar(**kwargs: Any) -> str:  # noqa: ANN401 -- avatar helper double
         nonlocal attempts
+        del kwargs
         attempts += 1
         if attempts == 1:
-            raise RuntimeError("transient DB failure")
-        return CreditResult(
-            new_balance=10, credited_amount=10, principal_repaid=0, remaining_debt=0
-        )
+            raise RuntimeError("transient avatar failure")
+        return ""
+
+    def record_reward(**kwargs: Any) -> None:  # noqa: ANN401 -- aggregator double
+        rewards.append(kwargs)
 
     async def noop_process(message: SimpleNamespace) -> None:
         del message
 
-    monkeypatch.setattr(target=cli, name="credit_with_repayment", value=flaky_reward)
+    monkeypatch.setattr(target=cli, name="guild_avatar_url", value=flaky_avatar)
+    monkeypatch.setattr(
+        target=cli, name="message_rewards", value=SimpleNamespace(add=record_reward)
+    )
     bot = SimpleNamespace(
         user=FakeUser(user_id=999, bot=True), process_commands=noop_process, _message_reward_at={}
     )
@@ -2916,4 +2957,5 @@ async def test_cli_message_reward_cooldown_rolls_back_on_credit_failure(
     assert 1 not in bot._message_reward_at
     await cli.DiscordBot.on_message(as_discord_bot(fake=bot), message=as_message(fake=message))
     assert attempts == 2
+    assert len(rewards) == 1
     assert bot._message_reward_at.get(1) is not None
@@ -7,10 +7,11 @@ from pathlib import Path
 from datetime import datetime, timedelta
 
 import pytest
-from sqlalchemy import text, select, update
+from sqlalchemy import text, event, select, update
 from nextcord.ui import Button
 from sqlalchemy.ext.asyncio import create_async_engine
 
+from discordbot.utils import stored_integer
 from discordbot.typings.games import (
     GameParticipant,
     BlackjackPlayerResult,
@@ -18,8 +19,10 @@ from discordbot.typings.games import (
     BlackjackPlayerSettlement,
 )
 from discordbot.utils.timezone import TAIWAN_TIMEZONE
-from discordbot.typings.economy import TRANSFER_TAX_BPS
+from discordbot.typings.economy import TRANSFER_TAX_BPS, IncomeCredit
+from discordbot.services.economy import database
 from discordbot.cogs.games.blackjack import Card, BlackjackRound, BlackjackHandState
+from discordbot.utils.stored_integer import stored_int_sort_key
 from discordbot.cogs.games.settlement import settle_wager, settle_blackjack_player
 from discordbot.services.economy.database import (
     VIP_PURCHASE_COST,
@@ -53,6 +56,7 @@ from discordbot.services.economy.database import (
     get_jackpot_pool,
     get_casino_ledger,
     _stored_int_to_int,
+    credit_income_batch,
     get_jackpot_snapshot,
     credit_with_repayment,
     apply_round_settlement,
@@ -406,6 +410,27 @@ async def test_adjust_balance_stores_and_refreshes_avatar_url() -> None:
     assert await _stored_avatar_url(user_id=42) == "https://cdn.example/b.png"
 
 
+async def test_credit_income_batch_refreshes_identity_like_single_credits() -> None:
+    """A batched credit renames and re-avatars, and an empty avatar keeps the stored one."""
+    await _add_balance(user_id=42, name="alice", amount=10, avatar_url="https://cdn.example/a.png")
+
+    credited = await credit_income_batch(
+        incomes=[
+            IncomeCredit(user_id=42, name="alice_renamed", avatar_url="", amount=10),
+            IncomeCredit(user_id=43, name="bob", avatar_url="https://cdn.example/b.png", amount=5),
+        ]
+    )
+
+    assert credited == 2
+    assert await _stored_avatar_url(user_id=42) == "https://cdn.example/a.png"
+    assert await _stored_wallet_name(user_id=42) == "alice_renamed"
+    assert await get_account(user_id=42) == AccountSnapshot(
+        name="alice_renamed", balance=20, total_earned=20, total_spent=0
+    )
+    assert await _stored_avatar_url(user_id=43) == "https://cdn.example/b.png"
+    assert await get_balance(user_id=43) == 5
+
+
 async def test_admin_flag_defaults_to_false() -> None:
     """Unknown users and normal accounts are not economy admins."""
     assert await get_admin(user_id=42) is False
@@ -497,6 +522,7 @@ async def test_ensure_schema_bootstraps_current_databases(
         "casino_account",
         "jackpot_pool",
         "casino_ledger",
+        "economy_aggregates",
     }
     assert "bot_status" not in economy_tables
     assert {"user_id", "name", "is_central_banker"} <= table_columns["user_account"]
@@ -511,8 +537,8 @@ async def test_ensure_schema_bootstraps_current_databases(
     _assert_money_columns_are_text(
         table_column_types=table_column_types, jackpot_column_types=jackpot_column_types
     )
-    assert "ix_user_wallet_balance" in wallet_index_names
-    assert "ix_casino_account_day_loss" in casino_index_names
+    assert "ix_user_wallet_balance_key" in wallet_index_names
+    assert "ix_casino_account_day_loss_key" in casino_index_names
     assert jackpot_row == (1_000, 0, 0, 1_000, 0)
 
     await _add_balance(
@@ -525,6 +551,49 @@ async def test_ensure_schema_bootstraps_current_databases(
     await engine.dispose()
 
 
+async def test_ensure_schema_adds_sort_keys_to_an_older_database(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A database from before the sort keys gains them, keyed for the rows it already has."""
+    db_path = tmp_path / "legacy-economy.db"
+    engine = create_async_engine(url=f"sqlite+aiosqlite:///{db_path}")
+    async with engine.begin() as conn:
+        for statement in (
+            "CREATE TABLE user_wallet (user_id INTEGER PRIMARY KEY, name VARCHAR(128) NOT NULL,"
+            " balance TEXT NOT NULL, total_earned TEXT NOT NULL, total_spent TEXT NOT NULL,"
+            " updated_at DATETIME)",
+            "CREATE INDEX ix_user_wallet_balance ON user_wallet (balance)",
+            "CREATE TABLE casino_account (user_id INTEGER PRIMARY KEY,"
+            " name VARCHAR(128) NOT NULL, day_started_at DATETIME, daily_loss TEXT NOT NULL,"
+            " daily_win TEXT NOT NULL, daily_net TEXT NOT NULL, updated_at DATETIME)",
+            "CREATE INDEX ix_casino_account_day_loss ON casino_account (day_started_at, daily_loss)",
+            "INSERT INTO user_wallet VALUES (1, 'small', '9', '9', '0', NULL),"
+            " (2, 'large', '10', '10', '0', NULL), (3, 'minus', '-5', '0', '5', NULL)",
+        ):
+            await conn.execute(statement=text(text=statement))
+    monkeypatch.setattr("discordbot.services.economy.database._engine", engine)
+    monkeypatch.setattr("discordbot.services.economy.database._schema_ready_for", None)
+
+    await _ensure_schema()
+
+    _, wallet_index_names, casino_index_names, _, _ = await _economy_schema_details()
+    async with open_session() as session:
+        result = await session.execute(
+            statement=text(text="SELECT user_id, balance_key FROM user_wallet ORDER BY user_id")
+        )
+        keys = result.all()
+    assert "ix_user_wallet_balance" not in wallet_index_names
+    assert "ix_casino_account_day_loss" not in casino_index_names
+    assert "ix_user_wallet_balance_key" in wallet_index_names
+    assert "ix_casino_account_day_loss_key" in casino_index_names
+    assert keys == [
+        (1, stored_int_sort_key(value=9)),
+        (2, stored_int_sort_key(value=10)),
+        (3, stored_int_sort_key(value=-5)),
+    ]
+    await engine.dispose()
+
+
 async def test_ensure_schema_serializes_concurrent_first_use(
     tmp_path: Path, monkeypatch: pytest.MonkeyPatch
 ) -> None:
@@ -730,8 +799,64 @@ async def test_top_n_db_order_handles_large_zero_and_negative_balances() -> None
     ]
 
 
+async def test_stored_sort_key_orders_like_the_integers_in_python_and_sqlite() -> None:
+    """The Python key and the generated column agree, and both sort in numeric order."""
+    values = [-(10**30), -1_000, -999, -10, -9, -1, 0, 1, 9, 10, 99, 100, 10**20 - 1, 10**20]
+    for user_id, value in enumerate(SystemRandom().sample(values, k=len(values)), start=1):
+        # A zero delta writes no wallet row, so every balance arrives in two steps.
+        await adjust_balance(
+            user_id=user_id, name=str(value), delta=value + 1, allow_negative=True
+        )
+        await adjust_balance(user_id=user_id, name=str(value), delta=-1, allow_negative=True)
+
+    async with open_session() as session:
+        result = await session.execute(
+            statement=select(UserWallet.balance, UserWallet.balance_key).order_by(
+                UserWallet.balance_key
+            )
+        )
+        stored = result.all()
+
+    assert [balance for balance, _ in stored] == values
+    assert [key for _, key in stored] == [stored_int_sort_key(value=value) for value in values]
+
+
+async def test_leaderboard_queries_read_their_index_without_a_sort() -> None:
+    """Neither leaderboard builds a temp B-tree or calls a UDF."""
+    captured: list[tuple[str, Any]] = []
+
+    def capture(*args: Any) -> None:  # noqa: ANN401 -- SQLAlchemy event arguments are untyped
+        """Records each statement the queries below send to SQLite."""
+        captured.append((args[2], args[3]))
+
+    await _ensure_schema()
+    sync_engine = database._engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", capture)
+    try:
+        await top_n(limit=10)
+        await top_losers(limit=10)
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", capture)
+
+    plans: dict[str, str] = {}
+    async with open_session() as session:
+        connection = await session.connection()
+        for statement, parameters in captured:
+            if "_key" in statement:
+                result = await connection.exec_driver_sql(
+                    f"EXPLAIN QUERY PLAN {statement}", parameters
+                )
+                plans[statement] = " | ".join(row[3] for row in result.all())
+
+    assert len(plans) == 2
+    for statement, plan in plans.items():
+        assert "TEMP B-TREE" not in plan, statement
+        assert "_key" in plan, plan
+        assert "discordbot_int" not in statement
+
+
 async def test_top_n_short_cache_hit_and_manual_invalidation() -> None:
-    """Repeated leaderboard reads use cached rows until explicitly invalidated."""
+    """A write that bypasses the notes stays unseen until the board is invalidated."""
     await _add_balance(user_id=1, name="alice", amount=100)
     await _add_balance(user_id=2, name="bob", amount=50)
 
@@ -750,7 +875,7 @@ async def test_top_n_short_cache_hit_and_manual_invalidation() -> None:
 
 
 async def test_top_n_write_path_invalidates_cache() -> None:
-    """Balance writes clear cached leaderboard rows."""
+    """Balance writes reach the board through their post-commit notes."""
     await _add_balance(user_id=1, name="alice", amount=100)
     await _add_balance(user_id=2, name="bob", amount=50)
 
@@ -1455,6 +1580,50 @@ async def test_wallet_and_jackpot_store_large_values_as_text() -> None:
     assert jackpot_row == (str(1_000 + large_amount), "text", str(large_amount), "text")
 
 
+async def test_stored_integer_arithmetic_stays_native_until_it_outgrows_int64(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Ordinary settlements never call the big-integer UDFs; values past 64 bits still do."""
+    udf_calls: list[str] = []
+
+    def counted(name: str, udf: Any) -> Any:  # noqa: ANN401 -- wraps a SQLite UDF
+        """Records each call before handing it to the real UDF."""
+
+        def wrapper(left: Any, right: Any) -> Any:  # noqa: ANN401 -- SQLite UDF inputs
+            udf_calls.append(name)
+            return udf(left, right)
+
+        return wrapper
+
+    for name in ("sqlite_int_add_text", "sqlite_int_compare_text"):
+        monkeypatch.setattr(
+            f"discordbot.utils.stored_integer.{name}",
+            counted(name=name, udf=getattr(stored_integer, name)),
+        )
+
+    await _add_balance(user_id=1, name="alice", amount=10**17)
+    await _add_balance(user_id=2, name="bob", amount=1_000)
+    sent = await transfer(
+        sender_id=1, sender_name="alice", receiver_id=2, receiver_name="bob", amount=500
+    )
+    await apply_round_settlement(
+        player_id=2, player_account_name="bob", player_delta=-300, casino_delta=300
+    )
+    native_calls = list(udf_calls)
+
+    # The first credit starts on the native path and overflows into 19 digits; the next two
+    # start from text too wide for it.
+    await adjust_balance(user_id=1, name="alice", delta=10**18 - 1)
+    await adjust_balance(user_id=1, name="alice", delta=9 * 10**18)
+    await adjust_balance(user_id=1, name="alice", delta=-(10**18))
+
+    assert sent is not None
+    assert native_calls == []
+    assert "sqlite_int_add_text" in udf_calls
+    assert await get_balance(user_id=1) == sent.sender_balance + (10**18 - 1) + 8 * 10**18
+    assert await get_balance(user_id=2) == sent.receiver_balance - 300
+
+
 async def test_daily_casino_counters_skip_push_and_house_ledger() -> None:
     """Zero deltas and dealer ledger mirrors do not enter player loss counters."""
     await _add_balance(user_id=1, name="alice", amount=100)
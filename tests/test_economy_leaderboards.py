@@ -0,0 +1,154 @@
+"""Tests for the in-process top-K leaderboards and the write notes that maintain them."""
+
+from typing import Any
+
+import pytest
+from sqlalchemy import event, update
+
+from discordbot.services.economy import database
+from discordbot.services.economy.database import (
+    UserWallet,
+    top_n,
+    transfer,
+    top_losers,
+    open_session,
+    credit_with_repayment,
+    apply_round_settlement,
+)
+from discordbot.services.economy.leaderboards import RankedRow, TopKBoard
+
+pytestmark = pytest.mark.usefixtures("economy_isolated_db")
+
+
+def _board(*scores: int, capacity: int = 2) -> TopKBoard:
+    """Builds a board seeded with one row per score, user IDs counting from 1."""
+    board = TopKBoard(capacity=capacity, reconcile_seconds=60.0, label="test")
+    rows = [
+        RankedRow(user_id=index, name=str(index), score=score)
+        for index, score in enumerate(scores, start=1)
+    ]
+    board.seed(rows=rows, version=board.begin_seed())
+    return board
+
+
+def _ranked(board: TopKBoard, limit: int) -> list[tuple[int, int]] | None:
+    """Reads `(user_id, score)` pairs off a board, or None when it must reseed."""
+    rows = board.read(limit=limit, exclude_user_ids=(), include_hidden=True)
+    return None if rows is None else [(row.user_id, row.score) for row in rows]
+
+
+def test_board_notes_patch_drop_ignore_or_invalidate() -> None:
+    """Each kind of note keeps the board's rows the true top, or gives up on them."""
+    board = _board(300, 200, 100)
+
+    board.note(user_id=2, score=500, name="bob")
+    assert _ranked(board=board, limit=2) == [(2, 500), (1, 300)]
+
+    board.note(user_id=3, score=90)
+    assert _ranked(board=board, limit=2) == [(2, 500), (1, 300)]
+
+    board.note(user_id=1, score=50)
+    assert _ranked(board=board, limit=1) == [(2, 500)]
+    assert _ranked(board=board, limit=2) is None
+
+    board = _board(300, 200, 100)
+    board.note(user_id=9, score=250)
+    assert _ranked(board=board, limit=1) is None
+
+
+def test_a_board_holding_the_whole_table_reseeds_for_a_new_row() -> None:
+    """With nothing outside the board, any unseen account could belong on it."""
+    board = _board(300, capacity=5)
+    assert _ranked(board=board, limit=5) == [(1, 300)]
+
+    board.note(user_id=2, score=1)
+    assert _ranked(board=board, limit=5) is None
+
+
+def test_a_seed_that_raced_a_note_is_not_installed() -> None:
+    """A write committed while the seed query ran must not be papered over."""
+    board = TopKBoard(capacity=2, reconcile_seconds=60.0, label="test")
+    version = board.begin_seed()
+    board.note(user_id=1, score=900)
+    board.seed(rows=[RankedRow(user_id=1, name="1", score=100)], version=version)
+    assert _ranked(board=board, limit=1) is None
+
+
+async def test_a_write_after_the_seed_is_read_without_a_query() -> None:
+    """Once seeded, a leaderboard read after an ordinary write sends SQLite nothing."""
+    await credit_with_repayment(user_id=1, name="alice", amount=100)
+    await credit_with_repayment(user_id=2, name="bob", amount=50)
+    assert [row.user_id for row in await top_n(limit=2)] == [1, 2]
+
+    await transfer(sender_id=1, sender_name="alice", receiver_id=2, receiver_name="bob", amount=80)
+    statements: list[str] = []
+
+    def capture(*args: Any) -> None:  # noqa: ANN401 -- SQLAlchemy event arguments are untyped
+        """Records each statement the read below sends to SQLite."""
+        statements.append(args[2])
+
+    sync_engine = database._engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", capture)
+    try:
+        ranked = await top_n(limit=2)
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", capture)
+
+    assert statements == []
+    assert [row.user_id for row in ranked] == [2, 1]
+    assert ranked[0].balance > ranked[1].balance
+
+
+async def test_a_rolled_back_write_leaves_the_board_alone() -> None:
+    """Notes apply only once their transaction commits."""
+    await credit_with_repayment(user_id=1, name="alice", amount=100)
+    await credit_with_repayment(user_id=2, name="bob", amount=50)
+    assert [row.user_id for row in await top_n(limit=1)] == [1]
+
+    async with open_session() as session:
+        database._note_wallet_write(session=session, user_id=2, balance=1_000, delta=950)
+        await session.rollback()
+
+    assert [row.balance for row in await top_n(limit=2)] == [100, 50]
+
+
+async def test_an_aged_board_reconciles_with_the_table() -> None:
+    """A write that bypassed the notes is picked up once the board is old enough."""
+    await credit_with_repayment(user_id=1, name="alice", amount=100)
+    await credit_with_repayment(user_id=2, name="bob", amount=50)
+    assert [row.user_id for row in await top_n(limit=1)] == [1]
+    async with open_session() as session:
+        await session.execute(
+            statement=update(UserWallet)
+            .where(UserWallet.user_id == 2)
+            .values(balance=1_000, total_earned=1_000, total_spent=0)
+        )
+        await session.commit()
+
+    database._current_leaderboards().balance.reconcile_seconds = 0.0
+
+    assert [row.user_id for row in await top_n(limit=1)] == [2]
+
+
+async def test_casino_losses_reach_the_loss_board() -> None:
+    """A settled loss patches today's loss board through its daily-loss note."""
+    await credit_with_repayment(user_id=1, name="alice", amount=500)
+    await credit_with_repayment(user_id=2, name="bob", amount=500)
+    for user_id in (1, 2):
+        await apply_round_settlement(
+            player_id=user_id,
+            player_account_name=str(user_id),
+            player_delta=-100,
+            casino_delta=100,
+        )
+    assert [row.loss_amount for row in await top_losers(limit=2)] == [100, 100]
+
+    await apply_round_settlement(
+        player_id=2, player_account_name="bob", player_delta=-250, casino_delta=250
+    )
+
+    losers = await top_losers(limit=2)
+    assert [(row.user_id, row.name, row.loss_amount) for row in losers] == [
+        (2, "bob", 350),
+        (1, "1", 100),
+    ]
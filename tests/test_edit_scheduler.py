@@ -0,0 +1,109 @@
+"""Tests for the shared live-preview edit scheduler: budgets, fairness, coalescing, backoff.
+
+Each test builds its own `EditScheduler` with tiny intervals and small buckets so the token
+arithmetic is visible in milliseconds; the module-level instance the streamers share is left
+alone.
+"""
+
+import time
+import asyncio
+from collections import Counter
+
+from discordbot.utils.edit_scheduler import MAX_BACKOFF_FACTOR, EditScheduler
+
+
+def _scheduler(*, channel_rate: float = 1000.0, channel_burst: int = 5) -> EditScheduler:
+    """A scheduler whose global bucket never binds, so a test sees only the channel's."""
+    return EditScheduler(
+        channel_rate=channel_rate,
+        channel_burst=channel_burst,
+        global_rate=1000.0,
+        global_burst=100,
+    )
+
+
+async def test_a_lane_spends_its_burst_then_waits_for_the_channel_bucket() -> None:
+    """The first edits go out back to back; past the burst each one waits for a refill."""
+    scheduler = _scheduler(channel_rate=20.0, channel_burst=2)
+    stop = asyncio.Event()
+    async with scheduler.lane(channel_id=1, min_interval=0.0, wait_for_change=False) as lane:
+        started = time.monotonic()
+        for _ in range(4):
+            assert await lane.next_slot(stop=stop)
+        elapsed = time.monotonic() - started
+
+    stats = scheduler.stats()
+    assert stats.edits == 4
+    # Two slots were paid from the burst, two waited about 1/20s each for a token.
+    assert stats.rate_limit_waits == 2
+    assert elapsed >= 0.09
+
+
+async def test_snapshot_changes_between_slots_are_coalesced_into_one_edit() -> None:
+    """A lane waiting for changes skips idle slots and counts every change it folded away."""
+    scheduler = _scheduler()
+    stop = asyncio.Event()
+    async with scheduler.lane(channel_id=1, min_interval=0.0) as lane:
+        assert await lane.next_slot(stop=stop)
+        for _ in range(5):
+            lane.touch()
+        assert await lane.next_slot(stop=stop)
+        # Nothing changed since, so the next slot waits until stopped rather than granting.
+        stop_later = asyncio.get_running_loop().call_later(0.02, stop.set)
+        assert await lane.next_slot(stop=stop) is False
+        stop_later.cancel()
+
+    assert lane.edits == 2
+    assert lane.coalesced_snapshots == 4
+    assert scheduler.stats().coalesced_snapshots == 4
+
+
+async def test_lanes_in_one_channel_take_turns_for_its_tokens() -> None:
+    """Two busy streams in one channel alternate instead of one starving the other."""
+    scheduler = _scheduler(channel_rate=50.0, channel_burst=1)
+    stop = asyncio.Event()
+    order: list[str] = []
+
+    async def stream(name: str) -> None:
+        async with scheduler.lane(channel_id=7, min_interval=0.0, wait_for_change=False) as lane:
+            for _ in range(3):
+                assert await lane.next_slot(stop=stop)
+                order.append(name)
+                await asyncio.sleep(0)
+
+    await asyncio.gather(stream(name="a"), stream(name="b"))
+
+    assert Counter(order) == {"a": 3, "b": 3}
+    # order-contract: a channel's lanes queue FIFO for its tokens, so turns alternate.
+    assert "aa" not in "".join(order[1:-1])
+
+
+async def test_a_throttled_edit_stretches_the_channel_and_fast_edits_ease_it_back() -> None:
+    """A 429 or a slow edit doubles the channel's cadence; every fast one gives some back."""
+    scheduler = _scheduler()
+    async with scheduler.lane(channel_id=3, min_interval=0.01) as lane:
+        lane.settle(seconds=0.01, rate_limited=True)
+        lane.settle(seconds=30.0)
+        assert scheduler.channel(channel_id=3).backoff == 4.0
+        for _ in range(20):
+            lane.settle(seconds=30.0)
+        assert scheduler.channel(channel_id=3).backoff == MAX_BACKOFF_FACTOR
+        for _ in range(40):
+            lane.settle(seconds=0.01)
+        assert scheduler.channel(channel_id=3).backoff == 1.0
+
+    assert scheduler.stats().throttled_edits == 22
+
+
+async def test_a_stop_releases_a_lane_queued_behind_an_empty_bucket() -> None:
+    """Stopping the streamer must not wait out a token it will never use."""
+    scheduler = _scheduler(channel_rate=0.01, channel_burst=1)
+    stop = asyncio.Event()
+    async with scheduler.lane(channel_id=9, min_interval=0.0, wait_for_change=False) as lane:
+        assert await lane.next_slot(stop=stop)
+        asyncio.get_running_loop().call_later(0.02, stop.set)
+        started = time.monotonic()
+        assert await lane.next_slot(stop=stop) is False
+
+    assert time.monotonic() - started < 1.0
+    assert not scheduler.channel(channel_id=9).queue
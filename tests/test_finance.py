@@ -11,9 +11,12 @@ from discordbot.typings.economy import (
     LOAN_PROPOSAL_TIMEOUT_SECONDS,
     LoanProposalStatus,
 )
+from discordbot.services.economy import database
 from discordbot.services.economy.database import (
+    UserWallet,
     LoanContract,
     LoanProposal,
+    transfer,
     get_balance,
     open_session,
     _database_now,
@@ -23,6 +26,7 @@ from discordbot.services.economy.database import (
     repay_personal_loans,
     call_central_bank_loans,
     get_central_bank_status,
+    verify_economy_aggregates,
     create_personal_loan_request,
     reject_expired_loan_proposal,
     create_central_bank_loan_request,
@@ -318,3 +322,85 @@ async def test_forced_collection_without_amount_includes_accrued_interest() -> N
     assert result.principal_paid == 500
     assert result.closed_contract_ids == (accepted.contract.contract_id,)
     assert await get_balance(user_id=1) == 85
+
+
+async def test_economy_aggregates_follow_wallet_and_central_bank_writes() -> None:
+    """Every write path keeps the running totals equal to the full scan, negatives included."""
+    await _add_balance(user_id=10, name="capital", amount=1_000)
+    await _add_balance(user_id=11, name="other", amount=300)
+    await adjust_balance(user_id=12, name="debtor", delta=-50, allow_negative=True)
+    await adjust_balance(user_id=12, name="debtor", delta=80, allow_negative=True)
+    await transfer(
+        sender_id=11, sender_name="other", receiver_id=12, receiver_name="debtor", amount=200
+    )
+    proposal = await create_central_bank_loan_request(
+        borrower_id=1, borrower_name="alice", amount=400, monthly_rate_bps=300
+    )
+    assert proposal is not None
+    accepted = await accept_loan_proposal(
+        proposal_id=proposal.proposal_id, actor_id=99, actor_name="banker", is_central_banker=True
+    )
+    assert accepted is not None
+    await _backdate_contract(contract_id=accepted.contract.contract_id, days=30)
+    await call_central_bank_loans(borrower_id=1, borrower_name="alice", amount=250)
+
+    check = await verify_economy_aggregates()
+    status = await get_central_bank_status(exclude_user_ids=(10,))
+
+    assert check.consistent
+    assert check.stored_central_bank_principal == status.outstanding_principal > 0
+    assert status.total_positive_user_balance == check.stored_total_positive_balance - 1_000
+
+
+async def test_economy_aggregates_ignore_a_rolled_back_write() -> None:
+    """A full debit that cannot be covered changes neither the wallets nor the totals."""
+    await _add_balance(user_id=10, name="capital", amount=100)
+    before = await get_central_bank_status()
+
+    assert (
+        await transfer(
+            sender_id=10, sender_name="capital", receiver_id=11, receiver_name="other", amount=500
+        )
+        is None
+    )
+
+    assert await get_central_bank_status() == before
+    assert (await verify_economy_aggregates()).consistent
+
+
+async def test_economy_aggregates_report_drift_and_rebuild_from_the_scan() -> None:
+    """A write that bypasses the helpers shows up as drift until an admin rebuilds."""
+    await _add_balance(user_id=10, name="capital", amount=1_000)
+    async with open_session() as session:
+        await session.execute(
+            statement=update(UserWallet)
+            .where(UserWallet.user_id == 10)
+            .values(balance=5_000, total_earned=5_000)
+        )
+        await session.commit()
+
+    found = await verify_economy_aggregates()
+    assert (found.consistent, found.rebuilt) == (False, False)
+    assert (await get_central_bank_status()).total_positive_user_balance == 1_000
+
+    rebuilt = await verify_economy_aggregates(rebuild=True)
+    assert (rebuilt.stored_total_positive_balance, rebuilt.rebuilt) == (1_000, True)
+    assert (await get_central_bank_status()).total_positive_user_balance == 5_000
+    assert (await verify_economy_aggregates()).consistent
+
+
+async def test_ensure_schema_seeds_the_aggregates_of_an_older_database(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """A database from before the table gets its row from one scan of what is already there."""
+    await _add_balance(user_id=10, name="capital", amount=1_000)
+    await adjust_balance(user_id=11, name="debtor", delta=-30, allow_negative=True)
+    async with open_session() as session:
+        await session.execute(statement=text(text="DROP TABLE economy_aggregates"))
+        await session.commit()
+    monkeypatch.setattr(database, "_schema_ready_for", None)
+
+    status = await get_central_bank_status()
+
+    assert status.total_positive_user_balance == 1_000
+    assert (await verify_economy_aggregates()).consistent
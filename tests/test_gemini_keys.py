@@ -1,19 +1,29 @@
-"""Tests for Gemini key discovery and the per-reply key balancer.
+"""Tests for Gemini key discovery, the per-reply key balancer and the upload registry.
 
 The autouse `gemini_key_set_isolated` fixture strips every `GEMINI_API_KEY_<n>` before each
 test here, so a checkout with three real keys configured cannot decide any outcome below.
 Each test sets the exact key set it is about.
 """
 
-from datetime import datetime
+from datetime import UTC, datetime, timedelta
 
 import pytest
 
 from discordbot.typings.llm import LLMConfig
 from discordbot.typings.models import ModelSettings
 from discordbot.utils.timezone import TAIWAN_TIMEZONE
-from discordbot.services.gemini_keys.balancer import pick_gemini_key, reset_balancer_state
-from discordbot.services.gemini_keys.database import read_day_counts
+from discordbot.services.gemini_keys.uploads import (
+    UPLOAD_REUSE_MARGIN,
+    remember_upload,
+    find_upload_for_source,
+    find_upload_for_content,
+)
+from discordbot.services.gemini_keys.balancer import (
+    peek_gemini_key,
+    pick_gemini_key,
+    reset_balancer_state,
+)
+from discordbot.services.gemini_keys.database import read_day_counts, delete_expired_uploads
 
 
 def _keys(config: LLMConfig) -> list[tuple[int, str]]:
@@ -211,6 +221,22 @@ async def test_an_unconfigured_deployment_picks_no_key(monkeypatch: pytest.Monke
     assert await pick_gemini_key(config=LLMConfig()) is None
 
 
+async def test_a_peek_names_the_next_pick_without_counting_it(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Speculative work lands on the next reply's key but never shifts the split itself."""
+    config = _configure(monkeypatch=monkeypatch, count=2)
+    _pin_day(monkeypatch=monkeypatch, day="2026-08-22")
+    await _pick_indexes(config=config, times=1)
+
+    peeked = await peek_gemini_key(config=config)
+
+    assert peeked is not None
+    assert peeked.index == 2
+    assert await _pick_indexes(config=config, times=1) == [2]
+    assert await read_day_counts(day="2026-08-22") == {1: 1, 2: 1}
+
+
 async def test_the_counts_survive_a_restart(monkeypatch: pytest.MonkeyPatch) -> None:
     """A restart resumes the day's split instead of putting every key back at zero."""
     config = _configure(monkeypatch=monkeypatch, count=3)
@@ -238,3 +264,34 @@ async def test_an_unreachable_database_still_balances(monkeypatch: pytest.Monkey
     monkeypatch.setattr("discordbot.services.gemini_keys.balancer.read_day_counts", _explode)
 
     assert sorted(await _pick_indexes(config=config, times=6)) == [1, 1, 2, 2, 3, 3]
+
+
+async def test_an_upload_near_its_expiry_is_not_reused_and_is_swept(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Reuse needs the margin of life left; the write-path sweep drops what falls short."""
+    monkeypatch.setattr("discordbot.services.gemini_keys.uploads._last_sweep", None)
+    now = datetime.now(tz=UTC)
+    later = now + UPLOAD_REUSE_MARGIN + timedelta(hours=1)
+    await remember_upload(
+        cache_key=2, content_hash="bb", key_index=1, uri="https://files.test/b", expires_at=later
+    )
+    # Recorded after this interval's sweep, so only the read-side margin keeps it out.
+    await remember_upload(
+        cache_key=1,
+        content_hash="aa",
+        key_index=1,
+        uri="https://files.test/a",
+        expires_at=now + UPLOAD_REUSE_MARGIN - timedelta(minutes=5),
+    )
+
+    assert await find_upload_for_source(cache_key=1, key_index=1) is None
+    assert await find_upload_for_content(cache_key=3, content_hash="aa", key_index=1) is None
+    assert await find_upload_for_source(cache_key=2, key_index=1) == (
+        "https://files.test/b",
+        later,
+    )
+    assert (
+        await delete_expired_uploads(before=(now + UPLOAD_REUSE_MARGIN).replace(tzinfo=None)) == 1
+    )
+    assert await find_upload_for_source(cache_key=2, key_index=1) is not None
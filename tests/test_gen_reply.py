@@ -48,11 +48,8 @@ from discordbot.utils.llm_errors import (
 )
 from discordbot.cogs.gen_reply.cog import (
     UNROUTED_REPLY,
-    HISTORY_CHAR_BUDGET,
     LINK_CONTEXT_SOURCES,
     HISTORY_MESSAGE_LIMIT,
-    MAX_HISTORY_MEDIA_PARTS,
-    HISTORY_PER_MESSAGE_OVERHEAD,
     ReplyGeneratorCogs,
     _discard_task,
     _find_youtube_url,
@@ -60,11 +57,10 @@ from discordbot.cogs.gen_reply.cog import (
     _run_until_deadline,
     _can_launch_research,
     _link_url_for_source,
-    _trim_history_to_budget,
     _await_deadline_bound_task,
-    _history_media_over_budget,
     _build_runtime_instructions,
 )
+from discordbot.utils.reply_timing import ReplyTimingRecorder
 from discordbot.cogs.gen_reply.input import MessageInputBuilder
 from discordbot.utils.llm_transcript import USAGE_FOOTER_RE
 from discordbot.utils.media_delivery import MediaHostingService, MediaDeliveryPlanner
@@ -82,11 +78,18 @@ from discordbot.services.memory.store import (
 from discordbot.cogs.gen_reply.context import ReplyContext
 from discordbot.cogs.gen_reply.markers import (
     MAX_INLINE_IMAGES,
+    MarkerScanner,
     extract_inline_markers,
     scrub_markers_for_preview,
 )
 from discordbot.cogs.gen_reply.prompts import IMAGE_PROMPT, VIDEO_PROMPT, MEMORY_SELECT_PROMPT
 from discordbot.cogs.gen_reply.toolkit import GeminiKeyToolkit
+from discordbot.cogs.gen_reply.prefetch import (
+    PREFETCH_CLAIM_WINDOW,
+    PREFETCH_BUDGET_WINDOW,
+    AttachmentPrefetcher,
+    _Prefetched,
+)
 from discordbot.cogs.gen_reply.streaming import (
     DISCORD_MESSAGE_LIMIT,
     REASONING_PREVIEW_MAX_CHARS,
@@ -110,6 +113,7 @@ from discordbot.cogs.gen_reply.generation import (
 from discordbot.cogs.gen_reply.memory_tool import (
     NO_STORED_MEMORY,
     MemoryCandidate,
+    MemorySelection,
     MemoryReadContext,
     parse_user_id_list,
     memory_read_context,
@@ -121,7 +125,19 @@ from discordbot.cogs.gen_reply.memory_tool import (
     allowlist_ids_from_server_memory,
 )
 from discordbot.cogs.gen_reply.capabilities import render_capabilities_block
+from discordbot.cogs.gen_reply.triage_cache import TriageCache
+from discordbot.cogs.gen_reply.history_cache import ChannelHistoryCache
+from discordbot.cogs.gen_reply.history_budget import (
+    MARKER_TOKENS,
+    CHARS_PER_TOKEN,
+    MEDIA_PART_TOKENS,
+    SMALL_IMAGE_TOKENS,
+    VIDEO_TOKENS_PER_MB,
+    MESSAGE_OVERHEAD_TOKENS,
+    HistoryCostIndex,
+)
 from discordbot.cogs.gen_reply.attachment.base import DEAD_SOURCE_TTL, loggable_cache_key
+from discordbot.cogs.gen_reply.selection_cache import MemorySelectionCache
 from discordbot.services.memory.server_prompts import SERVER_PHASE1_PROMPT, SERVER_PHASE2_PROMPT
 from discordbot.cogs.gen_reply.attachment.inline import InlineRenderer
 from discordbot.cogs.gen_reply.attachment.select import build_attachment_handler
@@ -156,7 +172,7 @@ FAKE_MESSAGE_CREATED_AT = datetime(2026, 6, 10, 3, 4, 5, tzinfo=UTC)
 
 if TYPE_CHECKING:
     from pathlib import Path
-    from collections.abc import Callable, AsyncIterator
+    from collections.abc import Callable, Awaitable, AsyncIterator
 
     from aiohttp import ClientResponse
     from nextcord import Attachment
@@ -384,13 +400,15 @@ class FakeMessage:
 class FakeAttachment:
     """Minimal Discord attachment or sticker stub."""
 
-    def __init__(
+    def __init__(  # noqa: PLR0913 -- one knob per attachment field the renders read
         self,
         filename: str = "file.txt",
         content_type: str | None = "text/plain",
         payload: bytes = b"hello",
         url: str = "https://example.test/file.txt",
         attachment_id: int = 555,
+        width: int | None = None,
+        height: int | None = None,
     ) -> None:
         """Initializes attachment metadata and payload bytes."""
         self.id = attachment_id
@@ -398,6 +416,9 @@ class FakeAttachment:
         self.content_type = content_type
         self._payload = payload
         self.url = url
+        self.size = len(payload)
+        self.width = width
+        self.height = height
         self.read_count = 0
 
     async def read(self) -> bytes:
@@ -786,14 +807,16 @@ def _png_b64() -> str:
     return base64.b64encode(s=buffer.getvalue()).decode(encoding="utf-8")
 
 
-def _fake_uploader(files: FakeGeminiFiles | None = None) -> GeminiFileUploader:
+def _fake_uploader(
+    files: FakeGeminiFiles | None = None, key_index: int | None = None
+) -> GeminiFileUploader:
     """A GeminiFileUploader with its lazy Gemini client pre-seeded to a fake.
 
     `gemini_client` is a cached_property, so seeding `__dict__` bypasses the real
     factory and the upload path runs against the fake instead; the key it would have
-    built from is therefore never read.
+    built from is therefore never read. `key_index` opts into the upload registry.
     """
-    uploader = GeminiFileUploader(api_key="test-key")
+    uploader = GeminiFileUploader(api_key="test-key", key_index=key_index)
     uploader.__dict__["gemini_client"] = FakeGeminiClient(files=files)
     return uploader
 
@@ -821,6 +844,14 @@ def _cog(bot_user_id: int = 999) -> ReplyGeneratorCogs:
     # `__new__` skips `__init__`, so the pipeline's usage record needs its recorder wired
     # here; the autouse `usage_log_isolated_dir` fixture keeps it off the live file.
     cog.usage_recorder = UsageRecorder()
+    cog.timing_recorder = ReplyTimingRecorder()
+    cog.history_cache = ChannelHistoryCache(max_messages=HISTORY_MESSAGE_LIMIT)
+    cog.triage_cache = TriageCache()
+    cog.selection_cache = MemorySelectionCache()
+    cog.history_costs = HistoryCostIndex()
+    cog.prefetcher = AttachmentPrefetcher(
+        guild_byte_budget=cog.config.attachment_prefetch_guild_bytes
+    )
     toolkit = GeminiKeyToolkit(
         bot=cast("commands.Bot", cog.bot), openai_client=cog.openai_client, slot=None
     )
@@ -1788,6 +1819,52 @@ def test_scrub_markers_for_preview_hides_streaming_fragments() -> None:
     assert scrub_markers_for_preview(text="正常文字") == "正常文字"
 
 
+_SCANNED_REPLIES = [
+    "正常文字\n\n\n  保留空行  ",
+    "嗆你 <generate-voice>聽好</generate-voice> 滾 <generate-voi",
+    "看這<generate-image>a cat</generate-image>之後<GENERATE-IMAGE>a dog</Generate-Image>",
+    "前\n\n<generate-music>lofi</generate-music>\n\n\n\n<generate-video>a wave</generate-video>後",
+    "<deep-research>brief</deep-research> 好 <generate-image>an unclosed red ca",
+    "<generate-voice>a <generate-image>x</generate-image> b</generate-voice> <generate-voice>open",
+    "<generate-music></generate-music><generate-music>second <generate-music>raw</generate-music>",
+    "長" * 2100 + "<generate-voice>尾巴</generate-voice>",
+    "頭" + " " * 2100 + "<generate-ima",
+]
+
+
+@pytest.mark.parametrize("chunk", [1, 2, 3, 7, 16, 4096])
+@pytest.mark.parametrize("reply", _SCANNED_REPLIES)
+def test_marker_scanner_matches_the_one_shot_parsers_at_any_delta_size(
+    reply: str, chunk: int
+) -> None:
+    """Feeding a reply in deltas previews and finalizes exactly as re-parsing it whole does."""
+    scanner = MarkerScanner(preview_chars=2000)
+    for end in range(chunk, len(reply) + chunk, chunk):
+        scanner.feed(text=reply[end - chunk : end])
+        assert scanner.preview() == scrub_markers_for_preview(text=reply[:end])[:2000]
+    assert scanner.finish() == extract_inline_markers(text=reply)
+
+
+def test_marker_scanner_hides_stray_tags_from_the_preview_too() -> None:
+    """An unpaired close tag is scrubbed while streaming, not only once the reply is final."""
+    scanner = MarkerScanner(preview_chars=2000)
+    reply = "stray </generate-image> and </generate-voice> tags"
+    for delta in reply.split(" "):
+        scanner.feed(text=f"{delta} ")
+    assert scanner.preview() == "stray  and  tags"
+    assert scanner.finish() == extract_inline_markers(text=f"{reply} ")
+
+
+def test_marker_scanner_fills_the_cap_past_a_run_of_partial_tags() -> None:
+    """Partial tags straddling the cap still leave the preview as long as the cap allows."""
+    scanner = MarkerScanner(preview_chars=40)
+    reply = "hello <generate-voic<generate-musi<generate-voic<generate-"
+    scanner.feed(text=reply)
+    expected = "hello <generate-voic<generate-musi<gener"
+    assert scrub_markers_for_preview(text=reply)[:40] == expected
+    assert scanner.preview() == expected
+
+
 # ---- inline image (<generate-image>) ----
 
 
@@ -3975,6 +4052,53 @@ async def test_resolve_file_upload_recovers_pending_on_next_reference(
     assert load_calls == 1  # adopt path did not re-download the source
 
 
+async def test_the_upload_registry_reuses_uploads_across_restarts_and_sources() -> None:
+    """A known source skips the download, and the same bytes under a new id skip the upload."""
+    loads: list[str] = []
+
+    def _loader(name: str, data: bytes) -> Callable[[], Awaitable[tuple[bytes, str]]]:
+        async def _load() -> tuple[bytes, str]:
+            loads.append(name)
+            return data, "image/png"
+
+        return _load
+
+    first_files = FakeGeminiFiles()
+    first = await _fake_uploader(files=first_files, key_index=1)._resolve_file_upload(
+        cache_key=111, filename="a.png", load_data=_loader(name="a", data=b"same")
+    )
+    assert first == ("https://files.test/a.png", datetime(2099, 1, 1, tzinfo=UTC))
+
+    # A fresh uploader stands in for a restart: nothing in memory, only the registry.
+    files = FakeGeminiFiles()
+    restarted = _fake_uploader(files=files, key_index=1)
+    again = await restarted._resolve_file_upload(
+        cache_key=111, filename="a.png", load_data=_loader(name="a", data=b"same")
+    )
+    repost = await restarted._resolve_file_upload(
+        cache_key=222, filename="b.png", load_data=_loader(name="b", data=b"same")
+    )
+    assert again == repost == first
+    assert Counter(loads) == {"a": 1, "b": 1}  # the known source was never downloaded again
+    assert files.upload_calls == []
+
+    # The repost is now a known source too, so it resolves with no download either.
+    assert (
+        await restarted._resolve_file_upload(
+            cache_key=222, filename="b.png", load_data=_loader(name="b", data=b"same")
+        )
+        == first
+    )
+    assert Counter(loads) == {"a": 1, "b": 1}
+
+    # Another key's project cannot read that file, so the same bytes upload again there.
+    other_files = FakeGeminiFiles()
+    await _fake_uploader(files=other_files, key_index=2)._resolve_file_upload(
+        cache_key=111, filename="a.png", load_data=_loader(name="a", data=b"same")
+    )
+    assert other_files.upload_calls == [("a.png", "image/png")]
+
+
 def test_loggable_cache_key_strips_url_query_token() -> None:
     """An int key logs unchanged; a URL key drops its (possibly signed) query string."""
     assert loggable_cache_key(cache_key=12345) == 12345
@@ -4358,7 +4482,9 @@ async def test_gen_reply_processes_history_reference_and_current_messages(
 
     current = FakeMessage(content="current", author=FakeAuthor(user_id=3))
     current.channel = FakeChannel(history=fake_history)
-    raw_history = await cog._fetch_history(message=as_message(fake=current), limit=30)
+    raw_history = await cog._fetch_history(
+        toolkit=_toolkit(cog=cog), message=as_message(fake=current), limit=30
+    )
     rendered = await cog._render_history(
         toolkit=_toolkit(cog=cog),
         hist_messages=raw_history,
@@ -4407,43 +4533,282 @@ async def test_gen_reply_preserves_bot_mention_in_text_context() -> None:
     assert "你的審美跟 <@999> 一樣 這樣算誇獎嗎" in rendered
 
 
-def test_trim_history_keeps_the_newest_messages_within_the_budget() -> None:
+def _history_budget(cog: ReplyGeneratorCogs) -> int:
+    """The answer tier's history token budget, which every packing test is sized against."""
+    return _toolkit(cog=cog).runtime_models.slow_model.history_token_budget
+
+
+def test_pack_history_keeps_the_newest_messages_within_the_budget() -> None:
     """The budget drops the oldest context first and never cuts inside a message.
 
     Ordering is the contract being checked here, not just the count: `_fetch_history` hands
-    over oldest-first and the answer needs the conversation nearest the question, so a trim
+    over oldest-first and the answer needs the conversation nearest the question, so a pack
     that kept the wrong end would still pass a length assertion.
     """
-    per_message = 100
-    body = "x" * (per_message - HISTORY_PER_MESSAGE_OVERHEAD)
-    fits = HISTORY_CHAR_BUDGET // per_message
+    cog = _cog()
+    per_message = 25
+    fits = _history_budget(cog=cog) // per_message
     messages = [
-        FakeMessage(content=f"{i}:{body}", author=FakeAuthor(user_id=1)) for i in range(fits + 20)
+        FakeMessage(
+            content=f"{i:05d}".ljust(
+                (per_message - MESSAGE_OVERHEAD_TOKENS) * CHARS_PER_TOKEN, "x"
+            ),
+            author=FakeAuthor(user_id=1),
+        )
+        for i in range(fits + 20)
     ]
 
-    kept = _trim_history_to_budget(messages=[as_message(fake=m) for m in messages])
+    kept = cog._pack_history(
+        toolkit=_toolkit(cog=cog), messages=[as_message(fake=m) for m in messages]
+    ).messages
 
     assert len(kept) <= fits
     # order-contract: history is fed to the model oldest-first, and the tail is what is kept.
     assert [m.content for m in kept] == [m.content for m in messages[len(messages) - len(kept) :]]
 
 
-def test_trim_history_keeps_one_message_that_alone_exceeds_the_budget() -> None:
+def test_pack_history_keeps_one_message_that_alone_exceeds_the_budget() -> None:
     """A single oversized post must not reduce history to nothing."""
-    huge = FakeMessage(content="y" * (HISTORY_CHAR_BUDGET * 3), author=FakeAuthor(user_id=1))
+    cog = _cog()
+    huge = FakeMessage(
+        content="y" * (_history_budget(cog=cog) * CHARS_PER_TOKEN * 3),
+        author=FakeAuthor(user_id=1),
+    )
 
-    kept = _trim_history_to_budget(messages=[as_message(fake=huge)])
+    pack = cog._pack_history(toolkit=_toolkit(cog=cog), messages=[as_message(fake=huge)])
 
-    assert len(kept) == 1
+    assert len(pack.messages) == 1
 
 
-def test_trim_history_charges_an_attachment_only_message() -> None:
+def test_pack_history_charges_an_attachment_only_message() -> None:
     """Empty `content` still costs, so a run of image posts cannot overshoot the budget."""
+    cog = _cog()
     blanks = [FakeMessage(content="", author=FakeAuthor(user_id=1)) for _ in range(2000)]
 
-    kept = _trim_history_to_budget(messages=[as_message(fake=m) for m in blanks])
+    pack = cog._pack_history(
+        toolkit=_toolkit(cog=cog), messages=[as_message(fake=m) for m in blanks]
+    )
+
+    assert len(pack.messages) <= _history_budget(cog=cog) // MESSAGE_OVERHEAD_TOKENS
+
 
-    assert len(kept) <= HISTORY_CHAR_BUDGET // HISTORY_PER_MESSAGE_OVERHEAD
+def _channel_post(message_id: int, content: str = "hi") -> FakeMessage:
+    """A channel message with a distinct id; every fake shares channel id 555."""
+    message = FakeMessage(content=content, author=FakeAuthor(user_id=1))
+    message.id = message_id
+    return message
+
+
+def _paged_history(
+    posts: list[FakeMessage], calls: list[dict[str, int]]
+) -> Callable[..., AsyncIterator[FakeMessage]]:
+    """A `channel.history` fake over `posts` that honours `before` and records each walk."""
+
+    async def history(
+        limit: int, before: FakeMessage, oldest_first: bool
+    ) -> AsyncIterator[FakeMessage]:
+        """Yields the newest `limit` posts older than `before`, oldest first."""
+        del oldest_first
+        calls.append({"limit": limit, "before": before.id})
+        for post in [p for p in posts if p.id < before.id][-limit:]:
+            yield post
+
+    return history
+
+
+async def test_fetch_history_serves_a_fed_window_without_rest() -> None:
+    """Once the gateway has fed the channel, a reply's history costs no REST walk at all."""
+    cog = _cog()
+    calls: list[dict[str, int]] = []
+    posts = [_channel_post(message_id=100 + i, content=f"m{i}") for i in range(5)]
+    for post in posts:
+        await cog.on_message(message=as_message(fake=post))
+    current = _channel_post(message_id=200, content="current")
+    current.channel = FakeChannel(history=_paged_history(posts=posts, calls=calls))
+
+    kept = await cog._fetch_history(
+        toolkit=_toolkit(cog=cog), message=as_message(fake=current), limit=3
+    )
+
+    assert calls == []
+    # order-contract: history is fed to the model oldest-first, ending next to the question.
+    assert [m.content for m in kept] == ["m2", "m3", "m4"]
+
+
+async def test_fetch_history_tops_up_a_short_window_and_seeds_it() -> None:
+    """A window starting at the question pays one REST walk, which the next reply then reuses."""
+    cog = _cog()
+    calls: list[dict[str, int]] = []
+    older = [_channel_post(message_id=100 + i, content=f"old{i}") for i in range(4)]
+    current = _channel_post(message_id=200, content="current")
+    current.channel = FakeChannel(history=_paged_history(posts=older, calls=calls))
+    await cog.on_message(message=as_message(fake=current))
+
+    first = await cog._fetch_history(
+        toolkit=_toolkit(cog=cog), message=as_message(fake=current), limit=10
+    )
+    follow_up = _channel_post(message_id=300, content="next")
+    await cog.on_message(message=as_message(fake=follow_up))
+    second = await cog._fetch_history(
+        toolkit=_toolkit(cog=cog), message=as_message(fake=follow_up), limit=10
+    )
+
+    assert calls == [{"limit": 10, "before": 200}]
+    # order-contract: the REST run is spliced in front of the cached one, oldest-first.
+    assert [m.content for m in first] == ["old0", "old1", "old2", "old3"]
+    assert [m.content for m in second] == ["old0", "old1", "old2", "old3", "current"]
+
+
+async def test_history_cache_drops_deleted_and_unappliable_edits() -> None:
+    """A delete leaves the window contiguous; an edit nextcord could not apply cuts it back."""
+    cog = _cog()
+    posts = [_channel_post(message_id=100 + i, content=f"m{i}") for i in range(4)]
+    for post in posts:
+        await cog.on_message(message=as_message(fake=post))
+
+    await cog.on_raw_message_delete(
+        payload=cast("Any", SimpleNamespace(channel_id=555, message_id=103))
+    )
+    await cog.on_raw_message_edit(
+        payload=cast("Any", SimpleNamespace(channel_id=555, message_id=101, cached_message=None))
+    )
+    window = cog.history_cache.window_before(
+        message=as_message(fake=_channel_post(message_id=200)), limit=10
+    )
+
+    assert window is not None
+    assert [m.content for m in window.messages] == ["m2"]
+    assert not window.complete
+
+
+async def test_history_cache_is_cleared_on_a_new_gateway_session() -> None:
+    """`on_ready` means the gateway may have skipped events, so nothing cached is trusted."""
+    cog = _cog()
+    cog._resume_started = True
+    await cog.on_message(message=as_message(fake=_channel_post(message_id=100)))
+
+    await cog.on_ready()
+
+    assert (
+        cog.history_cache.window_before(
+            message=as_message(fake=_channel_post(message_id=200)), limit=10
+        )
+        is None
+    )
+
+
+async def test_a_post_in_an_active_channel_is_uploaded_before_anyone_asks() -> None:
+    """Once the bot has spoken in a channel, a new attachment there uploads on arrival."""
+    cog = _cog()
+    cog.config = LLMConfig(attachment_prefetch_enabled=True)
+    cog._tasks = set()
+    early = _channel_post(message_id=100)
+    early.attachments = [FakeAttachment(attachment_id=1)]
+    await cog.on_message(message=as_message(fake=early))
+    assert not cog._tasks  # nothing the bot said here yet, so nobody is likely to ask
+
+    await cog.on_message(
+        message=as_message(
+            fake=FakeMessage(content="reply", author=FakeAuthor(bot=True, user_id=999))
+        )
+    )
+    post = _channel_post(message_id=101)
+    post.attachments = [FakeAttachment(attachment_id=2)]
+    await cog.on_message(message=as_message(fake=post))
+    await asyncio.gather(*cog._tasks)
+    handler = cog._toolkits[None].input_builder.attachment_handler
+    assert isinstance(handler, GeminiFileUploader)
+    uploads = len(handler.gemini_client.aio.files.upload_calls)
+
+    await cog._render_history(
+        toolkit=cog._toolkits[None],
+        hist_messages=[as_message(fake=post)],
+        text_only=False,
+        message_id=200,
+    )
+
+    assert uploads == 1
+    assert len(handler.gemini_client.aio.files.upload_calls) == 1  # the reply reused it
+    stats = cog.prefetcher.stats()
+    assert (stats.started, stats.hits, stats.wasted) == (1, 1, 0)
+
+
+async def test_a_reply_arriving_mid_prefetch_waits_for_that_upload() -> None:
+    """A reply that renders a message still uploading joins the prefetch's render."""
+    cog = _cog()
+    cog.config = LLMConfig(attachment_prefetch_enabled=True)
+    cog._tasks = set()
+    await cog.on_message(
+        message=as_message(
+            fake=FakeMessage(content="reply", author=FakeAuthor(bot=True, user_id=999))
+        )
+    )
+    handler = cog._toolkits[None].input_builder.attachment_handler
+    assert isinstance(handler, GeminiFileUploader)
+    files = handler.gemini_client.aio.files
+    uploading = asyncio.Event()
+    release = asyncio.Event()
+    upload = files.upload
+
+    async def held_upload(file: BytesIO, config: dict[str, str]) -> SimpleNamespace:
+        uploading.set()
+        await release.wait()
+        return await upload(file=file, config=config)
+
+    files.upload = held_upload
+    post = _channel_post(message_id=101)
+    post.attachments = [FakeAttachment(attachment_id=2)]
+    await cog.on_message(message=as_message(fake=post))
+    await asyncio.wait_for(uploading.wait(), timeout=5)
+
+    reply = asyncio.create_task(
+        cog._render_history(
+            toolkit=cog._toolkits[None],
+            hist_messages=[as_message(fake=post)],
+            text_only=False,
+            message_id=200,
+        )
+    )
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.wait_for(asyncio.gather(reply, *cog._tasks), timeout=5)
+
+    assert len(files.upload_calls) == 1
+    stats = cog.prefetcher.stats()
+    assert (stats.started, stats.hits, stats.wasted) == (1, 1, 0)
+
+
+def test_the_prefetcher_charges_each_guild_and_scores_its_guesses(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """A guild stops at its byte budget; a claim on another key is a miss, an unread one waste."""
+    clock = {"now": 1000.0}
+    monkeypatch.setattr("discordbot.cogs.gen_reply.prefetch.time.monotonic", lambda: clock["now"])
+    prefetcher = AttachmentPrefetcher(guild_byte_budget=12)
+    prefetcher.note_bot_activity(channel_id=555)
+
+    def _post(message_id: int) -> Message:
+        message = _channel_post(message_id=message_id)
+        message.attachments = [FakeAttachment(payload=b"12345")]
+        return as_message(fake=message)
+
+    assert prefetcher.admit(message=_post(message_id=1), research_thread=False) == 5
+    assert prefetcher.admit(message=_post(message_id=2), research_thread=False) == 5
+    assert prefetcher.admit(message=_post(message_id=3), research_thread=False) is None
+    clock["now"] += PREFETCH_BUDGET_WINDOW
+    # The budget has rolled over, but the bot has long gone quiet in the channel.
+    assert prefetcher.admit(message=_post(message_id=4), research_thread=False) is None
+    assert prefetcher.admit(message=_post(message_id=4), research_thread=True) == 5
+
+    prefetcher._prefetched[1] = _Prefetched(key_index=1, size=5, started_at=clock["now"])
+    prefetcher._prefetched[2] = _Prefetched(key_index=1, size=5, started_at=clock["now"])
+    prefetcher.claim(message_ids=[1, 9], key_index=2)
+    clock["now"] += PREFETCH_CLAIM_WINDOW
+    prefetcher.claim(message_ids=[], key_index=1)
+
+    stats = prefetcher.stats()
+    assert (stats.started, stats.over_budget) == (3, 1)
+    assert (stats.hits, stats.key_misses, stats.wasted) == (0, 1, 1)
 
 
 def _image_post(index: int, count: int) -> FakeMessage:
@@ -4462,34 +4827,81 @@ def _image_post(index: int, count: int) -> FakeMessage:
 def test_history_media_budget_refuses_every_older_post_once_one_is_refused() -> None:
     """The files that survive are an unbroken run ending at the newest post.
 
-    The oldest post here needs one part and would fit the single slot the newest two leave
-    unspent, so a budget that kept looking for something small enough would admit it. That is
+    The oldest post here needs one part and would fit the budget the newest post leaves
+    unspent, so a packer that kept looking for something small enough would admit it. That is
     the case being pinned: admitting it would show the model an older attachment while a newer
     one rendered as a marker, which reads as files going missing at random rather than as a cap.
     """
+    cog = _cog()
+    newest = _history_budget(cog=cog) // MEDIA_PART_TOKENS - 2
     posts = [
         _image_post(index=0, count=1),
         _image_post(index=1, count=5),
-        _image_post(index=2, count=9),
+        _image_post(index=2, count=newest),
     ]
 
-    over = _history_media_over_budget(
-        builder=_toolkit(cog=_cog()).input_builder,
-        hist_messages=[as_message(fake=m) for m in posts],
+    pack = cog._pack_history(
+        toolkit=_toolkit(cog=cog), messages=[as_message(fake=m) for m in posts]
     )
 
-    assert over == {posts[0].id: 1, posts[1].id: 5}
+    assert len(pack.messages) == 3
+    assert pack.text_only == {posts[0].id: 1, posts[1].id: 5}
 
 
 def test_history_media_budget_exempts_the_newest_post_that_carries_attachments() -> None:
-    """One post of many images keeps its files rather than spending nothing at all."""
-    post = _image_post(index=0, count=MAX_HISTORY_MEDIA_PARTS + 5)
+    """One post of many images keeps its files rather than spending nothing at all.
+
+    Its overshoot is not charged to the budget either, so the text before it still packs.
+    """
+    cog = _cog()
+    post = _image_post(index=0, count=_history_budget(cog=cog) // MEDIA_PART_TOKENS + 5)
+    chat = [_channel_post(message_id=6000 + i) for i in range(3)]
 
-    over = _history_media_over_budget(
-        builder=_toolkit(cog=_cog()).input_builder, hist_messages=[as_message(fake=post)]
+    pack = cog._pack_history(
+        toolkit=_toolkit(cog=cog), messages=[as_message(fake=m) for m in [*chat, post]]
     )
 
-    assert over == {}
+    assert pack.text_only == {}
+    assert len(pack.messages) == 4
+    assert pack.tokens > _history_budget(cog=cog)
+
+
+def test_history_costs_price_media_by_kind_and_are_estimated_once(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """A small image is one tile, a large one the median part, a video scales with its size."""
+    cog = _cog()
+    builder = _toolkit(cog=cog).input_builder
+    post = _channel_post(message_id=7500, content="")
+    post.attachments = [
+        FakeAttachment(filename="a.png", content_type="image/png", width=128, height=128),
+        FakeAttachment(
+            filename="b.png", content_type="image/png", attachment_id=556, width=2048, height=900
+        ),
+        FakeAttachment(
+            filename="c.mp4",
+            content_type="video/mp4",
+            attachment_id=557,
+            payload=b"v" * 10_000_000,
+        ),
+    ]
+    collect = MessageInputBuilder.collect_attachment_sources
+    calls: list[int] = []
+
+    def counting(self: MessageInputBuilder, message: Message) -> object:
+        calls.append(message.id)
+        return collect(self, message=message)
+
+    monkeypatch.setattr(MessageInputBuilder, "collect_attachment_sources", counting)
+
+    first = cog.history_costs.cost(builder=builder, message=as_message(fake=post))
+    second = cog.history_costs.cost(builder=builder, message=as_message(fake=post))
+
+    video = 10 * VIDEO_TOKENS_PER_MB
+    assert first.media_parts == 3
+    assert first.media_tokens + 3 * MARKER_TOKENS == SMALL_IMAGE_TOKENS + MEDIA_PART_TOKENS + video
+    assert second == first
+    assert len(calls) == 1
 
 
 async def test_render_history_survives_a_message_the_collector_chokes_on(
@@ -5658,6 +6070,54 @@ async def test_a_reply_records_the_route_it_took(
     assert len(_usage_records(directory=usage_log_isolated_dir)) == 1
 
 
+async def test_a_reply_records_its_latency_waterfall(
+    monkeypatch: pytest.MonkeyPatch, reply_timing_isolated_dir: Path
+) -> None:
+    """Every stage the pipeline fans out lands on one timeline, whichever task ran it."""
+    cog = _cog()
+
+    async def fake_route(
+        toolkit: object,
+        message: FakeMessage,
+        reference_messages: list[object],
+        current_message: list[object],
+    ) -> RouteClassification:
+        """Routes every message to QA."""
+        del message, reference_messages, current_message
+        return RouteClassification(decision="QA")
+
+    async def fake_prepare(  # noqa: PLR0913 -- stub mirrors _prepare_reply_context's signature
+        toolkit: object,
+        message: FakeMessage,
+        history_limit: int,
+        parts_task: object,
+        text_parts: object,
+        route_done: object,
+    ) -> ReplyContext:
+        """Keeps the speculative prep off the real memory and history paths."""
+        del message, history_limit, parts_task, text_parts, route_done
+        return ReplyContext()
+
+    async def fake_message_handler(**kwargs: object) -> None:
+        """Stands in for the answer so the turn completes without an LLM call."""
+        del kwargs
+
+    monkeypatch.setattr(cog, "_route_classify", fake_route)
+    monkeypatch.setattr(cog, "_prepare_reply_context", fake_prepare)
+    monkeypatch.setattr(cog, "_handle_message_reply", fake_message_handler)
+
+    message = FakeMessage(content="<@999> recap", author=FakeAuthor(user_id=7))
+    await cog.on_message(message=as_message(fake=message))
+
+    (record,) = _usage_records(directory=reply_timing_isolated_dir)
+    assert (record["message_id"], record["route"]) == (message.id, "QA")
+    stages = {stage["stage"]: stage for stage in record["stages"]}
+    # `prep`, `effort` and `parts` run as their own tasks and still land on this timeline.
+    assert {"key_lease", "text_parts", "route", "prep", "effort", "parts", "answer"} <= set(stages)
+    assert stages["key_lease"]["end"] <= stages["route"]["start"]
+    assert stages["answer"]["end"] <= record["total"]
+
+
 async def test_a_failed_reply_records_that_it_never_routed(
     monkeypatch: pytest.MonkeyPatch, usage_log_isolated_dir: Path
 ) -> None:
@@ -7921,7 +8381,7 @@ def test_parse_user_id_list_handles_valid_and_malformed() -> None:
     assert parse_user_id_list(arguments='{"user_id_list": "nope"}') == []
 
 
-def test_resolve_user_memories_enforces_allowlist(memory_isolated_dir: object) -> None:
+async def test_resolve_user_memories_enforces_allowlist(memory_isolated_dir: object) -> None:
     """Ids outside the allowlist drop, mention wrappers and dupes collapse, gaps signal clearly."""
     del memory_isolated_dir
     _seed_fact(scope=user_scope(user_id=1), text="甲的記憶")
@@ -7930,7 +8390,7 @@ def test_resolve_user_memories_enforces_allowlist(memory_isolated_dir: object) -
         2: MemoryCandidate(prompt_label="B (b)", credit_label="B (b)"),
     }
 
-    memories = resolve_user_memories(
+    memories = await resolve_user_memories(
         user_id_list=["1", "<@1>", "3", "abc", "2"],
         allowed=allowed,
         context=MemoryReadContext(guild_id=None, dm_partner_id=None),
@@ -7943,7 +8403,7 @@ def test_resolve_user_memories_enforces_allowlist(memory_isolated_dir: object) -
     assert by_id["2"].memory == "(no stored memory for this user)"
 
 
-def test_absent_member_is_credited_by_id_never_by_the_alias_row(
+async def test_absent_member_is_credited_by_id_never_by_the_alias_row(
     memory_isolated_dir: object,
 ) -> None:
     """A member named only by the nickname table is credited by their bare id.
@@ -7956,7 +8416,7 @@ def test_absent_member_is_credited_by_id_never_by_the_alias_row(
     del memory_isolated_dir
     _seed_fact(scope=user_scope(user_id=42), text="第三人的記憶")
 
-    memories = resolve_user_memories(
+    memories = await resolve_user_memories(
         user_id_list=["42"],
         allowed={42: MemoryCandidate(prompt_label="Boss(社群暱稱:李董)")},
         context=MemoryReadContext(guild_id=None, dm_partner_id=None),
@@ -8013,7 +8473,7 @@ _COMPARTMENT_FACTS = {
     ],
     ids=["same-guild", "other-guild", "owner-own-dm", "other-owner-in-dm", "group-dm"],
 )
-def test_memory_read_opens_only_the_permitted_compartments(
+async def test_memory_read_opens_only_the_permitted_compartments(
     memory_isolated_dir: object,
     context: MemoryReadContext,
     compartments: set[str],
@@ -8035,7 +8495,7 @@ def test_memory_read_opens_only_the_permitted_compartments(
 
     assert set(compartments_for_reading(owner_id=1, context=context)) == compartments
 
-    memories = resolve_user_memories(
+    memories = await resolve_user_memories(
         user_id_list=["1"],
         allowed={1: MemoryCandidate(prompt_label="A (a)", credit_label="A (a)")},
         context=context,
@@ -8069,7 +8529,7 @@ def test_memory_read_context_by_channel_kind() -> None:
     assert group_context.dm_partner_id is None
 
 
-def test_resolve_user_memories_fully_locked_reads_as_no_memory(
+async def test_resolve_user_memories_fully_locked_reads_as_no_memory(
     memory_isolated_dir: object,
 ) -> None:
     """A memory stored only in another guild resolves to the no-memory signal, uncredited."""
@@ -8082,7 +8542,7 @@ def test_resolve_user_memories_fully_locked_reads_as_no_memory(
         durability="permanent",
     )
 
-    memories = resolve_user_memories(
+    memories = await resolve_user_memories(
         user_id_list=["1"],
         allowed={1: MemoryCandidate(prompt_label="A (a)", credit_label="A (a)")},
         context=MemoryReadContext(guild_id=111, dm_partner_id=None),
@@ -8700,6 +9160,9 @@ def test_allowlist_ids_from_server_memory_parses_nickname_table() -> None:
     assert "[id:" not in allowed[123]
     # An id outside the nickname section (e.g. in 近期脈絡) is never exposed.
     assert 789 not in allowed
+    # The parse is cached per document; a caller editing its copy must not edit the cache.
+    allowed.clear()
+    assert set(allowlist_ids_from_server_memory(memory=memory)) == {123, 456}
 
 
 def test_widen_allowlist_with_aliases_merges_participant_labels() -> None:
@@ -8882,6 +9345,7 @@ async def test_route_classify_carries_decision_and_defaults_qa() -> None:
     assert routed.link_context_sources == ["threads", "bilibili"]
 
     _recorded(cog).responses.output_parsed = None
+    cog.triage_cache.clear()  # the same message would otherwise reuse the IMAGE verdict
     fallback = await _route(cog=cog, message=message)
     assert fallback.decision == "QA"
     assert fallback.link_context_sources == []
@@ -8895,6 +9359,7 @@ async def test_grade_effort_carries_grade_and_defaults_high() -> None:
     assert (await _grade(cog=cog, message=message)).effort == "low"
 
     _recorded(cog).responses.effort_parsed = None
+    cog.triage_cache.clear()  # the same message would otherwise reuse the low grade
     assert (await _grade(cog=cog, message=message)).effort == "high"
 
 
@@ -8916,6 +9381,30 @@ async def test_grade_effort_asks_the_model_even_about_what_it_cannot_read() -> N
     assert len(_recorded(cog).responses.parse_models) == 2
 
 
+async def test_a_repeated_prompt_reuses_both_triage_verdicts() -> None:
+    """Whoever says it, the same short message is routed and graded once; long input is not."""
+    cog = _cog()
+    _recorded(cog).responses.output_parsed = RouteClassification(decision="IMAGE")
+    _recorded(cog).responses.effort_parsed = EffortGrade(effort="low")
+    first = FakeMessage(content="hi  there", author=FakeAuthor(user_id=1))
+    again = FakeMessage(content="Hi there", author=FakeAuthor(user_id=2))
+
+    assert (await _route(cog=cog, message=first)).decision == "IMAGE"
+    assert (await _grade(cog=cog, message=first)).effort == "low"
+    _recorded(cog).responses.output_parsed = RouteClassification(decision="QA")
+    _recorded(cog).responses.effort_parsed = EffortGrade(effort="high")
+    assert (await _route(cog=cog, message=again)).decision == "IMAGE"
+    assert (await _grade(cog=cog, message=again)).effort == "low"
+    assert len(_recorded(cog).responses.parse_models) == 2
+
+    essay = FakeMessage(content="why " * 100, author=FakeAuthor(user_id=1))
+    await _route(cog=cog, message=essay)
+    await _route(cog=cog, message=essay)
+    assert len(_recorded(cog).responses.parse_models) == 4
+    stats = cog.triage_cache.stats()
+    assert (stats.hits, stats.misses, stats.bypassed) == (2, 2, 2)
+
+
 async def test_resolve_effort_returns_graded_effort_on_success() -> None:
     """A completed grade flows through _resolve_effort as the answer model's effort."""
     cog = _cog()
@@ -9201,9 +9690,9 @@ async def _prepare_context_with_hanging_selection(
     )
 
     async def slow_selection(**kwargs: object) -> None:
-        """Simulates a proxy hang far past the selection grace."""
+        """Simulates a proxy that never answers, so only the grace can end the wait."""
         del kwargs
-        await asyncio.sleep(1)
+        await asyncio.Event().wait()
 
     monkeypatch.setattr(cog, "_select_user_memories", slow_selection)
     msg = as_message(fake=message)
@@ -9289,6 +9778,58 @@ async def test_memory_selection_timeout_retains_author_and_reference_memory(
     assert len(context.memory_labels) == 2
 
 
+async def test_a_quiet_channel_skips_the_repeat_memory_selection(
+    memory_isolated_dir: object, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """An empty selection stands for the next reply until a message names a candidate."""
+    del memory_isolated_dir
+    cog = _cog()
+    _seed_fact(scope=user_scope(user_id=1), text="甲")
+    _seed_fact(
+        scope=server_scope(server_id=1),
+        text="Boss(社群暱稱:李董)",
+        section="member_alias",
+        durability="permanent",
+        subject_id=42,
+    )
+    selections: list[str] = []
+
+    async def empty_selection(**kwargs: object) -> MemorySelection:
+        """Records the message each selection ran for, choosing nobody."""
+        selections.append(cast("Message", kwargs["message"]).content)
+        return MemorySelection(memories=[], input_tokens=1, output_tokens=1)
+
+    monkeypatch.setattr(cog, "_select_user_memories", empty_selection)
+
+    async def _prepare(content: str) -> None:
+        """Builds reply context for one message from the same author in the same channel."""
+        msg = as_message(fake=FakeMessage(content=content, author=FakeAuthor(user_id=1)))
+        text_parts = await cog._get_reference_and_current(
+            toolkit=_toolkit(cog=cog), message=msg, text_only=True
+        )
+        parts_task = asyncio.create_task(
+            coro=cog._get_reference_and_current(toolkit=_toolkit(cog=cog), message=msg)
+        )
+        route_done = asyncio.Event()
+        route_done.set()
+        await cog._prepare_reply_context(
+            toolkit=_toolkit(cog=cog),
+            message=msg,
+            history_limit=2,
+            parts_task=parts_task,
+            text_parts=text_parts,
+            route_done=route_done,
+        )
+
+    await _prepare(content="今天天氣")
+    await _prepare(content="晚餐吃什麼")
+    await _prepare(content="李董今天來嗎")
+
+    assert sorted(selections) == sorted(["今天天氣", "李董今天來嗎"])
+    stats = cog.selection_cache.stats()
+    assert (stats.skipped, stats.ran) == (1, 2)
+
+
 async def test_deterministic_memory_lookup_skips_locked_author_memory(
     memory_isolated_dir: object, monkeypatch: pytest.MonkeyPatch
 ) -> None:
@@ -2,6 +2,7 @@
 
 import asyncio
 from pathlib import Path
+import threading
 from collections.abc import Iterator
 
 import pytest
@@ -37,7 +38,7 @@ _SAMPLE_ROW: dict[str, str] = {
 
 def test_write_row_creates_table_and_inserts(isolated_db: Engine) -> None:
     """First write creates the canonical messages table, then inserts the row."""
-    log_msg._write_row_sync(row=_SAMPLE_ROW)
+    log_msg._write_rows_sync(rows=[_SAMPLE_ROW])
     with isolated_db.connect() as conn:
         rows = conn.execute(
             text(
@@ -55,9 +56,9 @@ def test_write_row_creates_table_and_inserts(isolated_db: Engine) -> None:
 
 def test_write_row_appends_to_existing_table(isolated_db: Engine) -> None:
     """Subsequent writes with distinct discord_message_ids append fresh rows."""
-    log_msg._write_row_sync(row=_SAMPLE_ROW)
+    log_msg._write_rows_sync(rows=[_SAMPLE_ROW])
     second_row = {**_SAMPLE_ROW, "discord_message_id": "1002", "content": "second message"}
-    log_msg._write_row_sync(row=second_row)
+    log_msg._write_rows_sync(rows=[second_row])
 
     with isolated_db.connect() as conn:
         rows = conn.execute(text('SELECT content FROM "messages" ORDER BY id')).all()
@@ -66,13 +67,13 @@ def test_write_row_appends_to_existing_table(isolated_db: Engine) -> None:
 
 def test_write_row_upserts_on_same_discord_message_id(isolated_db: Engine) -> None:
     """Verifies that duplicate discord_message_id writes update one row."""
-    log_msg._write_row_sync(row=_SAMPLE_ROW)
+    log_msg._write_rows_sync(rows=[_SAMPLE_ROW])
     edited_row = {
         **_SAMPLE_ROW,
         "content": "final streamed content with footer",
         "created_at": "2099-01-01 00:00:00",
     }
-    log_msg._write_row_sync(row=edited_row)
+    log_msg._write_rows_sync(rows=[edited_row])
 
     with isolated_db.connect() as conn:
         rows = conn.execute(text('SELECT content, created_at FROM "messages"')).all()
@@ -81,7 +82,7 @@ def test_write_row_upserts_on_same_discord_message_id(isolated_db: Engine) -> No
 
 def test_write_row_stores_different_sources_in_one_table(isolated_db: Engine) -> None:
     """Different channel and DM rows land in one messages table."""
-    log_msg._write_row_sync(row=_SAMPLE_ROW)
+    log_msg._write_rows_sync(rows=[_SAMPLE_ROW])
     other_row = {
         **_SAMPLE_ROW,
         "discord_message_id": "1002",
@@ -95,8 +96,7 @@ def test_write_row_stores_different_sources_in_one_table(isolated_db: Engine) ->
         "channel_name": "DM_alice_42",
         "content": "from dm",
     }
-    log_msg._write_row_sync(row=other_row)
-    log_msg._write_row_sync(row=dm_row)
+    log_msg._write_rows_sync(rows=[other_row, dm_row])
 
     with isolated_db.connect() as conn:
         rows = conn.execute(
@@ -124,8 +124,105 @@ async def test_write_row_concurrent_inserts_all_land(isolated_db: Engine) -> Non
         {**_SAMPLE_ROW, "discord_message_id": f"{2000 + i}", "content": f"msg-{i}"}
         for i in range(20)
     ]
-    await asyncio.gather(*[asyncio.to_thread(log_msg._write_row_sync, row=row) for row in rows])
+    await asyncio.gather(*[
+        asyncio.to_thread(log_msg._write_rows_sync, rows=[row]) for row in rows
+    ])
 
     with isolated_db.connect() as conn:
         count = conn.execute(text('SELECT COUNT(*) FROM "messages"')).scalar_one()
     assert count == 20
+
+
+def _stored(engine: Engine) -> list[tuple[str, str]]:
+    """Every stored (discord_message_id, content) pair, in insertion order."""
+    with engine.connect() as conn:
+        rows = conn.execute(text('SELECT discord_message_id, content FROM "messages" ORDER BY id'))
+        return [(row[0], row[1]) for row in rows]
+
+
+async def test_writer_collapses_waiting_edits_into_one_final_row(isolated_db: Engine) -> None:
+    """A streamed reply's edits replace its waiting row, and `close` writes what waits."""
+    writer = log_msg.MessageLogWriter()
+    for content in ("thinking...", "partial answer", "final answer"):
+        writer.enqueue(row={**_SAMPLE_ROW, "content": content})
+    writer.enqueue(row={**_SAMPLE_ROW, "discord_message_id": "1002", "content": "next"})
+
+    writer.close()
+
+    assert _stored(engine=isolated_db) == [("1001", "final answer"), ("1002", "next")]
+    writer.enqueue(row={**_SAMPLE_ROW, "discord_message_id": "1003"})
+    assert len(_stored(engine=isolated_db)) == 2
+
+
+async def test_writer_flushes_a_full_batch_before_the_interval(
+    isolated_db: Engine, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Reaching the batch size wakes the worker without waiting out the flush interval."""
+    monkeypatch.setattr(target=log_msg, name="MESSAGE_LOG_BATCH_ROWS", value=2)
+    monkeypatch.setattr(target=log_msg, name="MESSAGE_LOG_FLUSH_SECONDS", value=60.0)
+    loop = asyncio.get_running_loop()
+    flushed = asyncio.Event()
+    write_rows = log_msg._write_rows_sync
+
+    def spy(rows: list[dict[str, str]]) -> None:
+        write_rows(rows=rows)
+        loop.call_soon_threadsafe(flushed.set)
+
+    monkeypatch.setattr(target=log_msg, name="_write_rows_sync", value=spy)
+    writer = log_msg.MessageLogWriter()
+    writer.enqueue(row=_SAMPLE_ROW)
+    writer.enqueue(row={**_SAMPLE_ROW, "discord_message_id": "1002"})
+
+    await asyncio.wait_for(flushed.wait(), timeout=5)
+    writer.close()
+
+    assert _stored(engine=isolated_db) == [("1001", "hello world"), ("1002", "hello world")]
+
+
+async def test_writer_drops_new_messages_but_never_edits_when_full(
+    isolated_db: Engine, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Over the pending bound a new message is counted and dropped; an edit still lands."""
+    monkeypatch.setattr(target=log_msg, name="MESSAGE_LOG_MAX_PENDING", value=2)
+    monkeypatch.setattr(target=log_msg, name="MESSAGE_LOG_FLUSH_SECONDS", value=60.0)
+    writer = log_msg.MessageLogWriter()
+    writer.enqueue(row=_SAMPLE_ROW)
+    writer.enqueue(row={**_SAMPLE_ROW, "discord_message_id": "1002"})
+    writer.enqueue(row={**_SAMPLE_ROW, "discord_message_id": "1003"})
+    writer.enqueue(row={**_SAMPLE_ROW, "content": "edited"})
+
+    writer.close()
+
+    assert writer.dropped == 1
+    assert _stored(engine=isolated_db) == [("1001", "edited"), ("1002", "hello world")]
+
+
+async def test_close_lets_the_worker_finish_a_batch_in_flight(
+    isolated_db: Engine, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Closing mid-flush waits the handed-off batch out and leaves the worker uncancelled."""
+    monkeypatch.setattr(target=log_msg, name="MESSAGE_LOG_BATCH_ROWS", value=1)
+    loop = asyncio.get_running_loop()
+    writing = asyncio.Event()
+    release = threading.Event()
+    write_rows = log_msg._write_rows_sync
+
+    def held(rows: list[dict[str, str]]) -> None:
+        loop.call_soon_threadsafe(writing.set)
+        release.wait(timeout=5)
+        write_rows(rows=rows)
+
+    monkeypatch.setattr(target=log_msg, name="_write_rows_sync", value=held)
+    writer = log_msg.MessageLogWriter()
+    writer.enqueue(row=_SAMPLE_ROW)
+    await asyncio.wait_for(writing.wait(), timeout=5)
+    writer.enqueue(row={**_SAMPLE_ROW, "discord_message_id": "1002"})
+    worker = writer._worker
+    assert worker is not None
+
+    threading.Timer(interval=0.1, function=release.set).start()
+    writer.close()
+    await asyncio.wait_for(worker, timeout=5)
+
+    assert not worker.cancelled()
+    assert _stored(engine=isolated_db) == [("1001", "hello world"), ("1002", "hello world")]
@@ -89,6 +89,7 @@ from discordbot.services.memory.extraction import (
     target_centered_memory_messages,
     observation_key_sources_from_text,
 )
+from discordbot.services.memory.entry_index import index_path, read_entry_index
 
 from tests.helpers.casting import as_bot, as_interaction
 from tests.helpers.discord_mocks import FakeInteraction
@@ -393,6 +394,29 @@ def test_append_raw_entry_truncates_single_oversized_entry(
     assert raw_file_bytes(scope=USER_SCOPE) <= 80 + 1
 
 
+def test_the_raw_entry_index_follows_appends_and_heals_when_stale(
+    memory_isolated_dir: Path,
+) -> None:
+    """Counting reads the sidecar, and a sidecar that disagrees with the file is rebuilt."""
+    raw_path = memory_isolated_dir / str(USER_ID) / "raw.md"
+    for text in ("first", "second", "third"):
+        append_raw_entry(scope=USER_SCOPE, entry_text=text)
+    assert read_entry_index(path=raw_path).stored
+    assert count_raw_entries(scope=USER_SCOPE) == 3
+
+    # A hand edit the sidecar never saw, then a sidecar that is gone altogether.
+    with raw_path.open(mode="a", encoding="utf-8") as handle:
+        handle.write("\n## 2026-01-01T00:00:00+00:00\nhand-added\n")
+    assert count_raw_entries(scope=USER_SCOPE) == 4
+    index_path(path=raw_path).unlink()
+    append_raw_entry(scope=USER_SCOPE, entry_text="fifth")
+
+    index = read_entry_index(path=raw_path)
+    assert index.stored
+    assert len(index.offsets) == 5
+    assert raw_path.read_bytes()[index.offsets[-1] :].startswith(b"## ")
+
+
 def test_raw_file_bytes_missing_file_is_zero(memory_isolated_dir: Path) -> None:
     assert raw_file_bytes(scope=USER_SCOPE) == 0
     append_raw_entry(scope=USER_SCOPE, entry_text="something")
@@ -2511,6 +2535,27 @@ def test_append_detail_trims_oldest_past_cap(
     assert not detail_path.with_suffix(".md.tmp").exists()
 
 
+def test_a_detail_trim_cuts_on_an_entry_and_keeps_the_index_exact(
+    memory_isolated_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """The cut read off the index lands on a header, and the rewritten index still matches."""
+    monkeypatch.setattr("discordbot.services.memory.store.DETAIL_FILE_MAX_BYTES", 300)
+    monkeypatch.setattr("discordbot.services.memory.store.DETAIL_FILE_TRIM_TARGET_BYTES", 200)
+    for index in range(6):
+        append_detail(
+            scope=USER_SCOPE,
+            text=f"## 2026-01-0{index + 1}T00:00:00+00:00\nentry {index} " + "a" * 80,
+        )
+    detail_path = memory_isolated_dir / str(USER_ID) / "detail.md"
+    stored = read_entry_index(path=detail_path)
+    index_path(path=detail_path).unlink()
+    rebuilt = read_entry_index(path=detail_path)
+
+    assert detail_path.read_bytes().startswith(b"## ")
+    assert stored.stored
+    assert (stored.offsets, stored.size) == (rebuilt.offsets, rebuilt.size)
+
+
 async def test_pipeline_clear_resets_consolidation_cooldown(
     memory_isolated_dir: Path, monkeypatch: pytest.MonkeyPatch
 ) -> None:
@@ -0,0 +1,49 @@
+"""Tests for the offline memory-store bench: it generates a store and times every phase."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from scripts.memory_bench import StoreShape, BenchReport, run_bench, build_store
+
+from discordbot.services.memory.store import GLOBAL_COMPARTMENT, read_facts, iter_scopes
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+_TINY = StoreShape(
+    users=6, min_facts=3, max_facts=40, heavy_fraction=0.5, detail_bytes=4_096, seed=7
+)
+
+
+def test_the_generated_store_is_skewed_and_readable(memory_isolated_dir: Path) -> None:
+    """Ordinary users hold the floor, heavy ones more, and the store reads them all back."""
+    del memory_isolated_dir
+    generated = build_store(shape=_TINY)
+
+    assert [scope.scope for scope in generated] == iter_scopes()
+    for scope in generated:
+        stored = read_facts(scope=scope.scope, compartment=GLOBAL_COMPARTMENT)
+        if scope.heavy:
+            assert _TINY.min_facts <= len(stored) <= _TINY.max_facts
+        else:
+            assert len(stored) == _TINY.min_facts
+    assert any(scope.heavy for scope in generated)
+
+
+async def test_every_phase_runs_and_the_report_round_trips(memory_isolated_dir: Path) -> None:
+    """Each phase makes its calls, and the JSON a run writes reads back as its baseline."""
+    del memory_isolated_dir
+    report = await run_bench(shape=_TINY, sample=4, concurrency=2, label="test")
+
+    assert [phase.name for phase in report.phases] == [
+        "restart sweep",
+        "cold read",
+        "warm read",
+        "write burst",
+        "prune",
+    ]
+    assert all(phase.operations for phase in report.phases)
+    assert report.phases[0].operations == 1
+    assert (report.scopes, report.store_bytes > 0) == (_TINY.users, True)
+    assert BenchReport.model_validate_json(report.model_dump_json()) == report
@@ -18,6 +18,7 @@ from discordbot.typings.memory import (
     MemoryDurability,
     MemoryDeltaAction,
 )
+from discordbot.services.memory import store
 from discordbot.services.memory.facts import (
     FACT_ID_RE,
     mint_fact_id,
@@ -45,7 +46,9 @@ from discordbot.services.memory.store import (
     list_compartments,
     prune_compartment,
     unaccounted_files,
+    read_indexed_facts,
     read_memory_document,
+    cached_memory_document,
 )
 from discordbot.services.memory.deltas import (
     apply_deltas,
@@ -329,6 +332,72 @@ def test_reads_are_cached_until_a_write_lands(memory_isolated_dir: Path) -> None
     )
 
 
+def test_a_guild_write_leaves_the_global_parse_warm(
+    memory_isolated_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Only the compartment written is re-parsed; the shared `global/` tier is not."""
+    del memory_isolated_dir
+    scope = user_scope(user_id=111)
+    guild = guild_compartment(guild_id=500)
+    write_fact(scope=scope, fact=_fact(fact_id="a" * 16))
+    write_fact(scope=scope, fact=_fact(fact_id="b" * 16, compartment=guild))
+    read_memory_document(scope=scope, compartments=[GLOBAL_COMPARTMENT, guild], flavor="user")
+    parsed: list[str] = []
+
+    def counting_parse(text: str, compartment: str) -> MemoryFact | None:
+        parsed.append(compartment)
+        return parse_fact_file(text=text, compartment=compartment)
+
+    monkeypatch.setattr(store, "parse_fact_file", counting_parse)
+    write_fact(scope=scope, fact=_fact(fact_id="c" * 16, compartment=guild, text="新的"))
+    document = read_memory_document(
+        scope=scope, compartments=[GLOBAL_COMPARTMENT, guild], flavor="user"
+    )
+
+    assert "新的" in document
+    assert set(parsed) == {guild}
+
+
+def test_the_key_index_answers_in_id_order_and_follows_each_write(
+    memory_isolated_dir: Path,
+) -> None:
+    """Dedup finds the same fact the linear scan did, and never a stale one."""
+    del memory_isolated_dir
+    scope = user_scope(user_id=111)
+    write_fact(scope=scope, fact=_fact(fact_id="b" * 16, keys=("preference.a",)))
+    write_fact(scope=scope, fact=_fact(fact_id="a" * 16, keys=("preference.a", "fact.b")))
+    indexed = read_indexed_facts(scope=scope, compartment=GLOBAL_COMPARTMENT)
+
+    assert indexed.sharing_keys(keys=("fact.b", "preference.a")) == "a" * 16
+    assert indexed.sharing_keys(keys=("fact.z",)) is None
+    assert read_indexed_facts(scope=scope, compartment=GLOBAL_COMPARTMENT) is indexed
+
+    write_fact(scope=scope, fact=_fact(fact_id="a" * 16, keys=("fact.b",)))
+    rebuilt = read_indexed_facts(scope=scope, compartment=GLOBAL_COMPARTMENT)
+    assert rebuilt.sharing_keys(keys=("preference.a",)) == "b" * 16
+
+
+def test_a_full_render_cache_evicts_the_least_recently_used_document(
+    memory_isolated_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A full cache drops one cold entry, not every document it holds."""
+    del memory_isolated_dir
+    monkeypatch.setattr(store, "RENDER_CACHE_MAX_ENTRIES", 2)
+    scopes = [user_scope(user_id=user_id) for user_id in (111, 222, 333)]
+    for scope in scopes:
+        write_fact(scope=scope, fact=_fact())
+    cached_after_read = []
+    for scope in (scopes[0], scopes[1], scopes[0], scopes[2]):
+        read_memory_document(scope=scope, compartments=[GLOBAL_COMPARTMENT], flavor="user")
+    for scope in scopes:
+        cached = cached_memory_document(
+            scope=scope, compartments=[GLOBAL_COMPARTMENT], flavor="user"
+        )
+        cached_after_read.append(cached is not None)
+
+    assert cached_after_read == [True, False, True]
+
+
 def test_iter_scopes_finds_compartment_trees_and_skips_dot_dirs(memory_isolated_dir: Path) -> None:
     """The sweep sees a scope that has only fact files, and never the git directory."""
     write_fact(scope=user_scope(user_id=111), fact=_fact())
@@ -13,7 +13,8 @@ from collections.abc import Callable
 
 import pytest
 
-from discordbot.services.memory.store import user_scope
+from discordbot.services.memory import git_history
+from discordbot.services.memory.store import user_scope, append_raw_entry
 from discordbot.services.memory.git_history import MemoryGitService
 
 
@@ -27,6 +28,13 @@ def _git(repository: Path, *args: str) -> str:
     ).stdout
 
 
+@pytest.fixture(autouse=True)
+def short_debounce(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Settles a scope in a few ticks rather than seconds, so a test sees its commit."""
+    monkeypatch.setattr(git_history, "_DEBOUNCE_SECONDS", 0.05)
+    monkeypatch.setattr(git_history, "_MAX_DELAY_SECONDS", 1.0)
+
+
 @pytest.fixture
 def memory_repository(memory_isolated_dir: Path) -> Path:
     """Initializes the isolated memory dir as a git repository with one commit."""
@@ -67,6 +75,18 @@ async def test_a_scope_change_becomes_one_commit(memory_repository: Path) -> Non
     assert _git(memory_repository, "status", "--porcelain") == ""
 
 
+async def test_the_entry_indexes_stay_out_of_history(memory_repository: Path) -> None:
+    """A log's `.idx` sidecar is derived state, so only the log itself is committed."""
+    scope = user_scope(user_id=111)
+    append_raw_entry(scope=scope, entry_text="喜歡貓")
+    service = MemoryGitService()
+    service.start()
+    service.enqueue(scope=scope, reason="update")
+    await _wait_for(check=lambda: "update 111" in _git(memory_repository, "log", "--format=%s"))
+    await service.stop()
+    assert _git(memory_repository, "ls-files", "--", scope).strip() == "111/raw.md"
+
+
 async def test_an_unchanged_scope_makes_no_commit(memory_repository: Path) -> None:
     """The status guard is required, not an optimization: `git add` on a never-tracked,
     now-absent path exits 128, and an empty commit would fail too.
@@ -133,8 +153,12 @@ async def test_repeated_failures_disable_the_service(memory_repository: Path) ->
     # Removing the repository after start makes every git invocation fail without
     # touching the stored files, which is the shape of a genuinely broken deployment.
     shutil.rmtree(memory_repository / ".git")
-    for _ in range(5):
+    for attempt in range(1, 6):
+        # One at a time: requests pending together would coalesce into a single attempt.
         service.enqueue(scope=scope, reason="update")
+        await _wait_for(
+            check=lambda attempt=attempt: service.stats().consecutive_failures >= attempt
+        )
     await _wait_for(check=lambda: not service.enabled)
     await service.stop()
     assert not service.enabled
@@ -160,3 +184,25 @@ async def test_commits_carry_their_own_committer_identity(memory_repository: Pat
     await service.stop()
     assert service.enabled
     assert "discordbot" in _git(memory_repository, "log", "-1", "--format=%an")
+
+
+async def test_scopes_that_settle_together_share_one_commit(memory_repository: Path) -> None:
+    """A burst over several scopes is one commit naming each, not one commit per request."""
+    scopes = [user_scope(user_id=111), user_scope(user_id=222), "bot_memories/333"]
+    service = MemoryGitService()
+    service.start()
+    for scope in scopes:
+        (memory_repository / scope / "global").mkdir(parents=True)
+        (memory_repository / scope / "global" / "a.md").write_text("fact", encoding="utf-8")
+        service.enqueue(scope=scope, reason="update")
+        service.enqueue(scope=scope, reason="update")
+    # A scope that changed nothing rides along without failing the staging of the rest.
+    service.enqueue(scope=user_scope(user_id=999), reason="update")
+    await _wait_for(check=lambda: service.stats().commits == 1)
+    await service.stop()
+
+    log = _git(memory_repository, "log", "--format=%B", "-1")
+    assert log.startswith("chore(memory): 3 scopes")
+    assert {"update 111", "update 222", "update bot_memories/333"} <= set(log.splitlines())
+    assert _git(memory_repository, "status", "--porcelain") == ""
+    assert service.stats().commits_saved == 6
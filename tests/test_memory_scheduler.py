@@ -0,0 +1,173 @@
+"""Tests for the cross-scope consolidation scheduler: budget, priority, cancellation."""
+
+from typing import Any
+import asyncio
+
+import pytest
+
+from discordbot.services.memory import scheduler
+from discordbot.services.memory.scheduler import (
+    ConsolidationScheduler,
+    estimate_consolidation_tokens,
+)
+
+# Short enough that a test can wait out a whole budget window.
+_WINDOW = 0.05
+
+
+@pytest.fixture
+def short_window(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Shrinks the budget window from a minute to a few ticks."""
+    monkeypatch.setattr(scheduler, "_WINDOW_SECONDS", _WINDOW)
+
+
+async def test_without_a_budget_every_consolidation_is_admitted_at_once() -> None:
+    """Unconfigured, the gate is the behaviour from before it existed."""
+    gate = ConsolidationScheduler()
+
+    await asyncio.wait_for(
+        asyncio.gather(*[
+            gate.admit(scope=f"user_{index}", backlog_bytes=100, estimated_tokens=10**9)
+            for index in range(5)
+        ]),
+        timeout=1,
+    )
+
+    stats = gate.stats()
+    assert (stats.queue_depth, stats.admitted) == (0, 5)
+    assert stats.mean_request_tokens == 10**9
+
+
+async def test_a_full_budget_defers_the_next_scope_until_the_window_frees(
+    short_window: None,
+) -> None:
+    """The second admission waits for the first one's tokens to leave the window."""
+    del short_window
+    gate = ConsolidationScheduler(tokens_per_minute=100)
+    await gate.admit(scope="user_1", backlog_bytes=100, estimated_tokens=80)
+
+    waiting = asyncio.create_task(
+        gate.admit(scope="user_2", backlog_bytes=100, estimated_tokens=80)
+    )
+    await asyncio.sleep(0)
+    assert not waiting.done()
+    assert gate.stats().queue_depth == 1
+
+    await asyncio.wait_for(waiting, timeout=1)
+    assert gate.stats().tokens_last_minute == 80
+
+
+async def test_an_oversized_consolidation_still_runs_alone(short_window: None) -> None:
+    """A request bigger than the whole budget is admitted into an empty window, not never."""
+    del short_window
+    gate = ConsolidationScheduler(tokens_per_minute=10)
+
+    await asyncio.wait_for(
+        gate.admit(scope="user_1", backlog_bytes=100, estimated_tokens=500), timeout=1
+    )
+    assert gate.stats().tokens_last_minute == 500
+
+
+async def test_the_largest_backlog_is_admitted_first(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Once the window frees, the queue is served by backlog, not by arrival."""
+    # Long enough that a loaded runner cannot free a second window before the assert.
+    monkeypatch.setattr(scheduler, "_WINDOW_SECONDS", _WINDOW * 10)
+    gate = ConsolidationScheduler(tokens_per_minute=100)
+    await gate.admit(scope="user_0", backlog_bytes=100, estimated_tokens=100)
+    admitted: list[str] = []
+
+    async def _admit(scope: str, backlog_bytes: int) -> None:
+        await gate.admit(scope=scope, backlog_bytes=backlog_bytes, estimated_tokens=100)
+        admitted.append(scope)
+
+    small = asyncio.create_task(_admit(scope="user_small", backlog_bytes=1_000))
+    large = asyncio.create_task(_admit(scope="user_large", backlog_bytes=50_000))
+    await asyncio.wait_for(large, timeout=2)
+
+    assert not small.done()
+    # order-contract: the budget fits one admission per window, and the larger backlog wins it.
+    assert admitted == ["user_large"]
+    await asyncio.wait_for(small, timeout=2)
+
+
+async def test_a_cancelled_waiter_leaves_the_queue(short_window: None) -> None:
+    """A consolidation cancelled while queued is charged nothing and waits for nothing."""
+    del short_window
+    gate = ConsolidationScheduler(tokens_per_minute=100)
+    await gate.admit(scope="user_1", backlog_bytes=100, estimated_tokens=100)
+    waiting = asyncio.create_task(
+        gate.admit(scope="user_2", backlog_bytes=100, estimated_tokens=50)
+    )
+    await asyncio.sleep(0)
+
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+
+    stats = gate.stats()
+    assert (stats.queue_depth, stats.admitted) == (0, 1)
+
+
+async def test_a_scope_already_waiting_is_joined_not_queued_twice(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """A repeat request shares the waiter, refreshes its estimate, and survives a cancel."""
+    monkeypatch.setattr(scheduler, "_WINDOW_SECONDS", _WINDOW * 10)
+    gate = ConsolidationScheduler(tokens_per_minute=100)
+    await gate.admit(scope="user_1", backlog_bytes=100, estimated_tokens=100)
+    first = asyncio.create_task(gate.admit(scope="user_2", backlog_bytes=100, estimated_tokens=50))
+    second = asyncio.create_task(
+        gate.admit(scope="user_2", backlog_bytes=4_000, estimated_tokens=70)
+    )
+    await asyncio.sleep(0)
+    assert gate.stats().queue_depth == 1
+
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert gate.stats().queue_depth == 1
+
+    await asyncio.wait_for(second, timeout=2)
+    stats = gate.stats()
+    assert (stats.queue_depth, stats.admitted, stats.tokens_last_minute) == (0, 2, 70)
+
+
+async def test_waiters_behind_a_full_budget_share_one_wakeup(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Every admit and cancel re-dispatches, but only one timer is ever left pending."""
+    monkeypatch.setattr(scheduler, "_WINDOW_SECONDS", 60.0)
+    gate = ConsolidationScheduler(tokens_per_minute=100)
+    await gate.admit(scope="user_0", backlog_bytes=100, estimated_tokens=100)
+    loop = asyncio.get_running_loop()
+    scheduled: list[asyncio.TimerHandle] = []
+    call_later = loop.call_later
+
+    def recording_call_later(*args: Any) -> asyncio.TimerHandle:  # noqa: ANN401 -- forwards call_later
+        handle = call_later(*args)
+        scheduled.append(handle)
+        return handle
+
+    monkeypatch.setattr(loop, "call_later", recording_call_later)
+    waiting = [
+        asyncio.create_task(
+            gate.admit(scope=f"user_{index}", backlog_bytes=100, estimated_tokens=50)
+        )
+        for index in range(1, 4)
+    ]
+    await asyncio.sleep(0)
+    waiting[0].cancel()
+    await asyncio.sleep(0)
+
+    assert len(scheduled) == 4
+    # order-contract: each dispatch cancels the timer before it, so only the newest survives.
+    assert [handle.cancelled() for handle in scheduled] == [True, True, True, False]
+    for task in waiting:
+        task.cancel()
+    await asyncio.gather(*waiting, return_exceptions=True)
+
+
+def test_the_estimate_counts_the_prompt_once_per_call() -> None:
+    """The prompt goes out with every call; the evidence, split across them, counts once."""
+    assert estimate_consolidation_tokens(prompt_bytes=300, evidence_bytes=900, calls=3) == 600
+    assert estimate_consolidation_tokens(prompt_bytes=300, evidence_bytes=0, calls=0) == 100
@@ -0,0 +1,253 @@
+"""Tests for the packed fact layout: the segment format, its writers, and the export script."""
+
+from pathlib import Path
+from datetime import UTC, datetime
+
+import pytest
+from scripts import export_memories as export_script
+
+from discordbot.typings.memory import MemoryFact
+from discordbot.services.memory import store
+from discordbot.services.memory.facts import node_type_for, render_fact_file
+from discordbot.services.memory.store import (
+    GLOBAL_COMPARTMENT,
+    read_facts,
+    user_scope,
+    write_fact,
+    delete_fact,
+    write_facts,
+    compartment_dir,
+    prune_compartment,
+    compact_compartment,
+)
+from discordbot.services.memory.segments import SEGMENT_NAME, scan_segment, encode_records
+
+SCOPE = user_scope(user_id=7)
+_NOW = datetime(2026, 7, 1, 12, 0, 0, tzinfo=UTC)
+
+
+def _fact(fact_id: str, text: str = "喜歡簡短回覆") -> MemoryFact:
+    """Builds a global-compartment fact with the boilerplate filled in."""
+    return MemoryFact(
+        fact_id=fact_id,
+        summary="回覆長度偏好",
+        section="preference",
+        durability="stable",
+        text=text,
+        compartment=GLOBAL_COMPARTMENT,
+        owner_id=7,
+        owner_name="Alice (alice)",
+        node_type=node_type_for(section="preference"),
+        created=_NOW,
+        last_confirmed=_NOW,
+    )
+
+
+def _directory() -> Path:
+    """The global compartment of the test scope."""
+    return compartment_dir(scope=SCOPE, compartment=GLOBAL_COMPARTMENT)
+
+
+@pytest.fixture
+def packed(memory_isolated_dir: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """The isolated store, writing the packed layout."""
+    monkeypatch.setattr(store, "_packed_storage", True)
+    return memory_isolated_dir
+
+
+def test_a_packed_batch_is_one_segment_and_reads_back(packed: Path) -> None:
+    """Writes and deletes land as records in `facts.seg`, never as loose files."""
+    del packed
+    write_facts(
+        scope=SCOPE,
+        compartment=GLOBAL_COMPARTMENT,
+        writes=[_fact(fact_id="00000000000000aa"), _fact(fact_id="00000000000000bb")],
+        deletes=set(),
+    )
+    write_fact(scope=SCOPE, fact=_fact(fact_id="00000000000000aa", text="改成詳細回覆"))
+
+    assert delete_fact(scope=SCOPE, compartment=GLOBAL_COMPARTMENT, fact_id="00000000000000bb")
+    assert not delete_fact(scope=SCOPE, compartment=GLOBAL_COMPARTMENT, fact_id="00000000000000bb")
+    assert [path.name for path in _directory().iterdir()] == [SEGMENT_NAME]
+    (fact,) = read_facts(scope=SCOPE, compartment=GLOBAL_COMPARTMENT)
+    assert (fact.fact_id, fact.text) == ("00000000000000aa", "改成詳細回覆")
+
+
+def test_a_torn_tail_is_skipped_by_readers_and_cut_by_the_next_append(packed: Path) -> None:
+    """An interrupted append costs only its own record."""
+    del packed
+    write_fact(scope=SCOPE, fact=_fact(fact_id="00000000000000aa"))
+    segment = _directory() / SEGMENT_NAME
+    with segment.open(mode="ab") as handle:
+        handle.write(b"+00000000000000bb 999\npartial")
+
+    assert [fact.fact_id for fact in read_facts(scope=SCOPE, compartment=GLOBAL_COMPARTMENT)] == [
+        "00000000000000aa"
+    ]
+    write_fact(scope=SCOPE, fact=_fact(fact_id="00000000000000cc"))
+
+    scan = scan_segment(data=segment.read_bytes())
+    assert not scan.torn
+    assert sorted(scan.live) == ["00000000000000aa", "00000000000000cc"]
+
+
+def test_a_corrupt_segment_refuses_writes_but_keeps_its_readable_prefix(packed: Path) -> None:
+    """Appending past bytes nobody can parse would hide the write, so it raises instead."""
+    del packed
+    write_fact(scope=SCOPE, fact=_fact(fact_id="00000000000000aa"))
+    segment = _directory() / SEGMENT_NAME
+    with segment.open(mode="ab") as handle:
+        handle.write(
+            b"garbage\n" + encode_records(writes={"00000000000000bb": b"x"}, deletes=set())
+        )
+
+    with pytest.raises(ValueError, match="corrupt"):
+        write_fact(scope=SCOPE, fact=_fact(fact_id="00000000000000cc"))
+    assert [fact.fact_id for fact in read_facts(scope=SCOPE, compartment=GLOBAL_COMPARTMENT)] == [
+        "00000000000000aa"
+    ]
+
+
+def test_a_refused_packed_write_keeps_the_loose_copy_it_would_replace(
+    memory_isolated_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A corrupt segment fails the batch before the loose file it updates is removed."""
+    del memory_isolated_dir
+    write_fact(scope=SCOPE, fact=_fact(fact_id="00000000000000aa"))
+    monkeypatch.setattr(store, "_packed_storage", True)
+    write_fact(scope=SCOPE, fact=_fact(fact_id="00000000000000bb"))
+    with (_directory() / SEGMENT_NAME).open(mode="ab") as handle:
+        handle.write(b"garbage\n")
+    assert len(read_facts(scope=SCOPE, compartment=GLOBAL_COMPARTMENT)) == 2
+
+    with pytest.raises(ValueError, match="corrupt"):
+        write_fact(scope=SCOPE, fact=_fact(fact_id="00000000000000aa", text="改成詳細回覆"))
+
+    assert (_directory() / "00000000000000aa.md").exists()
+    store.drop_read_caches()
+    texts = {
+        fact.fact_id: fact.text for fact in read_facts(scope=SCOPE, compartment=GLOBAL_COMPARTMENT)
+    }
+    assert texts == {"00000000000000aa": "喜歡簡短回覆", "00000000000000bb": "喜歡簡短回覆"}
+
+
+def test_a_write_that_fails_partway_still_invalidates_cached_reads(
+    packed: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A delete already applied when the append fails is not undone by the fact cache."""
+    del packed
+    monkeypatch.setattr(store, "_packed_storage", False)
+    write_fact(scope=SCOPE, fact=_fact(fact_id="00000000000000aa"))
+    monkeypatch.setattr(store, "_packed_storage", True)
+    assert len(read_facts(scope=SCOPE, compartment=GLOBAL_COMPARTMENT)) == 1
+
+    def failing_append(**kwargs: object) -> None:
+        del kwargs
+        raise OSError("disk full")
+
+    monkeypatch.setattr(store, "append_records", failing_append)
+    with pytest.raises(OSError, match="disk full"):
+        write_facts(
+            scope=SCOPE,
+            compartment=GLOBAL_COMPARTMENT,
+            writes=[_fact(fact_id="00000000000000bb")],
+            deletes={"00000000000000aa"},
+        )
+
+    assert read_facts(scope=SCOPE, compartment=GLOBAL_COMPARTMENT) == []
+
+
+def test_dead_records_past_the_floor_trigger_a_compaction(
+    packed: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Rewriting one fact over and over does not grow the segment without bound."""
+    del packed
+    monkeypatch.setattr(store, "SEGMENT_COMPACT_MIN_BYTES", 0)
+    for round_number in range(5):
+        write_fact(scope=SCOPE, fact=_fact(fact_id="00000000000000aa", text=f"第{round_number}版"))
+
+    data = (_directory() / SEGMENT_NAME).read_bytes()
+    scan = scan_segment(data=data)
+    assert scan.dead_bytes < scan.live_bytes
+    (fact,) = read_facts(scope=SCOPE, compartment=GLOBAL_COMPARTMENT)
+    assert fact.text == "第4版"
+
+
+def test_a_loose_file_overrides_the_record_and_a_delete_removes_both(
+    memory_isolated_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Switching layouts either way neither shadows a newer write nor resurrects a fact."""
+    del memory_isolated_dir
+    monkeypatch.setattr(store, "_packed_storage", True)
+    write_fact(scope=SCOPE, fact=_fact(fact_id="00000000000000aa", text="舊的"))
+    monkeypatch.setattr(store, "_packed_storage", False)
+    write_fact(scope=SCOPE, fact=_fact(fact_id="00000000000000aa", text="新的"))
+
+    (fact,) = read_facts(scope=SCOPE, compartment=GLOBAL_COMPARTMENT)
+    assert fact.text == "新的"
+    assert delete_fact(scope=SCOPE, compartment=GLOBAL_COMPARTMENT, fact_id="00000000000000aa")
+    assert read_facts(scope=SCOPE, compartment=GLOBAL_COMPARTMENT) == []
+
+
+def test_compaction_folds_loose_files_into_the_segment(memory_isolated_dir: Path) -> None:
+    """The `--pack` migration leaves one segment holding exactly what was readable."""
+    del memory_isolated_dir
+    write_fact(scope=SCOPE, fact=_fact(fact_id="00000000000000aa"))
+    write_fact(scope=SCOPE, fact=_fact(fact_id="00000000000000bb"))
+    before = read_facts(scope=SCOPE, compartment=GLOBAL_COMPARTMENT)
+
+    assert compact_compartment(scope=SCOPE, compartment=GLOBAL_COMPARTMENT) == 2
+    assert [path.name for path in _directory().iterdir()] == [SEGMENT_NAME]
+    assert read_facts(scope=SCOPE, compartment=GLOBAL_COMPARTMENT) == before
+
+
+def test_a_prune_rewrites_the_segment_and_reports_unreadable_records(packed: Path) -> None:
+    """Records outside `keep` go, and one no reader could parse is named in the report."""
+    del packed
+    write_facts(
+        scope=SCOPE,
+        compartment=GLOBAL_COMPARTMENT,
+        writes=[_fact(fact_id="00000000000000aa"), _fact(fact_id="00000000000000bb")],
+        deletes=set(),
+    )
+    segment = _directory() / SEGMENT_NAME
+    with segment.open(mode="ab") as handle:
+        handle.write(encode_records(writes={"00000000000000cc": b"not a fact"}, deletes=set()))
+
+    pruned = prune_compartment(
+        scope=SCOPE, compartment=GLOBAL_COMPARTMENT, keep={"00000000000000aa"}
+    )
+
+    assert pruned.unreadable == [f"{SEGMENT_NAME}:00000000000000cc"]
+    assert sorted(scan_segment(data=segment.read_bytes()).live) == ["00000000000000aa"]
+
+
+def test_the_export_writes_one_file_per_fact_and_drops_deleted_ones(
+    packed: Path, tmp_path: Path
+) -> None:
+    """Two exports diff fact by fact, and a rerun rebuilds rather than accumulates."""
+    del packed
+    fact = _fact(fact_id="00000000000000aa")
+    write_fact(scope=SCOPE, fact=fact)
+    write_fact(scope=SCOPE, fact=_fact(fact_id="00000000000000bb"))
+    out = tmp_path / "export"
+
+    assert export_script.export_store(out=out) == (2, 0)
+    exported = out / SCOPE / GLOBAL_COMPARTMENT / "00000000000000aa.md"
+    assert exported.read_text(encoding="utf-8") == render_fact_file(fact=fact)
+
+    delete_fact(scope=SCOPE, compartment=GLOBAL_COMPARTMENT, fact_id="00000000000000bb")
+    assert export_script.export_store(out=out) == (1, 0)
+    assert not (out / SCOPE / GLOBAL_COMPARTMENT / "00000000000000bb.md").exists()
+
+
+def test_the_export_refuses_a_directory_it_did_not_write(packed: Path, tmp_path: Path) -> None:
+    """A mistyped path is never emptied."""
+    del packed
+    out = tmp_path / "elsewhere"
+    out.mkdir()
+    (out / "keep.txt").write_text("mine", encoding="utf-8")
+
+    with pytest.raises(SystemExit):
+        export_script.export_store(out=out)
+    assert (out / "keep.txt").exists()
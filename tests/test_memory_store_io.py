@@ -0,0 +1,177 @@
+"""Tests for the memory store's off-loop IO facade."""
+
+import time
+from typing import Any
+import asyncio
+from pathlib import Path
+from functools import partial
+import threading
+
+import pytest
+
+from discordbot.services.memory import store_io
+from discordbot.services.memory.store import (
+    GLOBAL_COMPARTMENT,
+    user_scope,
+    mark_cleared,
+    append_raw_entry,
+    count_raw_entries,
+    delete_memory_files,
+    read_memory_document,
+)
+from discordbot.services.memory.store_io import MemoryStoreIO
+
+SCOPE = user_scope(user_id=7)
+
+
+async def test_a_cached_document_is_served_without_a_thread_hop(
+    memory_isolated_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Only the miss reaches the pool; the repeat read of an unchanged scope stays on the loop."""
+    del memory_isolated_dir
+    threads: list[str] = []
+
+    def counting_read(**kwargs: Any) -> str:  # noqa: ANN401 -- forwards the store's own keywords
+        threads.append(threading.current_thread().name)
+        return read_memory_document(**kwargs)
+
+    monkeypatch.setattr(store_io, "read_memory_document", counting_read)
+    facade = MemoryStoreIO(workers=1)
+
+    for _ in range(2):
+        await facade.read_memory_document(
+            scope=SCOPE, compartments=[GLOBAL_COMPARTMENT], flavor="user"
+        )
+
+    assert len(threads) == 1
+    assert all(name.startswith("memory-io") for name in threads)
+
+
+async def test_a_write_after_a_clear_stamp_writes_nothing(memory_isolated_dir: Path) -> None:
+    """The guard is re-checked on the worker, so a clear that won the race keeps the scope empty."""
+    del memory_isolated_dir
+    started_at = time.monotonic()
+    mark_cleared(scope=SCOPE)
+
+    written = await MemoryStoreIO(workers=1).run_unless_cleared(
+        scope=SCOPE,
+        started_at=started_at,
+        call=partial(append_raw_entry, scope=SCOPE, entry_text="- 喜歡貓"),
+    )
+
+    assert written is None
+    assert count_raw_entries(scope=SCOPE) == 0
+
+
+async def test_a_clear_waits_for_the_write_already_running(memory_isolated_dir: Path) -> None:
+    """A write past its guard finishes before the clear's file pass, which then removes it."""
+    del memory_isolated_dir
+    facade = MemoryStoreIO(workers=2)
+    entered = threading.Event()
+    release = threading.Event()
+
+    def held_append() -> None:
+        entered.set()
+        release.wait(timeout=5)
+        append_raw_entry(scope=SCOPE, entry_text="- 喜歡貓")
+
+    write = asyncio.create_task(
+        facade.run_unless_cleared(scope=SCOPE, started_at=time.monotonic(), call=held_append)
+    )
+    await asyncio.to_thread(entered.wait, 5)
+    clear = asyncio.create_task(
+        facade.run(scope=SCOPE, call=partial(delete_memory_files, scope=SCOPE))
+    )
+    await asyncio.sleep(0.05)
+    assert not clear.done()
+
+    release.set()
+    await write
+
+    assert await clear is True
+    assert count_raw_entries(scope=SCOPE) == 0
+
+
+async def test_a_busy_scope_holds_one_thread_and_others_read_past_it(
+    memory_isolated_dir: Path,
+) -> None:
+    """Jobs queued behind a slow one wait on the loop, not on a worker thread."""
+    del memory_isolated_dir
+    facade = MemoryStoreIO(workers=2)
+    entered = threading.Event()
+    release = threading.Event()
+
+    def held_prune() -> None:
+        entered.set()
+        release.wait(timeout=5)
+
+    busy = [asyncio.create_task(facade.run(scope=SCOPE, call=held_prune))]
+    await asyncio.to_thread(entered.wait, 5)
+    busy += [
+        asyncio.create_task(facade.run(scope=SCOPE, call=partial(count_raw_entries, scope=SCOPE)))
+        for _ in range(3)
+    ]
+    other = user_scope(user_id=8)
+
+    assert (
+        await asyncio.wait_for(
+            facade.run(scope=other, call=partial(count_raw_entries, scope=other)), timeout=2
+        )
+        == 0
+    )
+
+    release.set()
+    await asyncio.gather(*busy)
+    assert facade._tails == {}
+
+
+async def test_a_cancelled_caller_keeps_its_scope_until_the_thread_is_done(
+    memory_isolated_dir: Path,
+) -> None:
+    """A timed-out write still running on its thread is not overtaken by the next job."""
+    del memory_isolated_dir
+    facade = MemoryStoreIO(workers=2)
+    entered = threading.Event()
+    release = threading.Event()
+
+    def held_append() -> None:
+        entered.set()
+        release.wait(timeout=5)
+        append_raw_entry(scope=SCOPE, entry_text="- 喜歡貓")
+
+    write = asyncio.create_task(facade.run(scope=SCOPE, call=held_append))
+    await asyncio.to_thread(entered.wait, 5)
+    write.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await write
+    count = asyncio.create_task(
+        facade.run(scope=SCOPE, call=partial(count_raw_entries, scope=SCOPE))
+    )
+    await asyncio.sleep(0.05)
+    assert not count.done()
+
+    release.set()
+    assert await count == 1
+
+
+async def test_a_slow_call_is_reported_with_its_run_and_queue_time(
+    memory_isolated_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """The log line names the store function, not the facade's wrapper around it."""
+    del memory_isolated_dir
+    warnings: list[dict[str, Any]] = []
+    monkeypatch.setattr(store_io, "MEMORY_IO_SLOW_SECONDS", 0.0)
+    monkeypatch.setattr(
+        store_io.logfire, "warn", lambda message, **fields: warnings.append(fields)
+    )
+
+    await MemoryStoreIO(workers=1).run_unless_cleared(
+        scope=SCOPE,
+        started_at=time.monotonic(),
+        call=partial(append_raw_entry, scope=SCOPE, entry_text="- 喜歡貓"),
+    )
+
+    (warning,) = warnings
+    assert warning["operation"] == "append_raw_entry"
+    assert warning["io_seconds"] >= 0
+    assert warning["queued_seconds"] >= 0
@@ -0,0 +1,151 @@
+"""Tests for the write-behind message reward aggregator."""
+
+import asyncio
+
+import pytest
+
+from discordbot.typings.economy import IncomeCredit
+from discordbot.services.economy import message_rewards
+from discordbot.services.economy.database import top_n, get_account, get_balance
+from discordbot.services.economy.message_rewards import MessageRewardAggregator
+
+pytestmark = pytest.mark.usefixtures("economy_isolated_db")
+
+
+async def test_credits_merge_per_user_and_land_in_one_flush() -> None:
+    """Repeat credits merge, and the whole batch is one write the leaderboard sees."""
+    aggregator = MessageRewardAggregator()
+    for _ in range(3):
+        aggregator.add(user_id=1, name="alice", avatar_url="", amount=10)
+    aggregator.add(user_id=2, name="bob", avatar_url="https://cdn.test/bob.png", amount=10)
+    aggregator.add(user_id=3, name="carol", avatar_url="", amount=0)
+
+    assert await aggregator.flush() == 2
+
+    assert await get_balance(user_id=1) == 30
+    account = await get_account(user_id=2)
+    assert (account.name, account.balance, account.total_earned) == ("bob", 10, 10)
+    assert await get_balance(user_id=3) == 0
+    assert [(row.user_id, row.balance) for row in await top_n(limit=3)] == [(1, 30), (2, 10)]
+    stats = aggregator.stats()
+    assert (stats.pending_users, stats.credits, stats.flushes, stats.credits_saved) == (0, 4, 1, 3)
+
+
+async def test_a_failed_flush_keeps_its_credits_for_the_next_one(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """A write that raises loses nothing; credits taken meanwhile merge on top."""
+    real_batch = message_rewards.credit_income_batch
+
+    async def failing_batch(incomes: list[IncomeCredit]) -> int:
+        del incomes
+        raise RuntimeError("database is locked")
+
+    aggregator = MessageRewardAggregator()
+    aggregator.add(user_id=1, name="alice", avatar_url="https://cdn.test/a.png", amount=10)
+    monkeypatch.setattr(message_rewards, "credit_income_batch", failing_batch)
+    assert await aggregator.flush() == 0
+    assert aggregator.stats().consecutive_failures == 1
+
+    aggregator.add(user_id=1, name="alice", avatar_url="", amount=10)
+    monkeypatch.setattr(message_rewards, "credit_income_batch", real_batch)
+    assert await aggregator.flush() == 1
+
+    assert await get_balance(user_id=1) == 20
+    assert aggregator.stats().consecutive_failures == 0
+
+
+async def test_the_worker_flushes_a_full_batch_and_stop_writes_the_rest(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Enough waiting users flush without the interval; `stop` flushes the remainder."""
+    real_batch = message_rewards.credit_income_batch
+    flushed = asyncio.Event()
+
+    async def signalling_batch(incomes: list[IncomeCredit]) -> int:
+        written = await real_batch(incomes=incomes)
+        flushed.set()
+        return written
+
+    monkeypatch.setattr(message_rewards, "credit_income_batch", signalling_batch)
+    monkeypatch.setattr(message_rewards, "_FLUSH_MAX_USERS", 3)
+    monkeypatch.setattr(message_rewards, "_FLUSH_INTERVAL_SECONDS", 60.0)
+    aggregator = MessageRewardAggregator()
+    aggregator.start()
+    for user_id in (1, 2, 3):
+        aggregator.add(user_id=user_id, name=str(user_id), avatar_url="", amount=10)
+    await asyncio.wait_for(flushed.wait(), timeout=5)
+
+    aggregator.add(user_id=4, name="4", avatar_url="", amount=10)
+    await aggregator.stop()
+
+    assert [await get_balance(user_id=user_id) for user_id in (1, 2, 3, 4)] == [10] * 4
+    assert aggregator.stats().flushes == 2
+
+
+async def test_stop_during_a_flush_lets_its_write_land(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Stopping while the worker is mid-write neither drops nor repeats the batch."""
+    real_batch = message_rewards.credit_income_batch
+    writing = asyncio.Event()
+
+    async def slow_batch(incomes: list[IncomeCredit]) -> int:
+        writing.set()
+        await asyncio.sleep(0.5)
+        return await real_batch(incomes=incomes)
+
+    monkeypatch.setattr(message_rewards, "credit_income_batch", slow_batch)
+    aggregator = MessageRewardAggregator()
+    for user_id in range(1, message_rewards._FLUSH_MAX_USERS + 1):
+        aggregator.add(user_id=user_id, name=str(user_id), avatar_url="", amount=10)
+    aggregator.start()
+    await asyncio.wait_for(writing.wait(), timeout=5)
+
+    await aggregator.stop()
+
+    assert len(await top_n(limit=100)) == message_rewards._FLUSH_MAX_USERS
+    assert (aggregator.stats().pending_users, aggregator.stats().flushes) == (0, 1)
+
+
+async def test_a_cancelled_flush_still_writes_its_batch_once(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Cancelling the caller leaves the write running; its credits are not taken back."""
+    real_batch = message_rewards.credit_income_batch
+    writing = asyncio.Event()
+    written = asyncio.Event()
+
+    async def slow_batch(incomes: list[IncomeCredit]) -> int:
+        writing.set()
+        await asyncio.sleep(0.2)
+        users = await real_batch(incomes=incomes)
+        written.set()
+        return users
+
+    monkeypatch.setattr(message_rewards, "credit_income_batch", slow_batch)
+    aggregator = MessageRewardAggregator()
+    aggregator.add(user_id=1, name="alice", avatar_url="", amount=10)
+    flush = asyncio.create_task(aggregator.flush())
+    await asyncio.wait_for(writing.wait(), timeout=5)
+    flush.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await flush
+    await asyncio.wait_for(written.wait(), timeout=5)
+
+    assert await aggregator.flush() == 0
+    assert await get_balance(user_id=1) == 10
+
+
+async def test_a_nameless_credit_keeps_the_stored_name() -> None:
+    """An empty name in a batch leaves the account's name alone, not its user ID."""
+    aggregator = MessageRewardAggregator()
+    aggregator.add(user_id=1, name="alice", avatar_url="", amount=10)
+    await aggregator.flush()
+
+    aggregator.add(user_id=1, name="", avatar_url="", amount=10)
+    aggregator.add(user_id=2, name="", avatar_url="", amount=10)
+    assert await aggregator.flush() == 2
+
+    alice = await get_account(user_id=1)
+    assert (alice.name, alice.balance) == ("alice", 20)
+    assert (await get_account(user_id=2)).name == "2"
+    assert [row.name for row in await top_n(limit=2)] == ["alice", "2"]
@@ -2,6 +2,7 @@
 
 from typing import TYPE_CHECKING, cast
 import asyncio
+from pathlib import Path
 
 import pytest
 from scripts import regen_memories as regen_script
@@ -18,6 +19,7 @@ from discordbot.services.memory.store import (
 )
 from discordbot.services.memory.pipeline import RegenerationReport
 from discordbot.services.memory.constants import MEMORY_GLOBAL_CONCURRENCY
+from discordbot.services.memory.scheduler import ConsolidationScheduler
 
 if TYPE_CHECKING:
     from discordbot.services.memory.extraction import MemoryExtractorAI
@@ -92,9 +94,12 @@ def test_parse_args_defaults_to_the_real_rebuild_over_the_whole_store() -> None:
 
 
 def test_the_offline_fan_out_does_not_reuse_the_live_bots_concurrency_cap() -> None:
-    """The script carries its own bound, tuned by hand rather than exposed as a flag."""
+    """The script defaults to its own bound, and a maintenance window can raise it."""
     assert regen_script._CONCURRENCY != MEMORY_GLOBAL_CONCURRENCY
-    assert "concurrency" not in vars(regen_script._parse_args(argv=[]))
+    assert regen_script._parse_args(argv=[]).concurrency == regen_script._CONCURRENCY
+    assert regen_script._parse_args(argv=["--concurrency", "40"]).concurrency == 40
+    with pytest.raises(SystemExit):
+        regen_script._parse_args(argv=["--concurrency", "0"])
 
 
 @pytest.mark.parametrize(
@@ -145,7 +150,7 @@ async def test_the_dry_run_names_files_a_rebuild_cannot_account_for(
 
 
 async def test_a_batch_run_counts_finished_scopes_and_reports_them_in_store_order(
-    monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+    monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str], tmp_path: Path
 ) -> None:
     """`_CONCURRENCY` scopes are in flight at once, so the bar tracks the batch, not one."""
     for scope in (_USER, _OTHER_USER, _SERVER):
@@ -160,7 +165,11 @@ async def test_a_batch_run_counts_finished_scopes_and_reports_them_in_store_orde
     monkeypatch.setattr(regen_script, "regenerate_main_memory", _land_in_reverse)
 
     rows = await regen_script._rebuild_batch(
-        extractor=cast("MemoryExtractorAI", None), scopes=scopes
+        extractor=cast("MemoryExtractorAI", None),
+        scopes=scopes,
+        options=regen_script.BatchOptions(),
+        journal=tmp_path / "journal.jsonl",
+        prompt_bytes=0,
     )
 
     assert [scope for scope, *_ in rows] == scopes
@@ -207,11 +216,18 @@ def test_the_report_says_how_many_fact_files_a_run_destroyed_unread(
     assert "UNREADABLE: 3 fact file(s) removed unread" in output
 
 
-async def test_a_scope_key_that_is_not_a_discord_id_becomes_one_error_row() -> None:
+async def test_a_scope_key_that_is_not_a_discord_id_becomes_one_error_row(tmp_path: Path) -> None:
     """`read_owner` parses the id, and it used to raise past the handler into the gather."""
     _seed(scope="111.bak")
     scope, result, _, removed = await regen_script._regen_one(
-        extractor=cast("MemoryExtractorAI", None), scope="111.bak", semaphore=asyncio.Semaphore(1)
+        extractor=cast("MemoryExtractorAI", None),
+        scope="111.bak",
+        run=regen_script._Run(
+            semaphore=asyncio.Semaphore(1),
+            gate=ConsolidationScheduler(),
+            journal=tmp_path / "journal.jsonl",
+            prompt_bytes=0,
+        ),
     )
     assert scope == "111.bak"
     assert result.startswith("error: ValueError")
@@ -234,3 +250,70 @@ def test_loss_note_flags_the_two_expected_losses(
 ) -> None:
     """The dry run says which scopes rebuild empty or lose their cross-server compartment."""
     assert regen_script._loss_note(result=result, buckets=buckets).startswith(expected)
+
+
+async def test_a_batch_starts_the_largest_evidence_first(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """With one worker, start order is the whole schedule, and size decides it."""
+    _seed(scope=_USER)
+    _seed(scope=_OTHER_USER)
+    for _ in range(5):
+        _seed(scope=_SERVER)
+    started: list[str] = []
+
+    async def _record(scope: str, extractor: object, identity: str) -> object:
+        started.append(scope)
+        return RegenerationReport(result="no_evidence")
+
+    monkeypatch.setattr(regen_script, "regenerate_main_memory", _record)
+
+    await regen_script._rebuild_batch(
+        extractor=cast("MemoryExtractorAI", None),
+        scopes=[_USER, _OTHER_USER, _SERVER],
+        options=regen_script.BatchOptions(concurrency=1),
+        journal=tmp_path / "journal.jsonl",
+        prompt_bytes=0,
+    )
+
+    # order-contract: one worker runs the scopes strictly in the order the tasks were created.
+    assert started[0] == _SERVER
+
+
+async def test_resume_skips_rebuilt_scopes_and_retries_the_rest(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """A crash costs the scopes in flight: `--resume` picks up at the journal's edge."""
+    for scope in (_USER, _OTHER_USER, _SERVER):
+        _seed(scope=scope)
+    journal = tmp_path / "journal.jsonl"
+    for scope, result in ((_USER, "regenerated"), (_OTHER_USER, "error: TimeoutError: ")):
+        regen_script._append_journal(
+            path=journal,
+            entry=regen_script.JournalEntry(
+                scope=scope, result=result, estimated_tokens=10, seconds=1.0
+            ),
+        )
+    with journal.open(mode="a", encoding="utf-8") as handle:
+        handle.write('{"scope": "torn')
+    rebuilt: set[str] = set()
+
+    async def _record(scope: str, extractor: object, identity: str) -> object:
+        rebuilt.add(scope)
+        return RegenerationReport(result="regenerated")
+
+    monkeypatch.setattr(regen_script, "regenerate_main_memory", _record)
+    monkeypatch.setattr(regen_script.console, "input", lambda *args, **kwargs: "y")
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(regen_script, "get_token_rates", lambda model_name: (0.0, 0.0))
+
+    await regen_script._regen_all(
+        model=ModelSettings(name="test-model", effort="low"),
+        target="all",
+        dry_run=False,
+        options=regen_script.BatchOptions(resume=True, journal=journal),
+    )
+
+    assert rebuilt == {_OTHER_USER, _SERVER}
+    entries = regen_script._read_journal(path=journal)
+    assert {entry.result for entry in entries.values()} == {"regenerated"}
@@ -0,0 +1,54 @@
+"""Tests for the offline reply-pipeline bench: it drives the real cog against its stubs."""
+
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING
+
+from scripts.reply_bench import (
+    StubModelSettings,
+    run_bench,
+    recorded_conversations,
+    synthetic_conversations,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+_FAST = StubModelSettings(
+    tokens_per_second=2_000, reply_tokens=30, first_token_seconds=0.0, triage_seconds=0.0
+)
+
+
+async def test_the_bench_replies_to_every_conversation_through_the_stubs(
+    memory_isolated_dir: Path,
+) -> None:
+    """Each mention is routed, graded and streamed from the stub, and its timing is kept."""
+    result = await run_bench(
+        conversations=synthetic_conversations(count=2, messages=2), settings=_FAST
+    )
+
+    assert (result.replies, result.failures) == (4, 0)
+    assert result.llm_requests["stream"] == 4
+    assert result.llm_requests["RouteClassification"] == 4
+    assert result.llm_requests["EffortGrade"] == 4
+    assert {timing.route for timing in result.timings} == {"QA"}
+    assert all("first_content" in timing.marks for timing in result.timings)
+    assert result.rest_calls["reply"] >= 4
+    assert result.replies_per_second > 0
+
+
+def test_a_replay_file_splits_into_one_conversation_per_channel(tmp_path: Path) -> None:
+    """Lines keep their order within a channel, and an unmentioned line only joins history."""
+    lines = [
+        {"channel": "a", "author": "alice", "content": "hi"},
+        {"channel": "b", "author": "bob", "content": "chatter", "mention": False},
+        {"channel": "a", "author": "carol", "content": "and me"},
+    ]
+    path = tmp_path / "replay.jsonl"
+    path.write_text("\n".join(json.dumps(line) for line in lines) + "\n", encoding="utf-8")
+
+    first, second = recorded_conversations(path=path)
+
+    assert [m.content for m in first] == ["hi", "and me"]
+    assert [(m.author, m.mention) for m in second] == [("bob", False)]
@@ -0,0 +1,121 @@
+"""Tests for the per-reply latency waterfall and the offline report that reads it."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+import asyncio
+import contextvars
+
+from scripts.latency_report import _percentile, _stage_table, _gating_stage, _read_timings
+
+from discordbot.utils.reply_timing import (
+    ReplyTiming,
+    StageTiming,
+    ReplyTimingConfig,
+    ReplyTimingRecorder,
+    timed_task,
+    queued_slot,
+    timed_stage,
+    mark_reply_timing,
+    start_reply_timing,
+    current_reply_timing,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+async def test_stages_from_every_task_of_a_reply_land_on_its_timeline() -> None:
+    """A task copies the context, so its stages record into the reply that started it."""
+    timing = start_reply_timing(message_id=1)
+
+    async def upload() -> None:
+        with timed_stage(stage="upload"):
+            await asyncio.sleep(0)
+        mark_reply_timing(name="first_content")
+        mark_reply_timing(name="first_content")
+
+    await timed_task(stage="prep", coro=upload())
+    timing.close(route="QA")
+    with timed_stage(stage="late"):
+        pass
+
+    assert {stage.stage for stage in timing.stages} == {"upload", "prep"}
+    assert set(timing.marks) == {"first_content"}
+    assert timing.route == "QA"
+    assert timing.total >= max(stage.end for stage in timing.stages)
+
+
+async def test_code_outside_a_reply_records_nothing() -> None:
+    """A prefetch or background job finds no timing, and the helpers are no-ops there."""
+    reply = start_reply_timing(message_id=1)
+    seen: list[ReplyTiming | None] = []
+
+    async def background() -> None:
+        with timed_stage(stage="upload"):
+            await asyncio.sleep(0)
+        mark_reply_timing(name="first_content")
+        seen.append(current_reply_timing())
+
+    # A fresh context, as the task nextcord starts for an unrelated event has.
+    await asyncio.create_task(background(), context=contextvars.Context())
+
+    assert seen == [None]
+    assert (reply.stages, reply.marks) == ([], {})
+
+
+async def test_a_queued_slot_records_only_the_wait() -> None:
+    """Time spent holding the semaphore is the caller's own stage, not queueing."""
+    timing = start_reply_timing(message_id=1)
+    semaphore = asyncio.Semaphore(1)
+    await semaphore.acquire()
+    asyncio.get_running_loop().call_later(0.05, semaphore.release)
+
+    async with queued_slot(semaphore=semaphore, stage="media_queue"):
+        await asyncio.sleep(0.05)
+
+    (queued,) = timing.stages
+    assert queued.stage == "media_queue"
+    assert 0.03 <= queued.end - queued.start < 0.1
+    assert not semaphore.locked()
+
+
+async def test_a_recorded_timing_lands_in_its_day_file(tmp_path: Path) -> None:
+    """One reply is one line in the file named after its day, readable by the report."""
+    timing_dir = tmp_path / "timing"
+    recorder = ReplyTimingRecorder(
+        config=ReplyTimingConfig.model_validate({"REPLY_TIMING_DIR": str(timing_dir)})
+    )
+    timing = start_reply_timing(message_id=42)
+    timing.add(stage="route", start=0.0, end=0.0)
+    timing.close(route="QA")
+
+    await recorder.record(timing=timing)
+
+    (path,) = timing_dir.iterdir()
+    assert path.name == f"{timing.at:%Y-%m-%d}.jsonl"
+    (read,), unreadable = _read_timings(paths=[path], route="QA")
+    assert (read.message_id, unreadable) == (42, 0)
+    assert _read_timings(paths=[path], route="IMAGE")[0] == []
+
+
+def test_the_report_credits_the_stage_the_answer_waited_on() -> None:
+    """`gating` names whatever finished last before the answer started."""
+    timing = ReplyTiming(
+        message_id=1,
+        stages=[
+            StageTiming(stage="route", start=0.0, end=0.8),
+            StageTiming(stage="media_queue", start=0.1, end=0.4),
+            StageTiming(stage="media_queue", start=0.5, end=0.7),
+            StageTiming(stage="prep", start=0.0, end=2.0),
+            StageTiming(stage="answer", start=2.0, end=6.0),
+        ],
+    )
+
+    assert _gating_stage(timing=timing) == "prep"
+    table = _stage_table(timings=[timing])
+    rows = dict(zip(table.columns[0].cells, table.columns[2].cells, strict=True))
+    # Repeated intervals are summed per reply: 0.3s + 0.2s of queueing.
+    assert rows["media_queue"] == "0.50s"
+    assert _percentile(values=[1.0, 2.0, 3.0, 4.0], q=50) == 2.0
+    assert _percentile(values=[1.0, 2.0, 3.0, 4.0], q=99) == 4.0
@@ -720,6 +720,7 @@ class _FakeStatusMessage:
     """Records `edit` calls on the opening status message."""
 
     def __init__(self) -> None:
+        self.channel = SimpleNamespace(id=1)
         self.edits: list[dict[str, object]] = []
 
     async def edit(self, **kwargs: object) -> None: